@@ -0,0 +1,169 @@
+import json
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import cycle, islice
+import pandas as pd
+from core.metricas_csv import analizar_métricas_desde_csv, calcular_indicadores_tendencias
+from models.entities import Article
+from services.file_export.csv_writer import guardar_articles_en_csv
+from services.ia_models_service import IAService, extraer_texto_gemini, extraer_texto_openai, parsear_json_modelo
+from services.respuestas_ia import extraer_json
+from services.scraping.scraping import _parsear_pagina_araucaniadiario, _parsear_pagina_elperiodico
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_FIXTURES = os.path.join(DIRECTORIO_BENCHMARKS, "fixtures")
+CSV_PROCESADOS = os.path.join(os.path.dirname(DIRECTORIO_BENCHMARKS), "articulos_procesados.csv")
+
+
+@dataclass
+class Contexto:
+    """
+    Datos compartidos por los casos de una ejecución.
+    """
+    directorio: str                             # Directorio temporal para los archivos generados
+    escala: int                                 # Veces que se replica articulos_procesados.csv
+    cantidad_articulos: int                     # Artículos generados para la escritura de CSV
+
+
+@dataclass
+class Caso:
+    """
+    Caso de benchmark: `preparar` arma los datos y retorna la función que se mide.
+    """
+    nombre: str                                 # Identificador estable (se usa para comparar ejecuciones)
+    descripcion: str                            # Qué se mide y con qué datos
+    preparar: Callable[[Contexto], Callable[[], object]]
+
+
+CASOS: list[Caso] = []
+
+
+def caso(nombre: str, descripcion: str) -> Callable:
+    """
+    Registra la función decorada como preparación de un caso de benchmark.
+    """
+    def decorador(preparar: Callable[[Contexto], Callable[[], object]]) -> Callable:
+        CASOS.append(Caso(nombre, descripcion, preparar))
+        return preparar
+    return decorador
+
+
+def _leer_fixture(nombre: str) -> bytes:
+    with open(os.path.join(DIRECTORIO_FIXTURES, nombre), "rb") as archivo:
+        return archivo.read()
+
+
+def _leer_fixture_json(nombre: str) -> dict:
+    return json.loads(_leer_fixture(nombre))
+
+
+def _csv_escalado(contexto: Contexto) -> str:
+    """
+    Escribe (una sola vez por ejecución) articulos_procesados.csv replicado `escala` veces.
+    """
+    ruta = os.path.join(contexto.directorio, f"articulos_procesados_x{contexto.escala}.csv")
+    if not os.path.exists(ruta):
+        df = pd.read_csv(CSV_PROCESADOS)
+        pd.concat([df] * contexto.escala, ignore_index=True).to_csv(ruta, index=False)
+    return ruta
+
+
+# ----------- SCRAPING -----------
+
+@caso("parseo_araucaniadiario", "Parseo de una página de listado guardada de Araucanía Diario (20 noticias).")
+def _parseo_araucaniadiario(contexto: Contexto) -> Callable[[], object]:
+    contenido = _leer_fixture("araucaniadiario_listado.html")
+    url = "https://araucaniadiario.cl/default/listar_contenido?p=1"
+    return lambda: _parsear_pagina_araucaniadiario(contenido, url)
+
+
+@caso("parseo_elperiodico", "Parseo de una página de listado guardada de El Periódico (20 noticias).")
+def _parseo_elperiodico(contexto: Contexto) -> Callable[[], object]:
+    contenido = _leer_fixture("elperiodico_listado.html")
+    url = "https://www.elperiodico.cl/category/temuco/page/1"
+    return lambda: _parsear_pagina_elperiodico(contenido, url)
+
+
+# ----------- RESPUESTAS DE IA -----------
+
+@caso("respuesta_openai_articulo", "Extracción del JSON y construcción del DTO desde una respuesta grabada de OpenAI.")
+def _respuesta_openai_articulo(contexto: Contexto) -> Callable[[], object]:
+    response_json = _leer_fixture_json("openai_procesamiento_articulo.json")
+    servicio = IAService(prompt="", usar_cache=False)
+
+    def medir() -> object:
+        datos = parsear_json_modelo(extraer_texto_openai(response_json))
+        return servicio._process_prompt_response("procesamiento_articulo", datos, 1.5, 200, "OPENAI")
+    return medir
+
+
+@caso("respuesta_gemini_articulo", "Extracción del JSON y construcción del DTO desde una respuesta grabada de Gemini.")
+def _respuesta_gemini_articulo(contexto: Contexto) -> Callable[[], object]:
+    response_json = _leer_fixture_json("gemini_procesamiento_articulo.json")
+    servicio = IAService(prompt="", usar_cache=False)
+
+    def medir() -> object:
+        datos = parsear_json_modelo(extraer_texto_gemini(response_json))
+        return servicio._process_prompt_response("procesamiento_articulo", datos, 1.5, 200, "GEMINI")
+    return medir
+
+
+@caso("respuesta_gemini_lote", "Extracción del JSON y construcción de los DTO desde una respuesta en lote grabada de Gemini (20 artículos).")
+def _respuesta_gemini_lote(contexto: Contexto) -> Callable[[], object]:
+    response_json = _leer_fixture_json("gemini_procesamiento_lote.json")
+    servicio = IAService(prompt="", usar_cache=False)
+
+    def medir() -> object:
+        datos = parsear_json_modelo(extraer_texto_gemini(response_json))
+        return servicio._process_prompt_response("procesamiento_lote", datos, 12.0, 200, "GEMINI")
+    return medir
+
+
+@caso("respuesta_gemini_lote_reparada", "Extracción tolerante del JSON de la respuesta en lote con prosa, coma sobrante y truncamiento.")
+def _respuesta_gemini_lote_reparada(contexto: Contexto) -> Callable[[], object]:
+    texto = extraer_texto_gemini(_leer_fixture_json("gemini_procesamiento_lote.json"))
+    # Texto previo, coma antes del cierre de cada objeto y respuesta cortada en el último artículo
+    danado = "Aquí está el análisis solicitado:\n" + texto.replace("\n    }", ",\n    }")[:-200]
+    return lambda: extraer_json(danado)
+
+
+# ----------- CSV Y PANDAS -----------
+
+@caso("csv_guardar_articulos", "Escritura con guardar_articles_en_csv de artículos generados desde articulos_procesados.csv.")
+def _csv_guardar_articulos(contexto: Contexto) -> Callable[[], object]:
+    filas = pd.read_csv(CSV_PROCESADOS).to_dict("records")
+    articulos = [
+        Article(
+            id=indice,
+            titulo=fila["titulo"],
+            fecha=fila["fecha"],
+            url=fila["url"],
+            fuente=fila["fuente"],
+            descripcion=fila["descripcion"],
+            etiquetas_ia=fila["etiquetas_ia"],
+            sentimiento=fila["sentimiento"],
+            rating=fila["rating"],
+            nivel_riesgo=fila["nivel_riesgo"],
+            indicador_violencia=fila["indicador_violencia"],
+            edad_recomendada=fila["edad_recomendada"],
+            execution_time=fila["execution_time"],
+            is_processed=True,
+            model_name=fila["model_name"]
+        )
+        for indice, fila in enumerate(islice(cycle(filas), contexto.cantidad_articulos), start=1)
+    ]
+    ruta = os.path.join(contexto.directorio, "articulos.csv")
+    return lambda: guardar_articles_en_csv(articulos, nombre_archivo=ruta)
+
+
+@caso("pandas_metricas_csv", "analizar_métricas_desde_csv sobre articulos_procesados.csv escalado.")
+def _pandas_metricas_csv(contexto: Contexto) -> Callable[[], object]:
+    ruta = _csv_escalado(contexto)
+    return lambda: analizar_métricas_desde_csv(ruta)
+
+
+@caso("pandas_tendencias_sentimiento", "Lectura y agregación de generar_tendencias_sentimiento sobre articulos_procesados.csv escalado.")
+def _pandas_tendencias_sentimiento(contexto: Contexto) -> Callable[[], object]:
+    ruta = _csv_escalado(contexto)
+    return lambda: calcular_indicadores_tendencias(pd.read_csv(ruta))
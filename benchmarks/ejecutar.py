@@ -0,0 +1,149 @@
+"""
+Ejecuta los benchmarks sin red ni base de datos y compara el resultado con una ejecución de referencia.
+
+    python -m benchmarks.ejecutar                    # mide y compara con .cache/benchmarks/base.json si existe
+    python -m benchmarks.ejecutar --guardar-base     # mide y deja el resultado como nueva referencia
+    python -m benchmarks.ejecutar --filtro parseo    # solo los casos cuyo nombre contiene "parseo"
+
+Termina con código 1 si algún caso es más lento que la referencia por sobre el umbral.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from contextlib import redirect_stdout
+from datetime import datetime
+from benchmarks.casos import CASOS, Contexto
+
+DIRECTORIO_RESULTADOS = ".cache/benchmarks"
+
+
+def medir_caso(funcion, repeticiones: int) -> dict[str, float | int]:
+    """
+    Mide `funcion` con timeit: calibra las iteraciones para que cada muestra dure al menos 0.2 seg
+    y retorna los tiempos por llamada de `repeticiones` muestras.
+    """
+    temporizador = timeit.Timer(funcion)
+    iteraciones, _ = temporizador.autorange()
+    muestras = [total / iteraciones for total in temporizador.repeat(repeat=repeticiones, number=iteraciones)]
+    return {
+        "iteraciones": iteraciones,
+        "repeticiones": repeticiones,
+        "mediana_seg": statistics.median(muestras),
+        "min_seg": min(muestras),
+        "max_seg": max(muestras),
+        "desviacion_seg": statistics.stdev(muestras) if len(muestras) > 1 else 0.0,
+    }
+
+
+def ejecutar_benchmarks(filtro: str | None, repeticiones: int, escala: int, cantidad_articulos: int) -> dict:
+    """
+    Ejecuta los casos seleccionados y retorna el resultado en el formato que se guarda en JSON.
+    """
+    casos = [caso for caso in CASOS if not filtro or filtro in caso.nombre]
+    resultados: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as directorio:
+        contexto = Contexto(directorio=directorio, escala=escala, cantidad_articulos=cantidad_articulos)
+        for caso in casos:
+            print(f"⏱️ {caso.nombre}...", end=" ", flush=True)
+            # Las funciones medidas imprimen mensajes de progreso que no deben contar ni ensuciar la salida
+            with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+                funcion = caso.preparar(contexto)
+                funcion()
+                medicion = medir_caso(funcion, repeticiones)
+            print(f"{medicion['mediana_seg'] * 1000:.3f} ms")
+            resultados[caso.nombre] = {"descripcion": caso.descripcion, **medicion}
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "escala": escala,
+        "cantidad_articulos": cantidad_articulos,
+        "casos": resultados,
+    }
+
+
+def comparar_resultados(base: dict, actual: dict, umbral: float) -> list[str]:
+    """
+    Compara la mediana de cada caso con la de la referencia y muestra la variación.
+
+    Retorna:
+    - Nombres de los casos más lentos que la referencia en más de `umbral` (0.15 = 15 %).
+    """
+    if (base.get("python"), base.get("plataforma")) != (actual["python"], actual["plataforma"]):
+        print("⚠️ La referencia se midió en otro entorno; la comparación es solo orientativa.")
+    if (base.get("escala"), base.get("cantidad_articulos")) != (actual["escala"], actual["cantidad_articulos"]):
+        print("⚠️ La referencia se midió con otro tamaño de datos; la comparación es solo orientativa.")
+
+    regresiones: list[str] = []
+    print(f"\n📊 Comparación con la referencia del {base.get('fecha', '?')} (umbral {umbral:.0%}):")
+    for nombre, medicion in actual["casos"].items():
+        anterior = base.get("casos", {}).get(nombre)
+        if anterior is None:
+            print(f"- {nombre}: sin referencia")
+            continue
+        variacion = medicion["mediana_seg"] / anterior["mediana_seg"] - 1
+        if variacion > umbral:
+            estado = "❌ regresión"
+            regresiones.append(nombre)
+        elif variacion < -umbral:
+            estado = "✅ mejora"
+        else:
+            estado = "= sin cambios"
+        print(
+            f"- {nombre}: {anterior['mediana_seg'] * 1000:.3f} ms → {medicion['mediana_seg'] * 1000:.3f} ms "
+            f"({variacion:+.1%}) {estado}"
+        )
+    return regresiones
+
+
+def guardar_resultado(resultado: dict, ruta: str) -> None:
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks sin red de las funciones más usadas de Eva IA.")
+    parser.add_argument("--filtro", help="Solo ejecuta los casos cuyo nombre contiene este texto.")
+    parser.add_argument("--repeticiones", type=int, default=7, help="Muestras por caso.")
+    parser.add_argument("--escala", type=int, default=50, help="Veces que se replica articulos_procesados.csv en los casos de pandas.")
+    parser.add_argument("--articulos", type=int, default=5000, help="Artículos generados para la escritura de CSV.")
+    parser.add_argument("--base", default=os.path.join(DIRECTORIO_RESULTADOS, "base.json"), help="Resultado de referencia para comparar.")
+    parser.add_argument("--umbral", type=float, default=0.15, help="Aumento de la mediana que se considera regresión (0.15 = 15 %%).")
+    parser.add_argument("--guardar-base", action="store_true", help="Guarda este resultado como nueva referencia.")
+    args = parser.parse_args()
+
+    resultado = ejecutar_benchmarks(args.filtro, max(1, args.repeticiones), max(1, args.escala), max(1, args.articulos))
+
+    ruta = os.path.join(DIRECTORIO_RESULTADOS, f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    guardar_resultado(resultado, ruta)
+    print(f"💾 Resultado guardado en '{ruta}'")
+
+    regresiones: list[str] = []
+    if os.path.exists(args.base) and not args.guardar_base:
+        with open(args.base, encoding="utf-8") as archivo:
+            regresiones = comparar_resultados(json.load(archivo), resultado, args.umbral)
+    elif not args.guardar_base:
+        print(f"ℹ️ No hay referencia en '{args.base}'; usar --guardar-base para crearla.")
+
+    if args.guardar_base:
+        guardar_resultado(resultado, args.base)
+        print(f"📌 Referencia actualizada en '{args.base}'")
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} caso(s) con regresión: {', '.join(regresiones)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,4 +11,137 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# URL base de las APIs de los proveedores (se puede apuntar a un servidor local de pruebas)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com").rstrip("/")
 
+# Concurrencia del procesamiento con IA: máximo de artículos en vuelo por modelo
+MAX_CONCURRENCIA_POR_MODELO: dict[str, int] = {
+    "GEMINI": int(os.getenv("MAX_CONCURRENCIA_GEMINI", "4")),
+    "OPENAI": int(os.getenv("MAX_CONCURRENCIA_OPENAI", "4")),
+}
+
+# Tamaño del pool de conexiones keep-alive de cada cliente HTTP de proveedor
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Pool de conexiones a la base de datos
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_IDLE_TIMEOUT_SEC = float(os.getenv("DB_POOL_IDLE_TIMEOUT_SEC", "300"))
+DB_POOL_ACQUIRE_TIMEOUT_SEC = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT_SEC", "30"))
+DB_POOL_HEALTHCHECK_SEC = float(os.getenv("DB_POOL_HEALTHCHECK_SEC", "30"))
+
+# Artículos por transacción en la ingesta masiva
+BULK_TAMANO_LOTE = int(os.getenv("BULK_TAMANO_LOTE", "1000"))
+
+# Buffer de escritura diferida de resultados de IA: se vacía por tamaño o por tiempo
+WRITE_BUFFER_TAMANO_LOTE = int(os.getenv("WRITE_BUFFER_TAMANO_LOTE", "50"))
+WRITE_BUFFER_INTERVALO_SEG = float(os.getenv("WRITE_BUFFER_INTERVALO_SEG", "2"))
+# Vaciados fallidos seguidos antes de dividir el lote para aislar las filas que no se pueden guardar
+WRITE_BUFFER_MAX_REINTENTOS = int(os.getenv("WRITE_BUFFER_MAX_REINTENTOS", "3"))
+# Elementos en espera como máximo mientras la base de datos falla (los productores se bloquean al llegar).
+# 0 (o menos que WRITE_BUFFER_TAMANO_LOTE) bloquea con un solo lote sin confirmar: una caída pierde como máximo ese lote.
+# Un valor mayor deja seguir a los productores durante la caída, a cambio de arriesgar hasta ese número de elementos
+WRITE_BUFFER_MAX_PENDIENTES = int(os.getenv("WRITE_BUFFER_MAX_PENDIENTES", "0"))
+# Archivo JSONL donde quedan las filas que no se pudieron guardar ni por separado
+WRITE_BUFFER_DESCARTES_RUTA = os.getenv("WRITE_BUFFER_DESCARTES_RUTA", os.path.join(".cache", "write_buffer_descartados.jsonl"))
+
+# Análisis en lote: varios artículos por petición al modelo, acotados por presupuesto de tokens
+ANALISIS_LOTE_ACTIVO = os.getenv("ANALISIS_LOTE_ACTIVO", "false").lower() == "true"
+ANALISIS_LOTE_MAX_TOKENS = int(os.getenv("ANALISIS_LOTE_MAX_TOKENS", "6000"))
+ANALISIS_LOTE_MAX_ARTICULOS = int(os.getenv("ANALISIS_LOTE_MAX_ARTICULOS", "20"))
+
+# Caché persistente de respuestas de los modelos de IA (LLM_CACHE_ACTIVO=false para omitirla)
+LLM_CACHE_ACTIVO = os.getenv("LLM_CACHE_ACTIVO", "true").lower() == "true"
+LLM_CACHE_RUTA = os.getenv("LLM_CACHE_RUTA", os.path.join(".cache", "llm_responses.sqlite3"))
+LLM_CACHE_TTL_SEG = float(os.getenv("LLM_CACHE_TTL_SEG", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRADAS = int(os.getenv("LLM_CACHE_MAX_ENTRADAS", "50000"))
+
+# Detección de artículos casi-duplicados (MinHash + LSH)
+DEDUP_ACTIVO = os.getenv("DEDUP_ACTIVO", "true").lower() == "true"
+DEDUP_UMBRAL = float(os.getenv("DEDUP_UMBRAL", "0.8"))
+DEDUP_NUM_PERMUTACIONES = int(os.getenv("DEDUP_NUM_PERMUTACIONES", "64"))
+DEDUP_BANDAS = int(os.getenv("DEDUP_BANDAS", "16"))
+DEDUP_INDICE_RUTA = os.getenv("DEDUP_INDICE_RUTA", os.path.join(".cache", "dedup_index.pkl"))
+
+# Scraping concurrente: páginas por ventana y límites de cortesía por host
+SCRAPING_VENTANA_PAGINAS = int(os.getenv("SCRAPING_VENTANA_PAGINAS", "4"))
+SCRAPING_MAX_CONEXIONES_POR_HOST = int(os.getenv("SCRAPING_MAX_CONEXIONES_POR_HOST", "4"))
+SCRAPING_INTERVALO_MIN_SEG = float(os.getenv("SCRAPING_INTERVALO_MIN_SEG", "0.1"))
+SCRAPING_REINTENTOS_MAX = int(os.getenv("SCRAPING_REINTENTOS_MAX", "2"))
+SCRAPING_INDICE_VISTOS_RUTA = os.getenv("SCRAPING_INDICE_VISTOS_RUTA", os.path.join(".cache", "scraping_vistos.sqlite3"))
+
+# Pipeline en streaming: capacidad de las colas entre etapas y micro-lotes de inserción
+PIPELINE_TAMANO_COLA = int(os.getenv("PIPELINE_TAMANO_COLA", "100"))
+PIPELINE_TAMANO_LOTE_DB = int(os.getenv("PIPELINE_TAMANO_LOTE_DB", "20"))
+PIPELINE_INTERVALO_LOTE_SEG = float(os.getenv("PIPELINE_INTERVALO_LOTE_SEG", "1"))
+
+# Lecturas paginadas por clave: artículos por página y filas por fetchmany
+DB_TAMANO_PAGINA = int(os.getenv("DB_TAMANO_PAGINA", "500"))
+DB_FETCH_TAMANO = int(os.getenv("DB_FETCH_TAMANO", "100"))
+
+# Modo worker: artículos reclamados por lote, duración del lease y espera cuando no hay trabajo
+WORKER_TAMANO_RECLAMO = int(os.getenv("WORKER_TAMANO_RECLAMO", "20"))
+WORKER_LEASE_SEG = int(os.getenv("WORKER_LEASE_SEG", "300"))
+WORKER_ESPERA_SEG = float(os.getenv("WORKER_ESPERA_SEG", "10"))
+
+# Timeouts HTTP (conexión / lectura), plazo por artículo y presupuesto de tiempo por ejecución (0 = sin límite)
+HTTP_TIMEOUT_CONEXION_SEG = float(os.getenv("HTTP_TIMEOUT_CONEXION_SEG", "5"))
+HTTP_TIMEOUT_LECTURA_SEG = float(os.getenv("HTTP_TIMEOUT_LECTURA_SEG", "60"))
+SCRAPING_TIMEOUT_LECTURA_SEG = float(os.getenv("SCRAPING_TIMEOUT_LECTURA_SEG", "20"))
+ANALISIS_PLAZO_ARTICULO_SEG = float(os.getenv("ANALISIS_PLAZO_ARTICULO_SEG", "120"))
+EJECUCION_PRESUPUESTO_SEG = float(os.getenv("EJECUCION_PRESUPUESTO_SEG", "0"))
+
+# Métricas: puerto del endpoint /metrics (0 = desactivado) y volcado periódico a archivo ("" = desactivado)
+METRICAS_PUERTO = int(os.getenv("METRICAS_PUERTO", "0"))
+METRICAS_ARCHIVO = os.getenv("METRICAS_ARCHIVO", "")
+METRICAS_INTERVALO_SEG = float(os.getenv("METRICAS_INTERVALO_SEG", "15"))
+
+# Límite de peticiones y tokens por minuto de cada proveedor de IA (0 = sin límite) y reintentos ante 429/5xx
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+IA_REINTENTOS_MAX = int(os.getenv("IA_REINTENTOS_MAX", "5"))
+IA_BACKOFF_BASE_SEG = float(os.getenv("IA_BACKOFF_BASE_SEG", "1"))
+IA_BACKOFF_MAX_SEG = float(os.getenv("IA_BACKOFF_MAX_SEG", "60"))
+
+# Salida estructurada: pedir a los proveedores JSON conforme al esquema de cada tipo de prompt
+IA_SALIDA_ESTRUCTURADA = os.getenv("IA_SALIDA_ESTRUCTURADA", "true").lower() == "true"
+
+# Streaming de las respuestas largas (resumen ejecutivo y tendencias): muestra el avance y corta salidas inválidas
+IA_STREAMING = os.getenv("IA_STREAMING", "true").lower() == "true"
+
+# Modo lote offline (APIs batch de los proveedores): solicitudes por trabajo, intervalo de sondeo,
+# lease de los artículos enviados (debe cubrir la ventana de 24 h del proveedor) y directorio de estado
+IA_LOTE_OFFLINE_MAX_SOLICITUDES = int(os.getenv("IA_LOTE_OFFLINE_MAX_SOLICITUDES", "1000"))
+IA_LOTE_OFFLINE_SONDEO_SEG = float(os.getenv("IA_LOTE_OFFLINE_SONDEO_SEG", "60"))
+IA_LOTE_OFFLINE_LEASE_SEG = int(os.getenv("IA_LOTE_OFFLINE_LEASE_SEG", str(26 * 3600)))
+IA_LOTE_OFFLINE_DIRECTORIO = os.getenv("IA_LOTE_OFFLINE_DIRECTORIO", os.path.join(".cache", "trabajos_lote"))
+
+# Cascada de modelos para el análisis de artículos: primero el modelo económico de cada proveedor y, solo si su
+# respuesta es inválida, de baja confianza o un caso de riesgo/violencia, el principal (false = solo el principal)
+IA_CASCADA_ACTIVA = os.getenv("IA_CASCADA_ACTIVA", "true").lower() == "true"
+OPENAI_MODELO_ECONOMICO = os.getenv("OPENAI_MODELO_ECONOMICO", "gpt-4o-mini")
+OPENAI_MODELO_PRINCIPAL = os.getenv("OPENAI_MODELO_PRINCIPAL", "gpt-4o")
+GEMINI_MODELO_ECONOMICO = os.getenv("GEMINI_MODELO_ECONOMICO", "gemini-2.0-flash-lite")
+GEMINI_MODELO_PRINCIPAL = os.getenv("GEMINI_MODELO_PRINCIPAL", "gemini-2.0-flash")
+IA_CASCADA_CONFIANZA_MINIMA = float(os.getenv("IA_CASCADA_CONFIANZA_MINIMA", "0.7"))
+# Valores (separados por coma) de nivel_riesgo e indicador_violencia que se confirman con el modelo principal
+IA_CASCADA_ESCALAR_RIESGO = [valor.strip() for valor in os.getenv("IA_CASCADA_ESCALAR_RIESGO", "alto").split(",") if valor.strip()]
+IA_CASCADA_ESCALAR_VIOLENCIA = [valor.strip() for valor in os.getenv("IA_CASCADA_ESCALAR_VIOLENCIA", "sí,moderado").split(",") if valor.strip()]
+
+# Peticiones de respaldo (hedging) a los proveedores de IA: si una petición no respondió al llegar al percentil
+# IA_RESPALDO_PERCENTIL de las latencias observadas (últimas IA_RESPALDO_VENTANA, mínimo IA_RESPALDO_MIN_MUESTRAS),
+# se envía un duplicado y se usa la primera respuesta. Los duplicados no superan IA_RESPALDO_MAX_FRACCION de las peticiones
+IA_RESPALDO_ACTIVO = os.getenv("IA_RESPALDO_ACTIVO", "false").lower() == "true"
+IA_RESPALDO_PERCENTIL = float(os.getenv("IA_RESPALDO_PERCENTIL", "0.95"))
+IA_RESPALDO_MAX_FRACCION = float(os.getenv("IA_RESPALDO_MAX_FRACCION", "0.05"))
+IA_RESPALDO_MIN_MUESTRAS = int(os.getenv("IA_RESPALDO_MIN_MUESTRAS", "20"))
+IA_RESPALDO_VENTANA = int(os.getenv("IA_RESPALDO_VENTANA", "200"))
+
+# Caché del prefijo estático de los prompts en Gemini (cachedContents): TTL del contexto cacheado y
+# espera antes de volver a intentar crearlo si el proveedor lo rechaza (por ejemplo, prefijo bajo el mínimo de tokens)
+IA_CONTEXTO_GEMINI_ACTIVO = os.getenv("IA_CONTEXTO_GEMINI_ACTIVO", "true").lower() == "true"
+IA_CONTEXTO_GEMINI_TTL_SEG = int(os.getenv("IA_CONTEXTO_GEMINI_TTL_SEG", "3600"))
+IA_CONTEXTO_GEMINI_REINTENTO_SEG = float(os.getenv("IA_CONTEXTO_GEMINI_REINTENTO_SEG", "600"))
+IA_CONTEXTO_MIN_TOKENS = int(os.getenv("IA_CONTEXTO_MIN_TOKENS", "1024"))
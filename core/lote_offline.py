@@ -0,0 +1,238 @@
+import time
+import uuid
+from config.settings import IA_LOTE_OFFLINE_LEASE_SEG, IA_LOTE_OFFLINE_MAX_SOLICITUDES, IA_LOTE_OFFLINE_SONDEO_SEG
+from models.entities import Article, ResultadoProcesamiento
+import repository.proceso_repository as repository
+from repository.write_buffer import BufferEscritura
+from services.ia_models_service import IAService
+from services.metricas import ARTICULOS_PROCESADOS, ERRORES_PARSEO_IA, TRABAJOS_LOTE_IA
+from services.plazos import PlazoVencido, PresupuestoAgotado, esperar, presupuesto_agotado
+from services.trabajos_lote import (
+    TrabajoLote, cargar_trabajos, claves_trabajo, crear_trabajo, eliminar_trabajo, guardar_trabajo, obtener_api_lote
+)
+from core.processor import (
+    MODELOS, _procesar_duplicado, _registrar_error, _registrar_resultado, construir_prompt_articulo, mostrar_resumen_throughput
+)
+
+PROMPT_TYPE_LOTE = "procesamiento_articulo"
+
+
+def preparar_trabajo(modelo: str, max_solicitudes: int = IA_LOTE_OFFLINE_MAX_SOLICITUDES) -> TrabajoLote | None:
+    """
+    Reclama hasta `max_solicitudes` artículos pendientes del modelo y escribe el JSONL de solicitudes.
+
+    Los artículos quedan reclamados con el nombre del trabajo como WORKER_ID y un lease que cubre
+    la ventana del proveedor, así el procesamiento normal y los workers no los toman mientras tanto.
+    Los casi-duplicados no se envían: al ingerir se les copia el resultado de su canónico.
+
+    Retorna:
+    - El trabajo guardado (aún sin enviar), o None si no hay artículos para enviar.
+    """
+    # El nombre es también el WORKER_ID de los artículos: debe ser único aunque se preparen varios trabajos por segundo
+    nombre = f"lote-{modelo.lower()}-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12]}"
+    # Una página de puros casi-duplicados no significa que no queden pendientes: se sigue reclamando
+    duplicados: list[int] = []
+    originales: list[Article] = []
+    while not originales:
+        articulos = repository.reclamar_articulos(modelo, nombre, max_solicitudes, IA_LOTE_OFFLINE_LEASE_SEG)
+        if not articulos:
+            break
+        originales = [articulo for articulo in articulos if articulo.duplicate_of is None]
+        duplicados.extend(articulo.id for articulo in articulos if articulo.duplicate_of is not None)
+    if not originales:
+        if duplicados:
+            repository.liberar_leases(nombre)
+        return None
+
+    trabajo = crear_trabajo(
+        nombre,
+        modelo,
+        PROMPT_TYPE_LOTE,
+        ((str(articulo.id), construir_prompt_articulo(articulo)) for articulo in originales),
+        duplicados=duplicados
+    )
+    print(f"📝 [{modelo}] Trabajo '{nombre}' preparado con {trabajo.solicitudes} artículos.")
+    return trabajo
+
+
+def enviar_trabajo(trabajo: TrabajoLote) -> bool:
+    """
+    Envía el JSONL del trabajo a la API batch del proveedor y guarda el ID del trabajo.
+
+    Retorna:
+    - True si quedó enviado. Si falla, el trabajo queda guardado sin ID y se reintenta en la próxima ejecución.
+    """
+    try:
+        trabajo.id_proveedor = obtener_api_lote(trabajo.modelo).enviar(trabajo)
+    except Exception as e:
+        print(f"❌ [{trabajo.modelo}] No se pudo enviar el trabajo '{trabajo.nombre}': {e}")
+        return False
+    guardar_trabajo(trabajo)
+    TRABAJOS_LOTE_IA.incrementar(proveedor=trabajo.modelo, estado="enviado")
+    print(f"📨 [{trabajo.modelo}] Trabajo '{trabajo.nombre}' enviado como {trabajo.id_proveedor}.")
+    return True
+
+
+def _registrar_solicitud(
+    articulo: Article,
+    trabajo: TrabajoLote,
+    respuesta: dict | None,
+    error: str | None,
+    status_code: int,
+    tiempo_por_articulo: float,
+    buffer: BufferEscritura
+) -> bool:
+    """
+    Interpreta el resultado de una solicitud del trabajo y encola la actualización del artículo y su log.
+    """
+    if error is not None or respuesta is None:
+        print(f"⚠️ [{trabajo.modelo}] El proveedor no procesó el artículo ID: {articulo.id}: {error}")
+        _registrar_error(articulo, trabajo.modelo, error or "Sin respuesta", status_code, buffer)
+        return False
+    servicio = IAService(prompt=construir_prompt_articulo(articulo), usar_cache=False)
+    try:
+        resultado_ia = servicio.interpretar_respuesta(trabajo.modelo, trabajo.prompt_type, respuesta, tiempo_por_articulo)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        ERRORES_PARSEO_IA.incrementar(proveedor=trabajo.modelo, prompt_type=trabajo.prompt_type)
+        print(f"❌ [{trabajo.modelo}] Respuesta inválida para el artículo ID: {articulo.id}: {e}")
+        _registrar_error(articulo, trabajo.modelo, str(e), status_code, buffer)
+        return False
+    return _registrar_resultado(articulo, trabajo.modelo, resultado_ia, buffer)
+
+
+def _confirmar(buffer: BufferEscritura, trabajo: TrabajoLote, descartados_previos: int) -> None:
+    """
+    Guarda lo pendiente del buffer; si falla o el buffer descartó resultados durante la ingesta,
+    la ingesta se interrumpe para no liberar ni eliminar el trabajo.
+    """
+    if not buffer.vaciar() or buffer.descartados > descartados_previos:
+        raise RuntimeError(f"No se pudieron guardar los resultados del trabajo '{trabajo.nombre}'.")
+
+
+def ingerir_trabajo(trabajo: TrabajoLote, datos: dict, buffer: BufferEscritura) -> ResultadoProcesamiento:
+    """
+    Guarda en MODEL_PROCESS_STATUS e IA_RESPONSE_LOG los resultados de un trabajo terminado.
+
+    Los resultados se asocian a los artículos por las claves del JSONL del trabajo, que se vuelven a
+    reclamar antes de ingerir (el lease pudo vencer si el proveedor tardó). Solo se consideran los que
+    siguen pendientes, por lo que una ingesta interrumpida se puede repetir sin duplicar resultados.
+    Al terminar se liberan los artículos que quedaron sin resultado, que vuelven a estar disponibles
+    para otra ejecución. Si la base de datos falla o algún resultado no se guarda, lanza la excepción
+    y el trabajo se conserva para repetir la ingesta.
+    """
+    api = obtener_api_lote(trabajo.modelo)
+    resultado = ResultadoProcesamiento(modelo=trabajo.modelo)
+    ids = [int(clave) for clave in claves_trabajo(trabajo) if clave.isdigit()] + trabajo.duplicados
+    pendientes = {
+        articulo.id: articulo
+        for articulo in repository.reclamar_articulos_por_id(trabajo.modelo, trabajo.nombre, ids, IA_LOTE_OFFLINE_LEASE_SEG)
+    }
+    descartados_previos = buffer.descartados
+    # Como en el análisis en lote, el tiempo del trabajo se reparte entre sus artículos
+    tiempo_por_articulo = round((time.time() - trabajo.creado) / max(1, trabajo.solicitudes), 2)
+
+    for solicitud in api.resultados(datos):
+        articulo = pendientes.pop(int(solicitud.clave), None) if solicitud.clave.isdigit() else None
+        if articulo is None:
+            continue
+        exito = _registrar_solicitud(
+            articulo, trabajo, solicitud.respuesta, solicitud.error, solicitud.status_code, tiempo_por_articulo, buffer
+        )
+        resultado.registrar(exito)
+        ARTICULOS_PROCESADOS.incrementar(modelo=trabajo.modelo, resultado="exitoso" if exito else "fallido")
+
+    # Los canónicos deben quedar guardados antes de copiar sus resultados a los casi-duplicados
+    _confirmar(buffer, trabajo, descartados_previos)
+    for articulo in pendientes.values():
+        if articulo.duplicate_of is not None and repository.obtener_resultado_ia(articulo.duplicate_of, trabajo.modelo) is not None:
+            exito = _procesar_duplicado(articulo, trabajo.modelo, buffer)
+            resultado.registrar(exito)
+            ARTICULOS_PROCESADOS.incrementar(modelo=trabajo.modelo, resultado="exitoso" if exito else "fallido")
+    _confirmar(buffer, trabajo, descartados_previos)
+
+    liberados = repository.liberar_leases(trabajo.nombre)
+    if liberados:
+        print(f"🔓 [{trabajo.modelo}] {liberados} artículos del trabajo '{trabajo.nombre}' quedaron sin resultado y vuelven a estar pendientes.")
+    return resultado
+
+
+def ejecutar_lote_offline(
+    modelos: list[str] = MODELOS,
+    esperar_resultados: bool = True,
+    max_solicitudes: int = IA_LOTE_OFFLINE_MAX_SOLICITUDES,
+    sondeo_seg: float = IA_LOTE_OFFLINE_SONDEO_SEG
+) -> list[ResultadoProcesamiento]:
+    """
+    Procesa los artículos pendientes con las APIs batch de los proveedores, pensado para backfills
+    nocturnos: más barato y con cuotas mayores que las llamadas síncronas, a cambio de latencia.
+
+    1. Retoma los trabajos guardados de ejecuciones anteriores (enviados o por enviar).
+    2. Prepara y envía trabajos nuevos hasta cubrir los pendientes de cada modelo.
+    3. Con `esperar_resultados`, consulta cada `sondeo_seg` hasta que terminan e ingiere los resultados.
+       Si el presupuesto de la ejecución se agota, los trabajos siguen en el proveedor y se retoman
+       en la próxima ejecución.
+
+    Retorna:
+    - Lista de ResultadoProcesamiento, uno por modelo, con los artículos ingeridos en esta ejecución.
+    """
+    inicio = time.perf_counter()
+    trabajos = [trabajo for trabajo in cargar_trabajos() if trabajo.modelo in modelos]
+    if trabajos:
+        print(f"♻️ Se retoman {len(trabajos)} trabajos por lotes de ejecuciones anteriores.")
+
+    for modelo in modelos:
+        while (trabajo := preparar_trabajo(modelo, max_solicitudes)) is not None:
+            trabajos.append(trabajo)
+
+    for trabajo in trabajos:
+        if trabajo.id_proveedor is None:
+            enviar_trabajo(trabajo)
+
+    resultados = {modelo: ResultadoProcesamiento(modelo=modelo) for modelo in modelos}
+    en_curso = [trabajo for trabajo in trabajos if trabajo.id_proveedor is not None]
+    if not esperar_resultados:
+        print(f"📨 {len(en_curso)} trabajos por lotes en curso; se ingieren en la próxima ejecución.")
+        return list(resultados.values())
+
+    while en_curso:
+        for trabajo in list(en_curso):
+            try:
+                estado, terminado, datos = obtener_api_lote(trabajo.modelo).consultar(trabajo.id_proveedor)
+            except Exception as e:
+                print(f"⚠️ [{trabajo.modelo}] No se pudo consultar el trabajo '{trabajo.nombre}': {e}")
+                continue
+            if estado != trabajo.estado_proveedor:
+                print(f"⏳ [{trabajo.modelo}] Trabajo '{trabajo.nombre}': {estado}")
+                trabajo.estado_proveedor = estado
+                guardar_trabajo(trabajo)
+            if not terminado:
+                continue
+            try:
+                # Buffer propio por trabajo: sus resultados se guardan con el trabajo como dueño de los leases
+                with BufferEscritura(worker_id=trabajo.nombre) as buffer:
+                    resultados[trabajo.modelo].acumular(ingerir_trabajo(trabajo, datos, buffer))
+            except Exception as e:
+                # El trabajo queda guardado: la próxima ejecución repite la ingesta de los artículos aún pendientes
+                print(f"❌ [{trabajo.modelo}] No se pudieron ingerir los resultados de '{trabajo.nombre}': {e}")
+                en_curso.remove(trabajo)
+                continue
+            TRABAJOS_LOTE_IA.incrementar(proveedor=trabajo.modelo, estado=estado)
+            eliminar_trabajo(trabajo)
+            en_curso.remove(trabajo)
+            print(f"✅ [{trabajo.modelo}] Trabajo '{trabajo.nombre}' ingerido.")
+
+        if not en_curso:
+            break
+        if presupuesto_agotado():
+            print(f"⏳ Se agotó el presupuesto de tiempo; {len(en_curso)} trabajos siguen en curso y se retoman en la próxima ejecución.")
+            break
+        try:
+            esperar(sondeo_seg)
+        except (PlazoVencido, PresupuestoAgotado):
+            continue
+
+    duracion = time.perf_counter() - inicio
+    for resultado in resultados.values():
+        resultado.duracion_seg = duracion
+    mostrar_resumen_throughput(list(resultados.values()))
+    return list(resultados.values())
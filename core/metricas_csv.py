@@ -0,0 +1,60 @@
+import pandas as pd
+from services.perfilado import trazar
+
+
+@trazar("pandas")
+def analizar_métricas_desde_csv(nombre_archivo: str = "articulos_procesados.csv") -> None:
+    """
+    Carga los artículos procesados desde un archivo CSV y genera métricas de análisis.
+    """
+    try:
+        df = pd.read_csv(nombre_archivo)
+
+        print("\n📊 Métricas Generales del CSV:")
+        print(f"Total de artículos: {len(df)}")
+        print("\n📰 Artículos por fuente:")
+        print(df['fuente'].value_counts())
+
+        print("\n😊 Distribución de Sentimientos:")
+        print(df['sentimiento'].value_counts())
+
+        print("\n⭐ Promedio de Rating por Fuente:")
+        print(df.groupby('fuente')['rating'].mean())
+
+        print("\n🔥 Nivel de Riesgo por frecuencia:")
+        print(df['nivel_riesgo'].value_counts())
+
+    except Exception as e:
+        print(f"❌ Error al analizar métricas desde el CSV: {e}")
+
+
+def calcular_indicadores_tendencias(df: pd.DataFrame) -> dict[str, object]:
+    """
+    Calcula, a partir de los artículos procesados, los indicadores que usa PROMPT_TENDENCIAS_SENTIMIENTO
+    (conteos de sentimiento, riesgo y violencia, rating promedio y edad sugerida) y el rango de fechas.
+    """
+    # Edad sugerida: la más restrictiva presente
+    edades = df['edad_recomendada'].dropna()
+    edad_promedio = "+18" if "+18" in edades.values else "+13" if "+13" in edades.values else "todo público"
+
+    # Calcular el rango de fechas
+    fechas = pd.to_datetime(df['fecha'], errors='coerce')
+    fecha_minima = fechas.min()
+    fecha_maxima = fechas.max()
+    rango_fechas = f"{fecha_minima.strftime('%Y-%m-%d')} a {fecha_maxima.strftime('%Y-%m-%d')}" if pd.notnull(fecha_minima) and pd.notnull(fecha_maxima) else "No disponible"
+
+    return {
+        "positivo": df[df['sentimiento'] == 'positivo'].shape[0],
+        "negativo": df[df['sentimiento'] == 'negativo'].shape[0],
+        "neutro": df[df['sentimiento'] == 'neutro'].shape[0],
+        "neutral": df[df['sentimiento'] == 'neutral'].shape[0],
+        "riesgo_bajo": df[df['nivel_riesgo'] == 'bajo'].shape[0],
+        "riesgo_medio": df[df['nivel_riesgo'] == 'medio'].shape[0],
+        "riesgo_alto": df[df['nivel_riesgo'] == 'alto'].shape[0],
+        "violencia_si": df[df['indicador_violencia'] == 'sí'].shape[0],
+        "violencia_no": df[df['indicador_violencia'] == 'no'].shape[0],
+        "violencia_moderado": df[df['indicador_violencia'] == 'moderado'].shape[0],
+        "rating_promedio": df['rating'].mean(),
+        "edad_promedio": edad_promedio,
+        "rango_fechas": rango_fechas,
+    }
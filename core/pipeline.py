@@ -0,0 +1,251 @@
+import queue
+import threading
+import time
+from config.settings import (
+    MAX_CONCURRENCIA_POR_MODELO, DEDUP_ACTIVO,
+    PIPELINE_TAMANO_COLA, PIPELINE_TAMANO_LOTE_DB, PIPELINE_INTERVALO_LOTE_SEG
+)
+from models.entities import Article, Noticia, ResultadoProcesamiento
+import repository.proceso_repository as repository
+from repository.write_buffer import BufferEscritura
+from services.deduplication import cargar_indice, guardar_indice
+from services.file_export import EscritorNoticiasCSV
+from services.metricas import PROFUNDIDAD_COLA
+from services.scraping import FUENTES, iterar_paginas_de_fuente, marcar_noticias_vistas
+from core.processor import MODELOS, marcar_duplicados, mostrar_resumen_throughput, procesar_y_registrar_lote
+
+# Marca de fin de flujo entre etapas
+_FIN = object()
+
+
+def _etapa_scraping(
+    nombre_fuente: str,
+    max_articulos: int,
+    incremental: bool,
+    cola_noticias: queue.Queue,
+    detener: threading.Event
+) -> None:
+    """
+    Extrae las noticias de una fuente y las entrega a la etapa de persistencia página a página.
+    Deja de extraer si la etapa de persistencia terminó con error (`detener`).
+    """
+    try:
+        for pagina in iterar_paginas_de_fuente(nombre_fuente, max_articulos=max_articulos, incremental=incremental):
+            if detener.is_set():
+                print(f"🛑 {nombre_fuente}: se detiene el scraping porque la persistencia terminó con error.")
+                break
+            for noticia in pagina:
+                cola_noticias.put(noticia)
+            PROFUNDIDAD_COLA.fijar(cola_noticias.qsize(), cola="noticias")
+    except Exception as e:
+        print(f"❌ Error en el scraping de {nombre_fuente}: {e}")
+    finally:
+        cola_noticias.put(_FIN)
+
+
+def _siguiente_lote(cola_noticias: queue.Queue, fuentes_activas: int, tamano_lote: int, intervalo_seg: float) -> tuple[list[Noticia], int]:
+    """
+    Toma de la cola hasta `tamano_lote` noticias, esperando como máximo `intervalo_seg`
+    desde la primera. Retorna el lote y la cantidad de fuentes que siguen activas.
+    """
+    lote: list[Noticia] = []
+    limite = None
+    while fuentes_activas and len(lote) < tamano_lote:
+        espera = None if limite is None else limite - time.monotonic()
+        if espera is not None and espera <= 0:
+            break
+        try:
+            elemento = cola_noticias.get(timeout=espera)
+        except queue.Empty:
+            break
+        if elemento is _FIN:
+            fuentes_activas -= 1
+            continue
+        lote.append(elemento)
+        if limite is None:
+            limite = time.monotonic() + intervalo_seg
+    return lote, fuentes_activas
+
+
+def _etapa_persistencia(
+    cola_noticias: queue.Queue,
+    colas_modelos: dict[str, queue.Queue],
+    total_fuentes: int,
+    trabajadores_por_modelo: dict[str, int],
+    escritor_csv: EscritorNoticiasCSV | None,
+    tamano_lote: int,
+    intervalo_seg: float,
+    detener: threading.Event,
+    incremental: bool = False
+) -> None:
+    """
+    Inserta las noticias en micro-lotes, marca los casi-duplicados y envía cada artículo
+    insertado a la cola de trabajo de cada modelo. En modo incremental, las noticias insertadas
+    se registran como vistas; las de un lote que no se pudo insertar se extraen de nuevo en la próxima ejecución.
+
+    Pase lo que pase, al terminar envía la marca de fin a cada trabajador de análisis; si termina con
+    error, activa `detener` y vacía la cola de noticias hasta recibir el fin de cada fuente, para que
+    los scrapers bloqueados en la cola acotada puedan terminar.
+    """
+    indice = None
+    fuentes_activas = total_fuentes
+    try:
+        if DEDUP_ACTIVO:
+            indice = cargar_indice()
+        while fuentes_activas:
+            lote, fuentes_activas = _siguiente_lote(cola_noticias, fuentes_activas, tamano_lote, intervalo_seg)
+            PROFUNDIDAD_COLA.fijar(cola_noticias.qsize(), cola="noticias")
+            if not lote:
+                continue
+            if escritor_csv:
+                escritor_csv.escribir(lote)
+
+            ids_insertados = repository.insertar_articulos_en_lote(lote, modelos=list(colas_modelos))
+            if incremental:
+                marcar_noticias_vistas([noticia for articulo_id, noticia in zip(ids_insertados, lote) if articulo_id is not None])
+            canonicos: dict[int, int] = {}
+            if indice is not None:
+                canonicos = {duplicado: canonico for canonico, duplicado in marcar_duplicados(ids_insertados, lote, indice)}
+
+            for articulo_id, noticia in zip(ids_insertados, lote):
+                if articulo_id is None:
+                    continue
+                articulo = Article(
+                    id=articulo_id,
+                    titulo=noticia.titulo,
+                    fecha=noticia.fecha,
+                    url=noticia.url,
+                    fuente=noticia.fuente,
+                    descripcion=noticia.descripcion,
+                    is_processed=False,
+                    duplicate_of=canonicos.get(articulo_id)
+                )
+                for modelo, cola_modelo in colas_modelos.items():
+                    cola_modelo.put(articulo)
+                    PROFUNDIDAD_COLA.fijar(cola_modelo.qsize(), cola=f"analisis_{modelo.lower()}")
+    except Exception as e:
+        print(f"❌ Error en la etapa de persistencia del pipeline: {e}")
+    finally:
+        for modelo, cola_modelo in colas_modelos.items():
+            for _ in range(trabajadores_por_modelo[modelo]):
+                cola_modelo.put(_FIN)
+        if fuentes_activas:
+            detener.set()
+            descartadas = 0
+            while fuentes_activas:
+                if cola_noticias.get() is _FIN:
+                    fuentes_activas -= 1
+                else:
+                    descartadas += 1
+            print(f"⚠️ {descartadas} noticias extraídas no se guardaron; se extraen de nuevo en la próxima ejecución.")
+        if indice is not None:
+            try:
+                guardar_indice(indice)
+            except OSError as e:
+                print(f"❌ No se pudo guardar el índice de duplicados: {e}")
+
+
+def _etapa_analisis(
+    modelo: str,
+    cola_modelo: queue.Queue,
+    buffer: BufferEscritura,
+    resultado: ResultadoProcesamiento,
+    lock: threading.Lock,
+    primer_analisis: dict[str, float]
+) -> None:
+    """
+    Toma artículos de la cola del modelo y los procesa con IA hasta recibir la marca de fin.
+    Si se agota el presupuesto de la ejecución, la cola se sigue vaciando sin procesar
+    (los artículos quedan pendientes) para no bloquear a la etapa de persistencia.
+    """
+    while True:
+        articulo = cola_modelo.get()
+        PROFUNDIDAD_COLA.fijar(cola_modelo.qsize(), cola=f"analisis_{modelo.lower()}")
+        if articulo is _FIN:
+            return
+        exitos = procesar_y_registrar_lote([articulo], modelo, buffer)
+        with lock:
+            if any(exito is not None for exito in exitos):
+                primer_analisis.setdefault(modelo, time.perf_counter())
+            for exito in exitos:
+                resultado.registrar(exito)
+
+
+def ejecutar_pipeline(
+    max_articulos: int = 50,
+    incremental: bool = True,
+    modelos: list[str] = MODELOS,
+    archivo_csv: str | None = None,
+    tamano_cola: int = PIPELINE_TAMANO_COLA,
+    tamano_lote_db: int = PIPELINE_TAMANO_LOTE_DB,
+    intervalo_lote_seg: float = PIPELINE_INTERVALO_LOTE_SEG
+) -> list[ResultadoProcesamiento]:
+    """
+    Ejecuta scraping, persistencia y análisis con IA como un flujo continuo.
+
+    Cada noticia extraída pasa a la etapa de persistencia y, una vez insertada, a la cola de
+    trabajo de cada modelo, sin esperar a que termine el resto del scraping. Las colas entre
+    etapas son acotadas (`tamano_cola`), por lo que una etapa lenta frena a las anteriores y
+    la memoria se mantiene constante.
+
+    Parámetros:
+    - max_articulos: Máximo de artículos a extraer por fuente.
+    - incremental: True para extraer solo noticias no vistas en ejecuciones anteriores.
+    - modelos: Modelos de IA con los que se analiza cada artículo.
+    - archivo_csv: Si se indica, las noticias extraídas también se escriben en este CSV.
+    - tamano_cola: Capacidad de cada cola entre etapas.
+    - tamano_lote_db / intervalo_lote_seg: Tamaño máximo y espera máxima de cada micro-lote de inserción.
+
+    Retorna:
+    - Lista de ResultadoProcesamiento, uno por modelo.
+    """
+    inicio = time.perf_counter()
+    cola_noticias: queue.Queue = queue.Queue(maxsize=tamano_cola)
+    colas_modelos: dict[str, queue.Queue] = {modelo: queue.Queue(maxsize=tamano_cola) for modelo in modelos}
+    trabajadores_por_modelo = {modelo: max(1, MAX_CONCURRENCIA_POR_MODELO.get(modelo, 1)) for modelo in modelos}
+    resultados = {modelo: ResultadoProcesamiento(modelo=modelo) for modelo in modelos}
+    primer_analisis: dict[str, float] = {}
+    lock = threading.Lock()
+    escritor_csv = EscritorNoticiasCSV(archivo_csv) if archivo_csv else None
+    detener = threading.Event()
+
+    hilos: list[threading.Thread] = []
+    try:
+        with BufferEscritura() as buffer:
+            for modelo in modelos:
+                for numero in range(trabajadores_por_modelo[modelo]):
+                    hilos.append(threading.Thread(
+                        target=_etapa_analisis,
+                        args=(modelo, colas_modelos[modelo], buffer, resultados[modelo], lock, primer_analisis),
+                        name=f"pipeline-{modelo.lower()}-{numero}"
+                    ))
+            hilos.append(threading.Thread(
+                target=_etapa_persistencia,
+                args=(
+                    cola_noticias, colas_modelos, len(FUENTES), trabajadores_por_modelo,
+                    escritor_csv, tamano_lote_db, intervalo_lote_seg, detener, incremental
+                ),
+                name="pipeline-persistencia"
+            ))
+            for nombre_fuente in FUENTES:
+                hilos.append(threading.Thread(
+                    target=_etapa_scraping,
+                    args=(nombre_fuente, max_articulos, incremental, cola_noticias, detener),
+                    name=f"pipeline-scraping-{nombre_fuente}"
+                ))
+
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+    finally:
+        if escritor_csv:
+            escritor_csv.cerrar()
+
+    duracion = time.perf_counter() - inicio
+    for resultado in resultados.values():
+        resultado.duracion_seg = duracion
+    for modelo, instante in primer_analisis.items():
+        print(f"⚡ [{modelo}] Primer análisis completado a los {instante - inicio:.2f} seg de iniciado el pipeline.")
+    mostrar_resumen_throughput(list(resultados.values()))
+    return list(resultados.values())
@@ -1,19 +1,61 @@
+import json
+import os
+import socket
+import threading
+import time
 import pytz
 import pandas as pd
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from itertools import chain
 from datetime import datetime
-from models.entities import AnalisisResumenDTO, Article, IAProcessedData, Noticia, ProcessStatusDTO, IALogModel, TendenciasSentimientoDTO
+from config.settings import (
+    MAX_CONCURRENCIA_POR_MODELO, ANALISIS_LOTE_ACTIVO, ANALISIS_LOTE_MAX_TOKENS, ANALISIS_LOTE_MAX_ARTICULOS, DEDUP_ACTIVO, DB_TAMANO_PAGINA,
+    WORKER_TAMANO_RECLAMO, WORKER_LEASE_SEG, WORKER_ESPERA_SEG, ANALISIS_PLAZO_ARTICULO_SEG, IA_STREAMING
+)
+from models.entities import (
+    AnalisisResumenDTO, Article, IAProcessedData, Noticia, ProcessStatusDTO, IALogModel, PromptCompilado, ResultadoProcesamiento,
+    TendenciasSentimientoDTO
+)
 import repository.proceso_repository as repository
-from services.ia_models_service import IAService
-from services.scraping.scraping import extraer_noticias_elperiodico, extraer_noticias_araucaniadiario
-from services.file_export.csv_writer import guardar_articles_en_csv, guardar_noticias_en_csv
+from repository.write_buffer import BufferEscritura
+from services.cascada import MOTIVOS_ESCALAMIENTO, analizar_con_cascada, motivo_escalamiento, niveles_cascada
+from services.ia_models_service import NIVELES_MODELO, ErrorPeticionIA, IAService
+from services.deduplication import IndiceSimilitud, cargar_indice, guardar_indice
+from services.http_clients import resumen_conexiones, resumen_respaldos
+from services.limitador import resumen_limitadores
+from services.metricas import (
+    ANALISIS_NIVEL_IA, ARTICULOS_PROCESADOS, ERRORES_PARSEO_IA, ESCALAMIENTOS_IA, RESPUESTAS_INTERPRETADAS_IA, TOKENS_CACHEADOS_IA, TOKENS_IA
+)
+from services.perfilado import tramo, tramo_articulo
+from services.plazos import PlazoVencido, PresupuestoAgotado, plazo_operacion, presupuesto_agotado
+from services.response_cache import resumen_cache
+from services.file_export.csv_writer import guardar_articles_en_csv
 from services.file_export import leer_desde_csv
-from core.prompts_analysis import PROMPT_ANALISIS_ARTICULO, PROMPT_COMPARATIVO_MEDIOS, PROMPT_RESUMEN_EJECUTIVO, PROMPT_TENDENCIAS_SENTIMIENTO
+from core.metricas_csv import analizar_métricas_desde_csv, calcular_indicadores_tendencias
+from core.prompts_analysis import (
+    PREFIJO_ANALISIS_ARTICULOS_LOTE, PROMPT_COMPARATIVO_MEDIOS, PROMPT_RESUMEN_EJECUTIVO, PROMPT_TENDENCIAS_SENTIMIENTO,
+    compilar_prompt_articulo, compilar_prompt_articulos_lote
+)
 
 # Constante para la zona horaria de América/Santiago
 TZ_SANTIAGO = pytz.timezone("America/Santiago")
 
 MODELOS: list[str] = ["GEMINI", "OPENAI"]
 
+# Estimación aproximada de tokens para armar lotes: ~4 caracteres por token y salida JSON por artículo
+CARACTERES_POR_TOKEN = 4
+TOKENS_SALIDA_POR_ARTICULO = 80
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estima la cantidad de tokens de un texto sin depender de un tokenizador.
+    """
+    return len(texto or "") // CARACTERES_POR_TOKEN + 1
+
+
 def cargar_datos_a_db() -> None:
     """
     Carga los datos desde archivos CSV a la base de datos.
@@ -27,22 +69,59 @@ def cargar_datos_a_db() -> None:
 
     print("Cargando datos desde los archivos CSV... 📂")
 
-    for noticia in diarios_data:
-        print(f"Guardado noticia: {noticia.titulo}")
-        nueva_noticia = Noticia(
-            titulo=noticia.titulo,
-            fecha=noticia.fecha,
-            descripcion=noticia.descripcion,
-            url=noticia.url,
-            fuente=noticia.fuente
-        )
-        articulo_id = repository.insertar_articulo(nueva_noticia)
-        if articulo_id:
-            for modelo in MODELOS:
-                repository.insertar_status(articulo_id=articulo_id, modelo=modelo, estado_procesado=False)
+    # Inserción masiva: artículos y estados pendientes por modelo en pocas sentencias por lote
+    ids_insertados = repository.insertar_articulos_en_lote(diarios_data, modelos=MODELOS)
+    print(f"Artículos insertados: {sum(1 for articulo_id in ids_insertados if articulo_id is not None)} de {len(diarios_data)}")
+
+    if DEDUP_ACTIVO:
+        marcar_duplicados(ids_insertados, diarios_data)
     print("Inserción de datos completada con éxito 🚀")
 
 
+def marcar_duplicados(
+    ids_insertados: list[int | None],
+    noticias: list[Noticia],
+    indice: IndiceSimilitud | None = None
+) -> list[tuple[int, int]]:
+    """
+    Agrega los artículos recién insertados al índice de similitud persistente y marca en la base
+    de datos los que son casi-duplicados de un artículo anterior (de esta carga o de cargas previas).
+
+    Parámetros:
+    - indice: Índice ya cargado. Si no se entrega, se carga desde disco y se guarda al terminar;
+      si se entrega, guardarlo queda a cargo de quien llama.
+
+    Retorna:
+    - Lista de pares (ID canónico, ID duplicado) detectados.
+    """
+    indice_propio = indice is None
+    if indice_propio:
+        indice = cargar_indice()
+    pares: list[tuple[int, int]] = []
+    for articulo_id, noticia in zip(ids_insertados, noticias):
+        if articulo_id is None:
+            continue
+        canonico = indice.agregar(articulo_id, f"{noticia.titulo} {noticia.descripcion}")
+        if canonico is not None:
+            pares.append((canonico, articulo_id))
+
+    if repository.marcar_duplicados(pares) and indice_propio:
+        guardar_indice(indice)
+    print(f"🧬 Casi-duplicados detectados: {len(pares)} (grupos en el índice: {len(indice.clusters())})")
+    return pares
+
+
+def mostrar_clusters_duplicados() -> dict[int, list[int]]:
+    """
+    Muestra los grupos de artículos casi-duplicados registrados en la base de datos.
+    """
+    clusters = repository.obtener_clusters_duplicados()
+    print(f"\n🧬 Grupos de artículos casi-duplicados: {len(clusters)}")
+    for canonico, duplicados in clusters.items():
+        print(f"- Artículo {canonico}: {duplicados}")
+    return clusters
+
+
 def obtener_datos_de_db(modelo: str, estado_procesado: bool) -> list[Article]:
     """
     Obtiene artículos desde la base de datos para un modelo específico y un estado de procesamiento.
@@ -75,15 +154,26 @@ def obtener_datos_de_db(modelo: str, estado_procesado: bool) -> list[Article]:
         return []
 
 
-def procesar_articulo_con_ia(articulo: Article, modelo: str) -> ProcessStatusDTO:
+def construir_prompt_articulo(articulo: Article) -> PromptCompilado:
     """
-    Procesa un artículo con un modelo de IA específico.
+    Crea el prompt de análisis de un artículo utilizando el prompt centralizado
+    (prefijo de instrucciones común a todos los artículos y el artículo como sufijo).
+    """
+    return compilar_prompt_articulo(articulo.titulo, articulo.descripcion)
+
+
+def procesar_articulo_con_ia(articulo: Article, modelo: str, descartado: ProcessStatusDTO | None = None) -> ProcessStatusDTO:
+    """
+    Procesa un artículo con un modelo de IA específico, recorriendo la cascada de modelos del proveedor
+    (primero el económico; el principal solo si hay que confirmar su respuesta, ver services.cascada).
+
+    Parámetros:
+    - descartado: Análisis ya obtenido para el artículo (por ejemplo, en un lote) que debe confirmarse
+      con el siguiente nivel de la cascada.
     """
     # Crear el prompt para el modelo utilizando el prompt centralizado
 # print(f"articulo a procesar: '{articulo}'")
-    titulo = articulo.titulo
-    descripcion = articulo.descripcion
-    prompt = PROMPT_ANALISIS_ARTICULO.format(titulo=titulo, descripcion=descripcion)
+    prompt = construir_prompt_articulo(articulo)
 
     # Crear instancia del servicio de IA
     modeloService = IAService(prompt=prompt)
@@ -94,9 +184,11 @@ def procesar_articulo_con_ia(articulo: Article, modelo: str) -> ProcessStatusDTO
         "OPENAI": modeloService.call_openAI,
     }
 
-    # Llamar al método correspondiente según el modelo
+    # Llamar al método correspondiente según el modelo, dentro del plazo por artículo (que cubre toda la cascada)
     if modelo in switch_modelos:
-        data_procesada: ProcessStatusDTO = switch_modelos[modelo]("procesamiento_articulo")
+        llamar = partial(switch_modelos[modelo], "procesamiento_articulo")
+        with plazo_operacion(ANALISIS_PLAZO_ARTICULO_SEG):
+            data_procesada: ProcessStatusDTO = analizar_con_cascada(llamar, modelo, descartado)
     else:
         raise ValueError(f"Modelo '{modelo}' no soportado. Modelos disponibles: {list(switch_modelos.keys())}")
 
@@ -105,65 +197,456 @@ def procesar_articulo_con_ia(articulo: Article, modelo: str) -> ProcessStatusDTO
     return data_procesada
 
 
-def procesar_con_modelo_ia(articulos_no_procesados: list[Article], modelo: str) -> None:
+def agrupar_articulos_por_tokens(
+    articulos: list[Article],
+    max_tokens: int = ANALISIS_LOTE_MAX_TOKENS,
+    max_articulos: int = ANALISIS_LOTE_MAX_ARTICULOS
+) -> list[list[Article]]:
+    """
+    Agrupa los artículos en lotes cuyo prompt estimado (instrucciones, artículos y salida esperada)
+    no supere `max_tokens` ni `max_articulos` elementos.
+    """
+    tokens_base = estimar_tokens(PREFIJO_ANALISIS_ARTICULOS_LOTE)
+    lotes: list[list[Article]] = []
+    lote_actual: list[Article] = []
+    tokens_lote = tokens_base
+
+    for articulo in articulos:
+        costo = estimar_tokens(articulo.titulo) + estimar_tokens(articulo.descripcion) + TOKENS_SALIDA_POR_ARTICULO
+        if lote_actual and (tokens_lote + costo > max_tokens or len(lote_actual) >= max_articulos):
+            lotes.append(lote_actual)
+            lote_actual = []
+            tokens_lote = tokens_base
+        lote_actual.append(articulo)
+        tokens_lote += costo
+
+    if lote_actual:
+        lotes.append(lote_actual)
+    return lotes
+
+
+def procesar_articulos_con_ia_en_lote(articulos: list[Article], modelo: str) -> dict[int, ProcessStatusDTO]:
+    """
+    Procesa varios artículos con un modelo de IA en una sola petición, con el primer nivel de la cascada del proveedor.
+
+    Retorna:
+    - Diccionario ID de artículo -> ProcessStatusDTO con los artículos que el modelo respondió correctamente.
+    """
+    articulos_json = json.dumps(
+        [{"id": articulo.id, "titulo": articulo.titulo, "descripcion": articulo.descripcion} for articulo in articulos],
+        ensure_ascii=False
+    )
+    prompt = compilar_prompt_articulos_lote(articulos_json)
+
+    # Crear instancia del servicio de IA
+    modeloService = IAService(prompt=prompt)
+
+    switch_modelos = {
+        "GEMINI": modeloService.call_gemini,
+        "OPENAI": modeloService.call_openAI,
+    }
+
+    if modelo not in switch_modelos:
+        raise ValueError(f"Modelo '{modelo}' no soportado. Modelos disponibles: {list(switch_modelos.keys())}")
+
+    # El lote tiene el mismo plazo que un artículo: es una sola petición
+    _, modelo_id = niveles_cascada(modelo)[0]
+    with plazo_operacion(ANALISIS_PLAZO_ARTICULO_SEG):
+        return switch_modelos[modelo]("procesamiento_lote", modelo_id=modelo_id)
+
+
+def _registrar_resultado(articulo: Article, modelo: str, resultado_ia: ProcessStatusDTO, buffer: BufferEscritura) -> bool:
+    """
+    Encola en el buffer de escritura la actualización del estado de un artículo y su registro de log.
+
+    Retorna:
+    - True si el resultado corresponde a un procesamiento exitoso.
+    """
+    procesado_exitosamente = (
+        resultado_ia.status_code == 200 and resultado_ia.is_processed
+    )
+
+    if procesado_exitosamente:
+        buffer.agregar_actualizacion(articulo.id, resultado_ia)
+        if resultado_ia.nivel_modelo is not None:
+            ANALISIS_NIVEL_IA.incrementar(proveedor=modelo, nivel=resultado_ia.nivel_modelo)
+        detalle = f" ({resultado_ia.modelo_id})" if resultado_ia.modelo_id else ""
+        print(f"✅ [{modelo}] Artículo ID: {articulo.id} procesado con éxito{detalle}.")
+    else:
+        print(f"⚠️ [{modelo}] Procesamiento fallido para el artículo ID: {articulo.id}. Código de estado: {resultado_ia.status_code}")
+
+    log_entry = IALogModel(
+        article_id=articulo.id,
+        model=resultado_ia.model_used,
+        prompt=resultado_ia.prompt or "",
+        response=resultado_ia.respuesta or "",
+        filtered_response=None,
+        status_code=resultado_ia.status_code,
+        response_time_sec=resultado_ia.response_time_sec,
+        tokens_used=resultado_ia.tokens_used,
+        log_date=datetime.now(TZ_SANTIAGO),
+        model_id=resultado_ia.modelo_id,
+        model_tier=resultado_ia.nivel_modelo
+    )
+    buffer.agregar_log(log_entry)
+    return procesado_exitosamente
+
+
+def _procesar_y_registrar_articulo(
+    articulo: Article,
+    modelo: str,
+    buffer: BufferEscritura,
+    descartado: ProcessStatusDTO | None = None
+) -> bool | None:
+    """
+    Procesa un artículo con un modelo de IA y encola en el buffer de escritura
+    la actualización de su estado y el registro de log (`descartado`: ver procesar_articulo_con_ia).
+
+    Retorna:
+    - True si el artículo fue procesado con éxito, False en caso contrario.
+    - None si se canceló por agotarse el presupuesto de la ejecución; el artículo queda pendiente sin log.
+    """
+    status_code = 500
+    try:
+        print(f"🤖 [{modelo}] Procesando artículo ID: {articulo.id}, Título: {articulo.titulo}...")
+        resultado_ia: ProcessStatusDTO = procesar_articulo_con_ia(articulo, modelo, descartado)
+        return _registrar_resultado(articulo, modelo, resultado_ia, buffer)
+
+    except PresupuestoAgotado:
+        print(f"⏳ [{modelo}] Artículo ID: {articulo.id} cancelado por agotarse el presupuesto; queda pendiente.")
+        return None
+
+    except Exception as e:
+        if isinstance(e, PlazoVencido):
+            status_code = 504
+        elif isinstance(e, ErrorPeticionIA):
+            status_code = e.status_code
+        print(f"❌ [{modelo}] Error al procesar el artículo ID: {articulo.id}: {e}")
+        _registrar_error(articulo, modelo, str(e), status_code, buffer)
+        return False
+
+
+def _registrar_error(articulo: Article, modelo: str, error: str, status_code: int, buffer: BufferEscritura) -> None:
+    """
+    Encola en el buffer de escritura el registro de log de un artículo que no se pudo procesar.
+    """
+    log_entry = IALogModel(
+        article_id=articulo.id,
+        model=articulo.model_name or modelo,
+        prompt=construir_prompt_articulo(articulo).texto,
+        response=f"ERROR: {error}",
+        filtered_response=None,
+        status_code=status_code,
+        response_time_sec=None,
+        tokens_used=None,
+        log_date=datetime.now(TZ_SANTIAGO)
+    )
+    buffer.agregar_log(log_entry)
+
+
+def _procesar_duplicado(articulo: Article, modelo: str, buffer: BufferEscritura) -> bool | None:
+    """
+    Reutiliza el resultado del artículo canónico para un casi-duplicado.
+    Si el canónico aún no tiene resultado para el modelo, el artículo se procesa con IA.
+    """
+    resultado_canonico = repository.obtener_resultado_ia(articulo.duplicate_of, modelo)
+    if resultado_canonico is None:
+        return _procesar_y_registrar_articulo(articulo, modelo, buffer)
+
+    print(f"🧬 [{modelo}] Artículo ID: {articulo.id} es duplicado del ID {articulo.duplicate_of}, se copia su resultado.")
+    resultado_canonico.respuesta = f"Resultado copiado del artículo ID {articulo.duplicate_of}"
+    resultado_canonico.response_time_sec = 0.0
+    resultado_canonico.tokens_used = 0
+    return _registrar_resultado(articulo, modelo, resultado_canonico, buffer)
+
+
+def procesar_y_registrar_lote(lote: list[Article], modelo: str, buffer: BufferEscritura) -> list[bool | None]:
+    """
+    Procesa y registra un lote de artículos (ver _procesar_y_registrar_lote) y cuenta sus resultados en las métricas.
+    """
+    with tramo_articulo(lote[0].id if len(lote) == 1 else [articulo.id for articulo in lote], modelo):
+        exitos = _procesar_y_registrar_lote(lote, modelo, buffer)
+    for exito in exitos:
+        etiqueta = "cancelado" if exito is None else "exitoso" if exito else "fallido"
+        ARTICULOS_PROCESADOS.incrementar(modelo=modelo, resultado=etiqueta)
+    return exitos
+
+
+def _procesar_y_registrar_lote(lote: list[Article], modelo: str, buffer: BufferEscritura) -> list[bool | None]:
+    """
+    Procesa un lote de artículos en una sola petición al modelo. Si la respuesta es inválida,
+    o le faltan artículos, esos artículos se procesan de a uno. Los artículos cuyo análisis
+    la cascada pide confirmar se repiten de a uno con el siguiente nivel. Un lote de un solo
+    casi-duplicado reutiliza el resultado de su artículo canónico.
+
+    Si el presupuesto de la ejecución ya se agotó, el lote no se procesa y sus artículos quedan pendientes.
+
+    Retorna:
+    - Lista con el éxito de cada artículo, en el orden del lote (None = cancelado).
+    """
+    if presupuesto_agotado():
+        return [None] * len(lote)
+
+    if len(lote) == 1:
+        if lote[0].duplicate_of is not None:
+            return [_procesar_duplicado(lote[0], modelo, buffer)]
+        return [_procesar_y_registrar_articulo(lote[0], modelo, buffer)]
+
+    try:
+        print(f"📦 [{modelo}] Procesando lote de {len(lote)} artículos (IDs {lote[0].id}..{lote[-1].id})...")
+        resultados = procesar_articulos_con_ia_en_lote(lote, modelo)
+    except PresupuestoAgotado:
+        print(f"⏳ [{modelo}] Lote cancelado por agotarse el presupuesto; sus artículos quedan pendientes.")
+        return [None] * len(lote)
+    except Exception as e:
+        print(f"⚠️ [{modelo}] Respuesta en lote inválida, se procesará artículo por artículo: {e}")
+        resultados = {}
+
+    exitos: list[bool | None] = []
+    for articulo in lote:
+        resultado_ia = resultados.get(articulo.id)
+        motivo = motivo_escalamiento(modelo, resultado_ia) if resultado_ia is not None else None
+        if resultado_ia is None:
+            exitos.append(_procesar_y_registrar_articulo(articulo, modelo, buffer))
+        elif motivo is not None:
+            resultado_ia.motivo_escalamiento = motivo
+            ESCALAMIENTOS_IA.incrementar(proveedor=modelo, motivo=motivo)
+            print(f"⤴️ [{modelo}] Artículo ID: {articulo.id} del lote se confirma con el siguiente modelo ({motivo})")
+            exitos.append(_procesar_y_registrar_articulo(articulo, modelo, buffer, descartado=resultado_ia))
+        else:
+            exitos.append(_registrar_resultado(articulo, modelo, resultado_ia, buffer))
+    return exitos
+
+
+def procesar_con_modelo_ia(
+    articulos_no_procesados: list[Article],
+    modelo: str,
+    max_concurrencia: int | None = None,
+    buffer: BufferEscritura | None = None,
+    modo_lote: bool = ANALISIS_LOTE_ACTIVO
+) -> ResultadoProcesamiento:
     """
     Procesa los artículos utilizando un modelo de IA, actualiza su estado en la base de datos
     y registra los resultados en la tabla de logs.
+
+    Los artículos se procesan en un pool de hilos acotado: como el trabajo está dominado por
+    la espera de HTTP, hasta `max_concurrencia` peticiones quedan en vuelo al mismo tiempo.
+    En modo lote cada petición analiza varios artículos, agrupados por presupuesto de tokens.
+
+    Los casi-duplicados cuyo artículo canónico también está pendiente se procesan en una segunda
+    fase, tras guardar los resultados de la primera, para copiar el resultado en vez de llamar al modelo.
+
+    Parámetros:
+    - articulos_no_procesados: Artículos pendientes para el modelo.
+    - modelo: Nombre del modelo de IA ("GEMINI", "OPENAI").
+    - max_concurrencia: Límite de artículos en vuelo. Por defecto MAX_CONCURRENCIA_POR_MODELO[modelo].
+    - buffer: Buffer de escritura compartido. Si no se entrega, se crea uno y se vacía al terminar.
+    - modo_lote: True para enviar varios artículos por petición (ANALISIS_LOTE_ACTIVO por defecto).
+
+    Retorna:
+    - ResultadoProcesamiento con los contadores y la duración del lote.
     """
+    resultado = ResultadoProcesamiento(modelo=modelo)
+
     if not articulos_no_procesados:
-        print("⚠️ No hay artículos para procesar.")
-        return
+        print(f"⚠️ [{modelo}] No hay artículos para procesar.")
+        return resultado
 
-    print(f"✅ Se encontraron {len(articulos_no_procesados)} artículos no procesados. Procesando con IA...")
+    limite = max(1, max_concurrencia or MAX_CONCURRENCIA_POR_MODELO.get(modelo, 1))
+    print(f"✅ [{modelo}] Se encontraron {len(articulos_no_procesados)} artículos no procesados. Procesando con IA (concurrencia: {limite})...")
 
-    for articulo in articulos_no_procesados:
-        try:
-            # print(articulo)
-            print(f"🤖 Procesando artículo ID: {articulo.id}, Título: {articulo.titulo}...")
-            resultado_ia: ProcessStatusDTO = procesar_articulo_con_ia(articulo, modelo)
+    buffer_propio = buffer is None
+    if buffer_propio:
+        buffer = BufferEscritura()
 
-            procesado_exitosamente = (
-                resultado_ia.status_code == 200 and resultado_ia.is_processed
-            )
+    ids_pendientes = {articulo.id for articulo in articulos_no_procesados}
+    originales = [articulo for articulo in articulos_no_procesados if articulo.duplicate_of is None]
+    duplicados = [articulo for articulo in articulos_no_procesados if articulo.duplicate_of is not None]
+    duplicados_en_espera = [articulo for articulo in duplicados if articulo.duplicate_of in ids_pendientes]
+    duplicados_directos = [articulo for articulo in duplicados if articulo.duplicate_of not in ids_pendientes]
 
-            if procesado_exitosamente:
-                actualizado = repository.actualizar_datos_ia(articulo.id, resultado_ia)
-                mensaje = "procesado y actualizado con éxito" if actualizado else "procesado, pero no se pudo actualizar en la base de datos"
-                print(f"✅ Artículo ID: {articulo.id} {mensaje}.")
-            else:
-                print(f"⚠️ Procesamiento fallido para el artículo ID: {articulo.id}. Código de estado: {resultado_ia.status_code}")
-
-            log_entry = IALogModel(
-                article_id=articulo.id,
-                model=resultado_ia.model_used,
-                prompt="PROMPT SIMULADO",  # Reemplaza por el prompt real si lo tienes
-                response="RESPUESTA SIMULADA",  # Reemplaza por la respuesta real si la tienes
-                filtered_response=None,
-                status_code=resultado_ia.status_code,
-                response_time_sec=0.5,  # simulado
-                tokens_used=100,        # simulado
-                log_date=datetime.now(TZ_SANTIAGO)
-            )
-            repository.insertar_log(log_entry)
-
-        except Exception as e:
-            print(f"❌ Error al procesar el artículo ID: {articulo.id}: {e}")
-            # Registrar el error en el log
-            log_entry = IALogModel(
-                article_id=articulo.id,
-                model=getattr(articulo, "model_name", "DESCONOCIDO"),
-                prompt="PROMPT SIMULADO",
-                response=f"ERROR: {str(e)}",
-                filtered_response=None,
-                status_code=500,
-                response_time_sec=None,
-                tokens_used=None,
-                log_date=datetime.now(TZ_SANTIAGO)
-            )
-            repository.insertar_log(log_entry)
+    if modo_lote:
+        lotes = agrupar_articulos_por_tokens(originales)
+    else:
+        lotes = [[articulo] for articulo in originales]
+    fases = [
+        lotes + [[articulo] for articulo in duplicados_directos],
+        [[articulo] for articulo in duplicados_en_espera],
+    ]
+
+    inicio = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=limite, thread_name_prefix=f"ia-{modelo.lower()}") as executor:
+            for numero_fase, lotes_fase in enumerate(fases):
+                if not lotes_fase:
+                    continue
+                if numero_fase > 0:
+                    # Los canónicos de esta fase deben estar guardados antes de copiar sus resultados
+                    buffer.vaciar()
+                futuros = [executor.submit(procesar_y_registrar_lote, lote, modelo, buffer) for lote in lotes_fase]
+                for futuro in as_completed(futuros):
+                    for exito in futuro.result():
+                        resultado.registrar(exito)
+    finally:
+        if buffer_propio:
+            buffer.cerrar()
+    resultado.duracion_seg = time.perf_counter() - inicio
+
+    print(f"🚀 [{modelo}] Procesamiento con modelo de IA completado.")
+    return resultado
+
+
+def procesar_pendientes_por_paginas(modelo: str, buffer: BufferEscritura, tamano_pagina: int = DB_TAMANO_PAGINA) -> ResultadoProcesamiento:
+    """
+    Procesa los artículos pendientes de un modelo leyendo la base de datos por páginas,
+    de modo que backlogs de cualquier tamaño se procesan con memoria constante.
+
+    Retorna:
+    - ResultadoProcesamiento acumulado de todas las páginas.
+    """
+    if modelo not in MODELOS:
+        print(f"⚠️ El modelo '{modelo}' no es válido. Modelos disponibles: {MODELOS}")
+        return ResultadoProcesamiento(modelo=modelo)
+
+    resultado = ResultadoProcesamiento(modelo=modelo)
+    inicio = time.perf_counter()
+    for pagina in repository.iterar_paginas_articulos_por_estado(estado_procesado=False, modelo=modelo, tamano_pagina=tamano_pagina):
+        if presupuesto_agotado():
+            print(f"⏳ [{modelo}] Se agotó el presupuesto de tiempo; los artículos restantes quedan pendientes.")
+            break
+        resultado.acumular(procesar_con_modelo_ia(pagina, modelo, buffer=buffer))
+        # Los canónicos de esta página quedan guardados antes de que sus duplicados aparezcan en otra
+        buffer.vaciar()
+    resultado.duracion_seg = time.perf_counter() - inicio
+
+    if not resultado.total:
+        print(f"⚠️ No se encontraron artículos no procesados para el modelo '{modelo}'.")
+    return resultado
+
+
+def procesar_modelos_en_paralelo(modelos: list[str] = MODELOS) -> list[ResultadoProcesamiento]:
+    """
+    Procesa los artículos pendientes de todos los modelos al mismo tiempo.
+
+    Cada modelo corre en su propio hilo coordinador con su propio límite de concurrencia,
+    de modo que un proveedor lento no frena al otro. Los pendientes se leen por páginas y
+    ambos modelos comparten un buffer de escritura que se vacía al terminar.
+
+    Retorna:
+    - Lista de ResultadoProcesamiento, uno por modelo, en el mismo orden que `modelos`.
+    """
+    with BufferEscritura() as buffer:
+        def _procesar_modelo(modelo: str) -> ResultadoProcesamiento:
+            return procesar_pendientes_por_paginas(modelo, buffer)
+
+        with ThreadPoolExecutor(max_workers=max(1, len(modelos)), thread_name_prefix="modelo") as executor:
+            return list(executor.map(_procesar_modelo, modelos))
+
+
+def _bucle_worker(
+    modelo: str,
+    worker_id: str,
+    buffer: BufferEscritura,
+    detener: threading.Event,
+    tamano_reclamo: int,
+    lease_seg: int,
+    continuo: bool,
+    espera_seg: float
+) -> ResultadoProcesamiento:
+    """
+    Reclama, procesa y confirma lotes de artículos de un modelo hasta que no quede trabajo
+    (o, en modo continuo, hasta que se pida detener).
+    """
+    resultado = ResultadoProcesamiento(modelo=modelo)
+    inicio = time.perf_counter()
+    while not detener.is_set():
+        if presupuesto_agotado():
+            print(f"⏳ [{modelo}] Se agotó el presupuesto de tiempo; el worker deja de reclamar artículos.")
+            break
+        articulos = repository.reclamar_articulos(modelo, worker_id, tamano_reclamo, lease_seg)
+        if not articulos:
+            if not continuo:
+                break
+            detener.wait(espera_seg)
             continue
 
-    print("🚀 Procesamiento con modelo de IA completado.")
+        print(f"📥 [{modelo}] Worker {worker_id} reclamó {len(articulos)} artículos.")
+        resultado.acumular(procesar_con_modelo_ia(articulos, modelo, buffer=buffer))
+        # Confirmar el lote antes de reclamar el siguiente; los fallidos conservan su lease
+        # hasta que vence, lo que evita reintentarlos de inmediato
+        buffer.vaciar()
+    resultado.duracion_seg = time.perf_counter() - inicio
+    return resultado
+
+
+def ejecutar_worker(
+    modelos: list[str] = MODELOS,
+    worker_id: str | None = None,
+    tamano_reclamo: int = WORKER_TAMANO_RECLAMO,
+    lease_seg: int = WORKER_LEASE_SEG,
+    continuo: bool = False,
+    espera_seg: float = WORKER_ESPERA_SEG
+) -> list[ResultadoProcesamiento]:
+    """
+    Procesa los artículos pendientes como un worker que comparte la base de datos con otros.
+
+    Cada modelo repite el ciclo reclamar, procesar y confirmar: los artículos se reclaman en lotes
+    con un lease, por lo que varios procesos (en la misma u otras máquinas) pueden trabajar a la
+    vez sin analizar dos veces el mismo artículo. Si un worker se detiene sin terminar, sus
+    artículos vuelven a estar disponibles al vencer el lease.
+
+    Parámetros:
+    - modelos: Modelos de IA a procesar; cada uno corre en su propio hilo.
+    - worker_id: Identificador del worker. Por defecto "<host>:<pid>".
+    - tamano_reclamo: Artículos reclamados por lote.
+    - lease_seg: Duración del lease; debe superar el tiempo de procesar un lote.
+    - continuo: True para seguir esperando trabajo nuevo en vez de terminar cuando no queda.
+    - espera_seg: Espera entre reclamos vacíos en modo continuo.
+
+    Retorna:
+    - Lista de ResultadoProcesamiento, uno por modelo, en el mismo orden que `modelos`.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    print(f"👷 Iniciando worker {worker_id} (lote: {tamano_reclamo}, lease: {lease_seg} seg).")
+
+    recuperadas = repository.liberar_leases_vencidos()
+    if recuperadas:
+        print(f"♻️ Se recuperaron {recuperadas} artículos con lease vencido.")
+
+    detener = threading.Event()
+    try:
+        with BufferEscritura(worker_id=worker_id) as buffer:
+            with ThreadPoolExecutor(max_workers=max(1, len(modelos)), thread_name_prefix="worker") as executor:
+                futuros = [
+                    executor.submit(_bucle_worker, modelo, worker_id, buffer, detener, tamano_reclamo, lease_seg, continuo, espera_seg)
+                    for modelo in modelos
+                ]
+                try:
+                    resultados = [futuro.result() for futuro in futuros]
+                except KeyboardInterrupt:
+                    print(f"🛑 Deteniendo worker {worker_id}: se termina el lote en curso...")
+                    detener.set()
+                    resultados = [futuro.result() for futuro in futuros]
+    finally:
+        liberadas = repository.liberar_leases(worker_id)
+        if liberadas:
+            print(f"🔓 Worker {worker_id} liberó {liberadas} artículos pendientes.")
+
+    mostrar_resumen_throughput(resultados)
+    return resultados
+
+
+def mostrar_resumen_throughput(resultados: list[ResultadoProcesamiento]) -> None:
+    """
+    Muestra el throughput obtenido por cada modelo al final de la ejecución.
+    """
+    print("\n⏱️ Resumen de throughput por modelo:")
+    for resultado in resultados:
+        print(
+            f"- {resultado.modelo}: {resultado.total} artículos "
+            f"({resultado.exitosos} exitosos, {resultado.fallidos} fallidos, {resultado.cancelados} cancelados) "
+            f"en {resultado.duracion_seg:.2f} seg → {resultado.articulos_por_minuto:.1f} artículos/min"
+        )
 
 
 def guardar_articulos_procesados_en_csv() -> None:
@@ -171,42 +654,56 @@ def guardar_articulos_procesados_en_csv() -> None:
     Obtiene los artículos procesados para ambos modelos y los guarda en un archivo CSV.
     """
     print("🔄 Obteniendo artículos procesados para ambos modelos...")
-    articulos_procesados: list[Article] = []
-    for modelo in MODELOS:
-        articulos_procesados.extend(obtener_datos_de_db(modelo=modelo, estado_procesado=True))
+    # Los artículos se leen por páginas y se escriben a medida que llegan, con memoria constante
+    articulos_procesados = chain.from_iterable(
+        repository.iterar_articulos_por_estado(estado_procesado=True, modelo=modelo) for modelo in MODELOS
+    )
 
     # Escribir los datos procesados en un archivo CSV
-    if articulos_procesados:
-        print("✍️ Escribiendo artículos procesados en un archivo CSV...")
-        guardar_articles_en_csv(articulos_procesados, nombre_archivo="articulos_procesados.csv")
-        print("✅ Artículos procesados guardados en 'articulos_procesados.csv'.")
+    print("✍️ Escribiendo artículos procesados en un archivo CSV...")
+    escritos = guardar_articles_en_csv(articulos_procesados, nombre_archivo="articulos_procesados.csv")
+    if escritos:
+        print(f"✅ {escritos} artículos procesados guardados en 'articulos_procesados.csv'.")
     else:
         print("⚠️ No se encontraron artículos procesados para guardar en el archivo CSV.")
 
 
-def analizar_métricas_desde_csv(nombre_archivo: str = "articulos_procesados.csv") -> None:
-    """
-    Carga los artículos procesados desde un archivo CSV y genera métricas de análisis.
-    """
-    try:
-        df = pd.read_csv(nombre_archivo)
-
-        print("\n📊 Métricas Generales del CSV:")
-        print(f"Total de artículos: {len(df)}")
-        print("\n📰 Artículos por fuente:")
-        print(df['fuente'].value_counts())
-
-        print("\n😊 Distribución de Sentimientos:")
-        print(df['sentimiento'].value_counts())
-
-        print("\n⭐ Promedio de Rating por Fuente:")
-        print(df.groupby('fuente')['rating'].mean())
+# Campos de los análisis generales (resumen ejecutivo y tendencias) y cómo se muestran
+CAMPOS_ANALISIS = {
+    "titulo": "Título",
+    "resumen": "Resumen",
+    "elementos_clave": "Elementos Clave",
+    "posibles_implicaciones": "Posibles Implicaciones",
+    "preguntas_pendientes": "Preguntas Pendientes",
+}
 
-        print("\n🔥 Nivel de Riesgo por frecuencia:")
-        print(df['nivel_riesgo'].value_counts())
 
-    except Exception as e:
-        print(f"❌ Error al analizar métricas desde el CSV: {e}")
+def _mostrar_avance_analisis(encabezado: str, mostrados: set[str]) -> Callable[[object], None]:
+    """
+    Retorna la función que recibe los resultados parciales del streaming y muestra cada campo
+    del análisis apenas el modelo lo termina de generar (el último campo recibido puede seguir creciendo).
+    """
+    def al_avanzar(parcial: object) -> None:
+        if not isinstance(parcial, dict):
+            return
+        for campo in list(parcial)[:-1]:
+            if campo in CAMPOS_ANALISIS and campo not in mostrados:
+                if not mostrados:
+                    print(encabezado)
+                mostrados.add(campo)
+                print(f"{CAMPOS_ANALISIS[campo]}: {parcial[campo]}")
+    return al_avanzar
+
+
+def _mostrar_analisis(encabezado: str, analisis: AnalisisResumenDTO | TendenciasSentimientoDTO, mostrados: set[str]) -> None:
+    """
+    Muestra los campos del análisis que no se mostraron durante el streaming.
+    """
+    if not mostrados:
+        print(encabezado)
+    for campo, etiqueta in CAMPOS_ANALISIS.items():
+        if campo not in mostrados:
+            print(f"{etiqueta}: {getattr(analisis, campo)}")
 
 
 def generar_resumen_ejecutivo(modelo: str) -> None:
@@ -217,44 +714,45 @@ def generar_resumen_ejecutivo(modelo: str) -> None:
     - modelo: Nombre del modelo de IA a utilizar ("OPENAI" o "GEMINI").
     """
     try:
-        # Leer los datos procesados desde el archivo CSV
-        nombre_archivo = "articulos_procesados.csv"
-        df = pd.read_csv(nombre_archivo)
-
-        # Preparar los datos para el prompt
-        distribucion_fuente = df['fuente'].value_counts().to_dict()
-        distribucion_sentimiento = df['sentimiento'].value_counts().to_dict()
-        rating_por_fuente = df.groupby('fuente')['rating'].mean().to_dict()
-        niveles_riesgo = df['nivel_riesgo'].value_counts().to_dict()
-
-        # Crear el prompt para el resumen ejecutivo
-        prompt = PROMPT_RESUMEN_EJECUTIVO.format(
-            distribucion_fuente=distribucion_fuente,
-            distribucion_sentimiento=distribucion_sentimiento,
-            rating_por_fuente=rating_por_fuente,
-            niveles_riesgo=niveles_riesgo
-        )
+        with tramo("preparar resumen_ejecutivo", "pandas"):
+            # Leer los datos procesados desde el archivo CSV
+            nombre_archivo = "articulos_procesados.csv"
+            df = pd.read_csv(nombre_archivo)
+
+            # Preparar los datos para el prompt
+            distribucion_fuente = df['fuente'].value_counts().to_dict()
+            distribucion_sentimiento = df['sentimiento'].value_counts().to_dict()
+            rating_por_fuente = df.groupby('fuente')['rating'].mean().to_dict()
+            niveles_riesgo = df['nivel_riesgo'].value_counts().to_dict()
+
+            # Crear el prompt para el resumen ejecutivo
+            prompt = PROMPT_RESUMEN_EJECUTIVO.format(
+                distribucion_fuente=distribucion_fuente,
+                distribucion_sentimiento=distribucion_sentimiento,
+                rating_por_fuente=rating_por_fuente,
+                niveles_riesgo=niveles_riesgo
+            )
 
         print(prompt)
 
         # Crear instancia del servicio de IA
         modeloService = IAService(prompt=prompt)
 
+        # Con streaming cada campo se muestra apenas el modelo lo completa
+        encabezado = "\n📋 Resumen Ejecutivo Generado:"
+        mostrados: set[str] = set()
+        al_avanzar = _mostrar_avance_analisis(encabezado, mostrados)
+
         # Llamar al modelo para generar el resumen ejecutivo
         if modelo == "OPENAI":
-            resumen: AnalisisResumenDTO = modeloService.call_openAI(prompt_type="resumen_ejecutivo")
+            resumen: AnalisisResumenDTO = modeloService.call_openAI(prompt_type="resumen_ejecutivo", streaming=IA_STREAMING, al_avanzar=al_avanzar)
         elif modelo == "GEMINI":
-            resumen: AnalisisResumenDTO = modeloService.call_gemini(prompt_type="resumen_ejecutivo")
+            resumen: AnalisisResumenDTO = modeloService.call_gemini(prompt_type="resumen_ejecutivo", streaming=IA_STREAMING, al_avanzar=al_avanzar)
         else:
             raise ValueError(f"Modelo '{modelo}' no soportado. Modelos disponibles: {MODELOS}")
 
         # Mostrar el resumen generado
-        print("\n📋 Resumen Ejecutivo Generado:")
-        print(f"Título: {resumen.titulo}")
-        print(f"Resumen: {resumen.resumen}")
-        print(f"Elementos Clave: {resumen.elementos_clave}")
-        print(f"Posibles Implicaciones: {resumen.posibles_implicaciones}")
-        print(f"Preguntas Pendientes: {resumen.preguntas_pendientes}")
+        _mostrar_analisis(encabezado, resumen, mostrados)
 
     except Exception as e:
         print(f"❌ Error al generar el resumen ejecutivo: {e}")
@@ -268,48 +766,16 @@ def generar_tendencias_sentimiento(modelo: str) -> None:
     - modelo: Nombre del modelo de IA a utilizar ("OPENAI" o "GEMINI").
     """
     try:
-        # Leer los datos procesados desde el archivo CSV
-        nombre_archivo = "articulos_procesados.csv"
-        df = pd.read_csv(nombre_archivo)
-
-        # Preparar los datos para el prompt
-        positivo = df[df['sentimiento'] == 'positivo'].shape[0]
-        negativo = df[df['sentimiento'] == 'negativo'].shape[0]
-        neutro = df[df['sentimiento'] == 'neutro'].shape[0]
-        neutral = df[df['sentimiento'] == 'neutral'].shape[0]
-        riesgo_bajo = df[df['nivel_riesgo'] == 'bajo'].shape[0]
-        riesgo_medio = df[df['nivel_riesgo'] == 'medio'].shape[0]
-        riesgo_alto = df[df['nivel_riesgo'] == 'alto'].shape[0]
-        violencia_si = df[df['indicador_violencia'] == 'sí'].shape[0]
-        violencia_no = df[df['indicador_violencia'] == 'no'].shape[0]
-        violencia_moderado = df[df['indicador_violencia'] == 'moderado'].shape[0]
-        rating_promedio = df['rating'].mean()
-
-        # Calcular el promedio de edad sugerida
-        edades = df['edad_recomendada'].dropna()
-        edad_promedio = "+18" if "+18" in edades.values else "+13" if "+13" in edades.values else "todo público"
-
-        # Calcular el rango de fechas
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-        fecha_minima = df['fecha'].min()
-        fecha_maxima = df['fecha'].max()
-        rango_fechas = f"{fecha_minima.strftime('%Y-%m-%d')} a {fecha_maxima.strftime('%Y-%m-%d')}" if pd.notnull(fecha_minima) and pd.notnull(fecha_maxima) else "No disponible"
-
-        # Crear el prompt para el análisis de tendencias emocionales
-        prompt = PROMPT_TENDENCIAS_SENTIMIENTO.format(
-            positivo=positivo,
-            negativo=negativo,
-            neutro=neutro,
-            neutral=neutral,
-            riesgo_bajo=riesgo_bajo,
-            riesgo_medio=riesgo_medio,
-            riesgo_alto=riesgo_alto,
-            violencia_si=violencia_si,
-            violencia_no=violencia_no,
-            violencia_moderado=violencia_moderado,
-            rating_promedio=rating_promedio,
-            edad_promedio=edad_promedio
-        )
+        with tramo("preparar tendencias_sentimiento", "pandas"):
+            # Leer los datos procesados desde el archivo CSV
+            nombre_archivo = "articulos_procesados.csv"
+            df = pd.read_csv(nombre_archivo)
+
+            indicadores = calcular_indicadores_tendencias(df)
+            rango_fechas = indicadores.pop("rango_fechas")
+
+            # Crear el prompt para el análisis de tendencias emocionales
+            prompt = PROMPT_TENDENCIAS_SENTIMIENTO.format(**indicadores)
 
         print(f"\n📅 Rango de Fechas: {rango_fechas}")
         # print(prompt)
@@ -317,26 +783,145 @@ def generar_tendencias_sentimiento(modelo: str) -> None:
         # Crear instancia del servicio de IA
         modeloService = IAService(prompt=prompt)
 
+        # Con streaming cada campo se muestra apenas el modelo lo completa
+        encabezado = "\n📋 Análisis de Tendencias Emocionales Generado:"
+        mostrados: set[str] = set()
+        al_avanzar = _mostrar_avance_analisis(encabezado, mostrados)
+
         # Llamar al modelo para generar el análisis de tendencias emocionales
         if modelo == "OPENAI":
-            tendencias: TendenciasSentimientoDTO = modeloService.call_openAI(prompt_type="tendencias_sentimiento")
+            tendencias: TendenciasSentimientoDTO = modeloService.call_openAI(prompt_type="tendencias_sentimiento", streaming=IA_STREAMING, al_avanzar=al_avanzar)
         elif modelo == "GEMINI":
-            tendencias: TendenciasSentimientoDTO = modeloService.call_gemini(prompt_type="tendencias_sentimiento")
+            tendencias: TendenciasSentimientoDTO = modeloService.call_gemini(prompt_type="tendencias_sentimiento", streaming=IA_STREAMING, al_avanzar=al_avanzar)
         else:
             raise ValueError(f"Modelo '{modelo}' no soportado. Modelos disponibles: {MODELOS}")
 
         # Mostrar el análisis generado
-        print("\n📋 Análisis de Tendencias Emocionales Generado:")
-        print(f"Título: {tendencias.titulo}")
-        print(f"Resumen: {tendencias.resumen}")
-        print(f"Elementos Clave: {tendencias.elementos_clave}")
-        print(f"Posibles Implicaciones: {tendencias.posibles_implicaciones}")
-        print(f"Preguntas Pendientes: {tendencias.preguntas_pendientes}")
+        _mostrar_analisis(encabezado, tendencias, mostrados)
 
     except Exception as e:
         print(f"❌ Error al generar el análisis de tendencias emocionales: {e}")
 
 
+def mostrar_resumen_conexiones() -> None:
+    """
+    Muestra cuántas peticiones a cada proveedor reutilizaron una conexión del pool.
+    """
+    estadisticas = resumen_conexiones()
+    if not estadisticas:
+        return
+    print("\n🔌 Reutilización de conexiones HTTP por proveedor:")
+    for proveedor, datos in estadisticas.items():
+        print(
+            f"- {proveedor}: {datos['peticiones']} peticiones, "
+            f"{datos['conexiones']} conexiones abiertas, {datos['reutilizadas']} reutilizadas"
+        )
+
+
+def mostrar_resumen_cache() -> None:
+    """
+    Muestra los aciertos y fallos de la caché de respuestas de IA.
+    """
+    estadisticas = resumen_cache()
+    if estadisticas is None:
+        return
+    consultas = estadisticas["aciertos"] + estadisticas["fallos"]
+    tasa = estadisticas["aciertos"] / consultas * 100 if consultas else 0.0
+    print(f"\n♻️ Caché de respuestas IA: {estadisticas['aciertos']} aciertos, {estadisticas['fallos']} fallos ({tasa:.1f}% de aciertos)")
+
+
+def mostrar_resumen_limitadores() -> None:
+    """
+    Muestra, por proveedor de IA, los límites en uso y cuánto se esperó o se recibió 429.
+    """
+    estadisticas = resumen_limitadores()
+    if not estadisticas:
+        return
+    print("\n🚦 Límites de tasa por proveedor:")
+    for proveedor, datos in estadisticas.items():
+        print(
+            f"- {proveedor}: {datos['rpm']} RPM / {datos['tpm']} TPM al {datos['factor']:.0%}, "
+            f"{datos['esperas']} esperas ({datos['segundos_espera']:.1f} seg), {datos['limitadas']} respuestas 429"
+        )
+
+
+def mostrar_resumen_respaldos() -> None:
+    """
+    Muestra, por proveedor de IA, la tasa de peticiones de respaldo y cuántas respondieron antes que la original.
+    """
+    estadisticas = resumen_respaldos()
+    if not estadisticas:
+        return
+    print("\n🪂 Peticiones de respaldo por proveedor:")
+    for proveedor, datos in estadisticas.items():
+        tasa = datos["respaldos"] / datos["peticiones"] if datos["peticiones"] else 0.0
+        print(
+            f"- {proveedor}: {int(datos['respaldos'])} de {int(datos['peticiones'])} peticiones ({tasa:.1%}), "
+            f"{int(datos['ganados'])} ganaron a la original, {int(datos['omitidos'])} omitidas por el tope de gasto "
+            f"(umbral actual: {datos['umbral']:.1f} seg)"
+        )
+
+
+def mostrar_resumen_parseo() -> None:
+    """
+    Muestra, por proveedor de IA, cuántas respuestas se leyeron directamente, cuántas hubo que reparar
+    y la tasa de fallos de interpretación (que obligan a repetir la llamada).
+    """
+    lineas: list[str] = []
+    for proveedor in MODELOS:
+        directas = RESPUESTAS_INTERPRETADAS_IA.total(proveedor=proveedor, forma="directa")
+        reparadas = RESPUESTAS_INTERPRETADAS_IA.total(proveedor=proveedor, forma="reparada")
+        elementos_invalidos = ERRORES_PARSEO_IA.total(proveedor=proveedor, nivel="elemento")
+        errores = ERRORES_PARSEO_IA.total(proveedor=proveedor) - elementos_invalidos
+        intentos = directas + reparadas + errores
+        if intentos:
+            lineas.append(
+                f"- {proveedor}: {int(directas)} directas, {int(reparadas)} reparadas, "
+                f"{int(errores)} con error ({errores / intentos:.1%} de fallos), "
+                f"{int(elementos_invalidos)} artículos inválidos en lotes"
+            )
+    if lineas:
+        print("\n🧩 Interpretación de respuestas de IA:")
+        print("\n".join(lineas))
+
+
+def mostrar_resumen_prefijos() -> None:
+    """
+    Muestra, por proveedor de IA, qué fracción de los tokens de entrada se leyó desde la caché de prefijos del proveedor.
+    """
+    lineas: list[str] = []
+    for proveedor in MODELOS:
+        entrada = TOKENS_IA.total(proveedor=proveedor, tipo="entrada")
+        if entrada:
+            cacheados = TOKENS_CACHEADOS_IA.total(proveedor=proveedor)
+            lineas.append(f"- {proveedor}: {int(cacheados)} de {int(entrada)} tokens de entrada desde la caché ({cacheados / entrada:.1%})")
+    if lineas:
+        print("\n🗄️ Caché de prefijos de prompt en los proveedores:")
+        print("\n".join(lineas))
+
+
+def mostrar_resumen_cascada() -> None:
+    """
+    Muestra, por proveedor de IA, cuántos análisis respondió cada nivel de la cascada y por qué se escaló.
+    """
+    lineas: list[str] = []
+    for proveedor in MODELOS:
+        por_nivel = {nivel: int(ANALISIS_NIVEL_IA.total(proveedor=proveedor, nivel=nivel)) for nivel in NIVELES_MODELO}
+        total = sum(por_nivel.values())
+        if not total:
+            continue
+        niveles = ", ".join(f"{cantidad} {nivel} ({cantidad / total:.0%})" for nivel, cantidad in por_nivel.items())
+        motivos = ", ".join(
+            f"{motivo}: {int(ESCALAMIENTOS_IA.total(proveedor=proveedor, motivo=motivo))}"
+            for motivo in MOTIVOS_ESCALAMIENTO
+            if ESCALAMIENTOS_IA.total(proveedor=proveedor, motivo=motivo)
+        )
+        lineas.append(f"- {proveedor}: {niveles}" + (f"; escalamientos por {motivos}" if motivos else ""))
+    if lineas:
+        print("\n🪜 Cascada de modelos:")
+        print("\n".join(lineas))
+
+
 def procesar_datos() -> None:
     """
     Función principal para procesar datos desde periódicos y realizar operaciones en la base de datos.
@@ -352,17 +937,25 @@ def procesar_datos() -> None:
     # Cargar información hacia DB
     # cargar_datos_a_db()
 
-    # Procesar datos con modelos de IA por cada modelo
-    for modelo in MODELOS:
-        articulos_no_procesados: list[Article] = obtener_datos_de_db(modelo, False)
-        procesar_con_modelo_ia(articulos_no_procesados, modelo)
+    # Procesar datos con todos los modelos de IA en paralelo
+    with tramo("procesar_modelos_en_paralelo", "etapa"):
+        resultados = procesar_modelos_en_paralelo(MODELOS)
+    mostrar_resumen_throughput(resultados)
 
     # Llamar al método independiente para guardar los artículos procesados en un CSV
-    guardar_articulos_procesados_en_csv()
-    analizar_métricas_desde_csv()
+    with tramo("guardar_articulos_procesados_en_csv", "etapa"):
+        guardar_articulos_procesados_en_csv()
+    with tramo("analizar_métricas_desde_csv", "etapa"):
+        analizar_métricas_desde_csv()
     for modelo in MODELOS:
         #generar_resumen_ejecutivo(modelo=modelo)
-        generar_tendencias_sentimiento(modelo=modelo)
-
-
-
+        with tramo(f"generar_tendencias_sentimiento {modelo}", "etapa"):
+            generar_tendencias_sentimiento(modelo=modelo)
+
+    mostrar_resumen_conexiones()
+    mostrar_resumen_limitadores()
+    mostrar_resumen_respaldos()
+    mostrar_resumen_parseo()
+    mostrar_resumen_cascada()
+    mostrar_resumen_prefijos()
+    mostrar_resumen_cache()
@@ -1,3 +1,5 @@
+from models.entities import PromptCompilado
+
 # ----------- ANALÍTICA CON IA (TEXT PROMPTS) -----------
 
 # Opción 1: Análisis de Tendencias
@@ -114,22 +116,69 @@ El Periódico:
 Redacta un reporte comparativo sobre estilo editorial, tono y grado de riesgo en la información de cada fuente.
 """
 
-# Opción 6: Análisis de Artículo Individual
-PROMPT_ANALISIS_ARTICULO = """
-Analiza el siguiente artículo de prensa y completa estrictamente los siguientes campos en formato JSON:
+# ----------- PROMPTS COMPILADOS (PREFIJO CACHEABLE + SUFIJO POR PETICIÓN) -----------
+# Las instrucciones y el esquema van primero y son idénticos en todas las peticiones del mismo tipo:
+# OpenAI cachea automáticamente el prefijo común y Gemini lo guarda como contexto cacheado (cachedContents).
+# Los datos de cada artículo van al final, en el sufijo.
 
-Artículo:
-"{titulo}"
-"{descripcion}"
+# Opción 6: Análisis de Artículo Individual
+PREFIJO_ANALISIS_ARTICULO = """
+Analiza el artículo de prensa que aparece al final y completa estrictamente los siguientes campos en formato JSON.
 
 Devuelve tu respuesta en formato JSON respetando el siguiente esquema y sin ningún comentario adicional(un json limpio):
 
-{{
+{
     "etiquetas_ia": [ "etiqueta1", "etiqueta2", "..." ],
     "sentimiento": "positivo | negativo | neutro",
     "rating": "número_decimal_entre_1.0_y_5.0_nivel_de_impacto",
     "nivel_riesgo": "bajo | medio | alto",
     "indicador_violencia": "sí | no | moderado",
-    "edad_recomendada": "+13 | +18 | todo público"
-}}
+    "edad_recomendada": "+13 | +18 | todo público",
+    "confianza": "número_decimal_entre_0.0_y_1.0_seguridad_del_análisis"
+}
+
 """
+
+SUFIJO_ANALISIS_ARTICULO = """Artículo:
+"{titulo}"
+"{descripcion}"
+"""
+
+# Opción 7: Análisis de Varios Artículos en una sola petición
+PREFIJO_ANALISIS_ARTICULOS_LOTE = """
+Analiza cada uno de los artículos de prensa que aparecen al final (arreglo JSON con "id", "titulo" y "descripcion") de forma independiente y completa estrictamente los siguientes campos en formato JSON para cada uno.
+
+Devuelve tu respuesta como un arreglo JSON con exactamente un objeto por artículo, usando el mismo "id" recibido, respetando el siguiente esquema y sin ningún comentario adicional(un json limpio):
+
+[
+    {
+        "id": 123,
+        "etiquetas_ia": [ "etiqueta1", "etiqueta2", "..." ],
+        "sentimiento": "positivo | negativo | neutro",
+        "rating": "número_decimal_entre_1.0_y_5.0_nivel_de_impacto",
+        "nivel_riesgo": "bajo | medio | alto",
+        "indicador_violencia": "sí | no | moderado",
+        "edad_recomendada": "+13 | +18 | todo público",
+        "confianza": "número_decimal_entre_0.0_y_1.0_seguridad_del_análisis"
+    }
+]
+
+"""
+
+SUFIJO_ANALISIS_ARTICULOS_LOTE = """Artículos:
+{articulos}
+"""
+
+
+def compilar_prompt_articulo(titulo: str, descripcion: str) -> PromptCompilado:
+    """
+    Prompt de análisis de un artículo: prefijo estático de instrucciones y esquema, y el artículo como sufijo.
+    """
+    return PromptCompilado(PREFIJO_ANALISIS_ARTICULO, SUFIJO_ANALISIS_ARTICULO.format(titulo=titulo, descripcion=descripcion))
+
+
+def compilar_prompt_articulos_lote(articulos_json: str) -> PromptCompilado:
+    """
+    Prompt de análisis de varios artículos: prefijo estático de instrucciones y esquema, y el arreglo JSON como sufijo.
+    """
+    return PromptCompilado(PREFIJO_ANALISIS_ARTICULOS_LOTE, SUFIJO_ANALISIS_ARTICULOS_LOTE.format(articulos=articulos_json))
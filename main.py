@@ -1,13 +1,61 @@
-from core.processor import procesar_datos
+import argparse
+from config.settings import EJECUCION_PRESUPUESTO_SEG
+from core.processor import ejecutar_worker, procesar_datos
+from repository.connection import cerrar_pool
+from services.http_clients import cerrar_clientes
+from services.metricas import detener_exportacion_metricas, iniciar_exportacion_metricas
+from services.perfilado import finalizar_perfilado, iniciar_perfilado
+from services.plazos import iniciar_presupuesto
+from services.response_cache import cerrar_cache
 
 def main():
     """
     Entry point of the application.
     """
+    parser = argparse.ArgumentParser(description="Eva IA: scraping y análisis de noticias con IA.")
+    parser.add_argument("--streaming", action="store_true", help="Ejecuta scraping, persistencia y análisis como un flujo continuo.")
+    parser.add_argument("--max-articulos", type=int, default=50, help="Máximo de artículos a extraer por fuente (modo streaming).")
+    parser.add_argument("--csv", help="En modo streaming, escribe además las noticias extraídas en este archivo CSV.")
+    parser.add_argument("--worker", action="store_true", help="Procesa los pendientes reclamándolos con lease, para correr varios procesos a la vez.")
+    parser.add_argument("--worker-id", help="Identificador del worker (por defecto <host>:<pid>).")
+    parser.add_argument("--continuo", action="store_true", help="En modo worker, sigue esperando trabajo nuevo en vez de terminar.")
+    parser.add_argument("--lote-offline", action="store_true",
+                        help="Procesa los pendientes con las APIs batch de los proveedores (más barato, resultados en horas); retoma los trabajos de ejecuciones anteriores.")
+    parser.add_argument("--sin-esperar", action="store_true", help="Con --lote-offline, envía los trabajos y termina sin esperar los resultados.")
+    parser.add_argument("--presupuesto-seg", type=float, default=EJECUCION_PRESUPUESTO_SEG,
+                        help="Tiempo máximo de la ejecución; al agotarse se cancela el trabajo en curso y queda pendiente (0 = sin límite).")
+    parser.add_argument("--profile", action="store_true", help="Mide el tiempo de cada etapa y guarda una traza compatible con Perfetto/chrome://tracing.")
+    parser.add_argument("--profile-articulos", action="store_true", help="Con --profile, registra además un tramo por artículo y modelo.")
+    parser.add_argument("--profile-salida", default=".cache/perfiles", help="Directorio donde se guarda la traza de --profile.")
+    args = parser.parse_args()
+
     print("Welcome to the IA application!")
 
     # Llamar a la función principal de procesamiento
-    procesar_datos()
+    iniciar_presupuesto(args.presupuesto_seg)
+    iniciar_exportacion_metricas()
+    if args.profile:
+        iniciar_perfilado(por_articulo=args.profile_articulos)
+    try:
+        if args.streaming:
+            from core.pipeline import ejecutar_pipeline
+            ejecutar_pipeline(max_articulos=args.max_articulos, archivo_csv=args.csv)
+        elif args.worker:
+            ejecutar_worker(worker_id=args.worker_id, continuo=args.continuo)
+        elif args.lote_offline:
+            from core.lote_offline import ejecutar_lote_offline
+            ejecutar_lote_offline(esperar_resultados=not args.sin_esperar)
+        else:
+            procesar_datos()
+    finally:
+        # Cerrar las conexiones HTTP persistentes de los proveedores, el pool de la base de datos, la caché
+        # y la exportación de métricas (con un último volcado)
+        cerrar_clientes()
+        cerrar_pool()
+        cerrar_cache()
+        detener_exportacion_metricas()
+        if args.profile:
+            finalizar_perfilado(args.profile_salida)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
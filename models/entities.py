@@ -1,3 +1,4 @@
+import hashlib
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -34,6 +35,7 @@ class Article:
     execution_time: str | None = None           # Tiempo de procesamiento del artículo (formato string)
     is_processed: bool | None = None            # Indica si el artículo fue procesado por el modelo
     model_name: str | None = None               # Nombre del modelo IA utilizado
+    duplicate_of: int | None = None             # ID del artículo canónico si es un casi-duplicado
 
 
 @dataclass
@@ -50,6 +52,8 @@ class IALogModel:
     response_time_sec: float | None = None     # Tiempo de respuesta del modelo IA en segundos
     tokens_used: int | None = None             # Número de tokens utilizados en la respuesta
     log_date: datetime | None = None           # Fecha y hora del registro
+    model_id: str | None = None                # Modelo concreto del proveedor que respondió (ej: gpt-4o-mini)
+    model_tier: str | None = None              # Nivel de la cascada que respondió: economico o principal
 
 
 @dataclass
@@ -84,6 +88,14 @@ class ProcessStatusDTO:
     execution_time: str                         # Tiempo de procesamiento del artículo (formato string)
     model_used: str                             # Nombre del modelo IA utilizado
     is_processed: bool                          # Indica si el artículo fue procesado con éxito
+    response_time_sec: float | None = None      # Tiempo de respuesta real del proveedor en segundos
+    tokens_used: int | None = None              # Tokens informados por el proveedor (entrada + salida)
+    prompt: str | None = None                   # Prompt enviado al modelo
+    respuesta: str | None = None                # Texto devuelto por el modelo
+    confianza: float | None = None              # Confianza informada por el modelo en su análisis (0.0 a 1.0)
+    modelo_id: str | None = None                # Modelo concreto del proveedor que respondió (ej: gpt-4o-mini)
+    nivel_modelo: str | None = None             # Nivel de la cascada que respondió: economico o principal
+    motivo_escalamiento: str | None = None      # Por qué se escaló al modelo principal, si se escaló
 
 
 @dataclass
@@ -97,6 +109,27 @@ class IAProcessedData:
     nivel_riesgo: str                           # Nivel de riesgo estimado: bajo, medio o alto
     indicador_violencia: str                    # Indicación si contiene violencia
     edad_recomendada: str                       # Edad sugerida de lectura (+13, +18)
+    confianza: float                            # Confianza del modelo en su análisis (0.0 a 1.0)
+
+
+@dataclass(frozen=True)
+class PromptCompilado:
+    """
+    Prompt separado en un prefijo estático (instrucciones y esquema, igual en todas las peticiones del mismo tipo)
+    y un sufijo con los datos de la petición. Los proveedores pueden cachear el prefijo común.
+    """
+    prefijo: str                                # Instrucciones y esquema de salida
+    sufijo: str                                 # Datos de la petición (artículo o lote de artículos)
+
+    @property
+    def texto(self) -> str:
+        """Prompt completo, tal como se envía a un proveedor sin caché de prefijos."""
+        return self.prefijo + self.sufijo
+
+    @property
+    def clave_prefijo(self) -> str:
+        """Identificador estable del prefijo (para agrupar las peticiones que lo comparten)."""
+        return hashlib.sha256(self.prefijo.encode("utf-8")).hexdigest()[:16]
 
 
 @dataclass
@@ -182,4 +215,41 @@ class TendenciasSentimientoDTO:
     resumen: str                                # Resumen generado por IA
     elementos_clave: list[str]                 # Elementos clave identificados en el análisis
     posibles_implicaciones: list[str]          # Implicaciones sociales o mediáticas
-    preguntas_pendientes: list[str]            # Preguntas clave generadas por IA
\ No newline at end of file
+    preguntas_pendientes: list[str]            # Preguntas clave generadas por IA
+
+@dataclass
+class ResultadoProcesamiento:
+    """
+    Representa el resultado agregado de procesar un lote de artículos con un modelo de IA.
+    """
+    modelo: str                                 # Nombre del modelo IA utilizado
+    total: int = 0                              # Artículos intentados
+    exitosos: int = 0                           # Artículos procesados y actualizados con éxito
+    fallidos: int = 0                           # Artículos con error o respuesta inválida
+    cancelados: int = 0                         # Artículos no procesados por agotarse el presupuesto (quedan pendientes)
+    duracion_seg: float = 0.0                   # Tiempo total de pared del lote en segundos
+
+    def registrar(self, exito: bool | None) -> None:
+        """Suma el resultado de un artículo: True exitoso, False fallido, None cancelado."""
+        if exito is None:
+            self.cancelados += 1
+            return
+        self.total += 1
+        if exito:
+            self.exitosos += 1
+        else:
+            self.fallidos += 1
+
+    def acumular(self, otro: "ResultadoProcesamiento") -> None:
+        """Suma los contadores de otro resultado del mismo modelo."""
+        self.total += otro.total
+        self.exitosos += otro.exitosos
+        self.fallidos += otro.fallidos
+        self.cancelados += otro.cancelados
+
+    @property
+    def articulos_por_minuto(self) -> float:
+        """Throughput del lote expresado en artículos por minuto."""
+        if self.duracion_seg <= 0:
+            return 0.0
+        return self.total / self.duracion_seg * 60
@@ -1,7 +1,18 @@
 from .proceso_repository import (
     insertar_articulo,
+    insertar_articulos_en_lote,
     obtener_articulos_por_estado,
+    iterar_articulos_por_estado,
+    iterar_paginas_articulos_por_estado,
     actualizar_datos_ia,
+    marcar_duplicados,
+    obtener_resultado_ia,
+    obtener_clusters_duplicados,
+    guardar_resultados_en_lote,
+    reclamar_articulos,
+    reclamar_articulos_por_id,
+    liberar_leases,
+    liberar_leases_vencidos,
     verificar_status_existente,
     insertar_status
 )
\ No newline at end of file
@@ -1,5 +1,12 @@
+import threading
+import time
+from contextlib import contextmanager
 import pyodbc
-from config.settings import DB_SERVER, DB_NAME, DB_USER, DB_PASSWORD
+from config.settings import (
+    DB_SERVER, DB_NAME, DB_USER, DB_PASSWORD,
+    DB_POOL_MAX_SIZE, DB_POOL_IDLE_TIMEOUT_SEC, DB_POOL_ACQUIRE_TIMEOUT_SEC, DB_POOL_HEALTHCHECK_SEC
+)
+from services.metricas import ERRORES_DB
 
 DRIVER = '{ODBC Driver 18 for SQL Server}'
 
@@ -19,4 +26,158 @@ def get_connection():
         return pyodbc.connect(connection_string)
     except Exception as e:
         print("❌ Error al conectar a la base de datos:", e)
-        return None
\ No newline at end of file
+        return None
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones thread-safe sobre get_connection.
+
+    Mantiene hasta `max_size` conexiones abiertas, verifica con `SELECT 1` las que llevan
+    más de `healthcheck_sec` sin usarse y cierra las que superan `idle_timeout_sec` inactivas.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DB_POOL_MAX_SIZE,
+        idle_timeout_sec: float = DB_POOL_IDLE_TIMEOUT_SEC,
+        acquire_timeout_sec: float = DB_POOL_ACQUIRE_TIMEOUT_SEC,
+        healthcheck_sec: float = DB_POOL_HEALTHCHECK_SEC,
+        factory=get_connection
+    ):
+        self.max_size = max_size
+        self.idle_timeout_sec = idle_timeout_sec
+        self.acquire_timeout_sec = acquire_timeout_sec
+        self.healthcheck_sec = healthcheck_sec
+        self._factory = factory
+        self._libres: list[tuple[object, float]] = []  # (conexión, instante en que quedó libre)
+        self._en_uso = 0
+        self._cond = threading.Condition()
+
+    def _total(self) -> int:
+        return len(self._libres) + self._en_uso
+
+    def _desalojar_inactivas(self) -> list:
+        """Quita del pool las conexiones inactivas por más de idle_timeout_sec. Requiere el lock."""
+        limite = time.monotonic() - self.idle_timeout_sec
+        vencidas = [conn for conn, libre_desde in self._libres if libre_desde < limite]
+        self._libres = [(conn, libre_desde) for conn, libre_desde in self._libres if libre_desde >= limite]
+        return vencidas
+
+    @staticmethod
+    def _cerrar(conexiones: list) -> None:
+        for conn in conexiones:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _esta_sana(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def adquirir(self):
+        """
+        Obtiene una conexión del pool, creando una nueva si hay cupo.
+        Espera hasta acquire_timeout_sec si el pool está lleno.
+        """
+        fin_espera = time.monotonic() + self.acquire_timeout_sec
+        while True:
+            with self._cond:
+                vencidas = self._desalojar_inactivas()
+                while not self._libres and self._total() >= self.max_size:
+                    restante = fin_espera - time.monotonic()
+                    if restante <= 0:
+                        self._cerrar(vencidas)
+                        raise TimeoutError(f"No hay conexiones disponibles en el pool (máximo {self.max_size}).")
+                    self._cond.wait(restante)
+                    vencidas += self._desalojar_inactivas()
+
+                self._en_uso += 1
+                conn, libre_desde = self._libres.pop() if self._libres else (None, 0.0)
+            self._cerrar(vencidas)
+
+            if conn is None:
+                conn = self._factory()
+                if conn is None:
+                    self._liberar_cupo()
+                    raise ConnectionError("No fue posible abrir una conexión a la base de datos.")
+                return conn
+
+            if time.monotonic() - libre_desde < self.healthcheck_sec or self._esta_sana(conn):
+                return conn
+
+            # La conexión quedó inutilizable: se descarta y se vuelve a intentar
+            self._cerrar([conn])
+            self._liberar_cupo()
+
+    def _liberar_cupo(self) -> None:
+        with self._cond:
+            self._en_uso -= 1
+            self._cond.notify()
+
+    def devolver(self, conn, descartar: bool = False) -> None:
+        """
+        Devuelve una conexión al pool. Si `descartar` es True la conexión se cierra.
+        """
+        if descartar:
+            self._cerrar([conn])
+            self._liberar_cupo()
+            return
+        with self._cond:
+            self._en_uso -= 1
+            self._libres.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def cerrar(self) -> None:
+        """
+        Cierra todas las conexiones libres del pool.
+        """
+        with self._cond:
+            libres = [conn for conn, _ in self._libres]
+            self._libres = []
+        self._cerrar(libres)
+
+
+_pool = PoolConexiones()
+
+
+@contextmanager
+def conexion():
+    """
+    Context manager que presta una conexión del pool y la devuelve al salir.
+
+    Al devolverla siempre se hace rollback, así una transacción que el bloque dejó sin
+    confirmar (por una excepción o por olvidar el commit) no pasa al siguiente usuario;
+    tras un commit el rollback no tiene efecto. Si el rollback falla, la conexión se descarta.
+    """
+    try:
+        conn = _pool.adquirir()
+    except Exception:
+        ERRORES_DB.incrementar()
+        raise
+    descartar = False
+    try:
+        yield conn
+    except Exception:
+        ERRORES_DB.incrementar()
+        raise
+    finally:
+        try:
+            conn.rollback()
+        except Exception:
+            descartar = True
+        _pool.devolver(conn, descartar=descartar)
+
+
+def cerrar_pool() -> None:
+    """
+    Cierra las conexiones del pool. Debe llamarse al terminar la ejecución.
+    """
+    _pool.cerrar()
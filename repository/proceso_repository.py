@@ -1,13 +1,50 @@
+import time
+from collections.abc import Iterator
 from models.entities import Article, Noticia, ProcessStatusDTO, IALogModel
-from repository.connection import get_connection
+from config.settings import BULK_TAMANO_LOTE, DB_TAMANO_PAGINA, DB_FETCH_TAMANO
+from repository.connection import conexion
+from services.metricas import DURACION_DB, medir_tiempo
+from services.perfilado import trazar, tramo
 from . import queries
 
+
+def _medir(funcion):
+    """
+    Registra la duración de cada llamada a la operación en la métrica db_operacion_segundos
+    y, con el perfilado activo, como un tramo de la etapa "db".
+    """
+    return trazar("db")(medir_tiempo(DURACION_DB, operacion=funcion.__name__)(funcion))
+
 # ----------- QUERYS (SELECT) -----------
 
+def _fila_a_article(fila) -> Article:
+    """
+    Construye un Article a partir de una fila de SELECT_ARTICULOS_PENDIENTES / SELECT_ARTICULOS_PROCESADOS.
+    """
+    return Article(
+        id=fila.ID,
+        titulo=fila.TITULO,
+        fecha=fila.FECHA,
+        url=fila.URL,
+        fuente=fila.FUENTE,
+        descripcion=fila.DESCRIPCION,
+        etiquetas_ia=fila.ETIQUETAS_IA,
+        sentimiento=fila.SENTIMIENTO,
+        rating=fila.RATING,
+        nivel_riesgo=fila.NIVEL_RIESGO,
+        indicador_violencia=fila.INDICADOR_VIOLENCIA,
+        edad_recomendada=fila.EDAD_RECOMENDADA,
+        execution_time=fila.EXECUTION_TIME,
+        is_processed=bool(fila.IS_PROCESSED),
+        model_name=fila.MODEL_NAME,
+        duplicate_of=fila.DUPLICATE_OF
+    )
+
+@_medir
 def obtener_articulos_por_estado(estado_procesado: bool, modelo: str) -> list[Article]:
     """
     Obtiene artículos filtrados por el campo IS_PROCESSED y el modelo de IA.
-    Si un artículo no tiene un registro en MODEL_PROCESS_STATUS, también será incluido.
+    Cada artículo tiene un registro en MODEL_PROCESS_STATUS por modelo, creado al insertarlo.
 
     Parámetros:
     - estado_procesado (bool): True para artículos procesados, False para no procesados.
@@ -16,39 +53,132 @@ def obtener_articulos_por_estado(estado_procesado: bool, modelo: str) -> list[Ar
     Retorna:
     - list[Article]: Lista de objetos Article con los datos del artículo y su estado de procesamiento.
     """
-    conn = get_connection()
-    if not conn:
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            consulta = queries.SELECT_ARTICULOS_PROCESADOS if estado_procesado else queries.SELECT_ARTICULOS_PENDIENTES
+            cursor.execute(consulta, (modelo,))
+            filas = cursor.fetchall()
+            return [_fila_a_article(fila) for fila in filas]
+    except Exception as e:
+        print("❌ Error al obtener artículos🚀🚀:", e)
         return []
+
+def iterar_paginas_articulos_por_estado(
+    estado_procesado: bool,
+    modelo: str,
+    tamano_pagina: int = DB_TAMANO_PAGINA
+) -> Iterator[list[Article]]:
+    """
+    Recorre los artículos filtrados por IS_PROCESSED y modelo en páginas ordenadas por ID.
+
+    Usa paginación por clave (ID > último ID leído), por lo que cada página es una consulta
+    corta con su propia conexión del pool y no se mantiene abierto un result set durante
+    el procesamiento. Es estable aunque los artículos cambien de estado entre páginas.
+
+    Parámetros:
+    - estado_procesado (bool): True para artículos procesados, False para no procesados.
+    - modelo (str): Nombre del modelo de IA ("GEMINI", "OPENAI").
+    - tamano_pagina (int): Cantidad máxima de artículos por página.
+
+    Retorna:
+    - Iterator[list[Article]]: Páginas de artículos en orden de ID.
+    """
+    consulta = queries.SELECT_ARTICULOS_PROCESADOS_PAGINA if estado_procesado else queries.SELECT_ARTICULOS_PENDIENTES_PAGINA
+    ultimo_id = 0
+    while True:
+        try:
+            with (
+                tramo("iterar_paginas_articulos_por_estado", "db", ultimo_id=ultimo_id),
+                DURACION_DB.cronometrar(operacion="iterar_paginas_articulos_por_estado"),
+                conexion() as conn
+            ):
+                cursor = conn.cursor()
+                cursor.execute(consulta, (tamano_pagina, modelo, ultimo_id))
+                pagina: list[Article] = []
+                while True:
+                    filas = cursor.fetchmany(DB_FETCH_TAMANO)
+                    if not filas:
+                        break
+                    pagina.extend(_fila_a_article(fila) for fila in filas)
+        except Exception as e:
+            print(f"❌ Error al obtener la página de artículos posterior al ID {ultimo_id}:", e)
+            return
+
+        if not pagina:
+            return
+        yield pagina
+        if len(pagina) < tamano_pagina:
+            return
+        ultimo_id = pagina[-1].id
+
+def iterar_articulos_por_estado(
+    estado_procesado: bool,
+    modelo: str,
+    tamano_pagina: int = DB_TAMANO_PAGINA
+) -> Iterator[Article]:
+    """
+    Igual que iterar_paginas_articulos_por_estado, pero entrega los artículos de a uno.
+    """
+    for pagina in iterar_paginas_articulos_por_estado(estado_procesado, modelo, tamano_pagina):
+        yield from pagina
+
+@_medir
+def obtener_resultado_ia(articulo_id: int, modelo: str) -> ProcessStatusDTO | None:
+    """
+    Obtiene el resultado de IA ya guardado de un artículo para un modelo.
+
+    Parámetros:
+    - articulo_id (int): ID del artículo.
+    - modelo (str): Nombre del modelo de IA.
+
+    Retorna:
+    - ProcessStatusDTO | None: Resultado procesado, o None si el artículo aún no fue procesado o hay error.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute(queries.SELECT_ARTICULOS_POR_ESTADO, (modelo, int(estado_procesado)))
-        filas = cursor.fetchall()
-        return [
-            Article(
-                id=fila.ID,
-                titulo=fila.TITULO,
-                fecha=fila.FECHA,
-                url=fila.URL,
-                fuente=fila.FUENTE,
-                descripcion=fila.DESCRIPCION,
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.SELECT_RESULTADO_IA, (articulo_id, modelo))
+            fila = cursor.fetchone()
+            if not fila:
+                return None
+            return ProcessStatusDTO(
                 etiquetas_ia=fila.ETIQUETAS_IA,
                 sentimiento=fila.SENTIMIENTO,
-                rating=fila.RATING,
+                rating=float(fila.RATING) if fila.RATING is not None else None,
                 nivel_riesgo=fila.NIVEL_RIESGO,
                 indicador_violencia=fila.INDICADOR_VIOLENCIA,
+                status_code=200,
                 edad_recomendada=fila.EDAD_RECOMENDADA,
                 execution_time=fila.EXECUTION_TIME,
-                is_processed=bool(fila.IS_PROCESSED),
-                model_name=fila.MODEL_NAME
+                model_used=modelo,
+                is_processed=True
             )
-            for fila in filas
-        ]
     except Exception as e:
-        print("❌ Error al obtener artículos🚀🚀:", e)
-        return []
-    finally:
-        conn.close()
+        print(f"❌ Error al obtener el resultado IA del artículo ID {articulo_id} y modelo {modelo}:", e)
+        return None
+
+@_medir
+def obtener_clusters_duplicados() -> dict[int, list[int]]:
+    """
+    Obtiene los grupos de artículos casi-duplicados registrados en PROCESSED_ARTICLES.
+
+    Retorna:
+    - dict[int, list[int]]: ID canónico -> IDs de sus duplicados.
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.SELECT_CLUSTERS_DUPLICADOS)
+            clusters: dict[int, list[int]] = {}
+            for fila in cursor.fetchall():
+                clusters.setdefault(fila.DUPLICATE_OF, []).append(fila.ID)
+            return clusters
+    except Exception as e:
+        print("❌ Error al obtener los grupos de duplicados:", e)
+        return {}
 
+@_medir
 def verificar_status_existente(articulo_id: int, modelo: str) -> bool:
     """
     Verifica si ya existe un registro en MODEL_PROCESS_STATUS para un artículo y modelo.
@@ -60,22 +190,118 @@ def verificar_status_existente(articulo_id: int, modelo: str) -> bool:
     Retorna:
     - bool: True si existe el registro, False si no existe o hay error.
     """
-    conn = get_connection()
-    if not conn:
-        return False
     try:
-        cursor = conn.cursor()
-        cursor.execute(queries.EXISTE_STATUS, (articulo_id, modelo))
-        existe = cursor.fetchone()[0] > 0
-        return existe
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.EXISTE_STATUS, (articulo_id, modelo))
+            existe = cursor.fetchone()[0] > 0
+            return existe
     except Exception as e:
         print(f"❌ Error al verificar el estado del artículo ID {articulo_id} y modelo {modelo}:", e)
         return False
-    finally:
-        conn.close()
+
+# ----------- RECLAMO DE TRABAJO CON LEASE -----------
+
+@_medir
+def reclamar_articulos(modelo: str, worker_id: str, cantidad: int, lease_seg: int) -> list[Article]:
+    """
+    Reclama de forma atómica hasta `cantidad` artículos pendientes para un modelo.
+
+    Las filas reclamadas quedan asociadas a `worker_id` hasta que se procesan o vence el lease
+    (`lease_seg` segundos); mientras tanto ningún otro worker puede reclamarlas. Las filas con
+    lease vencido (por ejemplo, de un worker que se detuvo) vuelven a estar disponibles.
+
+    Parámetros:
+    - modelo (str): Nombre del modelo de IA ("GEMINI", "OPENAI").
+    - worker_id (str): Identificador del worker que reclama.
+    - cantidad (int): Máximo de artículos a reclamar.
+    - lease_seg (int): Duración del lease en segundos. Debe superar el tiempo de procesar el lote.
+
+    Retorna:
+    - list[Article]: Artículos reclamados en orden de ID, o lista vacía si no hay trabajo o hay error.
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.RECLAMAR_ARTICULOS, (cantidad, modelo, worker_id, lease_seg, modelo))
+            articulos = [_fila_a_article(fila) for fila in cursor.fetchall()]
+            conn.commit()
+            return articulos
+    except Exception as e:
+        print(f"❌ Error al reclamar artículos para el modelo {modelo}:", e)
+        return []
+
+@_medir
+def reclamar_articulos_por_id(modelo: str, worker_id: str, ids: list[int], lease_seg: int) -> list[Article]:
+    """
+    Reclama (o renueva el lease de) los artículos indicados que siguen pendientes para un modelo.
+
+    Se toman los que ya son de `worker_id` y los que no tienen un lease vigente de otro worker,
+    por ejemplo porque el lease de `worker_id` venció y se liberaron mientras tanto.
+
+    Retorna:
+    - list[Article]: Artículos reclamados en orden de ID.
+
+    Lanza la excepción de la base de datos si falla, para no confundir un error con "no queda nada pendiente".
+    """
+    if not ids:
+        return []
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                queries.RECLAMAR_ARTICULOS_POR_ID,
+                (worker_id, lease_seg, ",".join(str(articulo_id) for articulo_id in ids), modelo, worker_id, modelo)
+            )
+            articulos = [_fila_a_article(fila) for fila in cursor.fetchall()]
+            conn.commit()
+            return articulos
+    except Exception as e:
+        print(f"❌ Error al reclamar los artículos de {worker_id} para el modelo {modelo}:", e)
+        raise
+
+@_medir
+def liberar_leases(worker_id: str) -> int:
+    """
+    Libera los artículos reclamados por un worker que siguen pendientes, para que otro
+    worker pueda tomarlos sin esperar a que venza el lease.
+
+    Retorna:
+    - int: Cantidad de filas liberadas (0 si hay error).
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.LIBERAR_LEASES_WORKER, (worker_id,))
+            liberadas = cursor.rowcount
+            conn.commit()
+            return liberadas
+    except Exception as e:
+        print(f"❌ Error al liberar los artículos del worker {worker_id}:", e)
+        return 0
+
+@_medir
+def liberar_leases_vencidos() -> int:
+    """
+    Libera los artículos pendientes cuyo lease ya venció.
+
+    Retorna:
+    - int: Cantidad de filas recuperadas (0 si hay error).
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.LIBERAR_LEASES_VENCIDOS)
+            recuperadas = cursor.rowcount
+            conn.commit()
+            return recuperadas
+    except Exception as e:
+        print("❌ Error al recuperar los leases vencidos:", e)
+        return 0
 
 # ----------- COMMANDS (INSERT/UPDATE) -----------
 
+@_medir
 def insertar_articulo(noticia: Noticia) -> int | None:
     """
     Inserta un artículo en la tabla PROCESSED_ARTICLES.
@@ -91,27 +317,24 @@ def insertar_articulo(noticia: Noticia) -> int | None:
     Retorna:
     - int | None: ID del artículo insertado o None si falla.
     """
-    conn = get_connection()
-    if not conn:
-        return None
     try:
-        cursor = conn.cursor()
-        cursor.execute(queries.INSERT_ARTICULO, (
-            noticia.titulo,
-            noticia.fecha,
-            noticia.url,
-            noticia.fuente,
-            noticia.descripcion
-        ))
-        id_insertado = cursor.fetchone()[0]
-        conn.commit()
-        return id_insertado
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.INSERT_ARTICULO, (
+                noticia.titulo,
+                noticia.fecha,
+                noticia.url,
+                noticia.fuente,
+                noticia.descripcion
+            ))
+            id_insertado = cursor.fetchone()[0]
+            conn.commit()
+            return id_insertado
     except Exception as e:
         print("❌ Error al insertar artículo:", e)
         return None
-    finally:
-        conn.close()
 
+@_medir
 def insertar_status(articulo_id: int, modelo: str, estado_procesado: bool) -> bool:
     """
     Inserta un nuevo estado en MODEL_PROCESS_STATUS.
@@ -124,21 +347,93 @@ def insertar_status(articulo_id: int, modelo: str, estado_procesado: bool) -> bo
     Retorna:
     - bool: True si la inserción fue exitosa, False si hubo error.
     """
-    conn = get_connection()
-    if not conn:
-        return False
     try:
-        cursor = conn.cursor()
-        cursor.execute(queries.INSERTAR_STATUS, (articulo_id, modelo, int(estado_procesado)))
-        conn.commit()
-        print(f"✅ Nuevo estado insertado para el artículo ID {articulo_id} y modelo {modelo}.")
-        return True
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.INSERTAR_STATUS, (articulo_id, modelo, int(estado_procesado)))
+            conn.commit()
+            print(f"✅ Nuevo estado insertado para el artículo ID {articulo_id} y modelo {modelo}.")
+            return True
     except Exception as e:
         print(f"❌ Error al insertar el estado del artículo ID {articulo_id} y modelo {modelo}:", e)
         return False
-    finally:
-        conn.close()
 
+@_medir
+def insertar_articulos_en_lote(noticias: list[Noticia], modelos: list[str], tamano_lote: int = BULK_TAMANO_LOTE) -> list[int | None]:
+    """
+    Inserta muchos artículos y sus registros de MODEL_PROCESS_STATUS con pocas sentencias por lote.
+
+    Cada lote se carga con fast_executemany en una tabla temporal, se pasa a PROCESSED_ARTICLES
+    con un MERGE que devuelve los IDs generados y se crean los estados pendientes de cada modelo
+    con un INSERT ... SELECT. Cada lote se confirma en su propia transacción.
+
+    Parámetros:
+    - noticias (list[Noticia]): Artículos a insertar.
+    - modelos (list[str]): Modelos para los que se crea un estado pendiente.
+    - tamano_lote (int): Cantidad de artículos por transacción.
+
+    Retorna:
+    - list[int | None]: IDs generados, en el mismo orden que `noticias`. Los artículos de lotes fallidos quedan en None.
+    """
+    ids_insertados: list[int | None] = []
+    inicio = time.perf_counter()
+
+    for desde in range(0, len(noticias), tamano_lote):
+        lote = noticias[desde:desde + tamano_lote]
+        try:
+            with conexion() as conn:
+                cursor = conn.cursor()
+                cursor.execute(queries.CREAR_STAGING_ARTICULOS)
+                cursor.fast_executemany = True
+                cursor.executemany(queries.INSERT_STAGING_ARTICULO, [
+                    (orden, noticia.titulo, noticia.fecha, noticia.url, noticia.fuente, noticia.descripcion)
+                    for orden, noticia in enumerate(lote)
+                ])
+                cursor.fast_executemany = False
+                cursor.execute(queries.MERGE_ARTICULOS_DESDE_STAGING)
+                for modelo in modelos:
+                    cursor.execute(queries.INSERTAR_STATUS_DESDE_STAGING, (modelo,))
+                cursor.execute(queries.SELECT_IDS_INSERTADOS)
+                ids_lote = [fila.ID for fila in cursor.fetchall()]
+                cursor.execute(queries.BORRAR_STAGING_ARTICULOS)
+                conn.commit()
+                ids_insertados.extend(ids_lote)
+                print(f"✅ Lote de {len(ids_lote)} artículos insertado (artículos {desde + 1}-{desde + len(lote)}).")
+        except Exception as e:
+            print(f"❌ Error al insertar el lote de artículos {desde + 1}-{desde + len(lote)}:", e)
+            ids_insertados.extend([None] * len(lote))
+
+    duracion = time.perf_counter() - inicio
+    total_insertados = sum(1 for articulo_id in ids_insertados if articulo_id is not None)
+    filas_por_seg = total_insertados / duracion if duracion > 0 else 0.0
+    print(f"🚀 Ingesta masiva: {total_insertados} artículos en {duracion:.2f} seg ({filas_por_seg:.1f} filas/seg).")
+    return ids_insertados
+
+@_medir
+def marcar_duplicados(pares: list[tuple[int, int]]) -> bool:
+    """
+    Marca artículos como casi-duplicados de su artículo canónico.
+
+    Parámetros:
+    - pares (list[tuple[int, int]]): Pares (ID canónico, ID duplicado).
+
+    Retorna:
+    - bool: True si la actualización fue exitosa, False si hubo error.
+    """
+    if not pares:
+        return True
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            cursor.executemany(queries.MARCAR_DUPLICADO, pares)
+            conn.commit()
+            return True
+    except Exception as e:
+        print("❌ Error al marcar artículos duplicados:", e)
+        return False
+
+@_medir
 def insertar_log(
     article_id: int,
     model_name: str,
@@ -148,7 +443,9 @@ def insertar_log(
     filtered_response: str | None = None,
     response_time_sec: float | None = None,
     tokens_used: int | None = None,
-    response_date: str | None = None
+    response_date: str | None = None,
+    model_id: str | None = None,
+    model_tier: str | None = None
 ) -> int | None:
     """
     Inserta un registro en la tabla de logs IA_RESPONSE_LOG.
@@ -163,35 +460,36 @@ def insertar_log(
     - response_time_sec: Tiempo de respuesta en segundos (opcional).
     - tokens_used: Número de tokens utilizados durante el procesamiento (opcional).
     - response_date: Fecha y hora del log (formato string, opcional).
+    - model_id: Modelo concreto del proveedor que respondió (opcional).
+    - model_tier: Nivel de la cascada que respondió, economico o principal (opcional).
 
     Retorna:
     - El ID generado del registro insertado (int) o None si falló.
     """
-    conn = get_connection()
-    if not conn:
-        return None
     try:
-        cursor = conn.cursor()
-        cursor.execute(queries.INSERT_LOG, (
-            article_id,
-            model_name,
-            prompt,
-            response,
-            filtered_response,
-            status_code,
-            response_time_sec,
-            tokens_used,
-            response_date
-        ))
-        id_insertado = cursor.fetchone()[0]
-        conn.commit()
-        return id_insertado
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.INSERT_LOG, (
+                article_id,
+                model_name,
+                prompt,
+                response,
+                filtered_response,
+                status_code,
+                response_time_sec,
+                tokens_used,
+                response_date,
+                model_id,
+                model_tier
+            ))
+            id_insertado = cursor.fetchone()[0]
+            conn.commit()
+            return id_insertado
     except Exception as e:
         print("❌ Error al insertar log:", e)
         return None
-    finally:
-        conn.close()
 
+@_medir
 def insertar_log(log: IALogModel) -> int | None:
     """
     Inserta un registro en la tabla de logs IA_RESPONSE_LOG usando un objeto IALogModel.
@@ -202,60 +500,121 @@ def insertar_log(log: IALogModel) -> int | None:
     Retorna:
     - El ID generado del registro insertado (int) o None si falló.
     """
-    conn = get_connection()
-    if not conn:
-        return None
     try:
-        cursor = conn.cursor()
-        cursor.execute(queries.INSERT_LOG, (
-            log.article_id,
-            log.model,
-            log.prompt,
-            log.response,
-            log.filtered_response,
-            log.status_code,
-            log.response_time_sec,
-            log.tokens_used,
-            log.log_date.strftime("%Y-%m-%d %H:%M:%S") if log.log_date else None
-        ))
-        id_insertado = cursor.fetchone()[0]
-        conn.commit()
-        return id_insertado
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.INSERT_LOG, (
+                log.article_id,
+                log.model,
+                log.prompt,
+                log.response,
+                log.filtered_response,
+                log.status_code,
+                log.response_time_sec,
+                log.tokens_used,
+                log.log_date.strftime("%Y-%m-%d %H:%M:%S") if log.log_date else None,
+                log.model_id,
+                log.model_tier
+            ))
+            id_insertado = cursor.fetchone()[0]
+            conn.commit()
+            return id_insertado
     except Exception as e:
         print("❌ Error al insertar log:", e)
         return None
-    finally:
-        conn.close()
 
-def actualizar_datos_ia(articulo_id: int, datos_ia: ProcessStatusDTO) -> bool:
+@_medir
+def actualizar_datos_ia(articulo_id: int, datos_ia: ProcessStatusDTO, worker_id: str | None = None) -> bool:
     """
     Actualiza los datos generados por la IA en la tabla MODEL_PROCESS_STATUS.
+    Con `worker_id`, no pisa un artículo cuyo lease vigente tiene otro worker.
     """
-    conn = get_connection()
-    if not conn:
-        return False
     try:
-        cursor = conn.cursor()
-
-        # Convertir lista de etiquetas a string
-        etiquetas_str = ", ".join(datos_ia.etiquetas_ia) if isinstance(datos_ia.etiquetas_ia, list) else datos_ia.etiquetas_ia
-
-        cursor.execute(queries.UPDATE_ARTICULO_IA, (
-            etiquetas_str,
-            datos_ia.sentimiento,
-            datos_ia.rating,
-            datos_ia.nivel_riesgo,
-            datos_ia.indicador_violencia,
-            datos_ia.edad_recomendada,
-            datos_ia.execution_time,
-            articulo_id,
-            datos_ia.model_used
-        ))
-        conn.commit()
-        return True
+        with conexion() as conn:
+            cursor = conn.cursor()
+
+            # Convertir lista de etiquetas a string
+            etiquetas_str = ", ".join(datos_ia.etiquetas_ia) if isinstance(datos_ia.etiquetas_ia, list) else datos_ia.etiquetas_ia
+
+            cursor.execute(queries.UPDATE_ARTICULO_IA, (
+                etiquetas_str,
+                datos_ia.sentimiento,
+                datos_ia.rating,
+                datos_ia.nivel_riesgo,
+                datos_ia.indicador_violencia,
+                datos_ia.edad_recomendada,
+                datos_ia.execution_time,
+                articulo_id,
+                datos_ia.model_used,
+                worker_id
+            ))
+            conn.commit()
+            return True
     except Exception as e:
         print(f"❌ Error al actualizar los datos del artículo ID {articulo_id}:", e)
         return False
-    finally:
-        conn.close()
 
+
+
+@_medir
+def guardar_resultados_en_lote(
+    actualizaciones: list[tuple[int, ProcessStatusDTO]],
+    logs: list[IALogModel],
+    worker_id: str | None = None
+) -> bool:
+    """
+    Guarda en una sola transacción un lote de resultados de IA y sus logs.
+
+    Parámetros:
+    - actualizaciones: Pares (ID del artículo, ProcessStatusDTO) para MODEL_PROCESS_STATUS.
+    - logs: Registros IALogModel para IA_RESPONSE_LOG.
+    - worker_id: Worker (o trabajo por lotes) dueño de los leases. Los artículos cuyo lease vigente
+      tiene otro worker no se actualizan: su resultado lo guarda el nuevo dueño.
+
+    Retorna:
+    - bool: True si el lote completo fue confirmado, False si hubo error (no se guarda nada).
+    """
+    if not actualizaciones and not logs:
+        return True
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            if actualizaciones:
+                cursor.executemany(queries.UPDATE_ARTICULO_IA, [
+                    (
+                        ", ".join(datos_ia.etiquetas_ia) if isinstance(datos_ia.etiquetas_ia, list) else datos_ia.etiquetas_ia,
+                        datos_ia.sentimiento,
+                        datos_ia.rating,
+                        datos_ia.nivel_riesgo,
+                        datos_ia.indicador_violencia,
+                        datos_ia.edad_recomendada,
+                        datos_ia.execution_time,
+                        articulo_id,
+                        datos_ia.model_used,
+                        worker_id
+                    )
+                    for articulo_id, datos_ia in actualizaciones
+                ])
+            if logs:
+                cursor.executemany(queries.INSERT_LOG_LOTE, [
+                    (
+                        log.article_id,
+                        log.model,
+                        log.prompt,
+                        log.response,
+                        log.filtered_response,
+                        log.status_code,
+                        log.response_time_sec,
+                        log.tokens_used,
+                        log.log_date.strftime("%Y-%m-%d %H:%M:%S") if log.log_date else None,
+                        log.model_id,
+                        log.model_tier
+                    )
+                    for log in logs
+                ])
+            conn.commit()
+            return True
+    except Exception as e:
+        print(f"❌ Error al guardar el lote de {len(actualizaciones)} resultados y {len(logs)} logs:", e)
+        return False
@@ -1,13 +1,18 @@
 # ----------- QUERYS (SELECT) -----------
 
-SELECT_ARTICULOS_POR_ESTADO = """
-    SELECT 
+# Las consultas por estado usan el literal IS_PROCESSED = 0 / 1 (no un parámetro) para que el
+# optimizador pueda usar los índices filtrados IX_ModelStatus_Pendientes / IX_ModelStatus_Procesados.
+# Todo artículo tiene su fila de estado por modelo (ver sql/migrations/002_indices_estado_proceso.sql),
+# por lo que basta un INNER JOIN sin COALESCE. Los pendientes excluyen los reclamados por un worker
+# con lease vigente.
+_COLUMNAS_ARTICULO_ESTADO = """
         pa.ID, 
         pa.TITULO, 
         pa.FECHA, 
         pa.URL, 
         pa.FUENTE, 
         pa.DESCRIPCION,
+        pa.DUPLICATE_OF,
         mps.ETIQUETAS_IA, 
         mps.SENTIMIENTO, 
         mps.RATING, 
@@ -15,12 +20,61 @@ SELECT_ARTICULOS_POR_ESTADO = """
         mps.INDICADOR_VIOLENCIA, 
         mps.EDAD_RECOMENDADA, 
         mps.EXECUTION_TIME,
-        COALESCE(mps.IS_PROCESSED, 0) AS IS_PROCESSED,
+        mps.IS_PROCESSED,
         mps.MODEL_NAME
-    FROM PROCESO.PROCESSED_ARTICLES pa
-    LEFT JOIN PROCESO.MODEL_PROCESS_STATUS mps
-        ON pa.ID = mps.ARTICLE_ID AND mps.MODEL_NAME = ?
-    WHERE COALESCE(mps.IS_PROCESSED, 0) = ?
+    FROM PROCESO.MODEL_PROCESS_STATUS mps
+    INNER JOIN PROCESO.PROCESSED_ARTICLES pa
+        ON pa.ID = mps.ARTICLE_ID
+"""
+
+# Parámetros: (modelo)
+SELECT_ARTICULOS_PENDIENTES = f"""
+    SELECT {_COLUMNAS_ARTICULO_ESTADO}
+    WHERE mps.MODEL_NAME = ? AND mps.IS_PROCESSED = 0
+        AND (mps.LEASE_EXPIRES IS NULL OR mps.LEASE_EXPIRES < SYSUTCDATETIME())
+    ORDER BY mps.ARTICLE_ID
+"""
+
+SELECT_ARTICULOS_PROCESADOS = f"""
+    SELECT {_COLUMNAS_ARTICULO_ESTADO}
+    WHERE mps.MODEL_NAME = ? AND mps.IS_PROCESSED = 1
+    ORDER BY mps.ARTICLE_ID
+"""
+
+SELECT_RESULTADO_IA = """
+    SELECT
+        ETIQUETAS_IA,
+        SENTIMIENTO,
+        RATING,
+        NIVEL_RIESGO,
+        INDICADOR_VIOLENCIA,
+        EDAD_RECOMENDADA,
+        EXECUTION_TIME
+    FROM PROCESO.MODEL_PROCESS_STATUS
+    WHERE ARTICLE_ID = ? AND MODEL_NAME = ? AND IS_PROCESSED = 1
+"""
+
+SELECT_CLUSTERS_DUPLICADOS = """
+    SELECT DUPLICATE_OF, ID
+    FROM PROCESO.PROCESSED_ARTICLES
+    WHERE DUPLICATE_OF IS NOT NULL
+    ORDER BY DUPLICATE_OF, ID
+"""
+
+# Paginación por clave: parámetros (tamaño de página, modelo, último ID leído)
+SELECT_ARTICULOS_PENDIENTES_PAGINA = f"""
+    SELECT TOP (?) {_COLUMNAS_ARTICULO_ESTADO}
+    WHERE mps.MODEL_NAME = ? AND mps.IS_PROCESSED = 0
+        AND (mps.LEASE_EXPIRES IS NULL OR mps.LEASE_EXPIRES < SYSUTCDATETIME())
+        AND mps.ARTICLE_ID > ?
+    ORDER BY mps.ARTICLE_ID
+"""
+
+SELECT_ARTICULOS_PROCESADOS_PAGINA = f"""
+    SELECT TOP (?) {_COLUMNAS_ARTICULO_ESTADO}
+    WHERE mps.MODEL_NAME = ? AND mps.IS_PROCESSED = 1
+        AND mps.ARTICLE_ID > ?
+    ORDER BY mps.ARTICLE_ID
 """
 
 EXISTE_STATUS = """
@@ -44,6 +98,8 @@ INSERTAR_STATUS = """
     VALUES (?, ?, ?)
 """
 
+# Solo guarda si quien escribe tiene el lease (parámetro worker, None fuera de los workers) o si nadie lo tiene vigente:
+# un worker cuyo lease venció y fue reclamado por otro no pisa el resultado del nuevo dueño
 UPDATE_ARTICULO_IA = """
     UPDATE PROCESO.MODEL_PROCESS_STATUS
     SET 
@@ -54,8 +110,17 @@ UPDATE_ARTICULO_IA = """
         INDICADOR_VIOLENCIA = ?, 
         EDAD_RECOMENDADA = ?, 
         EXECUTION_TIME = ?,
-        IS_PROCESSED = 1
+        IS_PROCESSED = 1,
+        WORKER_ID = NULL,
+        LEASE_EXPIRES = NULL
     WHERE ARTICLE_ID = ? AND MODEL_NAME = ?
+        AND (WORKER_ID = ? OR WORKER_ID IS NULL OR LEASE_EXPIRES < SYSUTCDATETIME())
+"""
+
+MARCAR_DUPLICADO = """
+    UPDATE PROCESO.PROCESSED_ARTICLES
+    SET DUPLICATE_OF = ?
+    WHERE ID = ?
 """
 
 ACTUALIZAR_STATUS = """
@@ -74,8 +139,140 @@ INSERT_LOG = """
         STATUS_CODE,
         RESPONSE_TIME_SEC,
         TOKENS_USED,
-        RESPONSE_DATE
+        RESPONSE_DATE,
+        MODEL_ID,
+        MODEL_TIER
     )
     OUTPUT INSERTED.ID
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-"""
\ No newline at end of file
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# ----------- RECLAMO DE TRABAJO CON LEASE -----------
+
+# UPDLOCK + READPAST: cada worker bloquea las filas que reclama y salta las bloqueadas por otro,
+# por lo que dos workers nunca reclaman la misma fila. Las filas con lease vencido se reclaman de nuevo.
+# Parámetros: (cantidad, modelo, worker, segundos de lease, modelo)
+RECLAMAR_ARTICULOS = f"""
+    SET NOCOUNT ON;
+    DECLARE @reclamados TABLE (ARTICLE_ID INT PRIMARY KEY);
+
+    WITH candidatos AS (
+        SELECT TOP (?) mps.ARTICLE_ID, mps.WORKER_ID, mps.LEASE_EXPIRES
+        FROM PROCESO.MODEL_PROCESS_STATUS mps WITH (UPDLOCK, READPAST, ROWLOCK)
+        WHERE mps.MODEL_NAME = ? AND mps.IS_PROCESSED = 0
+            AND (mps.LEASE_EXPIRES IS NULL OR mps.LEASE_EXPIRES < SYSUTCDATETIME())
+        ORDER BY mps.ARTICLE_ID
+    )
+    UPDATE candidatos
+    SET WORKER_ID = ?, LEASE_EXPIRES = DATEADD(SECOND, ?, SYSUTCDATETIME())
+    OUTPUT INSERTED.ARTICLE_ID INTO @reclamados (ARTICLE_ID);
+
+    SELECT {_COLUMNAS_ARTICULO_ESTADO}
+    INNER JOIN @reclamados r
+        ON r.ARTICLE_ID = mps.ARTICLE_ID
+    WHERE mps.MODEL_NAME = ?
+    ORDER BY mps.ARTICLE_ID;
+"""
+
+RECLAMAR_ARTICULOS_POR_ID = f"""
+    SET NOCOUNT ON;
+    DECLARE @reclamados TABLE (ARTICLE_ID INT PRIMARY KEY);
+
+    UPDATE mps
+    SET WORKER_ID = ?, LEASE_EXPIRES = DATEADD(SECOND, ?, SYSUTCDATETIME())
+    OUTPUT INSERTED.ARTICLE_ID INTO @reclamados (ARTICLE_ID)
+    FROM PROCESO.MODEL_PROCESS_STATUS mps WITH (UPDLOCK, ROWLOCK)
+    INNER JOIN STRING_SPLIT(?, ',') ids
+        ON mps.ARTICLE_ID = CAST(ids.value AS INT)
+    WHERE mps.MODEL_NAME = ? AND mps.IS_PROCESSED = 0
+        AND (mps.WORKER_ID = ? OR mps.LEASE_EXPIRES IS NULL OR mps.LEASE_EXPIRES < SYSUTCDATETIME());
+
+    SELECT {_COLUMNAS_ARTICULO_ESTADO}
+    INNER JOIN @reclamados r
+        ON r.ARTICLE_ID = mps.ARTICLE_ID
+    WHERE mps.MODEL_NAME = ?
+    ORDER BY mps.ARTICLE_ID;
+"""
+
+LIBERAR_LEASES_WORKER = """
+    UPDATE PROCESO.MODEL_PROCESS_STATUS
+    SET WORKER_ID = NULL, LEASE_EXPIRES = NULL
+    WHERE WORKER_ID = ? AND IS_PROCESSED = 0
+"""
+
+LIBERAR_LEASES_VENCIDOS = """
+    UPDATE PROCESO.MODEL_PROCESS_STATUS
+    SET WORKER_ID = NULL, LEASE_EXPIRES = NULL
+    WHERE IS_PROCESSED = 0 AND LEASE_EXPIRES < SYSUTCDATETIME()
+"""
+
+# ----------- INGESTA MASIVA (STAGING + MERGE) -----------
+
+CREAR_STAGING_ARTICULOS = """
+    IF OBJECT_ID('tempdb..#STAGING_ARTICLES') IS NOT NULL DROP TABLE #STAGING_ARTICLES;
+    IF OBJECT_ID('tempdb..#ARTICULOS_INSERTADOS') IS NOT NULL DROP TABLE #ARTICULOS_INSERTADOS;
+    CREATE TABLE #STAGING_ARTICLES (
+        ORD INT NOT NULL PRIMARY KEY,
+        TITULO VARCHAR(250) NOT NULL,
+        FECHA VARCHAR(50) NOT NULL,
+        URL VARCHAR(1000) NOT NULL,
+        FUENTE VARCHAR(100) NOT NULL,
+        DESCRIPCION VARCHAR(MAX) NOT NULL
+    );
+    CREATE TABLE #ARTICULOS_INSERTADOS (
+        ORD INT NOT NULL PRIMARY KEY,
+        ID INT NOT NULL
+    );
+"""
+
+INSERT_STAGING_ARTICULO = """
+    INSERT INTO #STAGING_ARTICLES (ORD, TITULO, FECHA, URL, FUENTE, DESCRIPCION)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# MERGE con ON 1 = 0 permite devolver en OUTPUT la columna ORD del origen junto al ID generado
+MERGE_ARTICULOS_DESDE_STAGING = """
+    MERGE INTO PROCESO.PROCESSED_ARTICLES AS destino
+    USING #STAGING_ARTICLES AS origen
+        ON 1 = 0
+    WHEN NOT MATCHED THEN
+        INSERT (TITULO, FECHA, URL, FUENTE, DESCRIPCION)
+        VALUES (origen.TITULO, origen.FECHA, origen.URL, origen.FUENTE, origen.DESCRIPCION)
+    OUTPUT origen.ORD, INSERTED.ID INTO #ARTICULOS_INSERTADOS (ORD, ID);
+"""
+
+INSERTAR_STATUS_DESDE_STAGING = """
+    INSERT INTO PROCESO.MODEL_PROCESS_STATUS (ARTICLE_ID, MODEL_NAME, IS_PROCESSED)
+    SELECT ID, ?, 0
+    FROM #ARTICULOS_INSERTADOS
+"""
+
+SELECT_IDS_INSERTADOS = """
+    SELECT ORD, ID
+    FROM #ARTICULOS_INSERTADOS
+    ORDER BY ORD
+"""
+
+BORRAR_STAGING_ARTICULOS = """
+    DROP TABLE #STAGING_ARTICLES;
+    DROP TABLE #ARTICULOS_INSERTADOS;
+"""
+
+# ----------- ESCRITURA EN LOTE DE RESULTADOS -----------
+
+INSERT_LOG_LOTE = """
+    INSERT INTO PROCESO.IA_RESPONSE_LOG (
+        ARTICLE_ID,
+        MODEL_NAME,
+        PROMPT,
+        RESPONSE,
+        FILTERED_RESPONSE,
+        STATUS_CODE,
+        RESPONSE_TIME_SEC,
+        TOKENS_USED,
+        RESPONSE_DATE,
+        MODEL_ID,
+        MODEL_TIER
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
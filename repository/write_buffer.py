@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+from dataclasses import asdict
+from functools import partial
+from config.settings import (
+    WRITE_BUFFER_TAMANO_LOTE, WRITE_BUFFER_INTERVALO_SEG, WRITE_BUFFER_MAX_REINTENTOS,
+    WRITE_BUFFER_MAX_PENDIENTES, WRITE_BUFFER_DESCARTES_RUTA
+)
+from models.entities import ProcessStatusDTO, IALogModel
+from repository.proceso_repository import guardar_resultados_en_lote
+from services.metricas import ESCRITURAS_DESCARTADAS, PROFUNDIDAD_COLA
+
+# Elementos del buffer etiquetados con su tipo: ("actualizacion", (id, dto)) o ("log", IALogModel)
+Elemento = tuple[str, object]
+
+
+class BufferEscritura:
+    """
+    Buffer de escritura diferida para los resultados de IA y sus logs.
+
+    Acumula actualizaciones de MODEL_PROCESS_STATUS y registros de IA_RESPONSE_LOG y los guarda
+    en transacciones por lote desde un hilo propio, cuando se alcanzan `tamano_lote` elementos
+    o pasan `intervalo_seg` segundos. Los productores se bloquean mientras haya un lote completo
+    pendiente, de modo que una caída pierde como máximo un lote sin confirmar.
+
+    Si la base de datos falla, los productores se bloquean con el lote fallido pendiente. Un
+    `max_pendientes` mayor que `tamano_lote` les permite seguir hasta ese número de elementos en espera,
+    que son los que se pierden si el proceso termina antes de que la base vuelva. Tras `max_reintentos` vaciados fallidos seguidos el lote se divide en mitades
+    para guardar lo que se pueda; las filas que fallan por separado se anotan en `ruta_descartes`
+    (JSONL) y dejan de reintentarse, así una fila inválida no detiene las escrituras siguientes.
+
+    Con `worker_id`, el escritor recibe el dueño de los leases para no pisar artículos reclamados por otro worker.
+    """
+
+    def __init__(
+        self,
+        tamano_lote: int = WRITE_BUFFER_TAMANO_LOTE,
+        intervalo_seg: float = WRITE_BUFFER_INTERVALO_SEG,
+        escritor=guardar_resultados_en_lote,
+        max_reintentos: int = WRITE_BUFFER_MAX_REINTENTOS,
+        max_pendientes: int = WRITE_BUFFER_MAX_PENDIENTES,
+        ruta_descartes: str = WRITE_BUFFER_DESCARTES_RUTA,
+        worker_id: str | None = None
+    ):
+        self.tamano_lote = max(1, tamano_lote)
+        self.intervalo_seg = intervalo_seg
+        self.max_reintentos = max(1, max_reintentos)
+        self.max_pendientes = max(self.tamano_lote, max_pendientes)
+        self.ruta_descartes = ruta_descartes
+        self._escritor = partial(escritor, worker_id=worker_id) if worker_id is not None else escritor
+        self._actualizaciones: list[tuple[int, ProcessStatusDTO]] = []
+        self._logs: list[IALogModel] = []
+        self._cond = threading.Condition()
+        self._vaciado_lock = threading.Lock()
+        self._cerrado = False
+        self._ultimo_vaciado_ok = True
+        self._fallos_seguidos = 0
+        self._en_vuelo = 0
+        self.lotes_guardados = 0
+        self.lotes_fallidos = 0
+        self.descartados = 0
+        self._hilo = threading.Thread(target=self._bucle, name="buffer-escritura", daemon=True)
+        self._hilo.start()
+
+    def _pendientes(self) -> int:
+        return len(self._actualizaciones) + len(self._logs)
+
+    def _hay_espacio(self) -> bool:
+        # Con la base de datos respondiendo se espera a que el hilo de vaciado tome el lote completo.
+        # Si está fallando se acepta hasta el tope de pendientes, contando el lote que se está reintentando
+        if self._ultimo_vaciado_ok:
+            return self._pendientes() < self.tamano_lote
+        return self._pendientes() + self._en_vuelo < self.max_pendientes
+
+    def _agregar(self, atributo: str, elemento) -> None:
+        with self._cond:
+            if self._cerrado:
+                raise RuntimeError("El buffer de escritura ya fue cerrado.")
+            self._cond.wait_for(lambda: self._hay_espacio() or self._cerrado)
+            if self._cerrado:
+                raise RuntimeError("El buffer de escritura ya fue cerrado.")
+            getattr(self, atributo).append(elemento)
+            PROFUNDIDAD_COLA.fijar(self._pendientes(), cola="buffer_escritura")
+            if self._pendientes() >= self.tamano_lote:
+                self._cond.notify_all()
+
+    def agregar_actualizacion(self, articulo_id: int, datos_ia: ProcessStatusDTO) -> None:
+        """
+        Encola la actualización de los datos de IA de un artículo.
+        """
+        self._agregar("_actualizaciones", (articulo_id, datos_ia))
+
+    def agregar_log(self, log: IALogModel) -> None:
+        """
+        Encola un registro de log de IA.
+        """
+        self._agregar("_logs", log)
+
+    def _bucle(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._cerrado or self._pendientes() >= self.tamano_lote,
+                    timeout=self.intervalo_seg
+                )
+                if self._cerrado:
+                    return
+            if not self.vaciar():
+                # Esperar un intervalo antes de reintentar un lote fallido
+                with self._cond:
+                    self._cond.wait_for(lambda: self._cerrado, timeout=self.intervalo_seg)
+
+    def _escribir(self, elementos: list[Elemento]) -> bool:
+        actualizaciones = [dato for tipo, dato in elementos if tipo == "actualizacion"]
+        logs = [dato for tipo, dato in elementos if tipo == "log"]
+        return self._escritor(actualizaciones, logs)
+
+    def _biseccionar(self, elementos: list[Elemento]) -> list[Elemento]:
+        """
+        Guarda por mitades un grupo de elementos cuyo guardado conjunto falló.
+
+        Retorna:
+        - Los elementos que fallaron incluso de a uno.
+        """
+        if len(elementos) <= 1:
+            return elementos
+        mitad = len(elementos) // 2
+        fallidos: list[Elemento] = []
+        for parte in (elementos[:mitad], elementos[mitad:]):
+            if not self._escribir(parte):
+                fallidos.extend(self._biseccionar(parte))
+        return fallidos
+
+    def _descartar(self, elementos: list[Elemento]) -> None:
+        """
+        Anota en el archivo de descartes los elementos que no se pudieron guardar.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.ruta_descartes) or ".", exist_ok=True)
+            with open(self.ruta_descartes, "a", encoding="utf-8") as archivo:
+                for tipo, dato in elementos:
+                    if tipo == "actualizacion":
+                        articulo_id, datos_ia = dato
+                        registro = {"tipo": tipo, "articulo_id": articulo_id, "datos": asdict(datos_ia)}
+                    else:
+                        registro = {"tipo": tipo, "datos": asdict(dato)}
+                    archivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"❌ No se pudieron anotar {len(elementos)} elementos en {self.ruta_descartes}: {e}")
+        for tipo, _ in elementos:
+            ESCRITURAS_DESCARTADAS.incrementar(tipo=tipo)
+        print(f"🗑️ {len(elementos)} elementos no se pudieron guardar tras {self.max_reintentos} intentos; quedaron en {self.ruta_descartes}")
+
+    def vaciar(self) -> bool:
+        """
+        Guarda inmediatamente todo lo pendiente en una transacción.
+        Si el guardado falla, los elementos vuelven al buffer para el siguiente intento; al fallar
+        `max_reintentos` veces seguidas se guardan por mitades y lo que no entra va al archivo de descartes.
+
+        Retorna:
+        - bool: True si todo lo pendiente quedó guardado.
+        """
+        with self._vaciado_lock:
+            with self._cond:
+                elementos: list[Elemento] = (
+                    [("actualizacion", dato) for dato in self._actualizaciones] + [("log", log) for log in self._logs]
+                )
+                self._actualizaciones, self._logs = [], []
+                self._en_vuelo = len(elementos)
+                self._cond.notify_all()
+
+            if not elementos:
+                return True
+
+            guardado = self._escribir(elementos)
+            fallidos: list[Elemento] = []
+            reintentar = False
+            if guardado:
+                self._fallos_seguidos = 0
+            else:
+                self._fallos_seguidos += 1
+                reintentar = self._fallos_seguidos < self.max_reintentos
+                if not reintentar:
+                    self._fallos_seguidos = 0
+                    fallidos = self._biseccionar(elementos)
+                    if fallidos:
+                        self._descartar(fallidos)
+
+            with self._cond:
+                self._en_vuelo = 0
+                if reintentar:
+                    # Los elementos vuelven al frente del buffer para el siguiente intento
+                    self._actualizaciones = [dato for tipo, dato in elementos if tipo == "actualizacion"] + self._actualizaciones
+                    self._logs = [dato for tipo, dato in elementos if tipo == "log"] + self._logs
+                    self.lotes_fallidos += 1
+                elif fallidos:
+                    self.lotes_fallidos += 1
+                    self.descartados += len(fallidos)
+                else:
+                    self.lotes_guardados += 1
+                guardado = not reintentar and not fallidos
+                self._ultimo_vaciado_ok = guardado
+                PROFUNDIDAD_COLA.fijar(self._pendientes(), cola="buffer_escritura")
+                self._cond.notify_all()
+            return guardado
+
+    def cerrar(self) -> None:
+        """
+        Detiene el hilo de vaciado y guarda lo pendiente. Debe llamarse al terminar el procesamiento.
+        Lo que no se logra guardar tras los reintentos queda en el archivo de descartes.
+        """
+        with self._cond:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._cond.notify_all()
+        self._hilo.join()
+        for _ in range(self.max_reintentos):
+            if self.vaciar():
+                break
+        if self.descartados:
+            print(f"❌ {self.descartados} resultados y logs no se guardaron; revisar {self.ruta_descartes}.")
+
+    def __enter__(self) -> "BufferEscritura":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
@@ -0,0 +1,127 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from config.settings import (
+    IA_CASCADA_ACTIVA, IA_CASCADA_CONFIANZA_MINIMA, IA_CASCADA_ESCALAR_RIESGO, IA_CASCADA_ESCALAR_VIOLENCIA
+)
+from models.entities import ProcessStatusDTO
+from services.ia_models_service import MODELOS_POR_NIVEL, NIVELES_MODELO, RespuestaInvalidaIA
+from services.metricas import ESCALAMIENTOS_IA
+
+# Motivos por los que un análisis pasa al siguiente nivel de la cascada
+MOTIVOS_ESCALAMIENTO: tuple[str, ...] = ("respuesta_invalida", "confianza_baja", "riesgo", "violencia")
+
+
+@dataclass(frozen=True)
+class PoliticaCascada:
+    """
+    Define cuándo el análisis del modelo económico se repite con el modelo principal.
+    """
+    activa: bool                                # False: todos los artículos van directo al modelo principal
+    confianza_minima: float                     # Confianza informada por debajo de la cual se escala
+    riesgos: frozenset[str]                     # Valores de nivel_riesgo que se confirman con el principal
+    violencias: frozenset[str]                  # Valores de indicador_violencia que se confirman con el principal
+
+    def motivo(self, resultado: ProcessStatusDTO) -> str | None:
+        """
+        Retorna por qué el análisis debe confirmarse con el modelo principal, o None si se acepta.
+        """
+        if resultado.confianza is not None and resultado.confianza < self.confianza_minima:
+            return "confianza_baja"
+        if resultado.nivel_riesgo in self.riesgos:
+            return "riesgo"
+        if resultado.indicador_violencia in self.violencias:
+            return "violencia"
+        return None
+
+
+POLITICA_CASCADA = PoliticaCascada(
+    activa=IA_CASCADA_ACTIVA,
+    confianza_minima=IA_CASCADA_CONFIANZA_MINIMA,
+    riesgos=frozenset(IA_CASCADA_ESCALAR_RIESGO),
+    violencias=frozenset(IA_CASCADA_ESCALAR_VIOLENCIA),
+)
+
+
+def niveles_cascada(proveedor: str, politica: PoliticaCascada = POLITICA_CASCADA) -> list[tuple[str, str]]:
+    """
+    Retorna los pares (nivel, modelo) que recorre la cascada del proveedor, del más económico al principal.
+    Sin cascada, o si ambos niveles usan el mismo modelo, solo el principal.
+    """
+    modelos = MODELOS_POR_NIVEL[proveedor]
+    if not politica.activa or modelos["economico"] == modelos["principal"]:
+        return [("principal", modelos["principal"])]
+    return [(nivel, modelos[nivel]) for nivel in NIVELES_MODELO]
+
+
+def motivo_escalamiento(proveedor: str, resultado: ProcessStatusDTO, politica: PoliticaCascada = POLITICA_CASCADA) -> str | None:
+    """
+    Retorna por qué un análisis ya obtenido (por ejemplo, de un lote) debe repetirse con el siguiente nivel,
+    o None si se acepta. El análisis del último nivel de la cascada se acepta siempre.
+    """
+    niveles = [nivel for nivel, _ in niveles_cascada(proveedor, politica)]
+    if resultado.nivel_modelo not in niveles[:-1]:
+        return None
+    return politica.motivo(resultado)
+
+
+def _sumar_intentos(resultado: ProcessStatusDTO, descartados: list[ProcessStatusDTO]) -> None:
+    """
+    Suma al resultado final los tokens y el tiempo de los análisis descartados: son parte del costo del artículo.
+    """
+    tokens = [dto.tokens_used for dto in [resultado, *descartados] if dto.tokens_used is not None]
+    resultado.tokens_used = sum(tokens) if tokens else None
+    tiempo = round(sum(dto.response_time_sec or 0.0 for dto in [resultado, *descartados]), 2)
+    resultado.response_time_sec = tiempo
+    resultado.execution_time = f"{tiempo} seg"
+
+
+def analizar_con_cascada(
+    llamar: Callable[..., ProcessStatusDTO],
+    proveedor: str,
+    descartado: ProcessStatusDTO | None = None,
+    politica: PoliticaCascada = POLITICA_CASCADA
+) -> ProcessStatusDTO:
+    """
+    Analiza un artículo recorriendo la cascada de modelos del proveedor.
+
+    `llamar(modelo_id=...)` hace la llamada al proveedor (call_openAI o call_gemini con el prompt del artículo).
+    Se pasa al siguiente nivel si la respuesta no se puede interpretar o si la política pide confirmarla;
+    los errores HTTP y de plazo no se escalan. La respuesta del último nivel se acepta siempre.
+
+    Parámetros:
+    - descartado: Análisis ya obtenido y rechazado (con su motivo_escalamiento), por ejemplo desde un lote;
+      la cascada continúa en el nivel siguiente al suyo.
+
+    Retorna:
+    - El ProcessStatusDTO del nivel que respondió, con el motivo del último escalamiento y
+      los tokens y el tiempo de todos los intentos.
+    """
+    niveles = niveles_cascada(proveedor, politica)
+    descartados: list[ProcessStatusDTO] = []
+    motivo: str | None = None
+    if descartado is not None:
+        posicion = [nivel for nivel, _ in niveles].index(descartado.nivel_modelo)
+        niveles = niveles[posicion + 1:]
+        descartados.append(descartado)
+        motivo = descartado.motivo_escalamiento
+
+    for posicion, (_, modelo_id) in enumerate(niveles):
+        ultimo = posicion == len(niveles) - 1
+        try:
+            resultado = llamar(modelo_id=modelo_id)
+        except RespuestaInvalidaIA:
+            if ultimo:
+                raise
+            motivo = "respuesta_invalida"
+        else:
+            motivo_nivel = None if ultimo else politica.motivo(resultado)
+            if motivo_nivel is None:
+                resultado.motivo_escalamiento = motivo
+                _sumar_intentos(resultado, descartados)
+                return resultado
+            motivo = motivo_nivel
+            descartados.append(resultado)
+
+        ESCALAMIENTOS_IA.incrementar(proveedor=proveedor, motivo=motivo)
+        print(f"⤴️ [{proveedor}] Se escala de {modelo_id} a {niveles[posicion + 1][1]} ({motivo})")
+    raise ValueError(f"La cascada de {proveedor} no tiene niveles después de '{descartado.nivel_modelo}'.")
@@ -0,0 +1,121 @@
+import threading
+import time
+from config.settings import (
+    GEMINI_API_KEY, GEMINI_BASE_URL, IA_CONTEXTO_GEMINI_REINTENTO_SEG, IA_CONTEXTO_GEMINI_TTL_SEG, IA_CONTEXTO_MIN_TOKENS
+)
+from models.entities import PromptCompilado
+from services.http_clients import obtener_cliente
+
+# Fracción del TTL tras la cual el contexto se renueva, para no usar uno que vence en medio de una petición
+FRACCION_RENOVACION = 0.9
+
+# Aproximación usada para estimar los tokens del prefijo
+CARACTERES_POR_TOKEN = 4
+
+
+def prefijo_cacheable(prompt: PromptCompilado, min_tokens: int = IA_CONTEXTO_MIN_TOKENS) -> bool:
+    """
+    Indica si el prefijo del prompt alcanza el mínimo de tokens que el proveedor exige para cachearlo.
+    """
+    return len(prompt.prefijo) // CARACTERES_POR_TOKEN >= min_tokens
+
+
+class ContextosGemini:
+    """
+    Contextos cacheados (cachedContents) de Gemini con los prefijos estáticos de los prompts.
+
+    Cada par (modelo, prefijo) se crea una vez y se reutiliza hasta cerca de su TTL; las peticiones
+    envían solo el sufijo y Gemini cobra los tokens del prefijo a la tarifa de tokens cacheados.
+    Los prefijos bajo `min_tokens` no se intentan cachear. Si el proveedor rechaza crear el contexto,
+    no se reintenta hasta pasados `reintento_seg` y las peticiones llevan el prefijo completo, igual
+    que mientras otro hilo lo está creando.
+    """
+
+    def __init__(
+        self,
+        ttl_seg: int = IA_CONTEXTO_GEMINI_TTL_SEG,
+        reintento_seg: float = IA_CONTEXTO_GEMINI_REINTENTO_SEG,
+        min_tokens: int = IA_CONTEXTO_MIN_TOKENS
+    ):
+        self.ttl_seg = ttl_seg
+        self.reintento_seg = reintento_seg
+        self.min_tokens = min_tokens
+        # Cliente propio: la creación de contextos no consume las cuotas de generación del limitador
+        self.cliente = obtener_cliente("GEMINI_CONTEXTO")
+        self._contextos: dict[tuple[str, str], tuple[str | None, float]] = {}
+        self._creando: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self.creados = 0
+        self.fallidos = 0
+
+    def _crear(self, modelo_id: str, prompt: PromptCompilado) -> str | None:
+        """
+        Crea el contexto cacheado con el prefijo como instrucción de sistema y retorna su nombre, o None si falla.
+        """
+        cuerpo = {
+            "model": f"models/{modelo_id}",
+            "displayName": f"prefijo-{prompt.clave_prefijo}",
+            "systemInstruction": {"parts": [{"text": prompt.prefijo}]},
+            "ttl": f"{self.ttl_seg}s",
+        }
+        try:
+            response = self.cliente.post(f"{GEMINI_BASE_URL}/v1beta/cachedContents", params={"key": GEMINI_API_KEY}, json=cuerpo)
+        except Exception as e:
+            print(f"⚠️ No se pudo crear el contexto cacheado de Gemini ({modelo_id}): {e}")
+            return None
+        if response.status_code != 200:
+            print(f"⚠️ Gemini no creó el contexto cacheado ({modelo_id}): {response.status_code} {response.text[:200]}")
+            return None
+        nombre = response.json().get("name")
+        print(f"🗄️ Contexto cacheado de Gemini creado para el prefijo {prompt.clave_prefijo} ({modelo_id}): {nombre}")
+        return nombre
+
+    def obtener(self, modelo_id: str, prompt: PromptCompilado) -> str | None:
+        """
+        Retorna el nombre del contexto cacheado con el prefijo del prompt (creándolo si hace falta), o None si no hay.
+        La creación se hace fuera del lock: mientras tanto, los demás hilos siguen con el contexto anterior o sin contexto.
+        """
+        if not prefijo_cacheable(prompt, self.min_tokens):
+            return None
+        clave = (modelo_id, prompt.clave_prefijo)
+        with self._lock:
+            nombre, vence = self._contextos.get(clave, (None, 0.0))
+            if time.monotonic() < vence or clave in self._creando:
+                return nombre
+            self._creando.add(clave)
+
+        nombre = None
+        try:
+            nombre = self._crear(modelo_id, prompt)
+        finally:
+            with self._lock:
+                self._creando.discard(clave)
+                if nombre is None:
+                    self.fallidos += 1
+                    self._contextos[clave] = (None, time.monotonic() + self.reintento_seg)
+                else:
+                    self.creados += 1
+                    self._contextos[clave] = (nombre, time.monotonic() + self.ttl_seg * FRACCION_RENOVACION)
+        return nombre
+
+    def invalidar(self, modelo_id: str, prompt: PromptCompilado) -> None:
+        """
+        Olvida el contexto del prefijo (por ejemplo, si el proveedor ya lo eliminó); la próxima petición lo vuelve a crear.
+        """
+        with self._lock:
+            self._contextos.pop((modelo_id, prompt.clave_prefijo), None)
+
+
+_contextos: ContextosGemini | None = None
+_contextos_lock = threading.Lock()
+
+
+def obtener_contextos_gemini() -> ContextosGemini:
+    """
+    Obtiene (o crea la primera vez) el registro compartido de contextos cacheados de Gemini.
+    """
+    global _contextos
+    with _contextos_lock:
+        if _contextos is None:
+            _contextos = ContextosGemini()
+        return _contextos
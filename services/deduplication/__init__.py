@@ -0,0 +1,2 @@
+# services/deduplication/__init__.py
+from .minhash import IndiceSimilitud, cargar_indice, guardar_indice
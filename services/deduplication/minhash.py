@@ -0,0 +1,181 @@
+import hashlib
+import os
+import pickle
+import random
+import re
+import threading
+import unicodedata
+from config.settings import DEDUP_UMBRAL, DEDUP_NUM_PERMUTACIONES, DEDUP_BANDAS, DEDUP_INDICE_RUTA
+
+# Primo de Mersenne para las permutaciones universales (a * x + b) mod p
+_PRIMO = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalizar_texto(texto: str) -> list[str]:
+    """
+    Normaliza un texto (minúsculas, sin tildes ni puntuación) y lo separa en palabras.
+    """
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^\w\s]", " ", texto).split()
+
+
+def obtener_shingles(texto: str, k: int = 3) -> set[str]:
+    """
+    Retorna el conjunto de secuencias de `k` palabras consecutivas del texto.
+    """
+    palabras = normalizar_texto(texto)
+    if len(palabras) <= k:
+        return {" ".join(palabras)} if palabras else set()
+    return {" ".join(palabras[i:i + k]) for i in range(len(palabras) - k + 1)}
+
+
+def _hash_shingle(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+class IndiceSimilitud:
+    """
+    Índice de casi-duplicados basado en MinHash y LSH por bandas.
+
+    Cada artículo se representa por la firma MinHash de sus shingles de palabras. La firma se
+    divide en `bandas` bandas; dos artículos son candidatos si coinciden en alguna banda, por lo
+    que una consulta solo compara contra los candidatos de sus buckets y no contra todo el índice.
+    Los candidatos se confirman con la similitud de Jaccard estimada frente a `umbral`.
+    """
+
+    def __init__(
+        self,
+        umbral: float = DEDUP_UMBRAL,
+        num_permutaciones: int = DEDUP_NUM_PERMUTACIONES,
+        bandas: int = DEDUP_BANDAS,
+        semilla: int = 1
+    ):
+        if num_permutaciones % bandas != 0:
+            raise ValueError("num_permutaciones debe ser múltiplo de bandas.")
+        self.umbral = umbral
+        self.num_permutaciones = num_permutaciones
+        self.bandas = bandas
+        self.filas_por_banda = num_permutaciones // bandas
+        generador = random.Random(semilla)
+        self._permutaciones = [
+            (generador.randrange(1, _PRIMO), generador.randrange(0, _PRIMO))
+            for _ in range(num_permutaciones)
+        ]
+        self._firmas: dict[int, tuple[int, ...]] = {}
+        self._buckets: dict[tuple[int, int], list[int]] = {}
+        self._canonicos: dict[int, int] = {}  # ID duplicado -> ID canónico
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._firmas)
+
+    def calcular_firma(self, texto: str) -> tuple[int, ...]:
+        """
+        Calcula la firma MinHash de un texto.
+        """
+        hashes = [_hash_shingle(s) for s in obtener_shingles(texto)]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_permutaciones)
+        return tuple(
+            min(((a * h + b) % _PRIMO) & _MAX_HASH for h in hashes)
+            for a, b in self._permutaciones
+        )
+
+    def _claves_bandas(self, firma: tuple[int, ...]) -> list[tuple[int, int]]:
+        r = self.filas_por_banda
+        return [(banda, hash(firma[banda * r:(banda + 1) * r])) for banda in range(self.bandas)]
+
+    @staticmethod
+    def similitud(firma_a: tuple[int, ...], firma_b: tuple[int, ...]) -> float:
+        """
+        Similitud de Jaccard estimada entre dos firmas.
+        """
+        iguales = sum(1 for x, y in zip(firma_a, firma_b) if x == y)
+        return iguales / len(firma_a)
+
+    def buscar(self, texto: str) -> int | None:
+        """
+        Retorna el ID canónico del artículo más parecido por sobre el umbral, o None si no hay.
+        """
+        return self._buscar_firma(self.calcular_firma(texto))
+
+    def _buscar_firma(self, firma: tuple[int, ...]) -> int | None:
+        candidatos: set[int] = set()
+        for clave in self._claves_bandas(firma):
+            candidatos.update(self._buckets.get(clave, ()))
+
+        mejor_id, mejor_similitud = None, self.umbral
+        for candidato in candidatos:
+            similitud = self.similitud(firma, self._firmas[candidato])
+            if similitud >= mejor_similitud:
+                mejor_id, mejor_similitud = candidato, similitud
+
+        if mejor_id is None:
+            return None
+        return self._canonicos.get(mejor_id, mejor_id)
+
+    def agregar(self, articulo_id: int, texto: str) -> int | None:
+        """
+        Agrega un artículo al índice.
+
+        Retorna:
+        - El ID canónico si el artículo es casi-duplicado de uno ya indexado, o None si es nuevo.
+        """
+        firma = self.calcular_firma(texto)
+        with self._lock:
+            if articulo_id in self._firmas:
+                return self._canonicos.get(articulo_id)
+            canonico = self._buscar_firma(firma)
+            self._firmas[articulo_id] = firma
+            for clave in self._claves_bandas(firma):
+                self._buckets.setdefault(clave, []).append(articulo_id)
+            if canonico is not None:
+                self._canonicos[articulo_id] = canonico
+            return canonico
+
+    def clusters(self) -> dict[int, list[int]]:
+        """
+        Retorna los grupos de duplicados: ID canónico -> IDs de sus casi-duplicados.
+        """
+        with self._lock:
+            grupos: dict[int, list[int]] = {}
+            for duplicado, canonico in self._canonicos.items():
+                grupos.setdefault(canonico, []).append(duplicado)
+            return grupos
+
+    def __getstate__(self) -> dict:
+        estado = self.__dict__.copy()
+        del estado["_lock"]
+        return estado
+
+    def __setstate__(self, estado: dict) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+
+def cargar_indice(ruta: str = DEDUP_INDICE_RUTA) -> IndiceSimilitud:
+    """
+    Carga el índice de similitud persistido en disco, o crea uno vacío si no existe.
+    """
+    if not os.path.exists(ruta):
+        print(f"⚠️ No existe el índice de duplicados en '{ruta}', se crea uno nuevo.")
+        return IndiceSimilitud()
+    with open(ruta, "rb") as archivo:
+        indice: IndiceSimilitud = pickle.load(archivo)
+    print(f"✅ Índice de duplicados cargado: {len(indice)} artículos.")
+    return indice
+
+
+def guardar_indice(indice: IndiceSimilitud, ruta: str = DEDUP_INDICE_RUTA) -> None:
+    """
+    Persiste el índice de similitud en disco (escritura atómica).
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, "wb") as archivo:
+        pickle.dump(indice, archivo)
+    os.replace(ruta_temporal, ruta)
@@ -1 +1 @@
-from .csv_writer import leer_desde_csv, guardar_noticias_en_csv, guardar_articles_en_csv
+from .csv_writer import leer_desde_csv, guardar_noticias_en_csv, guardar_articles_en_csv, EscritorNoticiasCSV
@@ -1,48 +1,86 @@
 import csv
+from collections.abc import Iterable
+from itertools import chain
 from models.entities import Noticia, Article
+from services.perfilado import trazar
 import os
 
-def guardar_noticias_en_csv(noticias: list[Noticia], nombre_archivo: str = "noticias.csv"):
+class EscritorNoticiasCSV:
     """
-    Guarda una lista de objetos Noticia en un archivo CSV.
+    Escribe objetos Noticia en un archivo CSV a medida que llegan, sin mantenerlos en memoria.
 
-    Parámetros:
-    - noticias: Lista de objetos Noticia a guardar.
-    - nombre_archivo: Nombre del archivo de salida. Por defecto "noticias.csv".
-
-    Crea el archivo en la ruta actual con columnas: Título, Fecha, Descripción, URL, Fuente.
+    Usa las mismas columnas que guardar_noticias_en_csv: Título, Fecha, Descripción, URL, Fuente.
     """
-    with open(nombre_archivo, mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file, delimiter=",")
-        writer.writerow(["Título", "Fecha", "Descripción", "URL", "Fuente"])
+
+    def __init__(self, nombre_archivo: str = "noticias.csv"):
+        self.nombre_archivo = nombre_archivo
+        self._file = open(nombre_archivo, mode="w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, delimiter=",")
+        self._writer.writerow(["Título", "Fecha", "Descripción", "URL", "Fuente"])
+
+    @trazar("csv", "escribir_noticias_csv")
+    def escribir(self, noticias: list[Noticia]) -> None:
         for noticia in noticias:
-            writer.writerow([
+            self._writer.writerow([
                 noticia.titulo,
                 noticia.fecha,
                 noticia.descripcion,
                 noticia.url,
                 noticia.fuente
             ])
+        self._file.flush()
+
+    def cerrar(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "EscritorNoticiasCSV":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+@trazar("csv")
+def guardar_noticias_en_csv(noticias: list[Noticia], nombre_archivo: str = "noticias.csv"):
+    """
+    Guarda una lista de objetos Noticia en un archivo CSV.
+
+    Parámetros:
+    - noticias: Lista de objetos Noticia a guardar.
+    - nombre_archivo: Nombre del archivo de salida. Por defecto "noticias.csv".
+
+    Crea el archivo en la ruta actual con columnas: Título, Fecha, Descripción, URL, Fuente.
+    """
+    with EscritorNoticiasCSV(nombre_archivo) as escritor:
+        escritor.escribir(noticias)
     print(f"✅ Archivo de noticias guardado como: {nombre_archivo}")
 
 
-def guardar_articles_en_csv(articulos: list[Article], nombre_archivo: str = "articulos.csv"):
+@trazar("csv")
+def guardar_articles_en_csv(articulos: Iterable[Article], nombre_archivo: str = "articulos.csv") -> int:
     """
-    Guarda una lista de objetos Article en un archivo CSV.
+    Guarda objetos Article en un archivo CSV.
 
     Parámetros:
-    - articulos: Lista de objetos Article a guardar.
+    - articulos: Lista o iterador de objetos Article a guardar. Se escriben a medida que se
+      recorren, por lo que un iterador no necesita caber en memoria.
     - nombre_archivo: Nombre del archivo de salida. Por defecto "articulos.csv".
 
     Crea el archivo en la ruta actual con columnas dinámicas basadas en los atributos de Article.
+
+    Retorna:
+    - Cantidad de artículos escritos.
     """
-    if not articulos:
+    iterador = iter(articulos)
+    primero = next(iterador, None)
+    if primero is None:
         print("⚠️ No hay artículos para guardar en el archivo CSV.")
-        return
+        return 0
 
     # Obtener los nombres de los atributos de la clase Article
-    columnas = [attr for attr in dir(articulos[0]) if not callable(getattr(articulos[0], attr)) and not attr.startswith("__")]
+    columnas = [attr for attr in dir(primero) if not callable(getattr(primero, attr)) and not attr.startswith("__")]
 
+    escritos = 0
     with open(nombre_archivo, mode="w", newline="", encoding="utf-8") as file:
         writer = csv.writer(file, delimiter=",")
         
@@ -50,12 +88,15 @@ def guardar_articles_en_csv(articulos: list[Article], nombre_archivo: str = "art
         writer.writerow(columnas)
         
         # Escribir los datos de cada artículo
-        for articulo in articulos:
+        for articulo in chain([primero], iterador):
             writer.writerow([getattr(articulo, columna, "") for columna in columnas])
+            escritos += 1
     
     print(f"✅ Archivo de artículos guardado como: {nombre_archivo}")
+    return escritos
 
 
+@trazar("csv")
 def leer_desde_csv(nombre_archivo: str) -> list[Noticia]:
     """
     Lee un archivo CSV y lo convierte en una lista de objetos Noticia.
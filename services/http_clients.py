@@ -0,0 +1,247 @@
+import socket
+import threading
+import time
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from config.settings import HTTP_POOL_SIZE, HTTP_TIMEOUT_CONEXION_SEG, HTTP_TIMEOUT_LECTURA_SEG, IA_REINTENTOS_MAX, IA_RESPALDO_ACTIVO
+from services.limitador import STATUS_REINTENTABLES, LimitadorProveedor, calcular_backoff, obtener_limitador
+from services.metricas import REINTENTOS_IA
+from services.respaldo import RespaldoLatencia
+from services.plazos import PresupuestoAgotado, calcular_timeout, esperar, presupuesto_agotado, verificar_plazos
+
+# Bytes pedidos al socket en cada lectura del cuerpo de una respuesta
+TAMANO_BLOQUE_LECTURA = 64 * 1024
+
+
+def _leer_cuerpo(response: requests.Response, limite: float) -> None:
+    """
+    Lee el cuerpo completo de la respuesta sin pasarse de `limite` (reloj monotónico).
+
+    El timeout de lectura de requests aplica a cada lectura del socket, no a la respuesta completa:
+    un servidor que envía los datos de a poco podría mantener la petición abierta indefinidamente.
+    Aquí cada lectura se acota al tiempo que le queda a la petición y se corta al vencer.
+    """
+    partes: list[bytes] = []
+    conexion = getattr(response.raw, "connection", None)
+    sock = getattr(conexion, "sock", None)
+    try:
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise socket.timeout("se superó el tiempo total de la petición")
+            if sock is not None:
+                sock.settimeout(restante)
+            parte = response.raw.read1(TAMANO_BLOQUE_LECTURA, decode_content=True)
+            if not parte:
+                break
+            partes.append(parte)
+    except (socket.timeout, urllib3.exceptions.TimeoutError) as e:
+        response.close()
+        raise requests.ReadTimeout(f"La respuesta de {response.url} no terminó de llegar a tiempo: {e}", response=response) from e
+    except urllib3.exceptions.HTTPError as e:
+        response.close()
+        raise requests.ConnectionError(f"Error al leer la respuesta de {response.url}: {e}", response=response) from e
+    response._content = b"".join(partes)
+    response._content_consumed = True
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP de larga vida para un proveedor, con un pool de conexiones keep-alive.
+
+    Todas las llamadas al mismo proveedor comparten la sesión, por lo que el handshake TCP/TLS
+    solo se paga al abrir cada conexión del pool y no en cada petición.
+
+    Toda petición lleva timeout de conexión y de lectura; el de lectura se acorta al tiempo
+    que le queda al plazo de la operación en curso y al presupuesto de la ejecución. Además, una
+    petición sin streaming no dura más que la suma de ambos en total, aunque el servidor envíe la
+    respuesta de a poco. Las respuestas en streaming se leen por partes y quien las lee verifica los plazos.
+
+    Con un `limitador`, cada petición espera su turno dentro de las cuotas del proveedor y las
+    respuestas 429/5xx se reintentan (hasta `reintentos_max` veces) respetando Retry-After o,
+    si el proveedor no lo indica, con backoff exponencial con jitter.
+
+    Con un `respaldo`, los envíos sin streaming que tardan más que la cola de latencias observadas
+    se duplican y se usa la primera respuesta (ver RespaldoLatencia). Solo se duplica el envío ya
+    autorizado por el limitador; el duplicado reserva su propia cuota y la del descartado se devuelve.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        pool_size: int = HTTP_POOL_SIZE,
+        timeout: tuple[float, float] = (HTTP_TIMEOUT_CONEXION_SEG, HTTP_TIMEOUT_LECTURA_SEG),
+        limitador: LimitadorProveedor | None = None,
+        reintentos_max: int = IA_REINTENTOS_MAX,
+        respaldo: RespaldoLatencia | None = None
+    ):
+        self.nombre = nombre
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.limitador = limitador
+        self.reintentos_max = reintentos_max
+        self.respaldo = respaldo
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self._lock = threading.Lock()
+        self.peticiones = 0
+
+    def request(self, method: str, url: str, tokens_estimados: int = 0, **kwargs) -> requests.Response:
+        """
+        Realiza una petición reutilizando las conexiones del pool.
+        `tokens_estimados` es lo que se reserva de la cuota de tokens por minuto del proveedor.
+
+        Lanza PresupuestoAgotado o PlazoVencido si la petición (incluidas las esperas y los
+        reintentos) no alcanza a completarse dentro del presupuesto de la ejecución o del plazo de la operación.
+        """
+        return self._request_con_reintentos(method, url, tokens_estimados, **kwargs)
+
+    def _request_con_reintentos(self, method: str, url: str, tokens_estimados: int = 0, **kwargs) -> requests.Response:
+        if self.limitador is None:
+            return self._enviar_con_respaldo(method, url, tokens_estimados, **kwargs)
+
+        for intento in range(self.reintentos_max + 1):
+            self.limitador.adquirir(tokens_estimados)
+            response = self._enviar_con_respaldo(method, url, tokens_estimados, **kwargs)
+            espera = self.limitador.registrar_respuesta(response)
+            if response.status_code >= 400:
+                # Una respuesta de error no consume tokens del proveedor: se devuelve lo reservado
+                self.limitador.corregir_tokens(tokens_estimados, 0)
+            if response.status_code not in STATUS_REINTENTABLES or intento == self.reintentos_max:
+                return response
+
+            espera = espera if espera is not None else calcular_backoff(intento)
+            REINTENTOS_IA.incrementar(proveedor=self.nombre, status=response.status_code)
+            print(
+                f"🔁 {self.nombre} respondió {response.status_code}; "
+                f"reintento {intento + 1}/{self.reintentos_max} en {espera:.1f} seg"
+            )
+            response.close()
+            if response.status_code == 429:
+                # La cuota es compartida: la pausa aplica a todos los hilos que usan el proveedor
+                self.limitador.pausar(espera)
+            else:
+                esperar(espera)
+        return response
+
+    def _enviar_con_respaldo(self, method: str, url: str, tokens_estimados: int, **kwargs) -> requests.Response:
+        """
+        Envía la petición, con respaldo si el cliente lo tiene y no es streaming.
+        """
+        if self.respaldo is None or kwargs.get("stream"):
+            return self._enviar(method, url, **kwargs)
+        if self.limitador is None:
+            return self.respaldo.ejecutar(lambda: self._enviar(method, url, **kwargs))
+        return self.respaldo.ejecutar(
+            lambda: self._enviar(method, url, **kwargs),
+            reservar=lambda: self.limitador.intentar_adquirir(tokens_estimados),
+            devolver=lambda: self.limitador.corregir_tokens(tokens_estimados, 0)
+        )
+
+    def _enviar(self, method: str, url: str, **kwargs) -> requests.Response:
+        if "timeout" not in kwargs:
+            kwargs["timeout"] = calcular_timeout(*self.timeout)
+        timeout = kwargs["timeout"]
+        limite = time.monotonic() + (sum(timeout) if isinstance(timeout, tuple) else timeout)
+        stream = kwargs.pop("stream", False)
+        with self._lock:
+            self.peticiones += 1
+        try:
+            response = self.session.request(method, url, stream=True, **kwargs)
+            if not stream:
+                _leer_cuerpo(response, limite)
+            return response
+        except requests.Timeout as e:
+            if presupuesto_agotado():
+                raise PresupuestoAgotado(f"Petición a {self.nombre} cancelada: se agotó el presupuesto de la ejecución.") from e
+            verificar_plazos()
+            raise
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def conexiones_abiertas(self) -> int:
+        """
+        Número de conexiones nuevas abiertas por el pool (cada una implica un handshake).
+        """
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[clave].num_connections for clave in list(pools.keys()))
+
+    def estadisticas(self) -> dict[str, int]:
+        """
+        Retorna las peticiones realizadas, las conexiones abiertas y las peticiones que reutilizaron una conexión.
+        """
+        conexiones = self.conexiones_abiertas()
+        return {
+            "peticiones": self.peticiones,
+            "conexiones": conexiones,
+            "reutilizadas": max(0, self.peticiones - conexiones),
+        }
+
+    def cerrar(self) -> None:
+        """
+        Cierra todas las conexiones del pool.
+        """
+        if self.respaldo is not None:
+            self.respaldo.cerrar()
+        self.session.close()
+
+
+_clientes: dict[str, ClienteHTTP] = {}
+_clientes_lock = threading.Lock()
+
+
+def obtener_cliente(proveedor: str, timeout: tuple[float, float] | None = None) -> ClienteHTTP:
+    """
+    Obtiene (o crea la primera vez) el cliente compartido de un proveedor, por ejemplo "OPENAI" o "GEMINI".
+    `timeout` (conexión, lectura) se aplica al crear el cliente; por defecto HTTP_TIMEOUT_*.
+    Los proveedores de IA con cuotas configuradas quedan con su limitador de tasa y, con
+    IA_RESPALDO_ACTIVO, con peticiones de respaldo.
+    """
+    with _clientes_lock:
+        cliente = _clientes.get(proveedor)
+        if cliente is None:
+            limitador = obtener_limitador(proveedor)
+            cliente = ClienteHTTP(
+                proveedor,
+                timeout=timeout or (HTTP_TIMEOUT_CONEXION_SEG, HTTP_TIMEOUT_LECTURA_SEG),
+                limitador=limitador,
+                respaldo=RespaldoLatencia(proveedor) if IA_RESPALDO_ACTIVO and limitador is not None else None
+            )
+            _clientes[proveedor] = cliente
+        return cliente
+
+
+def resumen_conexiones() -> dict[str, dict[str, int]]:
+    """
+    Retorna las estadísticas de reutilización de conexiones de cada cliente creado.
+    """
+    with _clientes_lock:
+        clientes = list(_clientes.values())
+    return {cliente.nombre: cliente.estadisticas() for cliente in clientes}
+
+
+def resumen_respaldos() -> dict[str, dict[str, float]]:
+    """
+    Retorna las estadísticas de peticiones de respaldo de cada cliente que las usa.
+    """
+    with _clientes_lock:
+        clientes = list(_clientes.values())
+    return {cliente.nombre: cliente.respaldo.estadisticas() for cliente in clientes if cliente.respaldo is not None}
+
+
+def cerrar_clientes() -> None:
+    """
+    Cierra los clientes de todos los proveedores. Debe llamarse al terminar la ejecución.
+    """
+    with _clientes_lock:
+        clientes = list(_clientes.values())
+        _clientes.clear()
+    for cliente in clientes:
+        cliente.cerrar()
@@ -1,116 +1,590 @@
-import requests
 import json
-from config.settings import GEMINI_API_KEY, OPENAI_API_KEY
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from config.settings import (
+    GEMINI_API_KEY, GEMINI_BASE_URL, GEMINI_MODELO_ECONOMICO, GEMINI_MODELO_PRINCIPAL, OPENAI_API_KEY, OPENAI_BASE_URL,
+    OPENAI_MODELO_ECONOMICO, OPENAI_MODELO_PRINCIPAL, IA_CONTEXTO_GEMINI_ACTIVO, IA_SALIDA_ESTRUCTURADA
+)
 from models.entities import (
     ProcessStatusDTO,
+    PromptCompilado,
     AnalisisResumenDTO,
     RiesgoEvaluacionDTO,
     PropuestaAccionDTO,
     TendenciasSentimientoDTO  # Importamos el nuevo DTO
 )
+from services.contexto_gemini import obtener_contextos_gemini, prefijo_cacheable
+from services.http_clients import obtener_cliente
+from services.limitador import obtener_limitador
+from services.metricas import (
+    ERRORES_PARSEO_IA, LATENCIA_IA, LLAMADAS_IA, PRIMER_TOKEN_IA, RESPUESTAS_INTERPRETADAS_IA, STREAMS_ABORTADOS_IA, TOKENS_CACHEADOS_IA,
+    TOKENS_IA
+)
+from services.perfilado import tramo
+from services.plazos import verificar_plazos
+from services.respuestas_ia import (
+    ESQUEMAS, SalidaInvalida, ValidadorJSONIncremental, esquema_gemini, extraer_json, validar_analisis_articulo
+)
+from services.response_cache import obtener_cache
+
+# Modelos de cada proveedor por nivel de la cascada, del más económico al principal
+NIVELES_MODELO: tuple[str, ...] = ("economico", "principal")
+MODELOS_POR_NIVEL: dict[str, dict[str, str]] = {
+    "OPENAI": {"economico": OPENAI_MODELO_ECONOMICO, "principal": OPENAI_MODELO_PRINCIPAL},
+    "GEMINI": {"economico": GEMINI_MODELO_ECONOMICO, "principal": GEMINI_MODELO_PRINCIPAL},
+}
+
+# Códigos con los que Gemini rechaza una petición cuyo contexto cacheado venció o ya no existe
+STATUS_CONTEXTO_INVALIDO = frozenset({400, 403, 404})
+
+# Estimación de tokens de salida que se reserva de la cuota TPM; se corrige con el uso real informado
+CARACTERES_POR_TOKEN = 4
+TOKENS_SALIDA_ESTIMADOS = 200
+
+
+class ErrorPeticionIA(Exception):
+    """
+    Se lanza cuando el proveedor responde con un código de error (incluido un 429 tras agotar los reintentos).
+    """
+
+    def __init__(self, proveedor: str, status_code: int):
+        super().__init__(f"Error en la petición a {proveedor}: {status_code}")
+        self.status_code = status_code
+
+
+class RespuestaInvalidaIA(Exception):
+    """
+    Se lanza cuando la respuesta del proveedor llegó, pero no se pudo interpretar o no pasó la validación.
+    """
+
+
+def nivel_modelo(proveedor: str, modelo_id: str) -> str | None:
+    """
+    Retorna el nivel de la cascada ("economico" o "principal") de un modelo del proveedor, o None si no está configurado.
+    Si ambos niveles usan el mismo modelo, se considera principal.
+    """
+    niveles = MODELOS_POR_NIVEL.get(proveedor, {})
+    for nivel in reversed(NIVELES_MODELO):
+        if niveles.get(nivel) == modelo_id:
+            return nivel
+    return None
+
+
+def _registrar_llamada(proveedor: str, response, latencia: float | None = None) -> None:
+    """
+    Registra en las métricas el código de estado y la latencia real de una llamada
+    (response.elapsed, o `latencia` si la respuesta se leyó en streaming).
+    """
+    LLAMADAS_IA.incrementar(proveedor=proveedor, status=response.status_code)
+    LATENCIA_IA.observar(latencia if latencia is not None else response.elapsed.total_seconds(), proveedor=proveedor)
+
+
+def _tokens_uso(proveedor: str, uso: dict) -> tuple[int | None, int | None, int | None]:
+    """
+    Retorna los tokens de entrada, de salida y de entrada leídos desde la caché de prefijos del proveedor
+    (incluidos en los de entrada) según los campos de uso de OpenAI o Gemini.
+    """
+    if proveedor == "OPENAI":
+        return uso.get("input_tokens"), uso.get("output_tokens"), (uso.get("input_tokens_details") or {}).get("cached_tokens")
+    return uso.get("promptTokenCount"), uso.get("candidatesTokenCount"), uso.get("cachedContentTokenCount")
+
+
+def _registrar_tokens(proveedor: str, uso: dict) -> int | None:
+    """
+    Registra en las métricas los tokens informados por el proveedor y retorna el total, o None si no los informó.
+    """
+    entrada, salida, cacheados = _tokens_uso(proveedor, uso)
+    if entrada is None and salida is None:
+        return None
+    TOKENS_IA.incrementar(entrada or 0, proveedor=proveedor, tipo="entrada")
+    TOKENS_IA.incrementar(salida or 0, proveedor=proveedor, tipo="salida")
+    TOKENS_CACHEADOS_IA.incrementar(cacheados or 0, proveedor=proveedor)
+    return (entrada or 0) + (salida or 0)
+
+
+def _corregir_cuota(proveedor: str, estimados: int, reales: int | None) -> None:
+    """
+    Ajusta la cuota de tokens por minuto del proveedor con los tokens realmente usados.
+    """
+    limitador = obtener_limitador(proveedor)
+    if limitador is not None:
+        limitador.corregir_tokens(estimados, reales)
+
+
+def extraer_texto_openai(response_json: dict) -> str:
+    """
+    Retorna el texto generado en una respuesta de la API Responses de OpenAI.
+    """
+    return response_json["output"][0]["content"][0]["text"]
+
+
+def extraer_texto_gemini(response_json: dict) -> str:
+    """
+    Retorna el texto generado en una respuesta generateContent de Gemini.
+    """
+    return response_json["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def parsear_json_modelo(texto: str) -> object:
+    """
+    Interpreta el JSON devuelto por un modelo, tolerando texto alrededor, bloques ```json,
+    comas sobrantes y lotes truncados (ver extraer_json).
+    """
+    return extraer_json(texto)[0]
+
+
+def _esquema_salida(prompt_type: str) -> dict | None:
+    """
+    Esquema JSON que se exige al proveedor para el tipo de prompt, o None si se pide texto libre.
+    """
+    return ESQUEMAS.get(prompt_type) if IA_SALIDA_ESTRUCTURADA else None
+
+
+def construir_payload_openai(prompt: str | PromptCompilado, prompt_type: str, modelo_id: str = OPENAI_MODELO_PRINCIPAL) -> dict[str, object]:
+    """
+    Cuerpo de la petición a la API Responses de OpenAI para un prompt (también se usa en los trabajos por lotes).
+    Un prompt compilado envía el prefijo como `instructions`, al inicio de la petición, para que OpenAI lo cachee.
+    """
+    payload: dict[str, object] = {
+        "model": modelo_id,
+        "input": prompt
+    }
+    if isinstance(prompt, PromptCompilado):
+        payload["instructions"] = prompt.prefijo
+        payload["input"] = prompt.sufijo
+        # Las peticiones con la misma clave se enrutan juntas, lo que mejora los aciertos en la caché de prefijos.
+        # Un prefijo bajo el mínimo de tokens no se cachea, así que no se agrupan
+        if prefijo_cacheable(prompt):
+            payload["prompt_cache_key"] = f"{prompt_type}-{prompt.clave_prefijo}"
+    esquema = _esquema_salida(prompt_type)
+    if esquema is not None:
+        # Salida estructurada: el modelo solo puede responder JSON que cumple el esquema
+        payload["text"] = {"format": {"type": "json_schema", "name": prompt_type, "schema": esquema, "strict": True}}
+    return payload
+
+
+def construir_payload_gemini(prompt: str | PromptCompilado, prompt_type: str, contexto: str | None = None) -> dict[str, object]:
+    """
+    Cuerpo de la petición generateContent de Gemini para un prompt (también se usa en los trabajos por lotes).
+
+    De un prompt compilado solo se envía el sufijo: el prefijo va en el contexto cacheado `contexto`
+    o, si no hay, como instrucción de sistema.
+    """
+    texto = prompt.sufijo if isinstance(prompt, PromptCompilado) else prompt
+    data: dict[str, object] = {
+        "contents": [
+            {
+                "parts": [
+                    {
+                        "text": texto
+                    }
+                ]
+            }
+        ]
+    }
+    if isinstance(prompt, PromptCompilado):
+        if contexto is not None:
+            data["cachedContent"] = contexto
+        else:
+            data["systemInstruction"] = {"parts": [{"text": prompt.prefijo}]}
+    esquema = _esquema_salida(prompt_type)
+    if esquema is not None:
+        # Salida estructurada: el modelo solo puede responder JSON que cumple el esquema
+        data["generationConfig"] = {"responseMimeType": "application/json", "responseSchema": esquema_gemini(esquema)}
+    return data
+
+
+# ----------- STREAMING -----------
+
+@dataclass
+class RespuestaStream:
+    """
+    Resultado de leer en streaming la respuesta de un proveedor.
+    """
+    texto: str = ""                             # Texto generado (hasta el aborto, si lo hubo)
+    uso: dict = field(default_factory=dict)     # Uso de tokens informado al final del stream
+    motivo_aborto: str | None = None            # Por qué se cortó el stream antes de terminar
+
+
+def _eventos_sse(response) -> Iterator[dict]:
+    """
+    Recorre los eventos server-sent events de una respuesta en streaming y retorna el JSON de cada `data:`.
+    """
+    for linea in response.iter_lines():
+        if not linea.startswith(b"data:"):
+            continue
+        datos = linea[5:].strip()
+        if datos and datos != b"[DONE]":
+            yield json.loads(datos)
+
+
+def _fragmento_openai(evento: dict) -> tuple[str, dict | None]:
+    """
+    Retorna el texto nuevo y el uso de tokens (solo en el evento final) de un evento de la API Responses de OpenAI.
+    """
+    tipo = evento.get("type")
+    if tipo == "response.output_text.delta":
+        return evento.get("delta", ""), None
+    if tipo in ("response.completed", "response.incomplete"):
+        return "", evento.get("response", {}).get("usage") or {}
+    if tipo in ("error", "response.failed"):
+        raise ValueError(f"OpenAI informó un error en el stream: {evento}")
+    return "", None
+
+
+def _fragmento_gemini(evento: dict) -> tuple[str, dict | None]:
+    """
+    Retorna el texto nuevo y el uso de tokens acumulado de un fragmento de streamGenerateContent de Gemini.
+    """
+    candidatos = evento.get("candidates") or [{}]
+    partes = candidatos[0].get("content", {}).get("parts", [])
+    return "".join(parte.get("text", "") for parte in partes), evento.get("usageMetadata")
+
+
+def _leer_stream(
+    proveedor: str,
+    prompt_type: str,
+    response,
+    fragmento: Callable[[dict], tuple[str, dict | None]],
+    al_avanzar: Callable[[object], None] | None,
+    inicio: float
+) -> RespuestaStream:
+    """
+    Lee una respuesta en streaming validando el JSON a medida que llega.
+
+    - Con cada valor que el modelo completa llama a `al_avanzar` con el resultado parcial.
+    - Corta el stream apenas la salida ya no puede ser válida para el esquema del tipo de prompt,
+      sin esperar (ni pagar) el resto de la generación.
+    - Un evento de error del proveedor o una línea `data:` que no se puede interpretar también cortan
+      el stream; en todos los casos `motivo_aborto` queda informado y la respuesta se trata como inválida.
+    """
+    resultado = RespuestaStream()
+    validador = ValidadorJSONIncremental(_esquema_salida(prompt_type))
+    primer_token = True
+    eventos = _eventos_sse(response)
+    try:
+        while True:
+            verificar_plazos()
+            try:
+                delta, uso = fragmento(next(eventos))
+            except StopIteration:
+                break
+            except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+                resultado.motivo_aborto = f"Evento del stream inválido: {e}"
+                print(f"❌ Stream de {proveedor} interrumpido: {e}")
+                break
+            if uso is not None:
+                resultado.uso = uso
+            if not delta or validador.terminado:
+                # Terminado el JSON, solo interesa el uso de tokens del evento final
+                continue
+            if primer_token:
+                PRIMER_TOKEN_IA.observar(time.perf_counter() - inicio, proveedor=proveedor)
+                primer_token = False
+            resultado.texto += delta
+            try:
+                avanzo = validador.alimentar(delta)
+            except SalidaInvalida as e:
+                resultado.motivo_aborto = str(e)
+                STREAMS_ABORTADOS_IA.incrementar(proveedor=proveedor, prompt_type=prompt_type)
+                print(f"✂️ Stream de {proveedor} cortado: la salida ya no puede ser válida ({e})")
+                break
+            if avanzo and al_avanzar is not None:
+                al_avanzar(validador.parcial())
+    finally:
+        response.close()
+    return resultado
 
 class IAService:
-    def __init__(self, prompt: str):
-        self.prompt = prompt
+    def __init__(self, prompt: str | PromptCompilado, usar_cache: bool = True):
+        # Con un prompt compilado, el prefijo se envía de forma que el proveedor lo pueda cachear;
+        # self.prompt es siempre el texto completo (clave de la caché de respuestas y log)
+        self.prompt_compilado = prompt if isinstance(prompt, PromptCompilado) else None
+        self.prompt = prompt.texto if isinstance(prompt, PromptCompilado) else prompt
+        self.usar_cache = usar_cache
+
+    def _respuesta_cacheada(self, proveedor: str, modelo_id: str, prompt_type: str) -> object | None:
+        """
+        Retorna el DTO construido desde la caché de respuestas, o None si no hay una entrada válida.
+        """
+        cache = obtener_cache() if self.usar_cache else None
+        if cache is None:
+            return None
+        cacheada = cache.obtener(proveedor, modelo_id, self.prompt, prompt_type)
+        if cacheada is None:
+            return None
+        try:
+            resultado = self._interpretar(proveedor, prompt_type, cacheada.texto, cacheada.response_time, 200)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        # Una respuesta desde la caché no consume tokens
+        self._anotar_traza(resultado, cacheada.texto, 0, proveedor, modelo_id)
+        print(f"♻️ Respuesta de {proveedor} ({modelo_id}) obtenida desde la caché")
+        return resultado
+
+    def _interpretar(self, proveedor: str, prompt_type: str, texto: str, response_time: float, status_code: int) -> object:
+        """
+        Extrae el JSON del texto del modelo y construye el DTO del tipo de prompt,
+        registrando en las métricas si la respuesta se pudo leer directamente o hubo que repararla.
+        """
+        processed_data, reparada = extraer_json(texto)
+        resultado = self._process_prompt_response(prompt_type, processed_data, response_time, status_code, proveedor)
+        RESPUESTAS_INTERPRETADAS_IA.incrementar(
+            proveedor=proveedor, prompt_type=prompt_type, forma="reparada" if reparada else "directa"
+        )
+        return resultado
 
-    def call_openAI(self, prompt_type: str) -> object:
+    def _anotar_traza(self, resultado: object, texto: str, tokens_used: int | None, proveedor: str, modelo_id: str) -> None:
+        """
+        Agrega a los ProcessStatusDTO el prompt enviado, el texto devuelto, los tokens de la llamada
+        y el modelo que respondió. En un lote los tokens se reparten entre los artículos.
+        """
+        if isinstance(resultado, ProcessStatusDTO):
+            dtos = [resultado]
+        elif isinstance(resultado, dict):
+            dtos = [dto for dto in resultado.values() if isinstance(dto, ProcessStatusDTO)]
+        else:
+            return
+        for dto in dtos:
+            dto.prompt = self.prompt
+            dto.respuesta = texto
+            dto.tokens_used = round(tokens_used / len(dtos)) if tokens_used is not None else None
+            dto.modelo_id = modelo_id
+            dto.nivel_modelo = nivel_modelo(proveedor, modelo_id)
+
+    def _estimar_tokens(self) -> int:
+        """
+        Tokens que se reservan de la cuota del proveedor para el prompt actual y su respuesta.
+        """
+        return len(self.prompt) // CARACTERES_POR_TOKEN + TOKENS_SALIDA_ESTIMADOS
+
+    def _guardar_en_cache(self, proveedor: str, modelo_id: str, prompt_type: str, texto: str, response_time: float) -> None:
+        """
+        Guarda en la caché el texto de una respuesta que se pudo procesar correctamente.
+        """
+        cache = obtener_cache() if self.usar_cache else None
+        if cache is not None:
+            cache.guardar(proveedor, modelo_id, self.prompt, prompt_type, texto, response_time)
+
+    def interpretar_respuesta(
+        self, proveedor: str, prompt_type: str, response_json: dict, response_time: float, modelo_id: str | None = None
+    ) -> object:
+        """
+        Construye el DTO desde una respuesta completa del proveedor obtenida fuera de call_openAI/call_gemini
+        (por ejemplo, un resultado de un trabajo por lotes), registrando los tokens informados.
+        `modelo_id` es el modelo que respondió (por defecto, el principal del proveedor).
+        Lanza KeyError, IndexError, TypeError o ValueError si la respuesta no se puede interpretar.
+        """
+        if proveedor == "OPENAI":
+            texto = extraer_texto_openai(response_json)
+            tokens_used = _registrar_tokens(proveedor, response_json.get("usage") or {})
+        else:
+            texto = extraer_texto_gemini(response_json)
+            tokens_used = _registrar_tokens(proveedor, response_json.get("usageMetadata") or {})
+        resultado = self._interpretar(proveedor, prompt_type, texto, response_time, 200)
+        self._anotar_traza(resultado, texto, tokens_used, proveedor, modelo_id or MODELOS_POR_NIVEL[proveedor]["principal"])
+        return resultado
+
+    def call_openAI(
+        self,
+        prompt_type: str,
+        streaming: bool = False,
+        al_avanzar: Callable[[object], None] | None = None,
+        modelo_id: str | None = None
+    ) -> object:
         """
         Realiza la llamada al modelo OpenAI y procesa la respuesta según el tipo de prompt.
+
+        Con `streaming` la respuesta se lee por SSE: `al_avanzar` recibe el resultado parcial con cada
+        valor completado y la petición se corta apenas la salida deja de ser válida para el esquema.
+        `modelo_id` elige el modelo (por defecto, el principal); la caché distingue las respuestas por modelo.
         """
-        print(f"Llamando al modelo: OpenAI")
-        url: str = "https://api.openai.com/v1/responses"
+        modelo_id = modelo_id or OPENAI_MODELO_PRINCIPAL
+        cacheado = self._respuesta_cacheada("OPENAI", modelo_id, prompt_type)
+        if cacheado is not None:
+            return cacheado
+
+        print(f"Llamando al modelo: OpenAI ({modelo_id})")
+        url: str = f"{OPENAI_BASE_URL}/responses"
         headers: dict[str, str] = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {OPENAI_API_KEY}"
         }
-        payload: dict[str, str] = {
-            "model": "gpt-4o",
-            "input": self.prompt
-        }
+        payload = construir_payload_openai(self.prompt_compilado or self.prompt, prompt_type, modelo_id)
+        if streaming:
+            payload["stream"] = True
 
-        # Realizar la solicitud
-        response = requests.post(url, headers=headers, json=payload)
-        response_time = round(response.elapsed.total_seconds(), 2)
+        # Realizar la solicitud (el cliente espera su turno en la cuota y reintenta los 429/5xx)
+        tokens_estimados = self._estimar_tokens()
+        stream = None
+        inicio = time.perf_counter()
+        with tramo("POST OPENAI", "llm", prompt_type=prompt_type, streaming=streaming):
+            response = obtener_cliente("OPENAI").post(
+                url, headers=headers, json=payload, tokens_estimados=tokens_estimados, stream=streaming
+            )
+            if streaming and response.status_code == 200:
+                stream = _leer_stream("OPENAI", prompt_type, response, _fragmento_openai, al_avanzar, inicio)
+        latencia = time.perf_counter() - inicio if stream is not None else None
+        response_time = round(latencia if latencia is not None else response.elapsed.total_seconds(), 2)
+        _registrar_llamada("OPENAI", response, latencia)
         print(f"Tiempo de respuesta: {response_time:.2f} segundos")
 
         if response.status_code == 200:
-            response_json = response.json()
+            if stream is not None:
+                # Se arma la misma estructura que la respuesta sin streaming
+                response_json = {"output": [{"content": [{"text": stream.texto}]}], "usage": stream.uso}
+            else:
+                response_json = response.json()
+            tokens_used = _registrar_tokens("OPENAI", response_json.get("usage") or {})
+            _corregir_cuota("OPENAI", tokens_estimados, tokens_used)
             try:
-                # Extraer el contenido del JSON devuelto por el modelo
-                output = response_json["output"][0]["content"][0]["text"]
-                processed_data = json.loads(output.strip("```json").strip())
+                with tramo("parsear respuesta OPENAI", "json", prompt_type=prompt_type):
+                    if stream is not None and stream.motivo_aborto:
+                        raise SalidaInvalida(stream.motivo_aborto)
 
-                # Procesar según el tipo de prompt
-                return self._process_prompt_response(prompt_type, processed_data, response_time, response.status_code, "OPENAI")
-            except (KeyError, ValueError, json.JSONDecodeError) as e:
+                    # Extraer el contenido del JSON devuelto por el modelo
+                    output = extraer_texto_openai(response_json)
+
+                    # Procesar según el tipo de prompt
+                    resultado = self._interpretar("OPENAI", prompt_type, output, response_time, response.status_code)
+                    self._anotar_traza(resultado, output, tokens_used, "OPENAI", modelo_id)
+                self._guardar_en_cache("OPENAI", modelo_id, prompt_type, output, response_time)
+                return resultado
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                ERRORES_PARSEO_IA.incrementar(proveedor="OPENAI", prompt_type=prompt_type)
                 print(f"❌ Error al procesar la respuesta del modelo OpenAI: {e}")
-                raise Exception("Error al procesar la respuesta del modelo OpenAI.")
+                raise RespuestaInvalidaIA(f"Error al procesar la respuesta del modelo OpenAI ({modelo_id}).") from e
         else:
             print(f"❌ Error en la petición: {response.status_code}")
-            raise Exception(f"Error en la petición: {response.status_code}")
+            raise ErrorPeticionIA("OPENAI", response.status_code)
 
-    def call_gemini(self, prompt_type: str) -> object:
+    def call_gemini(
+        self,
+        prompt_type: str,
+        streaming: bool = False,
+        al_avanzar: Callable[[object], None] | None = None,
+        modelo_id: str | None = None
+    ) -> object:
         """
         Realiza la llamada al modelo Gemini y procesa la respuesta según el tipo de prompt.
+
+        Con `streaming` se usa streamGenerateContent (SSE): `al_avanzar` recibe el resultado parcial con
+        cada valor completado y la petición se corta apenas la salida deja de ser válida para el esquema.
+        `modelo_id` elige el modelo (por defecto, el principal); la caché distingue las respuestas por modelo.
         """
-        print(f"Llamando al modelo: Gemini")
-        url: str = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        modelo_id = modelo_id or GEMINI_MODELO_PRINCIPAL
+        cacheado = self._respuesta_cacheada("GEMINI", modelo_id, prompt_type)
+        if cacheado is not None:
+            return cacheado
+
+        print(f"Llamando al modelo: Gemini ({modelo_id})")
+        metodo = "streamGenerateContent" if streaming else "generateContent"
+        url: str = f"{GEMINI_BASE_URL}/v1beta/models/{modelo_id}:{metodo}"
         headers: dict[str, str] = {
             "Content-Type": "application/json"
         }
         queryparam: dict[str, str | None] = {
             "key": GEMINI_API_KEY
         }
-        data = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": self.prompt
-                        }
-                    ]
-                }
-            ]
-        }
+        if streaming:
+            queryparam["alt"] = "sse"
+        contexto = None
+        if self.prompt_compilado is not None and IA_CONTEXTO_GEMINI_ACTIVO:
+            contexto = obtener_contextos_gemini().obtener(modelo_id, self.prompt_compilado)
+        data = construir_payload_gemini(self.prompt_compilado or self.prompt, prompt_type, contexto)
 
-        # Realizar la solicitud
-        response = requests.post(url, json=data, headers=headers, params=queryparam)
-        response_time = round(response.elapsed.total_seconds(), 2)
+        # Realizar la solicitud (el cliente espera su turno en la cuota y reintenta los 429/5xx)
+        tokens_estimados = self._estimar_tokens()
+        stream = None
+        inicio = time.perf_counter()
+        with tramo("POST GEMINI", "llm", prompt_type=prompt_type, streaming=streaming):
+            response = obtener_cliente("GEMINI").post(
+                url, json=data, headers=headers, params=queryparam, tokens_estimados=tokens_estimados, stream=streaming
+            )
+            if contexto is not None and response.status_code in STATUS_CONTEXTO_INVALIDO:
+                # El contexto cacheado venció o fue eliminado: se olvida y se reenvía con el prefijo en la petición
+                print(f"⚠️ Gemini rechazó el contexto cacheado {contexto} ({response.status_code}); se envía el prompt completo")
+                response.close()
+                obtener_contextos_gemini().invalidar(modelo_id, self.prompt_compilado)
+                data = construir_payload_gemini(self.prompt_compilado, prompt_type)
+                response = obtener_cliente("GEMINI").post(
+                    url, json=data, headers=headers, params=queryparam, tokens_estimados=tokens_estimados, stream=streaming
+                )
+            if streaming and response.status_code == 200:
+                stream = _leer_stream("GEMINI", prompt_type, response, _fragmento_gemini, al_avanzar, inicio)
+        latencia = time.perf_counter() - inicio if stream is not None else None
+        response_time = round(latencia if latencia is not None else response.elapsed.total_seconds(), 2)
+        _registrar_llamada("GEMINI", response, latencia)
         print(f"Tiempo de respuesta: {response_time:.2f} segundos")
 
         if response.status_code == 200:
-            response_json = response.json()
+            if stream is not None:
+                # Se arma la misma estructura que la respuesta sin streaming
+                response_json = {"candidates": [{"content": {"parts": [{"text": stream.texto}]}}], "usageMetadata": stream.uso}
+            else:
+                response_json = response.json()
+            tokens_used = _registrar_tokens("GEMINI", response_json.get("usageMetadata") or {})
+            _corregir_cuota("GEMINI", tokens_estimados, tokens_used)
             try:
-                # Extraer el contenido del JSON devuelto por el modelo
-                raw_text = response_json['candidates'][0]['content']['parts'][0]['text']
-                processed_data = json.loads(raw_text.strip("```json").strip())
+                with tramo("parsear respuesta GEMINI", "json", prompt_type=prompt_type):
+                    if stream is not None and stream.motivo_aborto:
+                        raise SalidaInvalida(stream.motivo_aborto)
+
+                    # Extraer el contenido del JSON devuelto por el modelo
+                    raw_text = extraer_texto_gemini(response_json)
 
-                # Procesar según el tipo de prompt
-                return self._process_prompt_response(prompt_type, processed_data, response_time, response.status_code, "GEMINI")
-            except (KeyError, ValueError, json.JSONDecodeError) as e:
+                    # Procesar según el tipo de prompt
+                    resultado = self._interpretar("GEMINI", prompt_type, raw_text, response_time, response.status_code)
+                    self._anotar_traza(resultado, raw_text, tokens_used, "GEMINI", modelo_id)
+                self._guardar_en_cache("GEMINI", modelo_id, prompt_type, raw_text, response_time)
+                return resultado
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                ERRORES_PARSEO_IA.incrementar(proveedor="GEMINI", prompt_type=prompt_type)
                 print(f"❌ Error al procesar la respuesta del modelo Gemini: {e}")
-                raise Exception("Error al procesar la respuesta del modelo Gemini.")
+                raise RespuestaInvalidaIA(f"Error al procesar la respuesta del modelo Gemini ({modelo_id}).") from e
         else:
             print(f"❌ Error en la petición: {response.status_code}")
-            raise Exception(f"Error en la petición: {response.status_code}")
+            raise ErrorPeticionIA("GEMINI", response.status_code)
 
     def _process_prompt_response(self, prompt_type: str, data: dict, response_time: float, status_code: int, model_used: str) -> object:
         """
         Procesa la respuesta según el tipo de prompt y retorna el DTO correspondiente.
         """
         if prompt_type == "procesamiento_articulo":
+            data = validar_analisis_articulo(data)
             return ProcessStatusDTO(
                 etiquetas_ia=data["etiquetas_ia"],
                 sentimiento=data["sentimiento"],
-                rating=float(data["rating"]),
+                rating=data["rating"],
                 nivel_riesgo=data["nivel_riesgo"],
                 indicador_violencia=data["indicador_violencia"],
                 edad_recomendada=data["edad_recomendada"],
+                confianza=data["confianza"],
                 is_processed=True,
                 execution_time=f"{response_time} seg",
                 status_code=status_code,
-                model_used=model_used
+                model_used=model_used,
+                response_time_sec=response_time
             )
+        elif prompt_type == "procesamiento_lote":
+            # Con salida estructurada el arreglo viene dentro de {"articulos": [...]}
+            if isinstance(data, dict) and isinstance(data.get("articulos"), list):
+                data = data["articulos"]
+            if not isinstance(data, list):
+                raise ValueError("Se esperaba un arreglo JSON para el análisis en lote.")
+            # El tiempo de la petición se reparte entre los artículos del lote
+            tiempo_por_articulo = round(response_time / max(1, len(data)), 2)
+            resultados: dict[int, ProcessStatusDTO] = {}
+            for item in data:
+                try:
+                    resultados[int(item["id"])] = self._process_prompt_response(
+                        "procesamiento_articulo", item, tiempo_por_articulo, status_code, model_used
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    ERRORES_PARSEO_IA.incrementar(proveedor=model_used, prompt_type="procesamiento_lote", nivel="elemento")
+                    print(f"⚠️ Elemento inválido en la respuesta en lote de {model_used}: {e}")
+            return resultados
         elif prompt_type == "resumen_ejecutivo":
             return AnalisisResumenDTO(
                 titulo=data.get("titulo", "Resumen Ejecutivo"),
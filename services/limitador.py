@@ -0,0 +1,296 @@
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from config.settings import (
+    OPENAI_RPM, OPENAI_TPM, GEMINI_RPM, GEMINI_TPM, IA_BACKOFF_BASE_SEG, IA_BACKOFF_MAX_SEG
+)
+from services.metricas import ESPERA_LIMITE_IA, FACTOR_LIMITE_IA
+from services.plazos import PlazoVencido, esperar
+
+# Códigos de estado que vale la pena reintentar: límite de tasa y errores transitorios del proveedor
+STATUS_REINTENTABLES = frozenset({429, 500, 502, 503, 504})
+
+# Ajuste automático de la tasa: se reduce a esta fracción con cada 429 y se recupera de a poco con cada éxito
+FACTOR_REDUCCION = 0.7
+FACTOR_RECUPERACION = 0.02
+FACTOR_MINIMO = 0.1
+
+_DURACION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_SEGUNDOS_POR_UNIDAD = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parsear_duracion(texto: str | None) -> float | None:
+    """
+    Convierte duraciones como "20ms", "1s", "6m0s" o "37.5s" (cabeceras x-ratelimit-reset-* y retryDelay de Gemini) a segundos.
+    """
+    if not texto:
+        return None
+    partes = _DURACION.findall(texto)
+    if not partes:
+        return None
+    return sum(float(valor) * _SEGUNDOS_POR_UNIDAD[unidad] for valor, unidad in partes)
+
+
+def _parsear_retry_after(valor: str | None) -> float | None:
+    """
+    Interpreta la cabecera Retry-After, que puede venir en segundos o como fecha HTTP.
+    """
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay_gemini(response: requests.Response) -> float | None:
+    """
+    Gemini informa la espera sugerida en el cuerpo del 429 (google.rpc.RetryInfo.retryDelay).
+    """
+    try:
+        detalles = response.json().get("error", {}).get("details", [])
+    except ValueError:
+        return None
+    for detalle in detalles if isinstance(detalles, list) else []:
+        if isinstance(detalle, dict) and "retryDelay" in detalle:
+            return _parsear_duracion(detalle["retryDelay"])
+    return None
+
+
+def calcular_backoff(intento: int) -> float:
+    """
+    Espera antes del reintento `intento` (0, 1, 2...): backoff exponencial con jitter completo.
+    """
+    return random.uniform(0, min(IA_BACKOFF_MAX_SEG, IA_BACKOFF_BASE_SEG * 2 ** intento))
+
+
+class CuboTokens:
+    """
+    Cubo de tokens que se rellena de forma continua a razón de `por_minuto` unidades por minuto.
+
+    Las reservas pueden dejar el saldo negativo: quien reserva espera lo que tarda el saldo en
+    volver a cero, así las peticiones concurrentes quedan espaciadas sin sobrepasar la tasa.
+    Un cubo sin tasa (0) no limita.
+    """
+
+    def __init__(self, por_minuto: float):
+        self.por_minuto = por_minuto
+        self.capacidad = por_minuto
+        self._saldo = float(por_minuto)
+        self._actualizado = time.monotonic()
+
+    def _rellenar(self, ahora: float) -> None:
+        if self.por_minuto > 0:
+            self._saldo = min(self.capacidad, self._saldo + (ahora - self._actualizado) * self.por_minuto / 60)
+        self._actualizado = ahora
+
+    def reservar(self, cantidad: float, ahora: float) -> float:
+        """
+        Descuenta `cantidad` y retorna los segundos que hay que esperar antes de usarla.
+        """
+        if self.por_minuto <= 0:
+            return 0.0
+        self._rellenar(ahora)
+        self._saldo -= cantidad
+        return 0.0 if self._saldo >= 0 else -self._saldo * 60 / self.por_minuto
+
+    def limitar_saldo(self, disponible: float, ahora: float) -> None:
+        """
+        Ajusta el saldo a lo que el proveedor informa como disponible, si es menor.
+        """
+        self._rellenar(ahora)
+        self._saldo = min(self._saldo, disponible)
+
+    def fijar_tasa(self, por_minuto: float, capacidad: float) -> None:
+        """
+        Cambia la tasa y la capacidad; un cubo que no limitaba parte lleno.
+        """
+        self._rellenar(time.monotonic())
+        if self.por_minuto <= 0:
+            self._saldo = capacidad
+        self.por_minuto = por_minuto
+        self.capacidad = capacidad
+        self._saldo = min(self._saldo, capacidad)
+
+
+class LimitadorProveedor:
+    """
+    Limita las peticiones a un proveedor de IA a sus cuotas de peticiones (RPM) y tokens (TPM) por minuto.
+
+    - Antes de cada petición reserva una petición y los tokens estimados, esperando lo necesario.
+    - Aprende los límites reales y el saldo disponible de las cabeceras x-ratelimit-* (OpenAI).
+      Una cuota configurada en 0 queda desactivada: las cabeceras no la activan.
+    - Ante un 429 pausa a todos los hilos durante el Retry-After y reduce la tasa; con cada
+      respuesta exitosa la tasa se recupera gradualmente hasta el límite.
+    """
+
+    def __init__(self, nombre: str, rpm: int, tpm: int):
+        self.nombre = nombre
+        self.rpm_limite = rpm
+        self.tpm_limite = tpm
+        self.factor = 1.0
+        self._peticiones = CuboTokens(rpm)
+        self._tokens = CuboTokens(tpm)
+        self._pausa_hasta = 0.0
+        self._lock = threading.Lock()
+        self.esperas = 0
+        self.segundos_espera = 0.0
+        self.limitadas = 0
+        FACTOR_LIMITE_IA.fijar(self.factor, proveedor=nombre)
+
+    def _aplicar_factor(self) -> None:
+        self._peticiones.fijar_tasa(self.rpm_limite * self.factor, self.rpm_limite)
+        self._tokens.fijar_tasa(self.tpm_limite * self.factor, self.tpm_limite)
+        FACTOR_LIMITE_IA.fijar(round(self.factor, 3), proveedor=self.nombre)
+
+    def adquirir(self, tokens: int) -> None:
+        """
+        Reserva una petición y `tokens` tokens, esperando hasta que estén disponibles.
+        Lanza PlazoVencido o PresupuestoAgotado si la espera supera el plazo en curso.
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            espera = max(
+                self._pausa_hasta - ahora,
+                self._peticiones.reservar(1, ahora),
+                self._tokens.reservar(tokens, ahora),
+            )
+            if espera > 0:
+                self.esperas += 1
+                self.segundos_espera += espera
+        if espera <= 0:
+            return
+        ESPERA_LIMITE_IA.observar(espera, proveedor=self.nombre)
+        try:
+            esperar(espera)
+        except PlazoVencido:
+            # La petición no se hará: se devuelve lo reservado
+            with self._lock:
+                ahora = time.monotonic()
+                self._peticiones.reservar(-1, ahora)
+                self._tokens.reservar(-tokens, ahora)
+            raise
+
+    def intentar_adquirir(self, tokens: int) -> bool:
+        """
+        Reserva una petición y `tokens` tokens solo si están disponibles sin esperar.
+
+        Retorna:
+        - True si quedaron reservados; False si habría que esperar (no se reserva nada).
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            if self._pausa_hasta > ahora:
+                return False
+            espera = max(self._peticiones.reservar(1, ahora), self._tokens.reservar(tokens, ahora))
+            if espera > 0:
+                self._peticiones.reservar(-1, ahora)
+                self._tokens.reservar(-tokens, ahora)
+                return False
+            return True
+
+    def corregir_tokens(self, estimados: int, reales: int | None) -> None:
+        """
+        Ajusta el cubo de tokens con el uso real informado por el proveedor.
+        """
+        if reales is None or reales == estimados:
+            return
+        with self._lock:
+            self._tokens.reservar(reales - estimados, time.monotonic())
+
+    def pausar(self, segundos: float) -> None:
+        """
+        Detiene las peticiones de todos los hilos durante `segundos` (por ejemplo, el Retry-After de un 429).
+        """
+        with self._lock:
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + segundos)
+
+    def registrar_respuesta(self, response: requests.Response) -> float | None:
+        """
+        Actualiza los límites y la tasa con la respuesta del proveedor.
+
+        Retorna:
+        - Segundos de espera indicados por el proveedor (Retry-After o retryDelay), o None si no los indicó.
+        """
+        cabeceras = response.headers
+        with self._lock:
+            ahora = time.monotonic()
+            limite = cabeceras.get("x-ratelimit-limit-requests")
+            if limite and limite.isdigit() and self.rpm_limite > 0:
+                self.rpm_limite = int(limite)
+            limite = cabeceras.get("x-ratelimit-limit-tokens")
+            if limite and limite.isdigit() and self.tpm_limite > 0:
+                self.tpm_limite = int(limite)
+
+            if response.status_code == 429:
+                self.limitadas += 1
+                self.factor = max(FACTOR_MINIMO, self.factor * FACTOR_REDUCCION)
+            elif response.status_code < 400 and self.factor < 1.0:
+                self.factor = min(1.0, self.factor + FACTOR_RECUPERACION)
+            self._aplicar_factor()
+
+            # El saldo informado por el proveedor manda sobre la estimación local
+            for cubo, sufijo, activo in ((self._peticiones, "requests", self.rpm_limite > 0), (self._tokens, "tokens", self.tpm_limite > 0)):
+                restante = cabeceras.get(f"x-ratelimit-remaining-{sufijo}")
+                if not activo or not restante or not restante.isdigit():
+                    continue
+                cubo.limitar_saldo(int(restante), ahora)
+                reinicio = _parsear_duracion(cabeceras.get(f"x-ratelimit-reset-{sufijo}"))
+                if int(restante) == 0 and reinicio:
+                    self._pausa_hasta = max(self._pausa_hasta, ahora + reinicio)
+
+        espera = _parsear_retry_after(cabeceras.get("Retry-After"))
+        if espera is None and response.status_code == 429:
+            espera = _retry_delay_gemini(response)
+        return espera
+
+    def estadisticas(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "rpm": self.rpm_limite,
+                "tpm": self.tpm_limite,
+                "factor": self.factor,
+                "esperas": self.esperas,
+                "segundos_espera": self.segundos_espera,
+                "limitadas": self.limitadas,
+            }
+
+
+# Cuotas configuradas por proveedor de IA; los demás clientes (scraping) no se limitan aquí
+LIMITES: dict[str, tuple[int, int]] = {
+    "OPENAI": (OPENAI_RPM, OPENAI_TPM),
+    "GEMINI": (GEMINI_RPM, GEMINI_TPM),
+}
+
+_limitadores: dict[str, LimitadorProveedor] = {}
+_limitadores_lock = threading.Lock()
+
+
+def obtener_limitador(proveedor: str) -> LimitadorProveedor | None:
+    """
+    Obtiene (o crea la primera vez) el limitador compartido de un proveedor de IA, o None si no tiene cuotas.
+    """
+    if proveedor not in LIMITES:
+        return None
+    with _limitadores_lock:
+        limitador = _limitadores.get(proveedor)
+        if limitador is None:
+            limitador = LimitadorProveedor(proveedor, *LIMITES[proveedor])
+            _limitadores[proveedor] = limitador
+        return limitador
+
+
+def resumen_limitadores() -> dict[str, dict[str, float]]:
+    """
+    Retorna las estadísticas de cada limitador creado.
+    """
+    with _limitadores_lock:
+        limitadores = list(_limitadores.values())
+    return {limitador.nombre: limitador.estadisticas() for limitador in limitadores}
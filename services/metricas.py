@@ -0,0 +1,285 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.settings import METRICAS_PUERTO, METRICAS_ARCHIVO, METRICAS_INTERVALO_SEG
+
+# Límites (en segundos) de los histogramas de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _clave(etiquetas: dict[str, object]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((nombre, str(valor)) for nombre, valor in etiquetas.items()))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(clave: tuple[tuple[str, str], ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pares = clave + extra
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + "}"
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._lock = threading.Lock()
+        self._valores: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def valor(self, **etiquetas) -> float:
+        with self._lock:
+            return self._valores.get(_clave(etiquetas), 0.0)
+
+    def total(self, **filtro) -> float:
+        """
+        Suma los valores de todas las series cuyas etiquetas incluyen `filtro`.
+        """
+        buscadas = set(_clave(filtro))
+        with self._lock:
+            return sum(valor for clave, valor in self._valores.items() if buscadas <= set(clave))
+
+    def _lineas(self) -> list[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f"{self.nombre}{_formatear_etiquetas(clave)} {valor:g}" for clave, valor in valores]
+
+    def exportar(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        return "\n".join(lineas + self._lineas())
+
+
+class Contador(_Metrica):
+    """
+    Valor que solo aumenta (peticiones, errores, tokens...), por combinación de etiquetas.
+    """
+    tipo = "counter"
+
+    def incrementar(self, valor: float = 1, **etiquetas) -> None:
+        clave = _clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + valor
+
+
+class Medidor(_Metrica):
+    """
+    Valor instantáneo que sube y baja (por ejemplo, la profundidad de una cola).
+    """
+    tipo = "gauge"
+
+    def fijar(self, valor: float, **etiquetas) -> None:
+        with self._lock:
+            self._valores[_clave(etiquetas)] = valor
+
+
+class Histograma(_Metrica):
+    """
+    Distribución de observaciones (latencias) en buckets acumulados, con su suma y cantidad.
+    """
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, buckets: tuple[float, ...] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[tuple[str, str], ...], list] = {}  # clave -> [conteos por bucket, suma, cantidad]
+
+    def observar(self, valor: float, **etiquetas) -> None:
+        clave = _clave(etiquetas)
+        with self._lock:
+            serie = self._series.setdefault(clave, [[0] * len(self.buckets), 0.0, 0])
+            indice = bisect.bisect_left(self.buckets, valor)
+            if indice < len(self.buckets):
+                serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def cronometrar(self, **etiquetas) -> Iterator[None]:
+        """
+        Observa la duración del bloque.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+
+    def cantidad(self, **etiquetas) -> int:
+        with self._lock:
+            serie = self._series.get(_clave(etiquetas))
+            return serie[2] if serie else 0
+
+    def _lineas(self) -> list[str]:
+        with self._lock:
+            series = sorted((clave, (list(s[0]), s[1], s[2])) for clave, s in self._series.items())
+        lineas: list[str] = []
+        for clave, (conteos, suma, cantidad) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(clave, (('le', f'{limite:g}'),))} {acumulado}")
+            lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(clave, (('le', '+Inf'),))} {cantidad}")
+            lineas.append(f"{self.nombre}_sum{_formatear_etiquetas(clave)} {suma:g}")
+            lineas.append(f"{self.nombre}_count{_formatear_etiquetas(clave)} {cantidad}")
+        return lineas
+
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas de la aplicación, exportable en el formato de texto de Prometheus.
+    """
+
+    def __init__(self):
+        self._metricas: dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        with self._lock:
+            return self._metricas.setdefault(metrica.nombre, metrica)
+
+    def contador(self, nombre: str, ayuda: str) -> Contador:
+        return self._registrar(Contador(nombre, ayuda))
+
+    def medidor(self, nombre: str, ayuda: str) -> Medidor:
+        return self._registrar(Medidor(nombre, ayuda))
+
+    def histograma(self, nombre: str, ayuda: str, buckets: tuple[float, ...] = BUCKETS_LATENCIA) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, buckets))
+
+    def exportar_texto(self) -> str:
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return "\n".join(metrica.exportar() for metrica in metricas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+# ----------- MÉTRICAS DE LA APLICACIÓN -----------
+
+PAGINAS_SCRAPING = REGISTRO.contador("scraping_paginas_total", "Páginas de listado descargadas, por host y código de estado (\"timeout\" o \"error\" si no hubo respuesta).")
+DURACION_PAGINA_SCRAPING = REGISTRO.histograma("scraping_pagina_segundos", "Tiempo de respuesta de las páginas de listado, por host.")
+DURACION_DB = REGISTRO.histograma("db_operacion_segundos", "Duración de las operaciones del repositorio, por operación.")
+ERRORES_DB = REGISTRO.contador("db_errores_total", "Operaciones de base de datos que terminaron en error.")
+LLAMADAS_IA = REGISTRO.contador("ia_llamadas_total", "Llamadas a los proveedores de IA, por proveedor y código de estado.")
+LATENCIA_IA = REGISTRO.histograma("ia_latencia_segundos", "Tiempo de respuesta de los proveedores de IA (response.elapsed).")
+TOKENS_IA = REGISTRO.contador("ia_tokens_total", "Tokens informados por los proveedores de IA, por proveedor y tipo (entrada/salida).")
+TOKENS_CACHEADOS_IA = REGISTRO.contador("ia_tokens_cacheados_total", "Tokens de entrada leídos desde la caché de prefijos del proveedor (incluidos en ia_tokens_total de entrada), por proveedor.")
+REINTENTOS_IA = REGISTRO.contador("ia_reintentos_total", "Peticiones a los proveedores de IA repetidas por respuesta 429/5xx, por proveedor y código de estado.")
+ESPERA_LIMITE_IA = REGISTRO.histograma("ia_espera_limite_segundos", "Tiempo de espera impuesto por el limitador de tasa antes de cada petición, por proveedor.")
+FACTOR_LIMITE_IA = REGISTRO.medidor("ia_limite_factor", "Fracción del límite por minuto que usa el limitador de cada proveedor (baja al recibir 429).")
+PRIMER_TOKEN_IA = REGISTRO.histograma("ia_primer_token_segundos", "Tiempo hasta el primer fragmento de texto de las respuestas en streaming, por proveedor.")
+RESPALDOS_IA = REGISTRO.contador("ia_respaldos_total", "Peticiones de respaldo a los proveedores de IA, por proveedor y resultado (ganado/perdido/fallido/omitido por el tope de gasto).")
+UMBRAL_RESPALDO_IA = REGISTRO.medidor("ia_respaldo_umbral_segundos", "Latencia observada a partir de la cual se envía una petición de respaldo, por proveedor.")
+STREAMS_ABORTADOS_IA = REGISTRO.contador("ia_streams_abortados_total", "Respuestas en streaming cortadas porque la salida ya no podía ser JSON válido, por proveedor y tipo de prompt.")
+ERRORES_PARSEO_IA = REGISTRO.contador("ia_errores_parseo_total", "Respuestas de IA (o artículos de un lote, nivel=elemento) que no se pudieron interpretar, por proveedor y tipo de prompt.")
+RESPUESTAS_INTERPRETADAS_IA = REGISTRO.contador(
+    "ia_respuestas_interpretadas_total",
+    "Respuestas de IA interpretadas, por proveedor, tipo de prompt y forma (directa/reparada)."
+)
+ANALISIS_NIVEL_IA = REGISTRO.contador("ia_analisis_nivel_total", "Análisis de artículos registrados, por proveedor y nivel de la cascada que respondió (economico/principal).")
+ESCALAMIENTOS_IA = REGISTRO.contador("ia_escalamientos_total", "Análisis repetidos con el siguiente nivel de la cascada, por proveedor y motivo.")
+TRABAJOS_LOTE_IA = REGISTRO.contador("ia_trabajos_lote_total", "Trabajos enviados a las APIs batch de los proveedores y cómo terminaron, por proveedor y estado.")
+ARTICULOS_PROCESADOS = REGISTRO.contador("articulos_procesados_total", "Artículos procesados, por modelo y resultado (exitoso/fallido/cancelado).")
+PROFUNDIDAD_COLA = REGISTRO.medidor("cola_profundidad", "Elementos en espera en cada cola interna.")
+ESCRITURAS_DESCARTADAS = REGISTRO.contador("buffer_escritura_descartados_total", "Resultados y logs que el buffer de escritura no pudo guardar y dejó en el archivo de descartes, por tipo.")
+
+
+def medir_tiempo(histograma: Histograma, **etiquetas) -> Callable:
+    """
+    Decorador que observa en `histograma` la duración de cada llamada a la función.
+    """
+    def decorador(funcion: Callable) -> Callable:
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with histograma.cronometrar(**etiquetas):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# ----------- EXPORTACIÓN -----------
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        cuerpo = REGISTRO.exportar_texto().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def volcar_metricas(ruta: str) -> None:
+    """
+    Escribe las métricas en formato de texto de Prometheus (escritura atómica).
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as archivo:
+        archivo.write(REGISTRO.exportar_texto())
+    os.replace(ruta_temporal, ruta)
+
+
+_servidor: ThreadingHTTPServer | None = None
+_detener_volcado = threading.Event()
+_hilo_volcado: threading.Thread | None = None
+
+
+def iniciar_exportacion_metricas(
+    puerto: int = METRICAS_PUERTO,
+    archivo: str = METRICAS_ARCHIVO,
+    intervalo_seg: float = METRICAS_INTERVALO_SEG
+) -> None:
+    """
+    Publica las métricas en http://127.0.0.1:<puerto>/metrics (si puerto > 0) y/o las vuelca
+    cada `intervalo_seg` segundos en `archivo` (si se indica).
+    """
+    global _servidor, _hilo_volcado
+    if puerto > 0 and _servidor is None:
+        _servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _ManejadorMetricas)
+        threading.Thread(target=_servidor.serve_forever, name="metricas-http", daemon=True).start()
+        print(f"📈 Métricas disponibles en http://127.0.0.1:{puerto}/metrics")
+
+    if archivo and _hilo_volcado is None:
+        _detener_volcado.clear()
+
+        def _bucle() -> None:
+            while not _detener_volcado.wait(intervalo_seg):
+                volcar_metricas(archivo)
+
+        _hilo_volcado = threading.Thread(target=_bucle, name="metricas-archivo", daemon=True)
+        _hilo_volcado.start()
+        print(f"📈 Métricas volcadas cada {intervalo_seg} seg en '{archivo}'")
+
+
+def detener_exportacion_metricas(archivo: str = METRICAS_ARCHIVO) -> None:
+    """
+    Detiene el servidor y el volcado periódico, escribiendo un último volcado. Debe llamarse al terminar.
+    """
+    global _servidor, _hilo_volcado
+    if _servidor is not None:
+        _servidor.shutdown()
+        _servidor.server_close()
+        _servidor = None
+    if _hilo_volcado is not None:
+        _detener_volcado.set()
+        _hilo_volcado.join()
+        _hilo_volcado = None
+        volcar_metricas(archivo)
@@ -0,0 +1,211 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+# Etapas que se muestran en el desglose, en orden
+ETAPAS = ("scraping", "csv", "db", "llm", "json", "pandas")
+
+
+@dataclass
+class Tramo:
+    """
+    Intervalo de tiempo medido durante una ejecución perfilada.
+    """
+    nombre: str                                 # Nombre de la operación (ej: "POST GEMINI")
+    etapa: str                                  # Etapa a la que pertenece (scraping, db, llm...)
+    inicio: float                               # Inicio en segundos desde el comienzo del perfilado
+    duracion: float                             # Duración en segundos
+    hilo: int                                   # Identificador del hilo
+    args: dict = field(default_factory=dict)    # Datos adicionales (ej: articulo_id, modelo)
+
+
+class Trazador:
+    """
+    Acumula los tramos de una ejecución y genera el desglose por etapa y la traza
+    en formato Chrome Trace Event (visible en Perfetto, chrome://tracing o speedscope).
+    """
+
+    def __init__(self, por_articulo: bool = False):
+        self.por_articulo = por_articulo
+        self.origen = time.perf_counter()
+        self.tramos: list[Tramo] = []
+        self.hilos: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre: str, etapa: str, inicio: float, fin: float, args: dict) -> None:
+        hilo = threading.current_thread()
+        tramo = Tramo(nombre, etapa, inicio - self.origen, fin - inicio, hilo.ident or 0, args)
+        with self._lock:
+            self.tramos.append(tramo)
+            self.hilos.setdefault(tramo.hilo, hilo.name)
+
+    @staticmethod
+    def _tiempos_propios(tramos: list[Tramo]) -> list[float]:
+        """
+        Tiempo de cada tramo descontando los tramos anidados dentro de él en el mismo hilo.
+        """
+        propios = [tramo.duracion for tramo in tramos]
+        por_hilo: dict[int, list[int]] = {}
+        for indice, tramo in enumerate(tramos):
+            por_hilo.setdefault(tramo.hilo, []).append(indice)
+
+        for indices in por_hilo.values():
+            indices.sort(key=lambda i: (tramos[i].inicio, -tramos[i].duracion))
+            pila: list[int] = []
+            for indice in indices:
+                tramo = tramos[indice]
+                while pila and tramos[pila[-1]].inicio + tramos[pila[-1]].duracion <= tramo.inicio:
+                    pila.pop()
+                if pila:
+                    propios[pila[-1]] -= tramo.duracion
+                pila.append(indice)
+        return [max(0.0, propio) for propio in propios]
+
+    def desglose(self) -> dict[str, dict[str, float]]:
+        """
+        Retorna por etapa: cantidad de tramos, tiempo total, tiempo propio (sin tramos anidados) y máximo.
+        """
+        with self._lock:
+            tramos = list(self.tramos)
+        resumen: dict[str, dict[str, float]] = {}
+        for tramo, propio in zip(tramos, self._tiempos_propios(tramos)):
+            etapa = resumen.setdefault(tramo.etapa, {"tramos": 0, "total_seg": 0.0, "propio_seg": 0.0, "max_seg": 0.0})
+            etapa["tramos"] += 1
+            etapa["total_seg"] += tramo.duracion
+            etapa["propio_seg"] += propio
+            etapa["max_seg"] = max(etapa["max_seg"], tramo.duracion)
+        return resumen
+
+    def exportar_chrome(self, ruta: str) -> None:
+        """
+        Escribe la traza en formato Chrome Trace Event (eventos completos "X", tiempos en microsegundos).
+        """
+        pid = os.getpid()
+        with self._lock:
+            eventos = [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": hilo, "args": {"name": nombre}}
+                for hilo, nombre in self.hilos.items()
+            ]
+            eventos += [
+                {
+                    "name": tramo.nombre,
+                    "cat": tramo.etapa,
+                    "ph": "X",
+                    "ts": round(tramo.inicio * 1_000_000),
+                    "dur": round(tramo.duracion * 1_000_000),
+                    "pid": pid,
+                    "tid": tramo.hilo,
+                    "args": tramo.args,
+                }
+                for tramo in self.tramos
+            ]
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, archivo, ensure_ascii=False, default=str)
+
+
+class _Medicion:
+    __slots__ = ("_trazador", "_nombre", "_etapa", "_args", "_inicio")
+
+    def __init__(self, trazador: Trazador, nombre: str, etapa: str, args: dict):
+        self._trazador = trazador
+        self._nombre = nombre
+        self._etapa = etapa
+        self._args = args
+
+    def __enter__(self) -> None:
+        self._inicio = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._trazador.registrar(self._nombre, self._etapa, self._inicio, time.perf_counter(), self._args)
+
+
+_trazador: Trazador | None = None
+_NULO = nullcontext()
+
+
+def tramo(nombre: str, etapa: str, **args):
+    """
+    Context manager que mide un tramo si el perfilado está activo; si no, no hace nada.
+    """
+    trazador = _trazador
+    if trazador is None:
+        return _NULO
+    return _Medicion(trazador, nombre, etapa, args)
+
+
+def tramo_articulo(articulo_id: int | list[int], modelo: str):
+    """
+    Tramo del procesamiento completo de un artículo (o de un lote, si se entregan varios IDs);
+    solo se registra con el perfilado por artículo activo.
+    """
+    trazador = _trazador
+    if trazador is None or not trazador.por_articulo:
+        return _NULO
+    if isinstance(articulo_id, list):
+        nombre = f"lote {articulo_id[0]}..{articulo_id[-1]}" if articulo_id else "lote"
+        return _Medicion(trazador, nombre, "articulo", {"articulo_ids": articulo_id, "modelo": modelo})
+    return _Medicion(trazador, f"articulo {articulo_id}", "articulo", {"articulo_id": articulo_id, "modelo": modelo})
+
+
+def trazar(etapa: str, nombre: str | None = None) -> Callable:
+    """
+    Decorador que mide cada llamada a la función como un tramo de `etapa`.
+    """
+    def decorador(funcion: Callable) -> Callable:
+        nombre_tramo = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with tramo(nombre_tramo, etapa):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def iniciar_perfilado(por_articulo: bool = False) -> None:
+    """
+    Activa el registro de tramos para la ejecución.
+    """
+    global _trazador
+    _trazador = Trazador(por_articulo=por_articulo)
+    print(f"🔬 Perfilado activo{' (con tramos por artículo)' if por_articulo else ''}.")
+
+
+def finalizar_perfilado(directorio: str) -> str | None:
+    """
+    Desactiva el perfilado, muestra el desglose por etapa y escribe la traza en `directorio`.
+
+    Retorna:
+    - Ruta del archivo de traza, o None si el perfilado no estaba activo.
+    """
+    global _trazador
+    trazador, _trazador = _trazador, None
+    if trazador is None:
+        return None
+
+    duracion_total = time.perf_counter() - trazador.origen
+    desglose = trazador.desglose()
+    print(f"\n🔬 Desglose por etapa (ejecución de {duracion_total:.2f} seg):")
+    print("   El tiempo total suma todos los hilos; el propio descuenta los tramos anidados.")
+    otras = sorted(etapa for etapa in desglose if etapa not in ETAPAS)
+    for etapa in [*ETAPAS, *otras]:
+        datos = desglose.get(etapa)
+        if not datos:
+            continue
+        print(
+            f"- {etapa}: {int(datos['tramos'])} tramos, total {datos['total_seg']:.2f} seg, "
+            f"propio {datos['propio_seg']:.2f} seg, máx {datos['max_seg']:.3f} seg"
+        )
+
+    ruta = os.path.join(directorio, f"traza_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    trazador.exportar_chrome(ruta)
+    print(f"🔬 Traza guardada en '{ruta}' (abrir en https://ui.perfetto.dev o chrome://tracing)")
+    return ruta
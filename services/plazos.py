@@ -0,0 +1,134 @@
+import threading
+import time
+from contextlib import contextmanager
+from collections.abc import Iterator
+
+
+class PlazoVencido(TimeoutError):
+    """
+    Se lanza cuando una operación supera el plazo asignado (por ejemplo, el de un artículo).
+    """
+
+
+class PresupuestoAgotado(PlazoVencido):
+    """
+    Se lanza cuando se agota el presupuesto de tiempo de la ejecución completa.
+    El trabajo afectado debe quedar pendiente para una próxima ejecución.
+    """
+
+
+class Plazo:
+    """
+    Instante límite de una operación, medido con el reloj monotónico.
+    Un plazo sin segundos (None o <= 0) no vence nunca.
+    """
+
+    def __init__(self, segundos: float | None):
+        self.limite = time.monotonic() + segundos if segundos and segundos > 0 else None
+
+    def restante(self) -> float | None:
+        """
+        Segundos que quedan antes de vencer, o None si el plazo no tiene límite.
+        """
+        if self.limite is None:
+            return None
+        return max(0.0, self.limite - time.monotonic())
+
+    def vencido(self) -> bool:
+        return self.limite is not None and time.monotonic() >= self.limite
+
+
+_presupuesto = Plazo(None)
+_local = threading.local()
+
+
+def iniciar_presupuesto(segundos: float | None) -> None:
+    """
+    Fija el presupuesto de tiempo de la ejecución, compartido por todos los hilos.
+    Con None o 0 la ejecución no tiene límite.
+    """
+    global _presupuesto
+    _presupuesto = Plazo(segundos)
+    if _presupuesto.limite is not None:
+        print(f"⏳ Presupuesto de tiempo de la ejecución: {segundos} seg")
+
+
+def presupuesto_agotado() -> bool:
+    """
+    True si el presupuesto de tiempo de la ejecución ya se agotó.
+    """
+    return _presupuesto.vencido()
+
+
+@contextmanager
+def plazo_operacion(segundos: float | None) -> Iterator[Plazo]:
+    """
+    Aplica un plazo a las peticiones HTTP que el hilo actual realice dentro del bloque.
+    """
+    with usar_plazo(Plazo(segundos)) as plazo:
+        yield plazo
+
+
+def plazo_actual() -> Plazo | None:
+    """
+    Retorna el plazo de la operación en curso del hilo, o None si no hay uno.
+    """
+    return getattr(_local, "plazo", None)
+
+
+@contextmanager
+def usar_plazo(plazo: Plazo | None) -> Iterator[Plazo | None]:
+    """
+    Aplica en el hilo actual un plazo ya creado, por ejemplo el de la operación que delegó el trabajo a otro hilo.
+    """
+    anterior = getattr(_local, "plazo", None)
+    _local.plazo = plazo
+    try:
+        yield plazo
+    finally:
+        _local.plazo = anterior
+
+
+def verificar_plazos() -> None:
+    """
+    Lanza PresupuestoAgotado o PlazoVencido si ya venció el presupuesto de la ejecución
+    o el plazo de la operación en curso del hilo.
+    """
+    if _presupuesto.vencido():
+        raise PresupuestoAgotado("Se agotó el presupuesto de tiempo de la ejecución.")
+    plazo: Plazo | None = getattr(_local, "plazo", None)
+    if plazo is not None and plazo.vencido():
+        raise PlazoVencido("Se superó el plazo de la operación.")
+
+
+def calcular_timeout(conexion_seg: float, lectura_seg: float) -> tuple[float, float]:
+    """
+    Retorna el timeout (conexión, lectura) para una petición, acotado por el tiempo que
+    le queda al plazo de la operación en curso y al presupuesto de la ejecución.
+    """
+    verificar_plazos()
+    restantes = [lectura_seg]
+    for plazo in (_presupuesto, getattr(_local, "plazo", None)):
+        restante = plazo.restante() if plazo is not None else None
+        if restante is not None:
+            restantes.append(restante)
+    lectura = max(0.01, min(restantes))
+    return min(conexion_seg, lectura), lectura
+
+
+def esperar(segundos: float) -> None:
+    """
+    Duerme `segundos` sin pasarse del plazo de la operación en curso ni del presupuesto de la ejecución:
+    si alguno vence antes, duerme hasta ese momento y lanza la excepción correspondiente.
+    """
+    verificar_plazos()
+    restantes = [segundos]
+    for plazo in (_presupuesto, getattr(_local, "plazo", None)):
+        restante = plazo.restante() if plazo is not None else None
+        if restante is not None:
+            restantes.append(restante)
+    espera = min(restantes)
+    if espera > 0:
+        time.sleep(espera)
+    if espera < segundos:
+        verificar_plazos()
@@ -0,0 +1,184 @@
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import requests
+from config.settings import (
+    HTTP_POOL_SIZE, IA_RESPALDO_MAX_FRACCION, IA_RESPALDO_MIN_MUESTRAS, IA_RESPALDO_PERCENTIL, IA_RESPALDO_VENTANA
+)
+from services.metricas import RESPALDOS_IA, UMBRAL_RESPALDO_IA
+from services.plazos import Plazo, plazo_actual, usar_plazo
+
+
+def _util(futuro: Future) -> bool:
+    """
+    True si la petición terminó con una respuesta exitosa que se puede usar.
+    """
+    return futuro.exception() is None and futuro.result().status_code == 200
+
+
+def _descartar(futuro: Future) -> None:
+    """
+    Libera la conexión de una respuesta que no se va a usar.
+    """
+    if futuro.exception() is None:
+        futuro.result().close()
+
+
+class RespaldoLatencia:
+    """
+    Peticiones de respaldo (hedged requests) a un proveedor para recortar la cola de latencia.
+
+    Si una petición no respondió cuando ya pasó el percentil `percentil` de las latencias observadas,
+    se envía un duplicado y se usa la primera respuesta exitosa; la otra se descarta al llegar.
+    Los duplicados se limitan a `fraccion_max` de las peticiones, así el gasto extra queda acotado.
+    Mientras no haya `min_muestras` latencias, las peticiones se envían sin respaldo.
+
+    Solo se mide y se duplica el envío por la red: las esperas por cuota y los reintentos quedan fuera,
+    así una cola en el limitador no dispara respaldos justo cuando el proveedor está limitando.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        percentil: float = IA_RESPALDO_PERCENTIL,
+        fraccion_max: float = IA_RESPALDO_MAX_FRACCION,
+        min_muestras: int = IA_RESPALDO_MIN_MUESTRAS,
+        ventana: int = IA_RESPALDO_VENTANA,
+        max_hilos: int = 2 * HTTP_POOL_SIZE
+    ):
+        self.nombre = nombre
+        self.percentil = percentil
+        self.fraccion_max = fraccion_max
+        self.min_muestras = min_muestras
+        self._latencias: deque[float] = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix=f"respaldo-{nombre.lower()}")
+        self.peticiones = 0
+        self.respaldos = 0
+        self.ganados = 0
+        self.omitidos = 0
+
+    def umbral(self) -> float | None:
+        """
+        Latencia (segundos) a partir de la cual se envía el respaldo, o None si aún no hay suficientes muestras.
+        """
+        with self._lock:
+            if len(self._latencias) < self.min_muestras:
+                return None
+            ordenadas = sorted(self._latencias)
+        umbral = ordenadas[max(0, math.ceil(self.percentil * len(ordenadas)) - 1)]
+        UMBRAL_RESPALDO_IA.fijar(umbral, proveedor=self.nombre)
+        return umbral
+
+    def _medir(self, enviar: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Envía la petición y registra su latencia si fue exitosa.
+        """
+        inicio = time.perf_counter()
+        response = enviar()
+        if response.status_code == 200:
+            with self._lock:
+                self._latencias.append(time.perf_counter() - inicio)
+        return response
+
+    def _en_hilo(self, enviar: Callable[[], requests.Response], plazo: Plazo | None) -> requests.Response:
+        # El plazo de la operación es por hilo: se aplica el del hilo que pidió la petición
+        with usar_plazo(plazo):
+            return self._medir(enviar)
+
+    def _reservar_respaldo(self, reservar: Callable[[], bool] | None) -> bool:
+        """
+        Cuenta un respaldo si el tope de gasto extra lo permite y hay cuota libre para enviarlo sin esperar.
+        """
+        with self._lock:
+            if self.respaldos + 1 > self.fraccion_max * self.peticiones:
+                self.omitidos += 1
+                return False
+            self.respaldos += 1
+        if reservar is not None and not reservar():
+            with self._lock:
+                self.respaldos -= 1
+                self.omitidos += 1
+            return False
+        return True
+
+    def ejecutar(
+        self,
+        enviar: Callable[[], requests.Response],
+        reservar: Callable[[], bool] | None = None,
+        devolver: Callable[[], None] | None = None
+    ) -> requests.Response:
+        """
+        Ejecuta `enviar` (un envío por la red, ya con su cuota reservada) con un respaldo si tarda demasiado.
+        `reservar` toma la cuota del respaldo (False si no hay sin esperar, y entonces no se envía) y
+        `devolver` reintegra la de la petición descartada. Las excepciones se propagan como sin respaldo;
+        si ninguna petición sirve, se usa el resultado de la original.
+        """
+        with self._lock:
+            self.peticiones += 1
+        umbral = self.umbral()
+        if umbral is None:
+            return self._medir(enviar)
+
+        plazo = plazo_actual()
+        original = self._executor.submit(self._en_hilo, enviar, plazo)
+        terminadas, _ = wait([original], timeout=umbral)
+        if terminadas:
+            return original.result()
+        if not self._reservar_respaldo(reservar):
+            RESPALDOS_IA.incrementar(proveedor=self.nombre, resultado="omitido")
+            return original.result()
+
+        print(f"🪂 {self.nombre} no respondió en {umbral:.1f} seg (p{self.percentil * 100:g}); se envía una petición de respaldo")
+        respaldo = self._executor.submit(self._en_hilo, enviar, plazo)
+        pendientes = {original, respaldo}
+        ganadora: Future | None = None
+        while pendientes and ganadora is None:
+            terminadas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            # Si ambas terminaron a la vez se prefiere la original
+            for futuro in sorted(terminadas, key=lambda futuro: futuro is respaldo):
+                if ganadora is None and _util(futuro):
+                    ganadora = futuro
+        for futuro in pendientes:
+            futuro.add_done_callback(_descartar)
+        # Se usa una sola respuesta: la cuota reservada por la otra vuelve al limitador
+        if devolver is not None:
+            devolver()
+
+        if ganadora is None:
+            RESPALDOS_IA.incrementar(proveedor=self.nombre, resultado="fallido")
+            _descartar(respaldo)
+            return original.result()
+        if ganadora is respaldo:
+            with self._lock:
+                self.ganados += 1
+            RESPALDOS_IA.incrementar(proveedor=self.nombre, resultado="ganado")
+        else:
+            RESPALDOS_IA.incrementar(proveedor=self.nombre, resultado="perdido")
+        perdedora = original if ganadora is respaldo else respaldo
+        if perdedora.done():
+            _descartar(perdedora)
+        return ganadora.result()
+
+    def estadisticas(self) -> dict[str, float]:
+        """
+        Retorna las peticiones, los respaldos enviados, ganados y omitidos, y el umbral actual.
+        """
+        umbral = self.umbral()
+        with self._lock:
+            return {
+                "peticiones": self.peticiones,
+                "respaldos": self.respaldos,
+                "ganados": self.ganados,
+                "omitidos": self.omitidos,
+                "umbral": umbral or 0.0,
+            }
+
+    def cerrar(self) -> None:
+        """
+        Deja de esperar las peticiones descartadas que siguen en curso.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from config.settings import LLM_CACHE_ACTIVO, LLM_CACHE_RUTA, LLM_CACHE_TTL_SEG, LLM_CACHE_MAX_ENTRADAS
+
+
+@dataclass
+class RespuestaCacheada:
+    """
+    Representa una respuesta de modelo almacenada en la caché.
+    """
+    texto: str                                  # Texto devuelto por el modelo (antes de parsear)
+    response_time: float                        # Tiempo de respuesta original en segundos
+
+
+def hash_prompt(prompt: str) -> str:
+    """
+    Retorna el hash SHA-256 del prompt, usado como parte de la clave de la caché.
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class CacheRespuestas:
+    """
+    Caché persistente en disco (SQLite) de las respuestas de los proveedores de IA.
+
+    La clave es (proveedor, id del modelo, hash del prompt, tipo de prompt). Las entradas
+    vencen tras `ttl_seg` segundos y, si se supera `max_entradas`, se eliminan las de uso
+    más antiguo.
+    """
+
+    def __init__(self, ruta: str = LLM_CACHE_RUTA, ttl_seg: float = LLM_CACHE_TTL_SEG, max_entradas: int = LLM_CACHE_MAX_ENTRADAS):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ttl_seg = ttl_seg
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS RESPUESTAS (
+                PROVEEDOR TEXT NOT NULL,
+                MODELO TEXT NOT NULL,
+                PROMPT_HASH TEXT NOT NULL,
+                PROMPT_TYPE TEXT NOT NULL,
+                RESPUESTA TEXT NOT NULL,
+                RESPONSE_TIME REAL NOT NULL,
+                CREADO REAL NOT NULL,
+                ULTIMO_ACCESO REAL NOT NULL,
+                PRIMARY KEY (PROVEEDOR, MODELO, PROMPT_HASH, PROMPT_TYPE)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS IX_RESPUESTAS_ACCESO ON RESPUESTAS (ULTIMO_ACCESO)")
+        self._conn.commit()
+
+    def obtener(self, proveedor: str, modelo: str, prompt: str, prompt_type: str) -> RespuestaCacheada | None:
+        """
+        Busca una respuesta vigente en la caché. Retorna None si no existe o ya venció.
+        """
+        clave = (proveedor, modelo, hash_prompt(prompt), prompt_type)
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT RESPUESTA, RESPONSE_TIME, CREADO FROM RESPUESTAS "
+                "WHERE PROVEEDOR = ? AND MODELO = ? AND PROMPT_HASH = ? AND PROMPT_TYPE = ?",
+                clave
+            ).fetchone()
+
+            if fila is None or ahora - fila[2] > self.ttl_seg:
+                if fila is not None:
+                    self._conn.execute(
+                        "DELETE FROM RESPUESTAS WHERE PROVEEDOR = ? AND MODELO = ? AND PROMPT_HASH = ? AND PROMPT_TYPE = ?",
+                        clave
+                    )
+                    self._conn.commit()
+                self.fallos += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE RESPUESTAS SET ULTIMO_ACCESO = ? "
+                "WHERE PROVEEDOR = ? AND MODELO = ? AND PROMPT_HASH = ? AND PROMPT_TYPE = ?",
+                (ahora, *clave)
+            )
+            self._conn.commit()
+            self.aciertos += 1
+            return RespuestaCacheada(texto=fila[0], response_time=fila[1])
+
+    def guardar(self, proveedor: str, modelo: str, prompt: str, prompt_type: str, texto: str, response_time: float) -> None:
+        """
+        Guarda (o reemplaza) la respuesta de un prompt y aplica el límite de entradas.
+        """
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO RESPUESTAS "
+                "(PROVEEDOR, MODELO, PROMPT_HASH, PROMPT_TYPE, RESPUESTA, RESPONSE_TIME, CREADO, ULTIMO_ACCESO) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (proveedor, modelo, hash_prompt(prompt), prompt_type, texto, response_time, ahora, ahora)
+            )
+            self._conn.execute("DELETE FROM RESPUESTAS WHERE CREADO < ?", (ahora - self.ttl_seg,))
+            self._conn.execute(
+                "DELETE FROM RESPUESTAS WHERE rowid IN ("
+                "SELECT rowid FROM RESPUESTAS ORDER BY ULTIMO_ACCESO DESC LIMIT -1 OFFSET ?)",
+                (self.max_entradas,)
+            )
+            self._conn.commit()
+
+    def estadisticas(self) -> dict[str, int]:
+        """
+        Retorna los contadores de aciertos y fallos de la caché.
+        """
+        return {"aciertos": self.aciertos, "fallos": self.fallos}
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: CacheRespuestas | None = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache() -> CacheRespuestas | None:
+    """
+    Obtiene la caché compartida de respuestas, o None si está desactivada (LLM_CACHE_ACTIVO=false).
+    """
+    global _cache
+    if not LLM_CACHE_ACTIVO:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheRespuestas()
+        return _cache
+
+
+def resumen_cache() -> dict[str, int] | None:
+    """
+    Retorna los aciertos y fallos de la caché, o None si no se utilizó.
+    """
+    with _cache_lock:
+        return _cache.estadisticas() if _cache else None
+
+
+def cerrar_cache() -> None:
+    """
+    Cierra la caché compartida. Debe llamarse al terminar la ejecución.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.cerrar()
+            _cache = None
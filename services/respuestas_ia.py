@@ -0,0 +1,469 @@
+import json
+import types
+import typing
+import unicodedata
+from dataclasses import dataclass, fields
+from models.entities import IAProcessedData, TendenciasSentimientoDTO
+
+# Valores permitidos para los campos categóricos del análisis de un artículo (ver PROMPT_ANALISIS_ARTICULO)
+VALORES_PERMITIDOS: dict[str, tuple[str, ...]] = {
+    "sentimiento": ("positivo", "negativo", "neutro"),
+    "nivel_riesgo": ("bajo", "medio", "alto"),
+    "indicador_violencia": ("sí", "no", "moderado"),
+    "edad_recomendada": ("+13", "+18", "todo público"),
+}
+
+# Variantes frecuentes que el modelo devuelve para un valor permitido
+_SINONIMOS: dict[str, dict[str, str]] = {
+    "sentimiento": {"neutral": "neutro"},
+    "indicador_violencia": {"si": "sí"},
+    "edad_recomendada": {"todo publico": "todo público", "13": "+13", "18": "+18"},
+}
+
+RATING_MINIMO = 1.0
+RATING_MAXIMO = 5.0
+CONFIANZA_MINIMA = 0.0
+CONFIANZA_MAXIMA = 1.0
+
+_TIPOS_JSON = {str: "string", float: "number", int: "integer", bool: "boolean"}
+
+
+# ----------- ESQUEMAS DE SALIDA ESTRUCTURADA -----------
+
+def _esquema_tipo(tipo: object) -> dict:
+    """
+    Convierte una anotación de tipo de un dataclass en un esquema JSON.
+    """
+    origen = typing.get_origin(tipo)
+    if origen in (typing.Union, types.UnionType):
+        tipos = [argumento for argumento in typing.get_args(tipo) if argumento is not type(None)]
+        return _esquema_tipo(tipos[0])
+    if origen is list:
+        (elemento,) = typing.get_args(tipo) or (str,)
+        return {"type": "array", "items": _esquema_tipo(elemento)}
+    if tipo in _TIPOS_JSON:
+        return {"type": _TIPOS_JSON[tipo]}
+    return {"type": "object"}
+
+
+def esquema_desde_dto(dto: type, extra: dict[str, dict] | None = None) -> dict:
+    """
+    Genera el esquema JSON (objeto con todos los campos obligatorios) de los campos de un dataclass.
+    Los campos de VALORES_PERMITIDOS quedan restringidos a sus valores; `extra` agrega propiedades al inicio.
+    """
+    propiedades: dict[str, dict] = dict(extra or {})
+    tipos = typing.get_type_hints(dto)
+    for campo in fields(dto):
+        esquema = _esquema_tipo(tipos[campo.name])
+        if campo.name in VALORES_PERMITIDOS:
+            esquema["enum"] = list(VALORES_PERMITIDOS[campo.name])
+        propiedades[campo.name] = esquema
+    return {
+        "type": "object",
+        "properties": propiedades,
+        "required": list(propiedades),
+        "additionalProperties": False,
+    }
+
+
+# IAProcessedData contiene los campos de ProcessStatusDTO que completa el modelo (el resto los agrega el servicio)
+ESQUEMA_ARTICULO = esquema_desde_dto(IAProcessedData)
+ESQUEMA_LOTE = {
+    "type": "object",
+    "properties": {"articulos": {"type": "array", "items": esquema_desde_dto(IAProcessedData, {"id": {"type": "integer"}})}},
+    "required": ["articulos"],
+    "additionalProperties": False,
+}
+ESQUEMA_TENDENCIAS = esquema_desde_dto(TendenciasSentimientoDTO)
+
+# Esquema de la respuesta por tipo de prompt; los tipos sin esquema se piden como texto libre
+ESQUEMAS: dict[str, dict] = {
+    "procesamiento_articulo": ESQUEMA_ARTICULO,
+    "procesamiento_lote": ESQUEMA_LOTE,
+    "tendencias_sentimiento": ESQUEMA_TENDENCIAS,
+}
+
+
+def esquema_gemini(esquema: dict) -> dict:
+    """
+    Adapta un esquema JSON al subconjunto OpenAPI de responseSchema de Gemini
+    (tipos en mayúsculas, sin additionalProperties y con el orden de las propiedades).
+    """
+    adaptado: dict = {}
+    for clave, valor in esquema.items():
+        if clave == "additionalProperties":
+            continue
+        if clave == "type":
+            adaptado["type"] = valor.upper()
+        elif clave == "properties":
+            adaptado["properties"] = {nombre: esquema_gemini(propiedad) for nombre, propiedad in valor.items()}
+            adaptado["propertyOrdering"] = list(valor)
+        elif clave == "items":
+            adaptado["items"] = esquema_gemini(valor)
+        else:
+            adaptado[clave] = valor
+    return adaptado
+
+
+# ----------- EXTRACCIÓN TOLERANTE -----------
+
+def _recortar_json(texto: str) -> str:
+    """
+    Recorta el primer objeto o arreglo JSON balanceado del texto, ignorando el texto que lo rodea
+    (prosa, bloques ```json). Si la respuesta viene truncada dentro de un arreglo (por ejemplo, el
+    de un lote), conserva sus elementos completos y cierra lo que quedó abierto.
+    """
+    inicio = min((posicion for posicion in (texto.find("{"), texto.find("[")) if posicion >= 0), default=-1)
+    if inicio < 0:
+        raise ValueError("La respuesta no contiene un objeto ni un arreglo JSON.")
+
+    pila: list[str] = []
+    en_cadena = escapado = False
+    ultimo_corte: tuple[int, str] | None = None  # Fin del último elemento completo de un arreglo y sus cierres
+    for posicion in range(inicio, len(texto)):
+        caracter = texto[posicion]
+        if en_cadena:
+            if escapado:
+                escapado = False
+            elif caracter == "\\":
+                escapado = True
+            elif caracter == '"':
+                en_cadena = False
+        elif caracter == '"':
+            en_cadena = True
+        elif caracter in "{[":
+            pila.append("}" if caracter == "{" else "]")
+        elif caracter in "}]":
+            if not pila or pila.pop() != caracter:
+                raise ValueError(f"JSON mal formado en la posición {posicion}.")
+            if not pila:
+                return texto[inicio:posicion + 1]
+            if pila[-1] == "]":
+                ultimo_corte = (posicion, "".join(reversed(pila)))
+
+    if ultimo_corte is not None:
+        posicion, cierres = ultimo_corte
+        return texto[inicio:posicion + 1] + cierres
+    raise ValueError("La respuesta JSON está incompleta.")
+
+
+def _quitar_comas_finales(texto: str) -> str:
+    """
+    Elimina las comas que quedan antes de un cierre de objeto o arreglo (fuera de las cadenas).
+    """
+    resultado: list[str] = []
+    en_cadena = escapado = False
+    for caracter in texto:
+        if en_cadena:
+            if escapado:
+                escapado = False
+            elif caracter == "\\":
+                escapado = True
+            elif caracter == '"':
+                en_cadena = False
+        elif caracter == '"':
+            en_cadena = True
+        elif caracter in "}]":
+            while resultado and resultado[-1].isspace():
+                resultado.pop()
+            if resultado and resultado[-1] == ",":
+                resultado.pop()
+        resultado.append(caracter)
+    return "".join(resultado)
+
+
+def extraer_json(texto: str) -> tuple[object, bool]:
+    """
+    Interpreta el JSON devuelto por un modelo.
+
+    Primero intenta el texto tal cual (el caso normal con salida estructurada) o sin el bloque ```json;
+    si falla, busca el primer objeto o arreglo balanceado, quita las comas sobrantes y cierra un arreglo truncado.
+
+    Retorna:
+    - El valor interpretado y si fue necesario repararlo.
+    Lanza ValueError si no se puede recuperar.
+    """
+    candidato = texto.strip()
+    if candidato.startswith("```"):
+        # Caso frecuente sin salida estructurada: el JSON viene dentro de un bloque ```json
+        candidato = candidato.removeprefix("```json").removeprefix("```").removesuffix("```")
+    try:
+        return json.loads(candidato), False
+    except json.JSONDecodeError:
+        pass
+    recortado = _recortar_json(texto)
+    try:
+        return json.loads(recortado), True
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_quitar_comas_finales(recortado)), True
+    except json.JSONDecodeError as e:
+        raise ValueError(f"No se pudo reparar el JSON de la respuesta: {e}") from e
+
+
+# ----------- VALIDACIÓN -----------
+
+def _normalizar(valor: str) -> str:
+    return unicodedata.normalize("NFC", str(valor)).strip().lower()
+
+
+def _valor_permitido(campo: str, valor: object) -> str | None:
+    """
+    Retorna el valor permitido de `campo` que corresponde a `valor` (aceptando variantes), o None si no hay.
+    """
+    permitidos = VALORES_PERMITIDOS[campo]
+    if valor in permitidos:
+        return valor
+    normalizado = _normalizar(valor)
+    normalizado = _SINONIMOS.get(campo, {}).get(normalizado, normalizado)
+    return normalizado if normalizado in permitidos else None
+
+
+def validar_analisis_articulo(data: dict) -> dict:
+    """
+    Valida y normaliza el análisis de un artículo: valores permitidos de los campos categóricos
+    (aceptando variantes como "neutral" o "si"), rating numérico entre 1.0 y 5.0 y confianza entre 0.0 y 1.0.
+    La confianza es opcional (respuestas guardadas antes de pedirla): si falta queda en None.
+    Lanza ValueError si un campo tiene un valor inválido y KeyError si falta.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Se esperaba un objeto JSON para el análisis del artículo.")
+    validado = dict(data)
+    for campo, permitidos in VALORES_PERMITIDOS.items():
+        valor = _valor_permitido(campo, data[campo])
+        if valor is None:
+            raise ValueError(f"Valor inválido para {campo}: {data[campo]!r} (permitidos: {', '.join(permitidos)})")
+        validado[campo] = valor
+
+    rating = float(data["rating"])
+    if not RATING_MINIMO <= rating <= RATING_MAXIMO:
+        raise ValueError(f"Rating fuera de rango: {rating}")
+    validado["rating"] = rating
+    if data.get("confianza") is not None:
+        confianza = float(data["confianza"])
+        if not CONFIANZA_MINIMA <= confianza <= CONFIANZA_MAXIMA:
+            raise ValueError(f"Confianza fuera de rango: {confianza}")
+        validado["confianza"] = confianza
+    else:
+        validado["confianza"] = None
+    if not isinstance(data["etiquetas_ia"], (list, str)):
+        raise ValueError("etiquetas_ia debe ser una lista o un texto.")
+    return validado
+
+
+# ----------- VALIDACIÓN INCREMENTAL (STREAMING) -----------
+
+class SalidaInvalida(ValueError):
+    """
+    Se lanza cuando la salida parcial de un modelo ya no puede ser un JSON válido para el DTO pedido.
+    """
+
+
+# Texto que se tolera antes del JSON (un bloque ```json o una frase de introducción)
+LIMITE_PREAMBULO = 200
+
+_TIPOS_APERTURA = {"{": "object", "[": "array", '"': "string", "t": "boolean", "f": "boolean", "n": "null"}
+
+# Tipos que la interpretación final acepta en lugar del del esquema: el rating como texto ("4.5")
+# y las etiquetas como un texto separado por comas
+_TIPOS_TOLERADOS = {"number": ("integer", "string"), "integer": ("number", "string"), "array": ("string",)}
+
+
+@dataclass
+class _Nivel:
+    tipo: str                                   # "{" u "["
+    esquema: dict                               # Esquema del objeto, o de los elementos si es un arreglo
+    estado: str                                 # Lo que se espera a continuación: clave, dos_puntos, valor o coma
+    clave: str | None = None                    # Última clave leída (objetos)
+
+
+class ValidadorJSONIncremental:
+    """
+    Recorre la salida de un modelo a medida que llega y detecta lo antes posible que ya no
+    puede ser un JSON válido para el esquema pedido: sintaxis rota, raíz de otro tipo,
+    claves que el esquema no admite, valores de otro tipo o fuera de los valores permitidos.
+
+    Dentro de los arreglos (los artículos de un lote) solo se exige la sintaxis: un elemento
+    inválido se descarta al interpretar la respuesta sin perder los demás.
+
+    `parcial()` retorna el valor con los elementos completos hasta el momento.
+    """
+
+    def __init__(self, esquema: dict | None = None):
+        self.esquema = esquema or {}
+        self.texto = ""
+        self.terminado = False
+        self._posicion = 0
+        self._inicio: int | None = None
+        self._pila: list[_Nivel] = []
+        self._en_cadena = False
+        self._escapado = False
+        self._inicio_token = 0                  # Inicio de la cadena o escalar en curso
+        self._escalar = False                   # Hay un número o literal en curso
+        self._es_clave = False                  # La cadena en curso es una clave
+        self._corte: tuple[int, str] | None = None
+        self._parcial_corte: int | None = None
+        self._parcial: object = None
+
+    def alimentar(self, fragmento: str) -> bool:
+        """
+        Agrega un fragmento de la salida.
+
+        Retorna:
+        - True si se completó algún valor nuevo (cambió el resultado parcial).
+        Lanza SalidaInvalida si la salida ya no puede ser válida.
+        """
+        corte_anterior = self._corte
+        self.texto += fragmento
+        while self._posicion < len(self.texto) and not self.terminado:
+            self._procesar(self.texto[self._posicion])
+            self._posicion += 1
+        return self._corte != corte_anterior
+
+    def parcial(self) -> object:
+        """
+        Valor JSON con los elementos completos recibidos hasta ahora (None si aún no hay ninguno).
+        """
+        if self._corte is None or self._inicio is None:
+            return None
+        posicion, cierres = self._corte
+        if self._parcial_corte != posicion:
+            self._parcial = json.loads(self.texto[self._inicio:posicion] + cierres)
+            self._parcial_corte = posicion
+        return self._parcial
+
+    # Reglas
+
+    def _invalido(self, motivo: str) -> None:
+        raise SalidaInvalida(f"{motivo} (carácter {self._posicion})")
+
+    def _violacion_esquema(self, motivo: str) -> None:
+        # En los arreglos la violación invalida solo ese elemento
+        if not any(nivel.tipo == "[" for nivel in self._pila):
+            self._invalido(motivo)
+
+    def _esquema_valor(self) -> dict:
+        nivel = self._pila[-1]
+        if nivel.tipo == "[":
+            return nivel.esquema
+        return nivel.esquema.get("properties", {}).get(nivel.clave, {})
+
+    def _cierres(self) -> str:
+        return "".join("}" if nivel.tipo == "{" else "]" for nivel in reversed(self._pila))
+
+    def _valor_completo(self, fin: int) -> None:
+        """
+        Marca como completo el valor que termina antes de `fin`.
+        """
+        if not self._pila:
+            self.terminado = True
+            return
+        self._pila[-1].estado = "coma"
+        self._corte = (fin, self._cierres())
+
+    def _iniciar_valor(self, caracter: str) -> None:
+        esquema = self._esquema_valor() if self._pila else self.esquema
+        tipo = _TIPOS_APERTURA.get(caracter, "number" if caracter == "-" or caracter.isdigit() else None)
+        if tipo is None:
+            self._invalido(f"Carácter inesperado {caracter!r}")
+        esperado = esquema.get("type")
+        if esperado not in (None, tipo) and tipo not in _TIPOS_TOLERADOS.get(esperado, ()):
+            self._violacion_esquema(f"Se esperaba {esperado} y llegó {tipo}")
+
+        if caracter == "{":
+            self._pila.append(_Nivel("{", esquema, "clave"))
+        elif caracter == "[":
+            self._pila.append(_Nivel("[", esquema.get("items", {}), "valor"))
+        elif caracter == '"':
+            self._en_cadena = True
+            self._es_clave = False
+            self._inicio_token = self._posicion
+        else:
+            self._escalar = True
+            self._inicio_token = self._posicion
+
+    def _cerrar_cadena(self) -> None:
+        cadena = json.loads(self.texto[self._inicio_token:self._posicion + 1])
+        nivel = self._pila[-1] if self._pila else None
+        if self._es_clave:
+            propiedades = nivel.esquema.get("properties")
+            if propiedades is not None and nivel.esquema.get("additionalProperties") is False and cadena not in propiedades:
+                self._violacion_esquema(f"Clave no admitida {cadena!r}")
+            nivel.clave = cadena
+            nivel.estado = "dos_puntos"
+            return
+        if nivel is not None and nivel.tipo == "{" and nivel.clave in VALORES_PERMITIDOS and "enum" in self._esquema_valor():
+            if _valor_permitido(nivel.clave, cadena) is None:
+                self._violacion_esquema(f"Valor no permitido para {nivel.clave}: {cadena!r}")
+        self._valor_completo(self._posicion + 1)
+
+    def _cerrar_escalar(self) -> None:
+        self._escalar = False
+        try:
+            json.loads(self.texto[self._inicio_token:self._posicion])
+        except json.JSONDecodeError:
+            self._invalido("Valor numérico o literal inválido")
+        self._valor_completo(self._posicion)
+
+    def _procesar(self, caracter: str) -> None:
+        if self._en_cadena:
+            if self._escapado:
+                self._escapado = False
+            elif caracter == "\\":
+                self._escapado = True
+            elif caracter == '"':
+                self._en_cadena = False
+                self._cerrar_cadena()
+            return
+
+        if self._escalar:
+            if caracter.isalnum() or caracter in "+-.":
+                return
+            self._cerrar_escalar()
+            if self.terminado:
+                return
+
+        if caracter.isspace():
+            return
+
+        if self._inicio is None:
+            # Antes de la raíz se tolera un bloque ```json o una introducción corta
+            if caracter in "{[":
+                if self.esquema.get("type") == "object" and caracter == "[":
+                    # Un lote puede llegar como arreglo en vez de {"articulos": [...]}
+                    arreglos = [p for p in self.esquema.get("properties", {}).values() if p.get("type") == "array"]
+                    if len(arreglos) == 1:
+                        self.esquema = arreglos[0]
+                self._inicio = self._posicion
+                self._iniciar_valor(caracter)
+            elif self._posicion >= LIMITE_PREAMBULO:
+                self._invalido("La respuesta no comienza con un objeto JSON")
+            return
+
+        nivel = self._pila[-1]
+        if caracter in "}]":
+            esperado = "}" if nivel.tipo == "{" else "]"
+            # Se tolera una coma final: extraer_json la quita al interpretar
+            if caracter != esperado or nivel.estado in ("dos_puntos",) or (nivel.tipo == "{" and nivel.estado == "valor"):
+                self._invalido(f"Cierre {caracter!r} inesperado")
+            self._pila.pop()
+            self._valor_completo(self._posicion + 1)
+        elif caracter == ",":
+            if nivel.estado != "coma":
+                self._invalido("Coma inesperada")
+            nivel.estado = "clave" if nivel.tipo == "{" else "valor"
+        elif caracter == ":":
+            if nivel.tipo != "{" or nivel.estado != "dos_puntos":
+                self._invalido("Dos puntos inesperados")
+            nivel.estado = "valor"
+        elif nivel.tipo == "{" and nivel.estado == "clave":
+            if caracter != '"':
+                self._invalido("Se esperaba una clave entre comillas")
+            self._en_cadena = True
+            self._es_clave = True
+            self._inicio_token = self._posicion
+        elif nivel.estado == "valor":
+            self._iniciar_valor(caracter)
+        else:
+            self._invalido(f"Carácter inesperado {caracter!r}")
@@ -1,2 +1,2 @@
 # services/scraping/__init__.py
-from .scraping import extraer_noticias_araucaniadiario, extraer_noticias_elperiodico
+from .scraping import extraer_noticias_araucaniadiario, extraer_noticias_elperiodico, extraer_noticias_de_todas_las_fuentes, iterar_paginas_de_fuente, marcar_noticias_vistas, ErrorDescargaPagina, FUENTES
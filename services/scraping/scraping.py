@@ -1,91 +1,345 @@
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlparse
 import requests
 from bs4 import BeautifulSoup
+from config.settings import (
+    SCRAPING_VENTANA_PAGINAS, SCRAPING_MAX_CONEXIONES_POR_HOST, SCRAPING_INTERVALO_MIN_SEG, SCRAPING_REINTENTOS_MAX,
+    HTTP_TIMEOUT_CONEXION_SEG, SCRAPING_TIMEOUT_LECTURA_SEG
+)
 from models.entities import Noticia
+from services.http_clients import obtener_cliente
+from services.limitador import STATUS_REINTENTABLES, calcular_backoff
+from services.metricas import DURACION_PAGINA_SCRAPING, PAGINAS_SCRAPING
+from services.perfilado import tramo
+from services.plazos import PresupuestoAgotado, esperar
+from services.scraping.seen_index import obtener_indice_vistos
 
 
-def extraer_noticias_araucaniadiario(max_articulos: int = 50) -> list[Noticia]:
-    base_url: str = "https://araucaniadiario.cl/default/listar_contenido?p="
+class PoliticaHost:
+    """
+    Límite de cortesía por host: como máximo `max_conexiones` peticiones simultáneas
+    y al menos `intervalo_min_seg` segundos entre el inicio de dos peticiones.
+    """
+
+    def __init__(self, max_conexiones: int = SCRAPING_MAX_CONEXIONES_POR_HOST, intervalo_min_seg: float = SCRAPING_INTERVALO_MIN_SEG):
+        self._semaforo = threading.BoundedSemaphore(max(1, max_conexiones))
+        self._intervalo_min_seg = intervalo_min_seg
+        self._lock = threading.Lock()
+        self._proximo_inicio = 0.0
+
+    def __enter__(self) -> "PoliticaHost":
+        self._semaforo.acquire()
+        with self._lock:
+            ahora = time.monotonic()
+            espera = self._proximo_inicio - ahora
+            self._proximo_inicio = max(ahora, self._proximo_inicio) + self._intervalo_min_seg
+        if espera > 0:
+            time.sleep(espera)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._semaforo.release()
+
+
+_politicas: dict[str, PoliticaHost] = {}
+_politicas_lock = threading.Lock()
+
+
+def _politica_para(url: str) -> PoliticaHost:
+    host = urlparse(url).netloc
+    with _politicas_lock:
+        if host not in _politicas:
+            _politicas[host] = PoliticaHost()
+        return _politicas[host]
+
+
+class ErrorDescargaPagina(Exception):
+    """
+    Se lanza cuando una página de listado no se pudo descargar tras los reintentos (error de red,
+    timeout o un código de error del sitio). No equivale al fin del listado.
+    """
+
+    def __init__(self, url: str, detalle: str):
+        super().__init__(f"No se pudo descargar {url}: {detalle}")
+        self.url = url
+
+
+@dataclass
+class PaginaDescargada:
+    """
+    Resultado de descargar una página de listado.
+    """
+    url: str                                    # URL de la página
+    status_code: int                            # Código de estado HTTP (304 si no cambió, 404 si no existe)
+    contenido: bytes | None                     # Cuerpo de la respuesta, None si no existe o no cambió
+    etag: str | None = None                     # Cabecera ETag de la respuesta
+    last_modified: str | None = None            # Cabecera Last-Modified de la respuesta
+
+
+def _descargar_pagina(
+    url: str,
+    cabeceras: dict[str, str] | None = None,
+    reintentos_max: int = SCRAPING_REINTENTOS_MAX
+) -> PaginaDescargada:
+    """
+    Descarga una página respetando el límite de cortesía de su host.
+    `cabeceras` permite enviar validadores para un GET condicional.
+
+    Los errores de red, los timeouts y las respuestas 429/5xx se reintentan hasta `reintentos_max`
+    veces con backoff exponencial. Si la página sigue sin descargarse lanza ErrorDescargaPagina:
+    una página que falla no se confunde con el fin del listado.
+    """
+    host = urlparse(url).netloc
+    cliente = obtener_cliente(host, timeout=(HTTP_TIMEOUT_CONEXION_SEG, SCRAPING_TIMEOUT_LECTURA_SEG))
+    for intento in range(reintentos_max + 1):
+        try:
+            with _politica_para(url), tramo(f"GET {host}", "scraping", url=url):
+                response = cliente.get(url, headers=cabeceras or {})
+        except requests.RequestException as e:
+            # Un timeout se cuenta aparte: con los timeouts de lectura del scraping es la falla más probable
+            PAGINAS_SCRAPING.incrementar(host=host, status="timeout" if isinstance(e, requests.Timeout) else "error")
+            detalle = str(e)
+        else:
+            PAGINAS_SCRAPING.incrementar(host=host, status=response.status_code)
+            DURACION_PAGINA_SCRAPING.observar(response.elapsed.total_seconds(), host=host)
+            print(f"⏱️ Tiempo respuesta ({url}): {response.elapsed.total_seconds()} segundos")
+            if response.status_code < 400 or response.status_code == 404:
+                contenido = response.content if response.status_code not in (304, 404) else None
+                return PaginaDescargada(
+                    url=url,
+                    status_code=response.status_code,
+                    contenido=contenido,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                )
+            detalle = f"respondió {response.status_code}"
+            if response.status_code not in STATUS_REINTENTABLES:
+                break
+
+        if intento < reintentos_max:
+            espera = calcular_backoff(intento)
+            print(f"🔁 {url}: {detalle}; reintento {intento + 1}/{reintentos_max} en {espera:.1f} seg")
+            esperar(espera)
+    raise ErrorDescargaPagina(url, detalle)
+
+
+def _iterar_paginado(
+    nombre_fuente: str,
+    base_url: str,
+    parsear_pagina: Callable[[bytes, str], list[Noticia] | None],
+    max_articulos: int,
+    ventana: int,
+    incremental: bool = False
+) -> Iterator[list[Noticia]]:
+    """
+    Recorre las páginas de un listado descargando hasta `ventana` páginas en paralelo
+    y entrega las noticias de cada página apenas se procesa.
+
+    Las páginas se procesan en orden: al encontrar la primera página sin contenido (una respuesta
+    404 o una página sin noticias) se descartan las siguientes de la ventana, por lo que el resultado
+    es el mismo que el de un recorrido secuencial. Si una página no se puede descargar tras los
+    reintentos, se entregan las anteriores y se lanza ErrorDescargaPagina.
+
+    En modo incremental solo se retornan las noticias no vistas en ejecuciones anteriores:
+    el recorrido se detiene en la primera página que no tiene noticias nuevas (o que responde
+    304 a un GET condicional) y la ventana parte en una página y se duplica mientras haya novedades.
+    Quien consume las noticias debe registrarlas con `marcar_noticias_vistas` una vez guardadas.
+
+    Si se agota el presupuesto de tiempo de la ejecución, el recorrido termina con las páginas ya entregadas.
+    """
+    indice = obtener_indice_vistos() if incremental else None
     noticias: list[Noticia] = []
     pagina: int = 1
+    por_pagina: int | None = None
+    ventana = max(1, ventana)
+    tamano_incremental = 1
+
+    def _descargar(url: str) -> PaginaDescargada:
+        return _descargar_pagina(url, indice.obtener_validadores(url) if indice else None)
+
+    with ThreadPoolExecutor(max_workers=ventana, thread_name_prefix="scraping") as executor:
+        while len(noticias) < max_articulos:
+            # Solo se piden las páginas que faltan según los artículos por página observados
+            restantes = max_articulos - len(noticias)
+            tamano = ventana if not por_pagina else max(1, min(ventana, -(-restantes // por_pagina)))
+            if incremental:
+                tamano = min(tamano, tamano_incremental)
+                tamano_incremental *= 2
+            paginas = list(range(pagina, pagina + tamano))
+            print(f"📄 {nombre_fuente}: Extrayendo páginas {paginas[0]}-{paginas[-1]}...")
+            futuros = [executor.submit(_descargar, f"{base_url}{numero}") for numero in paginas]
+
+            terminado = False
+            for numero, futuro in zip(paginas, futuros):
+                try:
+                    descarga = futuro.result()
+                except PresupuestoAgotado:
+                    print(f"⏳ {nombre_fuente}: se agotó el presupuesto de tiempo, se detiene la extracción.")
+                    terminado = True
+                    break
+                except ErrorDescargaPagina:
+                    print(f"❌ {nombre_fuente}: la página {numero} no se pudo descargar, se detiene la extracción.")
+                    for pendiente in futuros:
+                        pendiente.cancel()
+                    raise
+                if descarga.status_code == 304:
+                    print(f"✅ {nombre_fuente}: la página {numero} no cambió desde la última extracción")
+                    terminado = True
+                    break
 
-    while len(noticias) < max_articulos:
-        print(f"📄 Araucanía Diario: Extrayendo página {pagina}...")
-        url: str = f"{base_url}{pagina}"
-        response = requests.get(url)
-        print(f"⏱️ Tiempo respuesta: {response.elapsed.total_seconds()} segundos")
-        soup = BeautifulSoup(response.content, 'html.parser')
+                with tramo(f"parsear {nombre_fuente}", "scraping", pagina=numero):
+                    articulos = parsear_pagina(descarga.contenido, descarga.url) if descarga.contenido is not None else None
+                if not articulos:
+                    print(f"⚠️ No se encontró contenido en la página {numero}")
+                    terminado = True
+                    break
+                por_pagina = por_pagina or len(articulos)
 
-        contenedor = soup.find("div", class_="lista-contenido")
-        if not contenedor:
-            print(f"⚠️ No se encontró contenido en la página {pagina}")
-            break
+                if indice:
+                    nuevas = indice.filtrar_nuevas(nombre_fuente, articulos)
+                    if not nuevas:
+                        print(f"✅ {nombre_fuente}: la página {numero} solo contiene noticias ya vistas")
+                        terminado = True
+                        break
+                    articulos = nuevas
 
-        articulos = contenedor.find_all("article", class_="post__noticia")
+                incluidas = articulos[:max_articulos - len(noticias)]
+                noticias.extend(incluidas)
+                # Los validadores solo se guardan si la página se tomó completa; si no, un 304 ocultaría el resto
+                if indice and len(incluidas) == len(articulos):
+                    indice.anotar_pagina(descarga.url, descarga.etag, descarga.last_modified, len(incluidas))
+                yield incluidas
+                if len(noticias) >= max_articulos:
+                    terminado = True
+                    break
 
-        for articulo in articulos:
-            if len(noticias) >= max_articulos:
+            if terminado:
+                for pendiente in futuros:
+                    pendiente.cancel()
                 break
+            pagina += tamano
 
-            titulo_tag = articulo.find("h2", class_="post__titulo")
-            titulo = titulo_tag.a.text.strip() if titulo_tag and titulo_tag.a else "Sin título"
+    if indice:
+        print(f"🆕 {nombre_fuente}: {len(noticias)} noticias nuevas")
 
-            fecha_tag = articulo.find("span", class_="fecha")
-            fecha = fecha_tag.text.strip() if fecha_tag else "Sin fecha"
 
-            descripcion_tag = articulo.find("p", class_="post__detalle")
-            descripcion = descripcion_tag.text.strip() if descripcion_tag else "Sin descripción"
+def marcar_noticias_vistas(noticias: list[Noticia]) -> None:
+    """
+    Registra en el índice del scraping incremental las noticias ya guardadas en la base de datos,
+    para que las próximas extracciones incrementales las omitan.
+    """
+    por_fuente: dict[str, list[Noticia]] = {}
+    for noticia in noticias:
+        por_fuente.setdefault(noticia.fuente, []).append(noticia)
+    indice = obtener_indice_vistos()
+    for fuente, noticias_fuente in por_fuente.items():
+        indice.marcar_vistas(fuente, noticias_fuente)
+
+
+def _parsear_pagina_araucaniadiario(contenido: bytes, url: str) -> list[Noticia] | None:
+    soup = BeautifulSoup(contenido, 'html.parser')
+
+    contenedor = soup.find("div", class_="lista-contenido")
+    if not contenedor:
+        return None
+
+    noticias: list[Noticia] = []
+    for articulo in contenedor.find_all("article", class_="post__noticia"):
+        titulo_tag = articulo.find("h2", class_="post__titulo")
+        titulo = titulo_tag.a.text.strip() if titulo_tag and titulo_tag.a else "Sin título"
 
-            noticias.append(Noticia(
-                titulo=titulo,
-                fecha=fecha,
-                url=url,
-                fuente="Araucanía Diario",
-                descripcion=descripcion
-            ))
+        fecha_tag = articulo.find("span", class_="fecha")
+        fecha = fecha_tag.text.strip() if fecha_tag else "Sin fecha"
 
-        pagina += 1
+        descripcion_tag = articulo.find("p", class_="post__detalle")
+        descripcion = descripcion_tag.text.strip() if descripcion_tag else "Sin descripción"
+
+        noticias.append(Noticia(
+            titulo=titulo,
+            fecha=fecha,
+            url=url,
+            fuente="Araucanía Diario",
+            descripcion=descripcion
+        ))
 
     return noticias
 
-def extraer_noticias_elperiodico(max_articulos: int = 50) -> list[Noticia]:
-    base_url: str = "https://www.elperiodico.cl/category/temuco/page/"
+
+def _parsear_pagina_elperiodico(contenido: bytes, url: str) -> list[Noticia] | None:
+    soup = BeautifulSoup(contenido, "html.parser")
+
+    articulos = soup.select("div.post-col")
+    if not articulos:
+        return None
+
     noticias: list[Noticia] = []
-    pagina: int = 1
+    for articulo in articulos:
+        titulo_tag = articulo.select_one("h2.entry-title a")
+        titulo = titulo_tag.text.strip() if titulo_tag else "Sin título"
 
-    while len(noticias) < max_articulos:
-        print(f"📄 El Periódico: Extrayendo página {pagina}...")
-        url: str = f"{base_url}{pagina}"
-        response = requests.get(url)
-        print(f"⏱️ Tiempo respuesta: {response.elapsed.total_seconds()} segundos")
-        soup = BeautifulSoup(response.content, "html.parser")
+        fecha_tag = articulo.select_one("div.date a")
+        fecha = fecha_tag.text.strip() if fecha_tag else "Sin fecha"
 
-        articulos = soup.select("div.post-col")
+        desc_tag = articulo.select_one("div.entry-content p")
+        descripcion = desc_tag.text.strip() if desc_tag else "Sin descripción"
 
-        if not articulos:
-            print("⚠️ No se encontraron artículos.")
-            break
+        noticias.append(Noticia(
+            titulo=titulo,
+            fecha=fecha,
+            url=url,
+            fuente="El Periódico",
+            descripcion=descripcion
+        ))
 
-        for articulo in articulos:
-            if len(noticias) >= max_articulos:
-                break
+    return noticias
+
+
+FUENTES: dict[str, tuple[str, Callable[[bytes, str], list[Noticia] | None]]] = {
+    "Araucanía Diario": ("https://araucaniadiario.cl/default/listar_contenido?p=", _parsear_pagina_araucaniadiario),
+    "El Periódico": ("https://www.elperiodico.cl/category/temuco/page/", _parsear_pagina_elperiodico),
+}
 
-            titulo_tag = articulo.select_one("h2.entry-title a")
-            titulo = titulo_tag.text.strip() if titulo_tag else "Sin título"
+def iterar_paginas_de_fuente(
+    nombre_fuente: str,
+    max_articulos: int = 50,
+    ventana: int = SCRAPING_VENTANA_PAGINAS,
+    incremental: bool = False
+) -> Iterator[list[Noticia]]:
+    """
+    Entrega, página a página y en orden, las noticias de una fuente de FUENTES.
+    """
+    base_url, parsear_pagina = FUENTES[nombre_fuente]
+    return _iterar_paginado(nombre_fuente, base_url, parsear_pagina, max_articulos, ventana, incremental)
 
-            fecha_tag = articulo.select_one("div.date a")
-            fecha = fecha_tag.text.strip() if fecha_tag else "Sin fecha"
+def _extraer_de_fuente(nombre_fuente: str, max_articulos: int, ventana: int, incremental: bool) -> list[Noticia]:
+    return [noticia for pagina in iterar_paginas_de_fuente(nombre_fuente, max_articulos, ventana, incremental) for noticia in pagina]
 
-            desc_tag = articulo.select_one("div.entry-content p")
-            descripcion = desc_tag.text.strip() if desc_tag else "Sin descripción"
+def extraer_noticias_araucaniadiario(max_articulos: int = 50, ventana: int = SCRAPING_VENTANA_PAGINAS, incremental: bool = False) -> list[Noticia]:
+    return _extraer_de_fuente("Araucanía Diario", max_articulos, ventana, incremental)
 
-            noticias.append(Noticia(
-                titulo=titulo,
-                fecha=fecha,
-                url=url,
-                fuente="El Periódico",
-                descripcion=descripcion
-            ))
+def extraer_noticias_elperiodico(max_articulos: int = 50, ventana: int = SCRAPING_VENTANA_PAGINAS, incremental: bool = False) -> list[Noticia]:
+    return _extraer_de_fuente("El Periódico", max_articulos, ventana, incremental)
 
-        pagina += 1
+def extraer_noticias_de_todas_las_fuentes(
+    max_articulos: int = 50,
+    ventana: int = SCRAPING_VENTANA_PAGINAS,
+    incremental: bool = False
+) -> dict[str, list[Noticia]]:
+    """
+    Extrae las noticias de todas las fuentes al mismo tiempo.
+    Con `incremental=True` solo se retornan las noticias no vistas en ejecuciones anteriores;
+    después de guardarlas hay que registrarlas con `marcar_noticias_vistas`.
 
-    return noticias
\ No newline at end of file
+    Retorna:
+    - Diccionario nombre de la fuente -> noticias extraídas, en el orden de FUENTES.
+    """
+    with ThreadPoolExecutor(max_workers=len(FUENTES), thread_name_prefix="fuente") as executor:
+        futuros = {
+            nombre: executor.submit(_extraer_de_fuente, nombre, max_articulos, ventana, incremental)
+            for nombre in FUENTES
+        }
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from config.settings import SCRAPING_INDICE_VISTOS_RUTA
+from models.entities import Noticia
+
+
+def huella_noticia(noticia: Noticia) -> str:
+    """
+    Huella estable de una noticia a partir de su título y descripción normalizados.
+    """
+    contenido = f"{noticia.titulo.strip().lower()}\x1f{noticia.descripcion.strip().lower()}"
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class IndiceVistos:
+    """
+    Índice persistente (SQLite) de las noticias ya vistas por fuente y de los validadores
+    HTTP (ETag / Last-Modified) de cada página de listado, para el scraping incremental.
+
+    Las noticias se registran como vistas recién cuando quedaron guardadas en la base de datos, y los
+    validadores de una página se guardan cuando todas sus noticias fueron registradas: si la inserción
+    falla, la siguiente ejecución vuelve a extraerlas en lugar de saltarlas por vistas o por un 304.
+    """
+
+    def __init__(self, ruta: str = SCRAPING_INDICE_VISTOS_RUTA):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS VISTOS (
+                FUENTE TEXT NOT NULL,
+                HUELLA TEXT NOT NULL,
+                PRIMERA_VEZ REAL NOT NULL,
+                PRIMARY KEY (FUENTE, HUELLA)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS VALIDADORES (
+                URL TEXT PRIMARY KEY,
+                ETAG TEXT NULL,
+                LAST_MODIFIED TEXT NULL
+            )
+        """)
+        self._conn.commit()
+        # URL de la página -> [noticias aún sin registrar, ETag, Last-Modified]
+        self._paginas_pendientes: dict[str, list] = {}
+
+    def filtrar_nuevas(self, fuente: str, noticias: list[Noticia]) -> list[Noticia]:
+        """
+        Retorna las noticias que aún no están registradas como vistas para la fuente.
+        """
+        if not noticias:
+            return []
+        huellas = [huella_noticia(noticia) for noticia in noticias]
+        marcadores = ", ".join("?" for _ in huellas)
+        with self._lock:
+            vistas = {
+                fila[0] for fila in self._conn.execute(
+                    f"SELECT HUELLA FROM VISTOS WHERE FUENTE = ? AND HUELLA IN ({marcadores})",
+                    (fuente, *huellas)
+                )
+            }
+        return [noticia for noticia, huella in zip(noticias, huellas) if huella not in vistas]
+
+    def anotar_pagina(self, url: str, etag: str | None, last_modified: str | None, noticias: int) -> None:
+        """
+        Anota los validadores de una página extraída completa; se guardan cuando sus `noticias` queden registradas como vistas.
+        """
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._paginas_pendientes[url] = [noticias, etag, last_modified]
+
+    def marcar_vistas(self, fuente: str, noticias: list[Noticia]) -> None:
+        """
+        Registra las noticias como vistas para la fuente. Debe llamarse después de guardarlas en la base de datos.
+        Guarda además los validadores de las páginas cuyas noticias quedaron todas registradas.
+        """
+        ahora = time.time()
+        completas: dict[str, tuple[str | None, str | None]] = {}
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO VISTOS (FUENTE, HUELLA, PRIMERA_VEZ) VALUES (?, ?, ?)",
+                [(fuente, huella_noticia(noticia), ahora) for noticia in noticias]
+            )
+            self._conn.commit()
+            # Las noticias guardan como URL la de su página de listado
+            for noticia in noticias:
+                pendiente = self._paginas_pendientes.get(noticia.url)
+                if pendiente is None:
+                    continue
+                pendiente[0] -= 1
+                if pendiente[0] <= 0:
+                    del self._paginas_pendientes[noticia.url]
+                    completas[noticia.url] = (pendiente[1], pendiente[2])
+        self.guardar_validadores(completas)
+
+    def obtener_validadores(self, url: str) -> dict[str, str]:
+        """
+        Retorna las cabeceras de GET condicional (If-None-Match / If-Modified-Since) guardadas para la URL.
+        """
+        with self._lock:
+            fila = self._conn.execute("SELECT ETAG, LAST_MODIFIED FROM VALIDADORES WHERE URL = ?", (url,)).fetchone()
+        cabeceras: dict[str, str] = {}
+        if fila and fila[0]:
+            cabeceras["If-None-Match"] = fila[0]
+        if fila and fila[1]:
+            cabeceras["If-Modified-Since"] = fila[1]
+        return cabeceras
+
+    def guardar_validadores(self, validadores: dict[str, tuple[str | None, str | None]]) -> None:
+        """
+        Guarda los validadores (ETag, Last-Modified) de varias URLs.
+        """
+        filas = [(url, etag, last_modified) for url, (etag, last_modified) in validadores.items() if etag or last_modified]
+        if not filas:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO VALIDADORES (URL, ETAG, LAST_MODIFIED) VALUES (?, ?, ?)",
+                filas
+            )
+            self._conn.commit()
+
+
+_indice: IndiceVistos | None = None
+_indice_lock = threading.Lock()
+
+
+def obtener_indice_vistos() -> IndiceVistos:
+    """
+    Obtiene (o crea la primera vez) el índice de noticias vistas compartido.
+    """
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceVistos()
+        return _indice
@@ -0,0 +1,280 @@
+import glob
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from config.settings import (
+    GEMINI_API_KEY, GEMINI_BASE_URL, GEMINI_MODELO_PRINCIPAL, OPENAI_API_KEY, OPENAI_BASE_URL, IA_LOTE_OFFLINE_DIRECTORIO
+)
+from models.entities import PromptCompilado
+from services.http_clients import obtener_cliente
+from services.ia_models_service import ErrorPeticionIA, construir_payload_gemini, construir_payload_openai
+
+
+@dataclass
+class TrabajoLote:
+    """
+    Trabajo enviado (o por enviar) a la API batch de un proveedor.
+    Se guarda en disco para retomarlo si el proceso se reinicia antes de ingerir los resultados.
+    """
+    nombre: str                                 # Identificador local; es también el WORKER_ID de los artículos reclamados
+    modelo: str                                 # Proveedor de IA ("OPENAI", "GEMINI")
+    prompt_type: str                            # Tipo de prompt de todas las solicitudes
+    ruta_entrada: str                           # Archivo JSONL con las solicitudes
+    solicitudes: int                            # Cantidad de solicitudes del archivo
+    creado: float                               # Fecha de creación (epoch)
+    id_proveedor: str | None = None             # ID del trabajo en el proveedor; None si aún no se envió
+    estado_proveedor: str | None = None         # Último estado informado por el proveedor
+    duplicados: list[int] = field(default_factory=list)  # Casi-duplicados reclamados que reciben el resultado de su canónico
+
+
+@dataclass
+class ResultadoSolicitud:
+    """
+    Resultado de una solicitud de un trabajo por lotes.
+    """
+    clave: str                                  # custom_id (OpenAI) o key (Gemini) de la solicitud
+    respuesta: dict | None                      # Cuerpo con el mismo formato que la respuesta síncrona
+    error: str | None = None                    # Error informado por el proveedor para esta solicitud
+    status_code: int = 200                      # Código de estado de la solicitud
+
+
+def _verificar(response, proveedor: str) -> dict:
+    """
+    Retorna el JSON de una respuesta exitosa de la API batch o lanza ErrorPeticionIA.
+    """
+    if response.status_code != 200:
+        print(f"❌ Error en la petición a la API batch de {proveedor}: {response.status_code} {response.text[:200]}")
+        raise ErrorPeticionIA(proveedor, response.status_code)
+    return response.json()
+
+
+def _lineas_jsonl(texto: str) -> Iterator[dict]:
+    for linea in texto.splitlines():
+        if linea.strip():
+            yield json.loads(linea)
+
+
+class APILoteOpenAI:
+    """
+    Batch API de OpenAI: el JSONL se sube como archivo, se crea un batch sobre /v1/responses
+    y, al terminar, se descargan los archivos de salida y de errores.
+    """
+    proveedor = "OPENAI"
+    CAMPO_CLAVE = "custom_id"
+    ESTADOS_FINALES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+    def __init__(self):
+        # Cliente propio: la API batch tiene cuotas aparte y no consume las del limitador de tasa
+        self.cliente = obtener_cliente("OPENAI_LOTE")
+        self.headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+
+    @staticmethod
+    def solicitud(clave: str, prompt: str | PromptCompilado, prompt_type: str) -> dict:
+        return {"custom_id": clave, "method": "POST", "url": "/v1/responses", "body": construir_payload_openai(prompt, prompt_type)}
+
+    def enviar(self, trabajo: TrabajoLote) -> str:
+        with open(trabajo.ruta_entrada, "rb") as archivo:
+            response = self.cliente.post(
+                f"{OPENAI_BASE_URL}/files",
+                headers=self.headers,
+                data={"purpose": "batch"},
+                files={"file": (os.path.basename(trabajo.ruta_entrada), archivo, "application/jsonl")}
+            )
+        archivo_id = _verificar(response, self.proveedor)["id"]
+        response = self.cliente.post(
+            f"{OPENAI_BASE_URL}/batches",
+            headers=self.headers,
+            json={
+                "input_file_id": archivo_id,
+                "endpoint": "/v1/responses",
+                "completion_window": "24h",
+                "metadata": {"trabajo": trabajo.nombre},
+            }
+        )
+        return _verificar(response, self.proveedor)["id"]
+
+    def consultar(self, id_proveedor: str) -> tuple[str, bool, dict]:
+        """
+        Retorna el estado del trabajo, si ya terminó y los datos completos informados por el proveedor.
+        """
+        response = self.cliente.get(f"{OPENAI_BASE_URL}/batches/{id_proveedor}", headers=self.headers)
+        datos = _verificar(response, self.proveedor)
+        estado = datos.get("status", "")
+        return estado, estado in self.ESTADOS_FINALES, datos
+
+    def resultados(self, datos: dict) -> Iterator[ResultadoSolicitud]:
+        # Un batch vencido o cancelado puede traer igual los resultados de las solicitudes que alcanzó a completar
+        for campo in ("output_file_id", "error_file_id"):
+            archivo_id = datos.get(campo)
+            if not archivo_id:
+                continue
+            response = self.cliente.get(f"{OPENAI_BASE_URL}/files/{archivo_id}/content", headers=self.headers)
+            if response.status_code != 200:
+                raise ErrorPeticionIA(self.proveedor, response.status_code)
+            for linea in _lineas_jsonl(response.text):
+                respuesta = linea.get("response") or {}
+                status_code = respuesta.get("status_code", 500)
+                error = linea.get("error")
+                if error or status_code != 200:
+                    yield ResultadoSolicitud(linea["custom_id"], None, json.dumps(error or respuesta.get("body"), ensure_ascii=False), status_code)
+                else:
+                    yield ResultadoSolicitud(linea["custom_id"], respuesta.get("body"))
+
+
+class APILoteGemini:
+    """
+    Batch mode de la API de Gemini (batchGenerateContent). Las solicitudes del JSONL se envían
+    en línea, y los resultados se leen en línea o desde el archivo de respuestas si el proveedor lo genera.
+    """
+    proveedor = "GEMINI"
+    CAMPO_CLAVE = "key"
+    ESTADOS_FINALES = frozenset({"BATCH_STATE_SUCCEEDED", "BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED"})
+
+    def __init__(self):
+        # Cliente propio: la API batch tiene cuotas aparte y no consume las del limitador de tasa
+        self.cliente = obtener_cliente("GEMINI_LOTE")
+        self.params = {"key": GEMINI_API_KEY}
+
+    @staticmethod
+    def solicitud(clave: str, prompt: str | PromptCompilado, prompt_type: str) -> dict:
+        return {"key": clave, "request": construir_payload_gemini(prompt, prompt_type)}
+
+    def enviar(self, trabajo: TrabajoLote) -> str:
+        with open(trabajo.ruta_entrada, encoding="utf-8") as archivo:
+            solicitudes = list(_lineas_jsonl(archivo.read()))
+        cuerpo = {
+            "batch": {
+                "display_name": trabajo.nombre,
+                "input_config": {
+                    "requests": {
+                        "requests": [{"request": solicitud["request"], "metadata": {"key": solicitud["key"]}} for solicitud in solicitudes]
+                    }
+                },
+            }
+        }
+        response = self.cliente.post(
+            f"{GEMINI_BASE_URL}/v1beta/models/{GEMINI_MODELO_PRINCIPAL}:batchGenerateContent", params=self.params, json=cuerpo
+        )
+        return _verificar(response, self.proveedor)["name"]
+
+    def consultar(self, id_proveedor: str) -> tuple[str, bool, dict]:
+        """
+        Retorna el estado del trabajo, si ya terminó y los datos completos informados por el proveedor.
+        """
+        response = self.cliente.get(f"{GEMINI_BASE_URL}/v1beta/{id_proveedor}", params=self.params)
+        datos = _verificar(response, self.proveedor)
+        estado = (datos.get("metadata") or {}).get("state") or datos.get("state", "")
+        return estado, bool(datos.get("done")) or estado in self.ESTADOS_FINALES, datos
+
+    def resultados(self, datos: dict) -> Iterator[ResultadoSolicitud]:
+        respuesta = datos.get("response") or {}
+        if respuesta.get("responsesFile"):
+            response = self.cliente.get(
+                f"{GEMINI_BASE_URL}/download/v1beta/{respuesta['responsesFile']}:download",
+                params={**self.params, "alt": "media"}
+            )
+            if response.status_code != 200:
+                raise ErrorPeticionIA(self.proveedor, response.status_code)
+            elementos = ((linea.get("key"), linea) for linea in _lineas_jsonl(response.text))
+        else:
+            en_linea = (respuesta.get("inlinedResponses") or {}).get("inlinedResponses", [])
+            elementos = (((elemento.get("metadata") or {}).get("key"), elemento) for elemento in en_linea)
+
+        for clave, elemento in elementos:
+            if clave is None:
+                continue
+            if elemento.get("error"):
+                error = elemento["error"]
+                yield ResultadoSolicitud(clave, None, json.dumps(error, ensure_ascii=False), error.get("code", 500))
+            else:
+                yield ResultadoSolicitud(clave, elemento.get("response"))
+
+
+APIS_LOTE = {
+    "OPENAI": APILoteOpenAI,
+    "GEMINI": APILoteGemini,
+}
+
+
+def obtener_api_lote(modelo: str) -> APILoteOpenAI | APILoteGemini:
+    if modelo not in APIS_LOTE:
+        raise ValueError(f"Modelo '{modelo}' no soportado en modo lote. Modelos disponibles: {list(APIS_LOTE)}")
+    return APIS_LOTE[modelo]()
+
+
+# ----------- ESTADO EN DISCO -----------
+
+def _ruta_estado(nombre: str, directorio: str) -> str:
+    return os.path.join(directorio, f"{nombre}.json")
+
+
+def guardar_trabajo(trabajo: TrabajoLote, directorio: str = IA_LOTE_OFFLINE_DIRECTORIO) -> None:
+    """
+    Guarda el estado del trabajo de forma atómica (un corte a mitad de escritura no deja un archivo dañado).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta_estado(trabajo.nombre, directorio)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as archivo:
+        json.dump(asdict(trabajo), archivo, ensure_ascii=False, indent=2)
+    os.replace(f"{ruta}.tmp", ruta)
+
+
+def crear_trabajo(
+    nombre: str,
+    modelo: str,
+    prompt_type: str,
+    prompts: Iterable[tuple[str, str | PromptCompilado]],
+    directorio: str = IA_LOTE_OFFLINE_DIRECTORIO,
+    duplicados: list[int] | None = None
+) -> TrabajoLote:
+    """
+    Escribe el JSONL de solicitudes del proveedor para los pares (clave, prompt) y guarda el trabajo sin enviar.
+    Lanza FileExistsError si ya hay un trabajo con el mismo nombre, para no pisar sus solicitudes.
+    """
+    api = APIS_LOTE[modelo]
+    os.makedirs(directorio, exist_ok=True)
+    ruta_entrada = os.path.join(directorio, f"{nombre}.jsonl")
+    if os.path.exists(_ruta_estado(nombre, directorio)):
+        raise FileExistsError(f"Ya existe un trabajo por lotes llamado '{nombre}'.")
+    solicitudes = 0
+    with open(ruta_entrada, "x", encoding="utf-8") as archivo:
+        for clave, prompt in prompts:
+            archivo.write(json.dumps(api.solicitud(clave, prompt, prompt_type), ensure_ascii=False) + "\n")
+            solicitudes += 1
+    trabajo = TrabajoLote(nombre, modelo, prompt_type, ruta_entrada, solicitudes, time.time(), duplicados=list(duplicados or []))
+    guardar_trabajo(trabajo, directorio)
+    return trabajo
+
+
+def claves_trabajo(trabajo: TrabajoLote) -> list[str]:
+    """
+    Retorna las claves (custom_id o key) de las solicitudes del JSONL del trabajo.
+    """
+    campo = APIS_LOTE[trabajo.modelo].CAMPO_CLAVE
+    with open(trabajo.ruta_entrada, encoding="utf-8") as archivo:
+        return [str(solicitud[campo]) for solicitud in _lineas_jsonl(archivo.read())]
+
+
+def cargar_trabajos(directorio: str = IA_LOTE_OFFLINE_DIRECTORIO) -> list[TrabajoLote]:
+    """
+    Retorna los trabajos guardados que aún no se ingirieron, del más antiguo al más reciente.
+    """
+    trabajos: list[TrabajoLote] = []
+    for ruta in sorted(glob.glob(os.path.join(directorio, "*.json"))):
+        try:
+            with open(ruta, encoding="utf-8") as archivo:
+                trabajos.append(TrabajoLote(**json.load(archivo)))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ No se pudo leer el trabajo por lotes '{ruta}': {e}")
+    return sorted(trabajos, key=lambda trabajo: trabajo.creado)
+
+
+def eliminar_trabajo(trabajo: TrabajoLote, directorio: str = IA_LOTE_OFFLINE_DIRECTORIO) -> None:
+    """
+    Elimina el estado y el JSONL de un trabajo ya ingerido.
+    """
+    for ruta in (_ruta_estado(trabajo.nombre, directorio), trabajo.ruta_entrada):
+        if os.path.exists(ruta):
+            os.remove(ruta)
@@ -19,7 +19,12 @@ CREATE TABLE PROCESO.PROCESSED_ARTICLES (
     FECHA VARCHAR(50) NOT NULL,                -- Fecha original de publicación
     URL VARCHAR(1000) NOT NULL,                -- Enlace a la fuente original
     FUENTE VARCHAR(100) NOT NULL,              -- Nombre del medio o fuente
-    DESCRIPCION VARCHAR(MAX) NOT NULL          -- Resumen o contenido relevante
+    DESCRIPCION VARCHAR(MAX) NOT NULL,         -- Resumen o contenido relevante
+    DUPLICATE_OF INT NULL,                     -- ID del artículo canónico si es un casi-duplicado
+
+    CONSTRAINT FK_Article_DuplicateOf
+        FOREIGN KEY (DUPLICATE_OF)
+        REFERENCES PROCESO.PROCESSED_ARTICLES(ID)
 );
 
 -- Tabla de logs de ejecución (todos los intentos: exitosos y fallidos)
@@ -36,6 +41,8 @@ CREATE TABLE PROCESO.IA_RESPONSE_LOG (
     RESPONSE_TIME_SEC FLOAT NULL,              -- Tiempo de respuesta en segundos
     TOKENS_USED INT NULL,                      -- Tokens consumidos
     RESPONSE_DATE DATETIME DEFAULT GETDATE(),  -- Fecha de la respuesta
+    MODEL_ID VARCHAR(100) NULL,                -- Modelo concreto del proveedor (ej: gpt-4o-mini)
+    MODEL_TIER VARCHAR(20) NULL,               -- Nivel de la cascada que respondió (economico, principal)
 
     CONSTRAINT FK_Response_To_Article
         FOREIGN KEY (ARTICLE_ID)
@@ -49,7 +56,7 @@ CREATE TABLE PROCESO.MODEL_PROCESS_STATUS (
 
     ARTICLE_ID INT NOT NULL,                     -- ID del artículo procesado
     MODEL_NAME VARCHAR(100) NOT NULL,            -- Nombre del modelo IA utilizado
-    IS_PROCESSED BIT DEFAULT 0,                  -- Estado: 1 = procesado exitosamente, 0 = pendiente
+    IS_PROCESSED BIT NOT NULL DEFAULT 0,         -- Estado: 1 = procesado exitosamente, 0 = pendiente
 
     ETIQUETAS_IA VARCHAR(MAX) NULL,              -- Etiquetas generadas (temas/categorías)
     SENTIMIENTO VARCHAR(50) NULL,                -- Positivo, negativo o neutro
@@ -58,8 +65,40 @@ CREATE TABLE PROCESO.MODEL_PROCESS_STATUS (
     INDICADOR_VIOLENCIA VARCHAR(50) NULL,        -- Sí o No
     EDAD_RECOMENDADA VARCHAR(50) NULL,           -- Edad sugerida (ej: +13, +18)
     EXECUTION_TIME VARCHAR(50) NULL,                -- Tiempo de ejecución exitoso
+    WORKER_ID VARCHAR(100) NULL,                 -- Worker que tiene reclamado el artículo
+    LEASE_EXPIRES DATETIME2 NULL,                -- Vencimiento (UTC) del reclamo vigente
 
     CONSTRAINT FK_ModelStatus_Article FOREIGN KEY (ARTICLE_ID)
         REFERENCES PROCESO.PROCESSED_ARTICLES(ID)
         ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+-- Índices (ver sql/migrations/002_indices_estado_proceso.sql)
+-- Los índices filtrados requieren ANSI_NULLS y QUOTED_IDENTIFIER activos
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+
+-- Un único estado por artículo y modelo; búsquedas puntuales de UPDATE_ARTICULO_IA y EXISTE_STATUS
+CREATE UNIQUE INDEX UX_ModelStatus_Article_Model
+    ON PROCESO.MODEL_PROCESS_STATUS (ARTICLE_ID, MODEL_NAME);
+
+-- Trabajo pendiente por modelo: solo contiene las filas con IS_PROCESSED = 0
+CREATE INDEX IX_ModelStatus_Pendientes
+    ON PROCESO.MODEL_PROCESS_STATUS (MODEL_NAME, ARTICLE_ID)
+    INCLUDE (LEASE_EXPIRES)
+    WHERE IS_PROCESSED = 0;
+
+-- Resultados procesados por modelo, con las columnas de resultado incluidas (exportación a CSV)
+CREATE INDEX IX_ModelStatus_Procesados
+    ON PROCESO.MODEL_PROCESS_STATUS (MODEL_NAME, ARTICLE_ID)
+    INCLUDE (ETIQUETAS_IA, SENTIMIENTO, RATING, NIVEL_RIESGO, INDICADOR_VIOLENCIA, EDAD_RECOMENDADA, EXECUTION_TIME)
+    WHERE IS_PROCESSED = 1;
+
+-- Clave foránea de los logs (evita recorrer la tabla en los borrados en cascada)
+CREATE INDEX IX_ResponseLog_Article
+    ON PROCESO.IA_RESPONSE_LOG (ARTICLE_ID);
+
+-- Grupos de casi-duplicados
+CREATE INDEX IX_Article_DuplicateOf
+    ON PROCESO.PROCESSED_ARTICLES (DUPLICATE_OF, ID)
+    WHERE DUPLICATE_OF IS NOT NULL;
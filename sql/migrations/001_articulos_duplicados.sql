@@ -0,0 +1,8 @@
+-- Marca de artículos casi-duplicados: apunta al artículo canónico cuyo análisis se reutiliza
+IF COL_LENGTH('PROCESO.PROCESSED_ARTICLES', 'DUPLICATE_OF') IS NULL
+BEGIN
+    ALTER TABLE PROCESO.PROCESSED_ARTICLES
+        ADD DUPLICATE_OF INT NULL
+        CONSTRAINT FK_Article_DuplicateOf
+            FOREIGN KEY REFERENCES PROCESO.PROCESSED_ARTICLES(ID);
+END;
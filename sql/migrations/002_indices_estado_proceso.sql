@@ -0,0 +1,55 @@
+-- Índices para las búsquedas por (ARTICLE_ID, MODEL_NAME) y la consulta de trabajo pendiente.
+-- Los índices filtrados requieren estas opciones de sesión (también al consultar).
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+
+-- 1. IS_PROCESSED pasa a NOT NULL para que el filtro no necesite COALESCE
+UPDATE PROCESO.MODEL_PROCESS_STATUS SET IS_PROCESSED = 0 WHERE IS_PROCESSED IS NULL;
+ALTER TABLE PROCESO.MODEL_PROCESS_STATUS ALTER COLUMN IS_PROCESSED BIT NOT NULL;
+
+-- 2. Eliminar estados repetidos por (ARTICLE_ID, MODEL_NAME), conservando el procesado o el más antiguo
+WITH repetidos AS (
+    SELECT ROW_NUMBER() OVER (
+        PARTITION BY ARTICLE_ID, MODEL_NAME
+        ORDER BY IS_PROCESSED DESC, ID
+    ) AS FILA
+    FROM PROCESO.MODEL_PROCESS_STATUS
+)
+DELETE FROM repetidos WHERE FILA > 1;
+
+-- 3. Crear el estado pendiente de los artículos que no lo tienen: la consulta de pendientes
+--    ya no necesita un LEFT JOIN sobre todos los artículos
+INSERT INTO PROCESO.MODEL_PROCESS_STATUS (ARTICLE_ID, MODEL_NAME, IS_PROCESSED)
+SELECT pa.ID, m.MODEL_NAME, 0
+FROM PROCESO.PROCESSED_ARTICLES pa
+CROSS JOIN (VALUES ('GEMINI'), ('OPENAI')) AS m(MODEL_NAME)
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM PROCESO.MODEL_PROCESS_STATUS mps
+    WHERE mps.ARTICLE_ID = pa.ID AND mps.MODEL_NAME = m.MODEL_NAME
+);
+
+-- 4. Índices
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_ModelStatus_Article_Model')
+    CREATE UNIQUE INDEX UX_ModelStatus_Article_Model
+        ON PROCESO.MODEL_PROCESS_STATUS (ARTICLE_ID, MODEL_NAME);
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ModelStatus_Pendientes')
+    CREATE INDEX IX_ModelStatus_Pendientes
+        ON PROCESO.MODEL_PROCESS_STATUS (MODEL_NAME, ARTICLE_ID)
+        WHERE IS_PROCESSED = 0;
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ModelStatus_Procesados')
+    CREATE INDEX IX_ModelStatus_Procesados
+        ON PROCESO.MODEL_PROCESS_STATUS (MODEL_NAME, ARTICLE_ID)
+        INCLUDE (ETIQUETAS_IA, SENTIMIENTO, RATING, NIVEL_RIESGO, INDICADOR_VIOLENCIA, EDAD_RECOMENDADA, EXECUTION_TIME)
+        WHERE IS_PROCESSED = 1;
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ResponseLog_Article')
+    CREATE INDEX IX_ResponseLog_Article
+        ON PROCESO.IA_RESPONSE_LOG (ARTICLE_ID);
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Article_DuplicateOf')
+    CREATE INDEX IX_Article_DuplicateOf
+        ON PROCESO.PROCESSED_ARTICLES (DUPLICATE_OF, ID)
+        WHERE DUPLICATE_OF IS NOT NULL;
@@ -0,0 +1,35 @@
+-- Comparación de plan y tiempos de la consulta de pendientes antes y después de 002_indices_estado_proceso.sql.
+-- Ejecutar una vez antes y otra después de la migración, con "Incluir plan de ejecución real" activado
+-- (o SET STATISTICS XML ON) y comparar en la pestaña Mensajes las lecturas lógicas y el tiempo de CPU.
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+SET STATISTICS IO ON;
+SET STATISTICS TIME ON;
+
+DECLARE @modelo VARCHAR(100) = 'GEMINI';
+
+-- Antes: LEFT JOIN + COALESCE(mps.IS_PROCESSED, 0) = 0 recorre todos los artículos
+-- (Clustered Index Scan sobre PROCESSED_ARTICLES y MODEL_PROCESS_STATUS).
+SELECT pa.ID, pa.TITULO, pa.DESCRIPCION
+FROM PROCESO.PROCESSED_ARTICLES pa
+LEFT JOIN PROCESO.MODEL_PROCESS_STATUS mps
+    ON pa.ID = mps.ARTICLE_ID AND mps.MODEL_NAME = @modelo
+WHERE COALESCE(mps.IS_PROCESSED, 0) = 0;
+
+-- Después: búsqueda sobre IX_ModelStatus_Pendientes (Index Seek, solo filas pendientes)
+-- y Clustered Index Seek sobre PROCESSED_ARTICLES por cada pendiente.
+SELECT pa.ID, pa.TITULO, pa.DESCRIPCION
+FROM PROCESO.MODEL_PROCESS_STATUS mps
+INNER JOIN PROCESO.PROCESSED_ARTICLES pa
+    ON pa.ID = mps.ARTICLE_ID
+WHERE mps.MODEL_NAME = @modelo
+    AND mps.IS_PROCESSED = 0
+ORDER BY mps.ARTICLE_ID;
+
+-- Búsqueda puntual usada por UPDATE_ARTICULO_IA y EXISTE_STATUS: Index Seek sobre UX_ModelStatus_Article_Model
+SELECT COUNT(*)
+FROM PROCESO.MODEL_PROCESS_STATUS
+WHERE ARTICLE_ID = 1 AND MODEL_NAME = @modelo;
+
+SET STATISTICS IO OFF;
+SET STATISTICS TIME OFF;
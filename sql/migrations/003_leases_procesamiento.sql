@@ -0,0 +1,21 @@
+-- Reclamo de trabajo con lease para varios workers concurrentes sobre MODEL_PROCESS_STATUS.
+-- Un worker reclama filas pendientes registrando su WORKER_ID y el vencimiento del lease (UTC);
+-- si el worker muere, las filas vuelven a estar disponibles cuando vence LEASE_EXPIRES.
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+
+IF COL_LENGTH('PROCESO.MODEL_PROCESS_STATUS', 'WORKER_ID') IS NULL
+    ALTER TABLE PROCESO.MODEL_PROCESS_STATUS ADD WORKER_ID VARCHAR(100) NULL;
+
+IF COL_LENGTH('PROCESO.MODEL_PROCESS_STATUS', 'LEASE_EXPIRES') IS NULL
+    ALTER TABLE PROCESO.MODEL_PROCESS_STATUS ADD LEASE_EXPIRES DATETIME2 NULL;
+GO
+
+-- El índice de pendientes incluye LEASE_EXPIRES para que el reclamo no necesite leer la tabla base
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ModelStatus_Pendientes')
+    DROP INDEX IX_ModelStatus_Pendientes ON PROCESO.MODEL_PROCESS_STATUS;
+
+CREATE INDEX IX_ModelStatus_Pendientes
+    ON PROCESO.MODEL_PROCESS_STATUS (MODEL_NAME, ARTICLE_ID)
+    INCLUDE (LEASE_EXPIRES)
+    WHERE IS_PROCESSED = 0;
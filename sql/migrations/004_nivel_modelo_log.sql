@@ -0,0 +1,11 @@
+-- Cascada de modelos: cada registro de IA_RESPONSE_LOG guarda el modelo concreto del proveedor que respondió
+-- y el nivel de la cascada (economico o principal). Los registros anteriores quedan en NULL.
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+
+IF COL_LENGTH('PROCESO.IA_RESPONSE_LOG', 'MODEL_ID') IS NULL
+    ALTER TABLE PROCESO.IA_RESPONSE_LOG ADD MODEL_ID VARCHAR(100) NULL;
+
+IF COL_LENGTH('PROCESO.IA_RESPONSE_LOG', 'MODEL_TIER') IS NULL
+    ALTER TABLE PROCESO.IA_RESPONSE_LOG ADD MODEL_TIER VARCHAR(20) NULL;
+GO
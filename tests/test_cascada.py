@@ -0,0 +1,106 @@
+import pytest
+
+import services.cascada as cascada
+from models.entities import ProcessStatusDTO
+from services.cascada import PoliticaCascada, analizar_con_cascada, motivo_escalamiento, niveles_cascada
+from services.ia_models_service import ErrorPeticionIA, RespuestaInvalidaIA
+from services.metricas import ESCALAMIENTOS_IA
+
+POLITICA = PoliticaCascada(activa=True, confianza_minima=0.7, riesgos=frozenset({"alto"}), violencias=frozenset({"sí"}))
+NIVEL_POR_MODELO = {"mini": "economico", "grande": "principal"}
+
+
+@pytest.fixture(autouse=True)
+def modelos(monkeypatch):
+    monkeypatch.setitem(cascada.MODELOS_POR_NIVEL, "OPENAI", {"economico": "mini", "principal": "grande"})
+
+
+def _analisis(modelo_id: str, **campos) -> ProcessStatusDTO:
+    valores = dict(
+        etiquetas_ia="economía", sentimiento="neutro", rating=3.0, nivel_riesgo="bajo", indicador_violencia="no",
+        status_code=200, edad_recomendada="+13", execution_time="1.0 seg", model_used="OPENAI", is_processed=True,
+        response_time_sec=1.0, tokens_used=100, confianza=0.9, modelo_id=modelo_id, nivel_modelo=NIVEL_POR_MODELO[modelo_id]
+    )
+    valores.update(campos)
+    return ProcessStatusDTO(**valores)
+
+
+class Proveedor:
+    """
+    Reemplaza a call_openAI: responde por modelo con un análisis o una excepción.
+    """
+
+    def __init__(self, respuestas: dict[str, object]):
+        self.respuestas = respuestas
+        self.llamados: list[str] = []
+
+    def __call__(self, modelo_id: str) -> ProcessStatusDTO:
+        self.llamados.append(modelo_id)
+        respuesta = self.respuestas[modelo_id]
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+
+def test_niveles_sin_cascada_o_con_el_mismo_modelo(monkeypatch):
+    assert niveles_cascada("OPENAI", POLITICA) == [("economico", "mini"), ("principal", "grande")]
+    inactiva = PoliticaCascada(activa=False, confianza_minima=0.7, riesgos=frozenset(), violencias=frozenset())
+    assert niveles_cascada("OPENAI", inactiva) == [("principal", "grande")]
+    monkeypatch.setitem(cascada.MODELOS_POR_NIVEL, "OPENAI", {"economico": "grande", "principal": "grande"})
+    assert niveles_cascada("OPENAI", POLITICA) == [("principal", "grande")]
+
+
+def test_analisis_aceptado_no_escala():
+    proveedor = Proveedor({"mini": _analisis("mini")})
+    resultado = analizar_con_cascada(proveedor, "OPENAI", politica=POLITICA)
+    assert proveedor.llamados == ["mini"]
+    assert resultado.nivel_modelo == "economico"
+    assert resultado.motivo_escalamiento is None
+
+
+@pytest.mark.parametrize("campos, motivo", [
+    ({"confianza": 0.5}, "confianza_baja"),
+    ({"nivel_riesgo": "alto"}, "riesgo"),
+    ({"indicador_violencia": "sí"}, "violencia"),
+])
+def test_la_politica_escala_al_principal_y_suma_los_intentos(campos, motivo):
+    proveedor = Proveedor({"mini": _analisis("mini", **campos), "grande": _analisis("grande", **campos)})
+    escalamientos_previos = ESCALAMIENTOS_IA.valor(proveedor="OPENAI", motivo=motivo)
+
+    resultado = analizar_con_cascada(proveedor, "OPENAI", politica=POLITICA)
+
+    assert proveedor.llamados == ["mini", "grande"]
+    assert resultado.nivel_modelo == "principal"
+    assert resultado.motivo_escalamiento == motivo
+    assert resultado.tokens_used == 200
+    assert resultado.response_time_sec == 2.0
+    assert ESCALAMIENTOS_IA.valor(proveedor="OPENAI", motivo=motivo) == escalamientos_previos + 1
+
+
+def test_respuesta_invalida_escala_y_en_el_ultimo_nivel_se_propaga():
+    proveedor = Proveedor({"mini": RespuestaInvalidaIA("json roto"), "grande": _analisis("grande")})
+    assert analizar_con_cascada(proveedor, "OPENAI", politica=POLITICA).motivo_escalamiento == "respuesta_invalida"
+
+    proveedor = Proveedor({"mini": RespuestaInvalidaIA("json roto"), "grande": RespuestaInvalidaIA("json roto")})
+    with pytest.raises(RespuestaInvalidaIA):
+        analizar_con_cascada(proveedor, "OPENAI", politica=POLITICA)
+
+
+def test_errores_http_no_escalan():
+    proveedor = Proveedor({"mini": ErrorPeticionIA("OPENAI", 500)})
+    with pytest.raises(ErrorPeticionIA):
+        analizar_con_cascada(proveedor, "OPENAI", politica=POLITICA)
+    assert proveedor.llamados == ["mini"]
+
+
+def test_analisis_descartado_de_un_lote_continua_en_el_nivel_siguiente():
+    descartado = _analisis("mini", nivel_riesgo="alto")
+    descartado.motivo_escalamiento = motivo_escalamiento("OPENAI", descartado, POLITICA)
+    assert descartado.motivo_escalamiento == "riesgo"
+    assert motivo_escalamiento("OPENAI", _analisis("grande", nivel_riesgo="alto"), POLITICA) is None
+
+    proveedor = Proveedor({"grande": _analisis("grande", nivel_riesgo="alto")})
+    resultado = analizar_con_cascada(proveedor, "OPENAI", descartado=descartado, politica=POLITICA)
+    assert proveedor.llamados == ["grande"]
+    assert resultado.motivo_escalamiento == "riesgo"
+    assert resultado.tokens_used == 200
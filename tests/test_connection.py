@@ -0,0 +1,66 @@
+import pytest
+
+# El pool vive en el módulo de conexión, que importa pyodbc
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+import repository.connection as connection
+
+
+class ConexionFalsa:
+    """
+    Conexión que registra sus rollbacks; con `rollback_falla` simula una conexión rota.
+    """
+
+    def __init__(self, rollback_falla: bool = False):
+        self.rollback_falla = rollback_falla
+        self.rollbacks = 0
+        self.cerrada = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        if self.rollback_falla:
+            raise RuntimeError("conexión rota")
+
+    def close(self):
+        self.cerrada = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    creadas: list[ConexionFalsa] = []
+
+    def fabrica():
+        creadas.append(ConexionFalsa())
+        return creadas[-1]
+
+    pool = connection.PoolConexiones(max_size=1, acquire_timeout_sec=0.1, healthcheck_sec=60, factory=fabrica)
+    monkeypatch.setattr(connection, "_pool", pool)
+    return pool, creadas
+
+
+def test_la_conexion_se_devuelve_con_rollback_aunque_no_haya_error(pool):
+    _, creadas = pool
+    with connection.conexion():
+        pass
+    with connection.conexion() as conn:
+        assert conn is creadas[0]
+    assert len(creadas) == 1
+    assert creadas[0].rollbacks == 2
+
+
+def test_rollback_tras_una_excepcion(pool):
+    _, creadas = pool
+    with pytest.raises(ValueError):
+        with connection.conexion():
+            raise ValueError("consulta inválida")
+    assert creadas[0].rollbacks == 1
+    assert not creadas[0].cerrada
+
+
+def test_si_el_rollback_falla_la_conexion_se_descarta(pool):
+    _, creadas = pool
+    with connection.conexion() as conn:
+        conn.rollback_falla = True
+    assert creadas[0].cerrada
+    with connection.conexion() as conn:
+        assert conn is creadas[1]
@@ -0,0 +1,62 @@
+import threading
+import time
+from models.entities import PromptCompilado
+from services.contexto_gemini import ContextosGemini
+
+PROMPT = PromptCompilado("instrucciones " * 400, "artículo")
+
+
+class _ContextosSimulados(ContextosGemini):
+    """
+    Reemplaza la creación en el proveedor por una que puede bloquearse o fallar.
+    """
+
+    def __init__(self, respuestas: list[str | None], **kwargs):
+        super().__init__(**kwargs)
+        self.respuestas = respuestas
+        self.llamadas = 0
+        self.en_creacion = threading.Event()
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def _crear(self, modelo_id, prompt):
+        self.llamadas += 1
+        self.en_creacion.set()
+        self.liberar.wait(5)
+        return self.respuestas.pop(0)
+
+
+def test_prefijo_bajo_el_minimo_no_crea_contexto():
+    contextos = _ContextosSimulados(["cachedContents/1"], min_tokens=1024)
+    assert contextos.obtener("modelo", PromptCompilado("instrucciones breves", "artículo")) is None
+    assert contextos.llamadas == 0
+
+
+def test_creacion_en_curso_no_bloquea_a_otros_hilos():
+    contextos = _ContextosSimulados(["cachedContents/1"], min_tokens=10)
+    contextos.liberar.clear()
+    resultado: list = []
+    hilo = threading.Thread(target=lambda: resultado.append(contextos.obtener("modelo", PROMPT)))
+    hilo.start()
+    assert contextos.en_creacion.wait(5)
+
+    # Mientras el primer hilo espera al proveedor, los demás siguen sin contexto y sin crear otro
+    assert contextos.obtener("modelo", PROMPT) is None
+    assert contextos.llamadas == 1
+
+    contextos.liberar.set()
+    hilo.join(5)
+    assert resultado == ["cachedContents/1"]
+    assert contextos.obtener("modelo", PROMPT) == "cachedContents/1"
+    assert contextos.creados == 1
+
+
+def test_creacion_fallida_se_reintenta_pasado_el_plazo():
+    contextos = _ContextosSimulados([None, "cachedContents/2"], min_tokens=10, reintento_seg=0.2)
+    assert contextos.obtener("modelo", PROMPT) is None
+    assert contextos.obtener("modelo", PROMPT) is None
+    assert contextos.llamadas == 1
+
+    time.sleep(0.25)
+    assert contextos.obtener("modelo", PROMPT) == "cachedContents/2"
+    assert (contextos.creados, contextos.fallidos) == (1, 1)
@@ -0,0 +1,63 @@
+from services.deduplication import IndiceSimilitud, cargar_indice, guardar_indice
+from services.deduplication.minhash import normalizar_texto, obtener_shingles
+
+NOTICIA = (
+    "Temuco: municipio anuncia nuevo plan de reparación de calles tras las lluvias. "
+    "El alcalde informó que las obras comenzarán la próxima semana en los sectores más afectados de la ciudad"
+)
+# La misma noticia publicada por otro medio, con cambios menores de redacción y puntuación
+NOTICIA_OTRO_MEDIO = (
+    "TEMUCO - Municipio anuncia nuevo plan de reparación de calles tras las lluvias: "
+    "el alcalde informó que las obras comenzarán la próxima semana en los sectores más afectados de la comuna"
+)
+OTRA_NOTICIA = (
+    "Villarrica: bomberos controlan incendio forestal en el sector rural. "
+    "Brigadas de Conaf trabajaron durante toda la noche para contener el avance de las llamas"
+)
+
+
+def test_normalizacion_y_shingles():
+    assert normalizar_texto("¡Reparación de CALLES, ya!") == ["reparacion", "de", "calles", "ya"]
+    assert obtener_shingles("uno dos tres cuatro") == {"uno dos tres", "dos tres cuatro"}
+    assert obtener_shingles("uno dos") == {"uno dos"}
+    assert obtener_shingles("") == set()
+
+
+def test_similitud_estimada_cercana_a_jaccard():
+    indice = IndiceSimilitud(num_permutaciones=256, bandas=32)
+    shingles_a, shingles_b = obtener_shingles(NOTICIA), obtener_shingles(NOTICIA_OTRO_MEDIO)
+    jaccard = len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+    estimada = indice.similitud(indice.calcular_firma(NOTICIA), indice.calcular_firma(NOTICIA_OTRO_MEDIO))
+    assert abs(estimada - jaccard) < 0.15
+    assert indice.similitud(indice.calcular_firma(NOTICIA), indice.calcular_firma(NOTICIA)) == 1.0
+
+
+def test_casi_duplicado_apunta_al_canonico():
+    indice = IndiceSimilitud(umbral=0.5, num_permutaciones=128, bandas=32)
+    assert indice.agregar(1, NOTICIA) is None
+    assert indice.agregar(2, OTRA_NOTICIA) is None
+    assert indice.agregar(3, NOTICIA_OTRO_MEDIO) == 1
+    assert indice.agregar(4, NOTICIA) == 1
+    assert indice.buscar(OTRA_NOTICIA) == 2
+    assert indice.clusters() == {1: [3, 4]}
+    assert len(indice) == 4
+
+
+def test_agregar_dos_veces_el_mismo_articulo_no_lo_duplica():
+    indice = IndiceSimilitud(umbral=0.5, num_permutaciones=128, bandas=32)
+    indice.agregar(1, NOTICIA)
+    assert indice.agregar(2, NOTICIA) == 1
+    assert indice.agregar(2, NOTICIA) == 1
+    assert indice.agregar(1, NOTICIA) is None
+    assert len(indice) == 2
+
+
+def test_el_indice_persiste_en_disco(tmp_path):
+    ruta = str(tmp_path / "dedup" / "indice.pkl")
+    indice = IndiceSimilitud(umbral=0.5, num_permutaciones=128, bandas=32)
+    indice.agregar(1, NOTICIA)
+    guardar_indice(indice, ruta)
+
+    cargado = cargar_indice(ruta)
+    assert cargado.agregar(2, NOTICIA_OTRO_MEDIO) == 1
+    assert cargar_indice(str(tmp_path / "no_existe.pkl")).buscar(NOTICIA) is None
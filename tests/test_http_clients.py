@@ -0,0 +1,77 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import services.http_clients as http_clients
+from services.http_clients import ClienteHTTP
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        cuerpo = b'{"texto": "' + b"a" * 20 + b'"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        if self.path == "/goteo":
+            # Un byte cada 0.1 seg: ninguna lectura supera el timeout de lectura, pero la respuesta completa sí
+            for byte in cuerpo:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(0.1)
+        else:
+            self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_port}"
+    servidor.shutdown()
+
+
+def test_respuesta_normal_se_lee_completa(servidor):
+    cliente = ClienteHTTP("PRUEBA", timeout=(0.5, 1.0))
+    response = cliente.get(f"{servidor}/")
+    assert response.status_code == 200
+    assert response.json() == {"texto": "a" * 20}
+    cliente.cerrar()
+
+
+def test_respuesta_por_goteo_respeta_el_timeout_total(servidor):
+    cliente = ClienteHTTP("PRUEBA", timeout=(0.5, 1.0))
+    inicio = time.monotonic()
+    with pytest.raises(requests.ReadTimeout):
+        cliente.get(f"{servidor}/goteo")
+    assert time.monotonic() - inicio < 3
+    cliente.cerrar()
+
+
+def test_peticiones_seguidas_reutilizan_la_conexion(servidor):
+    cliente = ClienteHTTP("PRUEBA", pool_size=2, timeout=(0.5, 1.0))
+    for _ in range(5):
+        assert cliente.get(f"{servidor}/").status_code == 200
+    assert cliente.estadisticas() == {"peticiones": 5, "conexiones": 1, "reutilizadas": 4}
+    cliente.cerrar()
+
+
+def test_cliente_compartido_por_proveedor_y_cierre(monkeypatch, servidor):
+    monkeypatch.setattr(http_clients, "_clientes", {})
+    cliente = http_clients.obtener_cliente("PRUEBA", timeout=(0.5, 1.0))
+    assert http_clients.obtener_cliente("PRUEBA") is cliente
+    assert http_clients.obtener_cliente("OTRO") is not cliente
+
+    cliente.get(f"{servidor}/")
+    cliente.get(f"{servidor}/")
+    assert http_clients.resumen_conexiones()["PRUEBA"]["reutilizadas"] == 1
+
+    http_clients.cerrar_clientes()
+    assert http_clients.resumen_conexiones() == {}
+    assert http_clients.obtener_cliente("PRUEBA") is not cliente
+    http_clients.cerrar_clientes()
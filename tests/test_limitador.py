@@ -0,0 +1,61 @@
+import time
+import requests
+from services.http_clients import ClienteHTTP
+from services.limitador import LimitadorProveedor
+
+
+def _respuesta(status_code: int, cabeceras: dict[str, str] | None = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(cabeceras or {})
+    response._content = b"{}"
+    response._content_consumed = True
+    return response
+
+
+def test_los_reintentos_no_consumen_tokens_de_mas(monkeypatch):
+    limitador = LimitadorProveedor("PRUEBA", rpm=0, tpm=600)
+    cliente = ClienteHTTP("PRUEBA", limitador=limitador, reintentos_max=3)
+    respuestas = iter([_respuesta(503, {"Retry-After": "0"}), _respuesta(429, {"Retry-After": "0"}), _respuesta(200)])
+    monkeypatch.setattr(cliente, "_enviar", lambda method, url, **kwargs: next(respuestas))
+
+    response = cliente.post("https://proveedor.invalid/v1", tokens_estimados=300)
+
+    assert response.status_code == 200
+    # Solo queda reservada la petición exitosa (el 429 además reduce la tasa de recarga, no el saldo)
+    assert 290 <= limitador._tokens._saldo <= 310
+    cliente.cerrar()
+
+
+def test_respuesta_de_error_final_devuelve_la_reserva(monkeypatch):
+    limitador = LimitadorProveedor("PRUEBA", rpm=0, tpm=600)
+    cliente = ClienteHTTP("PRUEBA", limitador=limitador, reintentos_max=0)
+    monkeypatch.setattr(cliente, "_enviar", lambda method, url, **kwargs: _respuesta(500))
+
+    assert cliente.post("https://proveedor.invalid/v1", tokens_estimados=300).status_code == 500
+    assert limitador._tokens._saldo >= 599
+    cliente.cerrar()
+
+
+def test_limite_desactivado_no_se_activa_con_las_cabeceras():
+    limitador = LimitadorProveedor("PRUEBA", rpm=0, tpm=0)
+    limitador.registrar_respuesta(_respuesta(200, {
+        "x-ratelimit-limit-requests": "10",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "30s",
+        "x-ratelimit-limit-tokens": "1000",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "30s",
+    }))
+
+    assert limitador.rpm_limite == 0 and limitador.tpm_limite == 0
+    inicio = time.monotonic()
+    for _ in range(20):
+        limitador.adquirir(10_000)
+    assert time.monotonic() - inicio < 0.5
+
+
+def test_limite_configurado_aprende_de_las_cabeceras():
+    limitador = LimitadorProveedor("PRUEBA", rpm=100, tpm=1000)
+    limitador.registrar_respuesta(_respuesta(200, {"x-ratelimit-limit-requests": "60", "x-ratelimit-limit-tokens": "5000"}))
+    assert (limitador.rpm_limite, limitador.tpm_limite) == (60, 5000)
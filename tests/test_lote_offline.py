@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# El procesamiento por lotes importa el repositorio, que necesita el driver ODBC de pyodbc
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+import core.lote_offline as lote_offline
+import services.trabajos_lote as trabajos_lote
+from models.entities import Article, ProcessStatusDTO
+from repository.write_buffer import BufferEscritura
+
+ANALISIS = {
+    "etiquetas_ia": ["economía"],
+    "sentimiento": "neutro",
+    "rating": 3.0,
+    "nivel_riesgo": "bajo",
+    "indicador_violencia": "no",
+    "edad_recomendada": "todo público",
+    "confianza": 0.9,
+}
+
+
+class _APILoteLocal(BaseHTTPRequestHandler):
+    """
+    Reemplazo local de la Batch API de OpenAI: responde cada solicitud subida con el mismo análisis.
+    """
+    claves: list[str] = []
+
+    def _responder(self, cuerpo: str) -> None:
+        datos = cuerpo.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        cuerpo = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        if self.path == "/files":
+            _APILoteLocal.claves = re.findall(r'"custom_id": "(\d+)"', cuerpo)
+            self._responder(json.dumps({"id": "file-entrada"}))
+        else:
+            self._responder(json.dumps({"id": "batch-1"}))
+
+    def do_GET(self):
+        if self.path == "/batches/batch-1":
+            self._responder(json.dumps({"status": "completed", "output_file_id": "file-salida"}))
+            return
+        texto = json.dumps(ANALISIS, ensure_ascii=False)
+        lineas = [
+            {"custom_id": clave, "response": {"status_code": 200, "body": {"output": [{"content": [{"text": texto}]}]}}}
+            for clave in _APILoteLocal.claves
+        ]
+        self._responder("\n".join(json.dumps(linea, ensure_ascii=False) for linea in lineas))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_local(monkeypatch, tmp_path):
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _APILoteLocal)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setattr(trabajos_lote, "OPENAI_BASE_URL", f"http://127.0.0.1:{servidor.server_port}")
+    monkeypatch.chdir(tmp_path)
+    yield
+    servidor.shutdown()
+
+
+def _articulo(articulo_id: int, duplicate_of: int | None = None) -> Article:
+    return Article(articulo_id, f"Título {articulo_id}", "hoy", "https://x", "Fuente", "Descripción", duplicate_of=duplicate_of)
+
+
+@pytest.fixture
+def base_simulada(monkeypatch):
+    """
+    Artículos pendientes del modelo: la primera página reclamada trae solo casi-duplicados.
+    """
+    pendientes = [_articulo(1, duplicate_of=5), _articulo(2, duplicate_of=5), _articulo(5), _articulo(6)]
+    guardados: dict[int, ProcessStatusDTO] = {}
+
+    def reclamar_articulos(modelo, worker_id, cantidad, lease_seg):
+        pagina = pendientes[:cantidad]
+        del pendientes[:cantidad]
+        return pagina
+
+    def reclamar_articulos_por_id(modelo, worker_id, ids, lease_seg):
+        return [_articulo(articulo_id, duplicate_of=5 if articulo_id < 5 else None) for articulo_id in ids if articulo_id not in guardados]
+
+    def escritor(actualizaciones, logs):
+        guardados.update(actualizaciones)
+        return True
+
+    monkeypatch.setattr(lote_offline.repository, "reclamar_articulos", reclamar_articulos)
+    monkeypatch.setattr(lote_offline.repository, "reclamar_articulos_por_id", reclamar_articulos_por_id)
+    monkeypatch.setattr(lote_offline.repository, "liberar_leases", lambda worker_id: 0)
+    monkeypatch.setattr(lote_offline.repository, "obtener_resultado_ia", lambda articulo_id, modelo: guardados.get(articulo_id))
+    return escritor, guardados
+
+
+def test_trabajo_completo_contra_api_local(api_local, base_simulada, tmp_path):
+    escritor, guardados = base_simulada
+
+    trabajo = lote_offline.preparar_trabajo("OPENAI", max_solicitudes=2)
+    assert trabajo is not None
+    assert trabajos_lote.claves_trabajo(trabajo) == ["5", "6"]
+    assert trabajo.duplicados == [1, 2]
+
+    assert lote_offline.enviar_trabajo(trabajo)
+    estado, terminado, datos = trabajos_lote.obtener_api_lote("OPENAI").consultar(trabajo.id_proveedor)
+    assert terminado
+
+    buffer = BufferEscritura(escritor=escritor, ruta_descartes=str(tmp_path / "descartes.jsonl"))
+    resultado = lote_offline.ingerir_trabajo(trabajo, datos, buffer)
+    buffer.cerrar()
+
+    assert sorted(guardados) == [1, 2, 5, 6]
+    assert resultado.exitosos == 4
+
+
+def test_error_al_leer_la_base_conserva_el_trabajo(api_local, base_simulada, monkeypatch):
+    trabajo = lote_offline.preparar_trabajo("OPENAI", max_solicitudes=2)
+    assert lote_offline.enviar_trabajo(trabajo)
+
+    def reclamar_con_error(*args):
+        raise RuntimeError("base de datos no disponible")
+
+    monkeypatch.setattr(lote_offline.repository, "reclamar_articulos_por_id", reclamar_con_error)
+    lote_offline.ejecutar_lote_offline(modelos=["OPENAI"], max_solicitudes=2, sondeo_seg=0)
+
+    assert [guardado.nombre for guardado in trabajos_lote.cargar_trabajos()] == [trabajo.nombre]
+    assert os.path.exists(trabajo.ruta_entrada)
+
+
+def test_resultados_descartados_conservan_el_trabajo(api_local, base_simulada, tmp_path):
+    trabajo = lote_offline.preparar_trabajo("OPENAI", max_solicitudes=2)
+    assert lote_offline.enviar_trabajo(trabajo)
+    _, _, datos = trabajos_lote.obtener_api_lote("OPENAI").consultar(trabajo.id_proveedor)
+
+    buffer = BufferEscritura(escritor=lambda actualizaciones, logs: False, max_reintentos=1, ruta_descartes=str(tmp_path / "descartes.jsonl"))
+    with pytest.raises(RuntimeError):
+        lote_offline.ingerir_trabajo(trabajo, datos, buffer)
+    buffer.cerrar()
+    assert buffer.descartados > 0
+
+
+def test_trabajos_preparados_en_la_misma_ejecucion_no_se_pisan(api_local, base_simulada):
+    primero = lote_offline.preparar_trabajo("OPENAI", max_solicitudes=1)
+    segundo = lote_offline.preparar_trabajo("OPENAI", max_solicitudes=1)
+
+    assert primero.nombre != segundo.nombre
+    assert primero.ruta_entrada != segundo.ruta_entrada
+    assert trabajos_lote.claves_trabajo(primero) == ["5"]
+    assert trabajos_lote.claves_trabajo(segundo) == ["6"]
+    assert sorted(trabajo.nombre for trabajo in trabajos_lote.cargar_trabajos()) == sorted([primero.nombre, segundo.nombre])
+
+
+def test_crear_trabajo_con_nombre_existente_falla(api_local):
+    trabajos_lote.crear_trabajo("lote-repetido", "OPENAI", "procesamiento_articulo", [("1", "prompt")])
+    with pytest.raises(FileExistsError):
+        trabajos_lote.crear_trabajo("lote-repetido", "OPENAI", "procesamiento_articulo", [("2", "prompt")])
+    assert trabajos_lote.claves_trabajo(trabajos_lote.cargar_trabajos()[0]) == ["1"]
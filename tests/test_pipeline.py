@@ -0,0 +1,84 @@
+import threading
+import pytest
+
+# El pipeline importa el repositorio, que necesita el driver ODBC de pyodbc
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+import core.pipeline as pipeline
+from models.entities import Noticia
+
+FUENTES = {"Fuente A": None, "Fuente B": None}
+
+
+def _paginas(nombre_fuente: str, max_articulos: int, incremental: bool):
+    # Más noticias de las que caben en las colas acotadas del pipeline
+    for numero in range(50):
+        yield [Noticia(titulo=f"{nombre_fuente} {numero}-{i}", fecha="hoy", url=f"https://{numero}", fuente=nombre_fuente, descripcion="d") for i in range(3)]
+
+
+@pytest.fixture
+def pipeline_simulado(monkeypatch):
+    procesados: list[int] = []
+    lock = threading.Lock()
+
+    def procesar(lote, modelo, buffer):
+        with lock:
+            procesados.extend(articulo.id for articulo in lote)
+        return [True for _ in lote]
+
+    monkeypatch.setattr(pipeline, "FUENTES", FUENTES)
+    monkeypatch.setattr(pipeline, "iterar_paginas_de_fuente", _paginas)
+    monkeypatch.setattr(pipeline, "procesar_y_registrar_lote", procesar)
+    monkeypatch.setattr(pipeline, "marcar_noticias_vistas", lambda noticias: None)
+    monkeypatch.setattr(pipeline, "BufferEscritura", _BufferNulo)
+    return procesados
+
+
+class _BufferNulo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+def _ejecutar_con_limite(segundos: float = 10) -> list:
+    resultado: list = []
+    hilo = threading.Thread(
+        target=lambda: resultado.append(pipeline.ejecutar_pipeline(modelos=["OPENAI"], tamano_cola=2, intervalo_lote_seg=0.01)),
+        daemon=True
+    )
+    hilo.start()
+    hilo.join(segundos)
+    assert not hilo.is_alive(), "el pipeline quedó bloqueado"
+    return resultado[0]
+
+
+def test_error_al_cargar_el_indice_no_bloquea_el_pipeline(pipeline_simulado, monkeypatch):
+    def cargar_indice():
+        raise OSError("índice corrupto")
+
+    monkeypatch.setattr(pipeline, "DEDUP_ACTIVO", True)
+    monkeypatch.setattr(pipeline, "cargar_indice", cargar_indice)
+    monkeypatch.setattr(pipeline.repository, "insertar_articulos_en_lote", lambda lote, modelos: pytest.fail("no debe insertar"))
+
+    resultados = _ejecutar_con_limite()
+    assert resultados[0].total == 0
+    assert pipeline_simulado == []
+
+
+def test_error_al_insertar_detiene_el_scraping_y_termina(pipeline_simulado, monkeypatch):
+    llamadas = {"insertar": 0}
+
+    def insertar(lote, modelos):
+        llamadas["insertar"] += 1
+        if llamadas["insertar"] > 2:
+            raise RuntimeError("conexión perdida")
+        return list(range(llamadas["insertar"] * 100, llamadas["insertar"] * 100 + len(lote)))
+
+    monkeypatch.setattr(pipeline, "DEDUP_ACTIVO", False)
+    monkeypatch.setattr(pipeline.repository, "insertar_articulos_en_lote", insertar)
+
+    resultados = _ejecutar_con_limite()
+    # Los artículos insertados antes del error se analizan igual
+    assert resultados[0].total == len(pipeline_simulado) > 0
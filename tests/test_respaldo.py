@@ -0,0 +1,112 @@
+import threading
+import time
+import requests
+from services.http_clients import ClienteHTTP
+from services.limitador import LimitadorProveedor
+from services.respaldo import RespaldoLatencia
+
+
+def _respuesta(status_code: int = 200, texto: str = "") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = texto.encode("utf-8")
+    response._content_consumed = True
+    return response
+
+
+class _EnvioSimulado:
+    """
+    Envío falso: cada llamada tarda lo indicado en `demoras` (en orden) y responde con su número de llamada.
+    """
+
+    def __init__(self, demoras: list[float]):
+        self.demoras = demoras
+        self.llamadas = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs) -> requests.Response:
+        with self._lock:
+            numero = self.llamadas
+            self.llamadas += 1
+        time.sleep(self.demoras[numero] if numero < len(self.demoras) else 0.0)
+        return _respuesta(texto=str(numero))
+
+
+def _respaldo(**kwargs) -> RespaldoLatencia:
+    opciones = {"percentil": 0.5, "fraccion_max": 1.0, "min_muestras": 3, "ventana": 10}
+    opciones.update(kwargs)
+    return RespaldoLatencia("PRUEBA", **opciones)
+
+
+def test_umbral_requiere_muestras_y_usa_el_percentil():
+    respaldo = _respaldo(min_muestras=4)
+    for latencia in (0.1, 0.4, 0.2):
+        respaldo._latencias.append(latencia)
+    assert respaldo.umbral() is None
+
+    respaldo._latencias.append(0.3)
+    assert respaldo.umbral() == 0.2
+    respaldo.cerrar()
+
+
+def test_respaldo_gana_si_la_original_tarda():
+    respaldo = _respaldo()
+    respaldo._latencias.extend([0.01, 0.01, 0.01])
+    envio = _EnvioSimulado([1.0, 0.0])
+    devoluciones: list[bool] = []
+
+    response = respaldo.ejecutar(envio, reservar=lambda: True, devolver=lambda: devoluciones.append(True))
+
+    assert response.text == "1"
+    assert (respaldo.respaldos, respaldo.ganados) == (1, 1)
+    assert devoluciones == [True]
+    respaldo.cerrar()
+
+
+def test_original_gana_si_responde_antes_que_el_respaldo():
+    respaldo = _respaldo()
+    respaldo._latencias.extend([0.05, 0.05, 0.05])
+    envio = _EnvioSimulado([0.2, 1.0])
+    devoluciones: list[bool] = []
+
+    response = respaldo.ejecutar(envio, reservar=lambda: True, devolver=lambda: devoluciones.append(True))
+
+    assert response.text == "0"
+    assert (respaldo.respaldos, respaldo.ganados) == (1, 0)
+    assert devoluciones == [True]
+    respaldo.cerrar()
+
+
+def test_tope_de_respaldos_y_cuota_ocupada_los_omiten():
+    respaldo = _respaldo(fraccion_max=0.0)
+    respaldo._latencias.extend([0.01, 0.01, 0.01])
+    assert respaldo.ejecutar(_EnvioSimulado([0.1])).text == "0"
+    assert (respaldo.respaldos, respaldo.omitidos) == (0, 1)
+    respaldo.cerrar()
+
+    respaldo = _respaldo()
+    respaldo._latencias.extend([0.01, 0.01, 0.01])
+    envio = _EnvioSimulado([0.1])
+    assert respaldo.ejecutar(envio, reservar=lambda: False).text == "0"
+    assert envio.llamadas == 1
+    assert (respaldo.respaldos, respaldo.omitidos) == (0, 1)
+    respaldo.cerrar()
+
+
+def test_cliente_no_mide_la_espera_del_limitador_y_devuelve_la_cuota_del_descartado(monkeypatch):
+    limitador = LimitadorProveedor("PRUEBA", rpm=0, tpm=6000)
+    respaldo = _respaldo(min_muestras=1)
+    cliente = ClienteHTTP("PRUEBA", limitador=limitador, respaldo=respaldo)
+
+    # La espera de cuota no entra en las latencias del respaldo
+    monkeypatch.setattr(cliente, "_enviar", _EnvioSimulado([0.0]))
+    limitador.pausar(0.3)
+    assert cliente.post("https://proveedor.invalid/v1", tokens_estimados=100).status_code == 200
+    assert max(respaldo._latencias) < 0.1
+
+    # Con respaldo solo queda descontada la cuota de la respuesta usada
+    saldo_inicial = limitador._tokens._saldo
+    monkeypatch.setattr(cliente, "_enviar", _EnvioSimulado([0.5, 0.0]))
+    assert cliente.post("https://proveedor.invalid/v1", tokens_estimados=100).text == "1"
+    assert saldo_inicial - 110 <= limitador._tokens._saldo <= saldo_inicial - 90
+    cliente.cerrar()
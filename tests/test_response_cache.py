@@ -0,0 +1,62 @@
+import pytest
+
+import services.response_cache as response_cache
+from services.response_cache import CacheRespuestas
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheRespuestas(ruta=str(tmp_path / "cache" / "respuestas.db"), ttl_seg=60, max_entradas=2)
+    yield cache
+    cache.cerrar()
+
+
+def test_la_clave_distingue_proveedor_modelo_prompt_y_tipo(cache):
+    cache.guardar("OPENAI", "gpt-4o", "prompt", "procesamiento_articulo", "respuesta", 1.5)
+    guardada = cache.obtener("OPENAI", "gpt-4o", "prompt", "procesamiento_articulo")
+    assert (guardada.texto, guardada.response_time) == ("respuesta", 1.5)
+    assert cache.obtener("GEMINI", "gpt-4o", "prompt", "procesamiento_articulo") is None
+    assert cache.obtener("OPENAI", "gpt-4o-mini", "prompt", "procesamiento_articulo") is None
+    assert cache.obtener("OPENAI", "gpt-4o", "otro prompt", "procesamiento_articulo") is None
+    assert cache.obtener("OPENAI", "gpt-4o", "prompt", "resumen_ejecutivo") is None
+    assert cache.estadisticas() == {"aciertos": 1, "fallos": 4}
+
+
+def test_las_entradas_vencidas_no_se_usan(cache, monkeypatch):
+    ahora = 1_000_000.0
+    monkeypatch.setattr(response_cache.time, "time", lambda: ahora)
+    cache.guardar("OPENAI", "gpt-4o", "prompt", "procesamiento_articulo", "respuesta", 1.0)
+    ahora += 59
+    assert cache.obtener("OPENAI", "gpt-4o", "prompt", "procesamiento_articulo") is not None
+    ahora += 2
+    assert cache.obtener("OPENAI", "gpt-4o", "prompt", "procesamiento_articulo") is None
+
+
+def test_al_superar_el_maximo_se_elimina_la_de_uso_mas_antiguo(cache, monkeypatch):
+    ahora = 1_000_000.0
+    monkeypatch.setattr(response_cache.time, "time", lambda: ahora)
+    for prompt in ("a", "b"):
+        cache.guardar("OPENAI", "gpt-4o", prompt, "procesamiento_articulo", prompt, 1.0)
+        ahora += 1
+    assert cache.obtener("OPENAI", "gpt-4o", "a", "procesamiento_articulo") is not None   # "a" pasa a ser la más reciente
+    ahora += 1
+    cache.guardar("OPENAI", "gpt-4o", "c", "procesamiento_articulo", "c", 1.0)
+
+    assert cache.obtener("OPENAI", "gpt-4o", "b", "procesamiento_articulo") is None
+    assert cache.obtener("OPENAI", "gpt-4o", "a", "procesamiento_articulo") is not None
+    assert cache.obtener("OPENAI", "gpt-4o", "c", "procesamiento_articulo") is not None
+
+
+def test_la_cache_persiste_en_disco(tmp_path):
+    ruta = str(tmp_path / "respuestas.db")
+    cache = CacheRespuestas(ruta=ruta)
+    cache.guardar("GEMINI", "gemini-2.0-flash", "prompt", "procesamiento_articulo", "respuesta", 1.0)
+    cache.cerrar()
+    cache = CacheRespuestas(ruta=ruta)
+    assert cache.obtener("GEMINI", "gemini-2.0-flash", "prompt", "procesamiento_articulo").texto == "respuesta"
+    cache.cerrar()
+
+
+def test_con_la_cache_desactivada_no_se_crea(monkeypatch):
+    monkeypatch.setattr(response_cache, "LLM_CACHE_ACTIVO", False)
+    assert response_cache.obtener_cache() is None
@@ -0,0 +1,84 @@
+import json
+import pytest
+
+import services.ia_models_service as ia_models_service
+from services.ia_models_service import IAService, parsear_json_modelo
+from services.response_cache import CacheRespuestas
+from services.respuestas_ia import extraer_json, validar_analisis_articulo
+
+ANALISIS = {
+    "etiquetas_ia": ["economía"],
+    "sentimiento": "neutro",
+    "rating": 3.5,
+    "nivel_riesgo": "bajo",
+    "indicador_violencia": "no",
+    "edad_recomendada": "todo público",
+    "confianza": 0.8,
+}
+
+
+def test_json_directo_no_se_marca_como_reparado():
+    assert extraer_json(json.dumps(ANALISIS)) == (ANALISIS, False)
+
+
+def test_bloque_json_con_comillas_de_codigo():
+    texto = "```json\n" + json.dumps(ANALISIS) + "\n```"
+    assert extraer_json(texto) == (ANALISIS, False)
+
+
+def test_texto_alrededor_y_comas_finales_se_reparan():
+    texto = 'Aquí está el análisis: {"sentimiento": "neutro", "etiquetas_ia": ["a", "b",],} ¿Algo más?'
+    assert extraer_json(texto) == ({"sentimiento": "neutro", "etiquetas_ia": ["a", "b"]}, True)
+
+
+def test_lote_truncado_conserva_los_elementos_completos():
+    texto = '{"articulos": [{"id": 1, "rating": 3}, {"id": 2, "rating": 4}, {"id": 3, "rat'
+    assert parsear_json_modelo(texto) == {"articulos": [{"id": 1, "rating": 3}, {"id": 2, "rating": 4}]}
+
+
+@pytest.mark.parametrize("texto", ["sin json", '{"sentimiento": "neutro"', '{"a": 1]'])
+def test_json_irrecuperable_lanza_value_error(texto):
+    with pytest.raises(ValueError):
+        extraer_json(texto)
+
+
+def test_validacion_normaliza_variantes():
+    validado = validar_analisis_articulo(
+        {**ANALISIS, "sentimiento": "Neutral", "indicador_violencia": "si", "edad_recomendada": "todo publico", "rating": "4"}
+    )
+    assert validado["sentimiento"] == "neutro"
+    assert validado["indicador_violencia"] == "sí"
+    assert validado["edad_recomendada"] == "todo público"
+    assert validado["rating"] == 4.0
+
+
+def test_validacion_sin_confianza_la_deja_en_none():
+    datos = {campo: valor for campo, valor in ANALISIS.items() if campo != "confianza"}
+    assert validar_analisis_articulo(datos)["confianza"] is None
+
+
+@pytest.mark.parametrize("cambio", [{"sentimiento": "alegre"}, {"rating": 7}, {"confianza": 1.5}, {"etiquetas_ia": 3}])
+def test_validacion_rechaza_valores_invalidos(cambio):
+    with pytest.raises(ValueError):
+        validar_analisis_articulo({**ANALISIS, **cambio})
+
+
+def test_validacion_sin_un_campo_lanza_key_error():
+    datos = {campo: valor for campo, valor in ANALISIS.items() if campo != "nivel_riesgo"}
+    with pytest.raises(KeyError):
+        validar_analisis_articulo(datos)
+
+
+@pytest.mark.parametrize("error", [KeyError, IndexError, TypeError, ValueError])
+def test_respuesta_cacheada_ilegible_se_ignora(tmp_path, monkeypatch, error):
+    cache = CacheRespuestas(ruta=str(tmp_path / "cache.db"))
+    cache.guardar("OPENAI", "modelo", "prompt", "procesamiento_articulo", "{}", 1.0)
+    monkeypatch.setattr(ia_models_service, "obtener_cache", lambda: cache)
+
+    def interpretar_con_error(*args):
+        raise error("respuesta cacheada ilegible")
+
+    servicio = IAService(prompt="prompt")
+    monkeypatch.setattr(servicio, "_interpretar", interpretar_con_error)
+    assert servicio._respuesta_cacheada("OPENAI", "modelo", "procesamiento_articulo") is None
+    cache.cerrar()
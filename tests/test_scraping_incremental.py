@@ -0,0 +1,63 @@
+import pytest
+from services.scraping import scraping
+from services.scraping.scraping import PaginaDescargada, _iterar_paginado, marcar_noticias_vistas
+from services.scraping.seen_index import IndiceVistos
+from models.entities import Noticia
+
+BASE_URL = "https://ejemplo.cl/listado?p="
+FUENTE = "Fuente de prueba"
+
+
+def _parsear(contenido: bytes, url: str) -> list[Noticia] | None:
+    titulos = contenido.decode().split("|") if contenido else []
+    return [Noticia(titulo=titulo, fecha="hoy", url=url, fuente=FUENTE, descripcion=f"detalle {titulo}") for titulo in titulos] or None
+
+
+@pytest.fixture
+def indice(tmp_path, monkeypatch):
+    indice = IndiceVistos(str(tmp_path / "vistos.sqlite3"))
+    monkeypatch.setattr(scraping, "obtener_indice_vistos", lambda: indice)
+    return indice
+
+
+@pytest.fixture
+def paginas(monkeypatch):
+    """
+    Listado simulado: página -> títulos separados por "|". Responde 304 si recibe el ETag vigente.
+    """
+    contenido = {1: "a|b", 2: "c|d"}
+
+    def descargar(url: str, cabeceras: dict[str, str] | None = None) -> PaginaDescargada:
+        numero = int(url.removeprefix(BASE_URL))
+        etag = f'"{numero}"'
+        if (cabeceras or {}).get("If-None-Match") == etag:
+            return PaginaDescargada(url=url, status_code=304, contenido=None)
+        if numero not in contenido:
+            return PaginaDescargada(url=url, status_code=404, contenido=None)
+        return PaginaDescargada(url=url, status_code=200, contenido=contenido[numero].encode(), etag=etag)
+
+    monkeypatch.setattr(scraping, "_descargar_pagina", descargar)
+    return contenido
+
+
+def _extraer() -> list[str]:
+    return [noticia.titulo for pagina in _iterar_paginado(FUENTE, BASE_URL, _parsear, 10, 2, incremental=True) for noticia in pagina]
+
+
+def test_sin_guardar_las_noticias_se_extraen_de_nuevo(indice, paginas):
+    assert _extraer() == ["a", "b", "c", "d"]
+    # La inserción falló: no se llama a marcar_noticias_vistas y no quedan validadores que provoquen un 304
+    assert indice.obtener_validadores(f"{BASE_URL}1") == {}
+    assert _extraer() == ["a", "b", "c", "d"]
+
+
+def test_solo_se_omiten_las_noticias_guardadas(indice, paginas):
+    extraidas = [noticia for pagina in _iterar_paginado(FUENTE, BASE_URL, _parsear, 10, 2, incremental=True) for noticia in pagina]
+    # Solo se guardó la primera página y una noticia de la segunda
+    marcar_noticias_vistas(extraidas[:3])
+    assert indice.obtener_validadores(f"{BASE_URL}1") == {"If-None-Match": '"1"'}
+    assert indice.obtener_validadores(f"{BASE_URL}2") == {}
+
+    assert [noticia.titulo for noticia in indice.filtrar_nuevas(FUENTE, extraidas)] == ["d"]
+    # La página 1 ya tiene validadores guardados: responde 304 y el recorrido se detiene ahí
+    assert _extraer() == []
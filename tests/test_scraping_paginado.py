@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from services.scraping import scraping
+from services.scraping.scraping import ErrorDescargaPagina, PaginaDescargada, _descargar_pagina, _iterar_paginado
+from models.entities import Noticia
+from services.metricas import PAGINAS_SCRAPING
+
+BASE_URL = "https://ejemplo.cl/listado?p="
+FUENTE = "Fuente de prueba"
+
+
+def _parsear(contenido: bytes, url: str) -> list[Noticia] | None:
+    titulos = contenido.decode().split("|") if contenido else []
+    return [Noticia(titulo=titulo, fecha="hoy", url=url, fuente=FUENTE, descripcion="d") for titulo in titulos] or None
+
+
+def _respuesta(status_code: int, texto: str = "") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = texto.encode("utf-8")
+    response._content_consumed = True
+    response.elapsed = timedelta(seconds=0.01)
+    return response
+
+
+class _ClienteSimulado:
+    """
+    Cliente falso que entrega en orden las respuestas (o excepciones) indicadas.
+    """
+
+    def __init__(self, respuestas: list):
+        self.respuestas = respuestas
+        self.llamadas = 0
+
+    def get(self, url, **kwargs):
+        respuesta = self.respuestas[self.llamadas]
+        self.llamadas += 1
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    def usar(respuestas: list) -> _ClienteSimulado:
+        simulado = _ClienteSimulado(respuestas)
+        monkeypatch.setattr(scraping, "obtener_cliente", lambda host, timeout=None: simulado)
+        return simulado
+
+    monkeypatch.setattr(scraping, "esperar", lambda segundos: None)
+    return usar
+
+
+def test_error_transitorio_se_reintenta(cliente):
+    simulado = cliente([requests.ConnectionError("conexión rechazada"), _respuesta(503), _respuesta(200, "a|b")])
+    descarga = _descargar_pagina(f"{BASE_URL}1", reintentos_max=2)
+    assert descarga.status_code == 200 and descarga.contenido == b"a|b"
+    assert simulado.llamadas == 3
+
+
+def test_pagina_que_sigue_fallando_lanza_error(cliente):
+    cliente([_respuesta(429), _respuesta(500), _respuesta(502)])
+    with pytest.raises(ErrorDescargaPagina):
+        _descargar_pagina(f"{BASE_URL}1", reintentos_max=2)
+
+
+def test_error_no_reintentable_no_se_reintenta(cliente):
+    simulado = cliente([_respuesta(403), _respuesta(200, "a")])
+    with pytest.raises(ErrorDescargaPagina):
+        _descargar_pagina(f"{BASE_URL}1", reintentos_max=2)
+    assert simulado.llamadas == 1
+
+
+def test_pagina_inexistente_es_fin_del_listado(cliente):
+    cliente([_respuesta(404)])
+    descarga = _descargar_pagina(f"{BASE_URL}9", reintentos_max=2)
+    assert descarga.status_code == 404 and descarga.contenido is None
+
+
+def test_pagina_fallida_en_la_ventana_no_trunca_en_silencio(monkeypatch):
+    contenido = {1: "a|b", 2: "c|d", 4: "g|h"}
+
+    def descargar(url: str, cabeceras: dict[str, str] | None = None) -> PaginaDescargada:
+        numero = int(url.removeprefix(BASE_URL))
+        if numero == 3:
+            raise ErrorDescargaPagina(url, "timeout")
+        return PaginaDescargada(url=url, status_code=200, contenido=contenido[numero].encode())
+
+    monkeypatch.setattr(scraping, "_descargar_pagina", descargar)
+    entregadas: list[str] = []
+    with pytest.raises(ErrorDescargaPagina):
+        for pagina in _iterar_paginado(FUENTE, BASE_URL, _parsear, 10, 4):
+            entregadas.extend(noticia.titulo for noticia in pagina)
+    # Se entregan las páginas anteriores a la que falló y ninguna posterior
+    assert entregadas == ["a", "b", "c", "d"]
+
+
+class _ListadoLento(BaseHTTPRequestHandler):
+    def do_GET(self):
+        cuerpo = b"a|b" * 20
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        # Cada byte llega antes del timeout de lectura, pero la página completa tarda bastante más
+        for byte in cuerpo:
+            self.wfile.write(bytes([byte]))
+            self.wfile.flush()
+            time.sleep(0.05)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_pagina_que_supera_el_timeout_se_cuenta_y_lanza_error(monkeypatch):
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ListadoLento)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setattr(scraping, "HTTP_TIMEOUT_CONEXION_SEG", 0.2)
+    monkeypatch.setattr(scraping, "SCRAPING_TIMEOUT_LECTURA_SEG", 0.3)
+    host = f"127.0.0.1:{servidor.server_port}"
+
+    inicio = time.monotonic()
+    with pytest.raises(ErrorDescargaPagina):
+        _descargar_pagina(f"http://{host}/listado?p=1", reintentos_max=0)
+    assert time.monotonic() - inicio < 2
+    assert PAGINAS_SCRAPING.valor(host=host, status="timeout") == 1
+    servidor.shutdown()
@@ -0,0 +1,92 @@
+import json
+import pytest
+
+import services.ia_models_service as ia_models_service
+from services.ia_models_service import IAService, RespuestaInvalidaIA, _fragmento_openai, _leer_stream
+from services.metricas import ERRORES_PARSEO_IA
+from services.respuestas_ia import ESQUEMA_ARTICULO, ESQUEMA_LOTE, SalidaInvalida, ValidadorJSONIncremental
+
+
+def _alimentar(esquema: dict, fragmentos: list[str]) -> ValidadorJSONIncremental:
+    validador = ValidadorJSONIncremental(esquema)
+    for fragmento in fragmentos:
+        validador.alimentar(fragmento)
+    return validador
+
+
+def test_validador_acepta_la_salida_en_fragmentos_y_entrega_el_parcial():
+    validador = ValidadorJSONIncremental(ESQUEMA_ARTICULO)
+    assert not validador.alimentar('```json\n{"sentimiento": "neu')
+    assert validador.alimentar('tro", "rating": 4')
+    assert validador.parcial() == {"sentimiento": "neutro"}
+    validador.alimentar('.5, "etiquetas_ia": ["a"]}')
+    assert validador.terminado
+    assert validador.parcial() == {"sentimiento": "neutro", "rating": 4.5, "etiquetas_ia": ["a"]}
+
+
+@pytest.mark.parametrize("fragmentos", [
+    ['{"sentimiento": "ale', 'gre"'],           # valor fuera de los permitidos
+    ['{"otra_clave": 1'],                       # clave que el esquema no admite
+    ['{"rating": true'],                        # tipo distinto al del esquema
+    ["x" * 250],                                # demasiado texto antes del JSON
+])
+def test_validador_corta_apenas_la_salida_no_puede_ser_valida(fragmentos):
+    with pytest.raises(SalidaInvalida):
+        _alimentar(ESQUEMA_ARTICULO, fragmentos)
+
+
+def test_validador_de_lote_conserva_los_articulos_completos():
+    validador = _alimentar(ESQUEMA_LOTE, ['{"articulos": [{"id": 1, "rating": 3}, ', '{"id": 2, "rating": 4}, {"id"'])
+    assert validador.parcial() == {"articulos": [{"id": 1, "rating": 3}, {"id": 2, "rating": 4}]}
+
+
+class RespuestaStreamFalsa:
+    """
+    Respuesta HTTP en streaming con las líneas SSE indicadas.
+    """
+    status_code = 200
+
+    def __init__(self, lineas: list[bytes]):
+        self.lineas = lineas
+        self.cerrada = False
+
+    def iter_lines(self):
+        return iter(self.lineas)
+
+    def close(self):
+        self.cerrada = True
+
+
+def _delta(texto: str) -> bytes:
+    return b"data: " + json.dumps({"type": "response.output_text.delta", "delta": texto}).encode()
+
+
+@pytest.mark.parametrize("linea", [
+    b'data: {"type": "error", "message": "overloaded"}',
+    b'data: {"type": "response.output_text.delta", "delta": "x"',
+    b"data: \xff\xfe",
+])
+def test_evento_de_error_o_ilegible_corta_el_stream(linea):
+    response = RespuestaStreamFalsa([_delta('{"sentimiento": "neutro"'), linea, _delta(', "rating": 3}')])
+    resultado = _leer_stream("OPENAI", "procesamiento_articulo", response, _fragmento_openai, None, 0.0)
+    assert resultado.motivo_aborto
+    assert resultado.texto == '{"sentimiento": "neutro"'
+    assert response.cerrada
+
+
+class ClienteFalso:
+    def __init__(self, response):
+        self.response = response
+
+    def post(self, *args, **kwargs):
+        return self.response
+
+
+def test_evento_de_error_se_informa_como_respuesta_invalida(monkeypatch):
+    response = RespuestaStreamFalsa([_delta('{"sentimiento": '), b'data: {"type": "response.failed", "response": {}}'])
+    monkeypatch.setattr(ia_models_service, "obtener_cliente", lambda proveedor: ClienteFalso(response))
+    errores_previos = ERRORES_PARSEO_IA.valor(proveedor="OPENAI", prompt_type="procesamiento_articulo")
+
+    with pytest.raises(RespuestaInvalidaIA):
+        IAService(prompt="prompt", usar_cache=False).call_openAI("procesamiento_articulo", streaming=True)
+    assert ERRORES_PARSEO_IA.valor(proveedor="OPENAI", prompt_type="procesamiento_articulo") == errores_previos + 1
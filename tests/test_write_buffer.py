@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+import pytest
+
+# El repositorio importa pyodbc, que necesita el driver ODBC instalado
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+from models.entities import IALogModel, ProcessStatusDTO
+from repository.write_buffer import BufferEscritura
+
+
+class EscritorFalso:
+    """
+    Reemplaza a guardar_resultados_en_lote: falla con la base "caída" o si el lote trae un artículo inválido.
+    """
+
+    def __init__(self, invalidos: set[int] = frozenset()):
+        self.invalidos = set(invalidos)
+        self.caida = False
+        self.guardados: list[int] = []
+        self.logs: list[int] = []
+        self.llamadas = 0
+
+    def __call__(self, actualizaciones, logs) -> bool:
+        self.llamadas += 1
+        if self.caida or any(articulo_id in self.invalidos for articulo_id, _ in actualizaciones):
+            return False
+        self.guardados.extend(articulo_id for articulo_id, _ in actualizaciones)
+        self.logs.extend(log.article_id for log in logs)
+        return True
+
+
+def _dto() -> ProcessStatusDTO:
+    return ProcessStatusDTO(
+        etiquetas_ia=["etiqueta"], sentimiento="neutro", rating=3, nivel_riesgo="bajo", indicador_violencia="no",
+        status_code=200, edad_recomendada="+13", execution_time="1 seg", model_used="OPENAI", is_processed=True
+    )
+
+
+def _log(articulo_id: int) -> IALogModel:
+    return IALogModel(article_id=articulo_id, model="OPENAI", prompt="p", response="r", status_code=200)
+
+
+@pytest.fixture
+def ruta_descartes(tmp_path):
+    return str(tmp_path / "descartados.jsonl")
+
+
+def test_fila_invalida_se_descarta_y_no_bloquea_las_siguientes(ruta_descartes):
+    escritor = EscritorFalso(invalidos={3})
+    buffer = BufferEscritura(tamano_lote=100, intervalo_seg=60, escritor=escritor, max_reintentos=2, ruta_descartes=ruta_descartes)
+    for articulo_id in range(1, 7):
+        buffer.agregar_actualizacion(articulo_id, _dto())
+        buffer.agregar_log(_log(articulo_id))
+
+    assert not buffer.vaciar()          # primer intento: el lote vuelve al buffer
+    assert buffer._pendientes() == 12
+    assert not buffer.vaciar()          # reintentos agotados: se guarda por mitades
+    assert buffer._pendientes() == 0
+    assert sorted(escritor.guardados) == [1, 2, 4, 5, 6]
+    assert sorted(escritor.logs) == [1, 2, 3, 4, 5, 6]
+    assert buffer.descartados == 1
+
+    with open(ruta_descartes, encoding="utf-8") as archivo:
+        descartes = [json.loads(linea) for linea in archivo]
+    assert [(registro["tipo"], registro["articulo_id"]) for registro in descartes] == [("actualizacion", 3)]
+
+    buffer.agregar_actualizacion(7, _dto())
+    assert buffer.vaciar()
+    assert 7 in escritor.guardados
+    buffer.cerrar()
+
+
+def test_falla_transitoria_se_reintenta_sin_descartar(ruta_descartes):
+    escritor = EscritorFalso()
+    buffer = BufferEscritura(tamano_lote=100, intervalo_seg=60, escritor=escritor, max_reintentos=3, ruta_descartes=ruta_descartes)
+    buffer.agregar_actualizacion(1, _dto())
+    escritor.caida = True
+    assert not buffer.vaciar()
+    escritor.caida = False
+    assert buffer.vaciar()
+    assert escritor.guardados == [1]
+    assert buffer.descartados == 0
+    buffer.cerrar()
+
+
+def test_con_la_base_caida_los_productores_se_bloquean_en_el_tope(ruta_descartes):
+    escritor = EscritorFalso()
+    escritor.caida = True
+    buffer = BufferEscritura(
+        tamano_lote=2, intervalo_seg=60, escritor=escritor, max_reintentos=1000, max_pendientes=4, ruta_descartes=ruta_descartes
+    )
+    buffer.agregar_actualizacion(0, _dto())
+    assert not buffer.vaciar()
+
+    productor = threading.Thread(target=lambda: [buffer.agregar_actualizacion(i, _dto()) for i in range(1, 11)], daemon=True)
+    productor.start()
+    time.sleep(0.5)
+    assert productor.is_alive()
+    with buffer._cond:
+        assert buffer._pendientes() + buffer._en_vuelo <= 4
+
+    escritor.caida = False
+    deadline = time.monotonic() + 5
+    while productor.is_alive() and time.monotonic() < deadline:
+        buffer.vaciar()
+        productor.join(0.05)
+    assert not productor.is_alive()
+    buffer.cerrar()
+    assert sorted(escritor.guardados) == list(range(11))
+
+
+def test_sin_tope_opcional_los_productores_se_bloquean_con_un_lote_fallido(ruta_descartes):
+    escritor = EscritorFalso()
+    escritor.caida = True
+    buffer = BufferEscritura(tamano_lote=2, intervalo_seg=60, escritor=escritor, max_reintentos=1000, max_pendientes=0, ruta_descartes=ruta_descartes)
+    buffer.agregar_actualizacion(0, _dto())
+    buffer.agregar_actualizacion(1, _dto())
+    assert not buffer.vaciar()
+
+    productor = threading.Thread(target=lambda: buffer.agregar_actualizacion(2, _dto()), daemon=True)
+    productor.start()
+    productor.join(0.5)
+    assert productor.is_alive()
+    with buffer._cond:
+        assert buffer._pendientes() + buffer._en_vuelo == 2
+
+    escritor.caida = False
+    assert buffer.vaciar()
+    productor.join(5)
+    assert not productor.is_alive()
+    buffer.cerrar()
+    assert sorted(escritor.guardados) == [0, 1, 2]
+
+
+def test_cerrar_descarta_lo_que_no_se_pudo_guardar(ruta_descartes):
+    escritor = EscritorFalso()
+    buffer = BufferEscritura(tamano_lote=100, intervalo_seg=60, escritor=escritor, max_reintentos=2, ruta_descartes=ruta_descartes)
+    buffer.agregar_actualizacion(1, _dto())
+    buffer.agregar_log(_log(1))
+    escritor.caida = True
+    buffer.cerrar()
+    assert buffer._pendientes() == 0
+    assert buffer.descartados == 2
+    with pytest.raises(RuntimeError):
+        buffer.agregar_log(_log(2))
+
+
+def test_el_worker_llega_al_escritor(ruta_descartes):
+    recibidos = []
+
+    def escritor(actualizaciones, logs, worker_id=None):
+        recibidos.append((worker_id, [articulo_id for articulo_id, _ in actualizaciones]))
+        return True
+
+    with BufferEscritura(tamano_lote=100, intervalo_seg=60, escritor=escritor, ruta_descartes=ruta_descartes, worker_id="worker-1") as buffer:
+        buffer.agregar_actualizacion(1, _dto())
+    with BufferEscritura(tamano_lote=100, intervalo_seg=60, escritor=escritor, ruta_descartes=ruta_descartes) as buffer:
+        buffer.agregar_actualizacion(2, _dto())
+    assert recibidos == [("worker-1", [1]), (None, [2])]